@@ -4,14 +4,17 @@ Stores and retrieves original student documents
 """
 
 import os
+import json
 import ibm_boto3
 from ibm_botocore.client import Config
 from dotenv import load_dotenv
 from datetime import datetime
+from utils.tracing import traced
+from handlers.storage import ObjectStore
 
 load_dotenv()
 
-class COSHandler:
+class COSHandler(ObjectStore):
     def __init__(self):
         self.cos_client = ibm_boto3.client(
             's3',
@@ -22,7 +25,22 @@ class COSHandler:
         )
         self.bucket_name = os.getenv('COS_BUCKET_NAME', 'cpl-documents')
         print(f"[SUCCESS] COS Handler initialized (bucket: {self.bucket_name})")
+
+    @property
+    def location(self):
+        return self.bucket_name
+
+    @traced('cos.ping', peer='cos')
+    def ping(self):
+        """HEAD the bucket (credentials and endpoint are checked on first use, not at init)"""
+        try:
+            self.cos_client.head_bucket(Bucket=self.bucket_name)
+            return True
+        except Exception as e:
+            print(f"[ERROR] COS ping failed: {str(e)}")
+            return False
     
+    @traced('cos.upload_document', peer='cos')
     def upload_document(self, file_bytes, document_id, filename, metadata):
         """
         Upload document to COS
@@ -65,6 +83,7 @@ class COSHandler:
             print(f"      [ERROR] COS upload failed: {str(e)}")
             raise
     
+    @traced('cos.get_document', peer='cos')
     def get_document(self, object_key):
         """
         Retrieve document from COS
@@ -90,6 +109,7 @@ class COSHandler:
             print(f"[ERROR] COS retrieval failed: {str(e)}")
             raise
     
+    @traced('cos.get_document_by_id', peer='cos')
     def get_document_by_id(self, document_id, filename):
         """
         Retrieve document using document_id and filename
@@ -104,6 +124,37 @@ class COSHandler:
         object_key = f"{document_id}/{filename}"
         return self.get_document(object_key)
     
+    @traced('cos.upload_json', peer='cos')
+    def upload_json(self, object_key, payload):
+        """
+        Store a JSON artifact (e.g. coverage summary) next to a document
+
+        Args:
+            object_key: COS object key ({document_id}/_name.json)
+            payload: JSON-serializable dict
+
+        Returns:
+            str: COS object key
+        """
+        try:
+            self.cos_client.put_object(
+                Bucket=self.bucket_name,
+                Key=object_key,
+                Body=json.dumps(payload).encode('utf-8'),
+                ContentType='application/json'
+            )
+            return object_key
+        except Exception as e:
+            print(f"      [ERROR] COS JSON upload failed: {str(e)}")
+            raise
+
+    @traced('cos.get_json', peer='cos')
+    def get_json(self, object_key):
+        """Retrieve a JSON artifact stored with upload_json"""
+        file_bytes, _ = self.get_document(object_key)
+        return json.loads(file_bytes.decode('utf-8'))
+
+    @traced('cos.list_documents', peer='cos')
     def list_documents(self, prefix=""):
         """
         List all documents in bucket
@@ -129,6 +180,21 @@ class COSHandler:
             print(f"[ERROR] COS list failed: {str(e)}")
             return []
     
+    def iter_keys(self, prefix="", page_size=1000):
+        """
+        Yield every object key under prefix, one list_objects_v2 page at a time
+        (list_documents stops at the first 1000 keys)
+        """
+        kwargs = {'Bucket': self.bucket_name, 'Prefix': prefix, 'MaxKeys': page_size}
+        while True:
+            response = self.cos_client.list_objects_v2(**kwargs)
+            for obj in response.get('Contents', []):
+                yield obj['Key']
+            if not response.get('IsTruncated'):
+                break
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+    
+    @traced('cos.delete_document', peer='cos')
     def delete_document(self, object_key):
         """Delete document from COS"""
         try:
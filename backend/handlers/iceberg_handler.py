@@ -8,10 +8,13 @@ import prestodb  # Uses presto-python-client package
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from utils.tracing import traced
+from utils.slowlog import get_slow_log, presto_details
+from handlers.storage import RequestStore
 
 load_dotenv()
 
-class IcebergHandler:
+class IcebergHandler(RequestStore):
     """Handle student metadata storage in Apache Iceberg tables"""
     
     def __init__(self):
@@ -26,7 +29,12 @@ class IcebergHandler:
         
         # Connection
         self.conn = None
+
+    @property
+    def location(self):
+        return f"{self.host}:{self.port}"
     
+    @traced('iceberg.connect', peer='presto')
     def connect(self):
         """Connect to watsonx.data Presto"""
         try:
@@ -45,6 +53,7 @@ class IcebergHandler:
             print(f"[ERROR] Presto connection error: {str(e)}")
             return False
     
+    @traced('iceberg.insert_request', peer='presto')
     def insert_request(self, request_data):
         """
         Insert student CPL request into Iceberg table
@@ -65,8 +74,6 @@ class IcebergHandler:
                 return False
         
         try:
-            cursor = self.conn.cursor()
-            
             # Generate request ID
             request_id = self._generate_request_id()
             
@@ -115,7 +122,7 @@ class IcebergHandler:
             )
             """
             
-            cursor.execute(sql)
+            self._run('insert_request', sql, fetch=False)
             
             print(f"[SUCCESS] Inserted request to Iceberg table:")
             print(f"   Request ID: {request_id}")
@@ -131,6 +138,7 @@ class IcebergHandler:
             traceback.print_exc()
             return None
     
+    @traced('iceberg.get_all_requests', peer='presto')
     def get_all_requests(self):
         """Get all CPL requests from Iceberg table"""
         if not self.conn:
@@ -138,8 +146,6 @@ class IcebergHandler:
                 return []
         
         try:
-            cursor = self.conn.cursor()
-            
             # SELECT with document_name
             sql = f"""
             SELECT 
@@ -161,8 +167,7 @@ class IcebergHandler:
             ORDER BY submitted_date DESC
             """
             
-            cursor.execute(sql)
-            rows = cursor.fetchall()
+            rows = self._run('get_all_requests', sql)
             
             # Convert to list of dicts
             requests = []
@@ -210,6 +215,62 @@ class IcebergHandler:
             traceback.print_exc()
             return []
     
+    def iter_document_ids(self, batch_size=10000):
+        """
+        Stream distinct document_ids in sorted order, fetchmany page by page
+
+        Raises:
+            Exception: Connection or query failure (a partial stream must not
+                       be mistaken for the full set)
+        """
+        if not self.conn:
+            if not self.connect():
+                raise ConnectionError("Presto is unavailable")
+        
+        sql = f"""
+        SELECT DISTINCT document_id
+        FROM {self.catalog}.{self.schema}.{self.table}
+        WHERE document_id IS NOT NULL
+        ORDER BY document_id
+        """
+        cursor = self._run('iter_document_ids', sql, fetch=False)
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                if row[0]:
+                    yield row[0]
+    
+    @traced('iceberg.find_document_ids', peer='presto')
+    def find_document_ids(self, document_ids):
+        """
+        Which of these document_ids have a request (re-check before repairs)
+
+        Returns:
+            set: Subset of document_ids present in the table, or None on failure
+        """
+        document_ids = list(document_ids)
+        if not document_ids:
+            return set()
+        if not self.conn:
+            if not self.connect():
+                return None
+        
+        try:
+            quoted = ', '.join("'" + str(d).replace("'", "''") + "'" for d in document_ids)
+            sql = f"""
+            SELECT DISTINCT document_id
+            FROM {self.catalog}.{self.schema}.{self.table}
+            WHERE document_id IN ({quoted})
+            """
+            return {row[0] for row in self._run('find_document_ids', sql)}
+        except Exception as e:
+            print(f"[ERROR] Query error: {str(e)}")
+            return None
+    
+    @traced('iceberg.update_status', peer='presto')
     def update_status(self, request_id, status, credits=None, notes='', updated_by='Advisor'):
         """Update request status in Iceberg table"""
         if not self.conn:
@@ -217,8 +278,6 @@ class IcebergHandler:
                 return False
         
         try:
-            cursor = self.conn.cursor()
-            
             # Escape single quotes in notes
             notes = notes.replace("'", "''")
             
@@ -236,7 +295,7 @@ class IcebergHandler:
             WHERE request_id = '{request_id}'
             """
             
-            cursor.execute(sql)
+            self._run('update_status', sql, fetch=False)
             
             print(f"[SUCCESS] Updated status for {request_id} to '{status}'")
             return True
@@ -245,20 +304,48 @@ class IcebergHandler:
             print(f"[ERROR] Update error: {str(e)}")
             return False
     
+    @traced('iceberg.generate_request_id', peer='presto')
     def _generate_request_id(self):
         """Generate unique request ID"""
         if not self.conn:
             return f"REQ{datetime.now().strftime('%Y%m%d%H%M%S')}"
         
         try:
-            cursor = self.conn.cursor()
             sql = f"SELECT COUNT(*) FROM {self.catalog}.{self.schema}.{self.table}"
-            cursor.execute(sql)
-            count = cursor.fetchone()[0]
+            count = self._run('generate_request_id', sql)[0][0]
             return f"REQ{str(count + 1).zfill(6)}"
         except:
             return f"REQ{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    
+
+    @traced('iceberg.ping', peer='presto')
+    def ping(self):
+        """Round trip to Presto (SELECT 1); opens the HTTP session used by later queries"""
+        if not self.conn:
+            if not self.connect():
+                return False
+
+        try:
+            self._run('ping', "SELECT 1")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Presto ping failed: {str(e)}")
+            return False
+
+    def _run(self, operation, sql, fetch=True):
+        """
+        Execute one statement on a new cursor; slower than SLOW_PRESTO_MS it is
+        logged with its SQL, row count, Presto query id and stats (utils/slowlog.py)
+
+        Returns:
+            list: All rows if fetch, else the cursor
+        """
+        cursor = self.conn.cursor()
+        with get_slow_log().timed('presto', operation, sql=' '.join(sql.split())) as entry:
+            cursor.execute(sql)
+            result = cursor.fetchall() if fetch else cursor
+            entry.update(presto_details(cursor.stats, rows=len(result) if fetch else None))
+        return result
+
     def close(self):
         """Close Presto connection"""
         if self.conn:
@@ -0,0 +1,570 @@
+"""
+Embedded Storage Backends
+In-process implementations of the storage interfaces (handlers/storage.py)
+for small deployments and CI; selected with STORAGE_BACKEND=local. Everything
+lives under LOCAL_STORAGE_DIR:
+
+    vectors/    NumpyVectorStore    append-only row journal + memory-mapped float32 vectors
+    objects/    FileObjectStore     one file per key, metadata in objects/.metadata/
+    requests.sqlite3  SQLiteRequestStore  IcebergHandler's own SQL on a SQLite table
+
+Several processes (gunicorn workers) may share one directory: writers take an
+exclusive lock for each append, readers replay what other processes appended
+before every read, as the keyword index does.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+import sqlite3
+import threading
+import numpy as np
+from datetime import datetime
+
+from handlers.storage import VectorStore, ObjectStore, ObjectNotFound, OUTPUT_FIELDS, DEFAULT_EFFORT
+from handlers.iceberg_handler import IcebergHandler
+
+DEFAULT_STORAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'local')
+DEFAULT_DIM = 768  # ibm/slate-125m-english-rtrvr-v2
+
+
+def storage_dir():
+    return os.getenv('LOCAL_STORAGE_DIR', DEFAULT_STORAGE_DIR)
+
+
+# ==================== FILTER EXPRESSIONS ====================
+
+_TOKEN = re.compile(r'\s*(?:(?P<str>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')|(?P<num>-?\d+(?:\.\d+)?)'
+                    r'|(?P<op>==|!=|>=|<=|>|<|\(|\)|\[|\]|,)|(?P<word>[A-Za-z_][A-Za-z0-9_]*))')
+
+_COMPARE = {
+    '==': lambda a, b: a == b, '!=': lambda a, b: a != b,
+    '>': lambda a, b: a is not None and a > b, '<': lambda a, b: a is not None and a < b,
+    '>=': lambda a, b: a is not None and a >= b, '<=': lambda a, b: a is not None and a <= b,
+}
+
+
+def _tokenize(expr):
+    tokens, position = [], 0
+    expr = expr.strip()
+    while position < len(expr):
+        match = _TOKEN.match(expr, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unsupported filter expression near: {expr[position:position + 20]!r}")
+        position = match.end()
+        if match.group('str'):
+            tokens.append(('value', re.sub(r'\\(.)', r'\1', match.group('str')[1:-1])))
+        elif match.group('num'):
+            number = match.group('num')
+            tokens.append(('value', float(number) if '.' in number else int(number)))
+        elif match.group('op'):
+            tokens.append(('op', match.group('op')))
+        else:
+            word = match.group('word')
+            tokens.append(('op', word.lower()) if word.lower() in ('and', 'or', 'not', 'in') else ('field', word))
+    return tokens
+
+
+def compile_expr(expr):
+    """
+    Predicate over row dicts for the Milvus boolean expressions this code base
+    builds: ==, !=, <, >, in [...], and, or, not, parentheses. Empty means all.
+    """
+    tokens = _tokenize(expr or '')
+    if not tokens:
+        return lambda row: True
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else (None, None)
+
+    def take(kind=None, value=None):
+        nonlocal position
+        token = peek()
+        if (kind and token[0] != kind) or (value and token[1] != value):
+            raise ValueError(f"Unsupported filter expression: {expr!r}")
+        position += 1
+        return token[1]
+
+    def parse_or():
+        parts = [parse_and()]
+        while peek() == ('op', 'or'):
+            take()
+            parts.append(parse_and())
+        return parts[0] if len(parts) == 1 else (lambda row: any(p(row) for p in parts))
+
+    def parse_and():
+        parts = [parse_factor()]
+        while peek() == ('op', 'and'):
+            take()
+            parts.append(parse_factor())
+        return parts[0] if len(parts) == 1 else (lambda row: all(p(row) for p in parts))
+
+    def parse_factor():
+        if peek() == ('op', 'not'):
+            take()
+            inner = parse_factor()
+            return lambda row: not inner(row)
+        if peek() == ('op', '('):
+            take()
+            inner = parse_or()
+            take('op', ')')
+            return inner
+        field = take('field')
+        op = take('op')
+        if op == 'in':
+            take('op', '[')
+            values = []
+            while peek() != ('op', ']'):
+                values.append(take('value'))
+                if peek() == ('op', ','):
+                    take()
+            take('op', ']')
+            allowed = set(values)
+            return lambda row: row.get(field) in allowed
+        if op not in _COMPARE:
+            raise ValueError(f"Unsupported operator {op!r} in {expr!r}")
+        value, compare = take('value'), _COMPARE[op]
+        return lambda row: compare(row.get(field), value)
+
+    predicate = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"Unsupported filter expression: {expr!r}")
+    return predicate
+
+
+# ==================== VECTORS ====================
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact L2 search over float32 vectors in a memory-mapped file
+
+    rows.jsonl journals every insert (row + vector slot) and delete; the first
+    line names the vectors file and the dimension. compact() writes a new
+    vectors file and journal and swaps the journal in atomically.
+    """
+
+    def __init__(self, path=None, dim=None):
+        super().__init__()
+        self.path = os.path.abspath(path or os.path.join(storage_dir(), 'vectors'))
+        self.collection_name = os.path.basename(self.path)
+        self.journal_path = os.path.join(self.path, 'rows.jsonl')
+        self.dim = dim or int(os.getenv('LOCAL_VECTOR_DIM', DEFAULT_DIM))
+        self.vectors_name = None
+        self._lock = threading.Lock()
+        self._opened = False
+        self._reset()
+
+    def _reset(self):
+        self.rows = {}      # pk -> row (OUTPUT_FIELDS + 'slot')
+        self._offset = 0
+        self._inode = None
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._norms = np.zeros(0, dtype=np.float32)
+
+    @property
+    def location(self):
+        return self.path
+
+    @property
+    def connected(self):
+        return self._opened
+
+    def connect(self):
+        try:
+            with self._lock:
+                os.makedirs(self.path, exist_ok=True)
+                with open(self.journal_path, 'a+', encoding='utf-8') as journal:
+                    fcntl.flock(journal, fcntl.LOCK_EX)
+                    if os.fstat(journal.fileno()).st_size == 0:
+                        header = {'op': 'init', 'dim': self.dim, 'vectors': f"vectors-{uuid.uuid4().hex[:8]}.f32"}
+                        open(os.path.join(self.path, header['vectors']), 'wb').close()
+                        journal.write(json.dumps(header) + '\n')
+                self._replay()
+            self._opened = True
+            print(f"[SUCCESS] Local vector store: {self.path} ({len(self.rows)} rows)")
+            return True
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Local vector store error: {str(e)}")
+            return False
+
+    def _ensure_open(self):
+        if not self._opened and not self.connect():
+            raise ConnectionError(f"Local vector store {self.path} is unavailable")
+
+    # ---------- Journal ----------
+
+    def _apply(self, record):
+        op = record['op']
+        if op == 'init':
+            if record['dim'] != self.dim:
+                raise ValueError(f"{self.path} holds {record['dim']}-dimensional vectors, not {self.dim}")
+            self.vectors_name = record['vectors']
+        elif op == 'add':
+            row = record['row']
+            self.rows[row['pk']] = row
+        elif op == 'delete':
+            wanted = set(record['document_ids'])
+            for pk in [pk for pk, row in self.rows.items() if row['document_id'] in wanted]:
+                del self.rows[pk]
+
+    def _replay(self, retry=True):
+        """Apply journal lines written since the last read (by this or another process)"""
+        with open(self.journal_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self._inode:
+                # Journal was compacted (replaced); rebuild from the new file
+                self._reset()
+                self._inode = stat.st_ino
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # partially written line; pick it up next time
+                self._apply(json.loads(line.decode('utf-8')))
+                self._offset += len(line)
+        try:
+            self._map_vectors()
+        except FileNotFoundError:
+            if not retry:
+                raise
+            self._replay(retry=False)  # compacted after we read the journal
+
+    def _map_vectors(self):
+        """Map vectors appended since the last read; only the new tail is normed"""
+        vectors_path = os.path.join(self.path, self.vectors_name)
+        count = os.path.getsize(vectors_path) // (self.dim * 4)
+        if count == len(self._matrix):
+            return
+        self._matrix = np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(count, self.dim))
+        tail = np.asarray(self._matrix[len(self._norms):count])
+        self._norms = np.concatenate([self._norms, np.einsum('ij,ij->i', tail, tail)])
+
+    def _append(self, records, vectors=None):
+        """
+        Journal records under an exclusive lock; 'add' records get the slots
+        their vectors were appended at
+        """
+        with self._lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                fcntl.flock(journal, fcntl.LOCK_EX)
+                # Replay under the lock: a compaction may have swapped the files
+                self._replay()
+                if vectors is not None:
+                    with open(os.path.join(self.path, self.vectors_name), 'ab') as f:
+                        first_slot = f.seek(0, os.SEEK_END) // (self.dim * 4)
+                        f.write(vectors.tobytes())
+                    for i, record in enumerate(records):
+                        record['row']['slot'] = first_slot + i
+                journal.write(''.join(json.dumps(r, default=str) + '\n' for r in records))
+                journal.flush()
+                self._replay()
+
+    # ---------- Writes ----------
+
+    def insert_documents(self, documents, vectors):
+        self._ensure_open()
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(documents), -1)
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {matrix.shape[1]}")
+        records = []
+        for document in documents:
+            metadata = document['metadata']
+            row = {name: metadata.get(name) for name in OUTPUT_FIELDS if name not in ('pk', 'text')}
+            row['pk'] = metadata.get('pk') or f"{metadata['document_id']}_{metadata['sequence_number']}"
+            row['text'] = document['content']
+            records.append({'op': 'add', 'row': row})
+        self._append(records, matrix)
+        return [record['row']['pk'] for record in records]
+
+    def delete_documents(self, document_ids, batch_size=500):
+        self._ensure_open()
+        wanted = set(document_ids)
+        with self._lock:
+            self._replay()
+            count = sum(1 for row in self.rows.values() if row['document_id'] in wanted)
+        self._append([{'op': 'delete', 'document_ids': sorted(wanted)}])
+        return count
+
+    def compact(self, wait=True, timeout=None):
+        """Rewrite the vectors file and journal with only the live rows"""
+        self._ensure_open()
+        with self._lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                fcntl.flock(journal, fcntl.LOCK_EX)
+                self._replay()
+                old_name, rows = self.vectors_name, list(self.rows.values())
+                header = {'op': 'init', 'dim': self.dim, 'vectors': f"vectors-{uuid.uuid4().hex[:8]}.f32"}
+                with open(os.path.join(self.path, header['vectors']), 'wb') as f:
+                    for row in rows:
+                        f.write(np.asarray(self._matrix[row['slot']]).tobytes())
+                tmp_path = f"{self.journal_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps(header) + '\n')
+                    for slot, row in enumerate(rows):
+                        f.write(json.dumps({'op': 'add', 'row': dict(row, slot=slot)}, default=str) + '\n')
+                os.replace(tmp_path, self.journal_path)
+                self._replay()
+            os.remove(os.path.join(self.path, old_name))  # mapped elsewhere, it lives until unmapped
+        return 'Completed'
+
+    # ---------- Reads ----------
+
+    def _select(self, expr):
+        """(rows, slots) matching a filter, from the current journal"""
+        predicate = compile_expr(expr)
+        with self._lock:
+            self._replay()
+            rows = [row for row in self.rows.values() if predicate(row)]
+            matrix, norms = self._matrix, self._norms
+        return rows, np.fromiter((row['slot'] for row in rows), dtype=np.int64, count=len(rows)), matrix, norms
+
+    def search(self, vectors, k, expr=None, search_params=None, effort=None, partition_names=None):
+        self._ensure_open()
+        started = time.perf_counter()
+        rows, slots, matrix, norms = self._select(expr)
+        results = []
+        for vector in vectors:
+            if not rows:
+                results.append([])
+                continue
+            query = np.asarray(vector, dtype=np.float32)
+            # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2, over the candidate slots only
+            distances = norms[slots] - 2.0 * (matrix[slots] @ query) + float(query @ query)
+            top = np.argpartition(distances, k - 1)[:k] if len(rows) > k else np.arange(len(rows))
+            top = top[np.argsort(distances[top], kind='stable')]
+            results.append([
+                {
+                    'content': rows[i]['text'] or '',
+                    'metadata': {name: rows[i].get(name) for name in OUTPUT_FIELDS if name != 'text'},
+                    'score': float(max(distances[i], 0.0))
+                }
+                for i in top
+            ])
+        if len(vectors) == 1:
+            self._observe(effort or DEFAULT_EFFORT, (time.perf_counter() - started) * 1000.0)
+        return results
+
+    def query(self, expr, output_fields=None, limit=16384, consistency_level=None, partition_names=None):
+        self._ensure_open()
+        rows, _, matrix, _ = self._select(expr)
+        fields = output_fields or OUTPUT_FIELDS
+        return [
+            {name: (np.asarray(matrix[row['slot']]).tolist() if name == 'vector' else row.get(name)) for name in fields}
+            for row in rows[:limit]
+        ]
+
+    def __len__(self):
+        self._ensure_open()
+        with self._lock:
+            self._replay()
+            return len(self.rows)
+
+    def close(self):
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._opened = False
+
+
+# ==================== OBJECTS ====================
+
+class FileObjectStore(ObjectStore):
+    """Objects as files under root; writes are atomic (temp file + rename)"""
+
+    METADATA_DIR = '.metadata'
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or os.path.join(storage_dir(), 'objects'))
+
+    @property
+    def location(self):
+        return self.root
+
+    def ping(self):
+        os.makedirs(self.root, exist_ok=True)
+        return os.access(self.root, os.W_OK)
+
+    def _path(self, object_key, metadata=False):
+        base = os.path.join(self.root, self.METADATA_DIR) if metadata else self.root
+        path = os.path.abspath(os.path.join(base, object_key + ('.json' if metadata else '')))
+        if not path.startswith(self.root + os.sep) or (not metadata and self._is_metadata(path)):
+            raise ValueError(f"Object key outside the store: {object_key}")
+        return path
+
+    def _is_metadata(self, path):
+        return path.startswith(os.path.join(self.root, self.METADATA_DIR) + os.sep)
+
+    @staticmethod
+    def _write(path, body):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def _put(self, object_key, body, metadata):
+        self._write(self._path(object_key, metadata=True), json.dumps(metadata).encode('utf-8'))
+        self._write(self._path(object_key), body)
+        return object_key
+
+    def upload_document(self, file_bytes, document_id, filename, metadata):
+        object_key = self._put(f"{document_id}/{filename}", file_bytes, {
+            'document-id': document_id,
+            'student-name': metadata.get('student_name', 'Unknown'),
+            'nuid': metadata.get('nuid', 'N/A'),
+            'request-type': metadata.get('request_type', 'Not Specified'),
+            'target-course': metadata.get('target_course', 'Not Specified'),
+            'upload-date': datetime.utcnow().isoformat()
+        })
+        print(f"      [SUCCESS] Stored locally: {object_key}")
+        return object_key
+
+    def upload_json(self, object_key, payload):
+        return self._put(object_key, json.dumps(payload).encode('utf-8'), {})
+
+    def get_document(self, object_key):
+        try:
+            with open(self._path(object_key), 'rb') as f:
+                file_bytes = f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            raise ObjectNotFound(object_key)
+        try:
+            with open(self._path(object_key, metadata=True), 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            metadata = {}
+        return file_bytes, metadata
+
+    def iter_keys(self, prefix="", page_size=1000):
+        for directory, subdirectories, files in os.walk(self.root):
+            if directory == self.root:
+                subdirectories[:] = [d for d in subdirectories if d != self.METADATA_DIR]
+            subdirectories.sort()
+            for name in sorted(files):
+                if name.endswith('.tmp'):
+                    continue
+                key = os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    yield key
+
+    def delete_document(self, object_key):
+        try:
+            os.remove(self._path(object_key))
+            try:
+                os.remove(self._path(object_key, metadata=True))
+            except FileNotFoundError:
+                pass
+            print(f"[SUCCESS] Deleted locally: {object_key}")
+            return True
+        except OSError as e:
+            print(f"[ERROR] Local delete failed: {str(e)}")
+            return False
+
+
+# ==================== REQUESTS ====================
+
+REQUESTS_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    request_id TEXT, document_id TEXT, document_name TEXT, student_name TEXT,
+    nuid TEXT, request_type TEXT, target_course TEXT, status TEXT,
+    credits_awarded INTEGER, advisor_notes TEXT, submitted_date TEXT,
+    updated_date TEXT, updated_by TEXT, document_count INTEGER
+)
+"""
+
+
+class _Rows:
+    """Materialized result with the DB-API fetch methods IcebergHandler uses"""
+
+    def __init__(self, rows):
+        self._rows = list(rows)
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+
+class SQLiteRequestStore(IcebergHandler):
+    """
+    IcebergHandler on SQLite: the handler builds exactly the SQL it sends to
+    Presto, _run() rewrites the table name and timestamp casts for SQLite
+    """
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path or os.path.join(storage_dir(), 'requests.sqlite3')
+        self._db_lock = threading.Lock()
+
+    @property
+    def location(self):
+        return self.path
+
+    def connect(self):
+        try:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')  # readers never wait for a writer
+            conn.execute(REQUESTS_TABLE.format(table=self.table))
+            conn.commit()
+            self.conn = conn
+            return True
+        except sqlite3.Error as e:
+            print(f"[ERROR] SQLite connection error: {str(e)}")
+            return False
+
+    def translate(self, sql):
+        sql = re.sub(rf"\b{re.escape(self.catalog)}\.{re.escape(self.schema)}\.{re.escape(self.table)}\b", self.table, sql)
+        return sql.replace('CAST(CURRENT_TIMESTAMP AS TIMESTAMP)', "strftime('%Y-%m-%dT%H:%M:%f', 'now')")
+
+    def execute(self, sql):
+        """(column names, rows) of one Presto-dialect statement"""
+        if not self.conn and not self.connect():
+            raise ConnectionError(f"SQLite request store {self.path} is unavailable")
+        with self._db_lock:
+            cursor = self.conn.execute(self.translate(sql))
+            columns = [d[0] for d in cursor.description or []]
+            rows = cursor.fetchall()
+            self.conn.commit()
+        return columns, rows
+
+    def _run(self, operation, sql, fetch=True):
+        _, rows = self.execute(sql)
+        return rows if fetch else _Rows(rows)
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+
+# Singleton instances
+_vector_store = None
+_object_store = None
+_request_store = None
+
+def get_local_vector_store():
+    """Get or create the local vector store"""
+    global _vector_store
+    if _vector_store is None:
+        _vector_store = NumpyVectorStore()
+    return _vector_store
+
+def get_local_object_store():
+    """Get or create the local object store"""
+    global _object_store
+    if _object_store is None:
+        _object_store = FileObjectStore()
+    return _object_store
+
+def get_local_request_store():
+    """Get or create the local request store"""
+    global _request_store
+    if _request_store is None:
+        _request_store = SQLiteRequestStore()
+    return _request_store
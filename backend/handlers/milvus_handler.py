@@ -0,0 +1,323 @@
+"""
+Milvus Handler
+Direct pymilvus access to the CPL collection for operations the watsonx.ai
+MilvusVectorStore wrapper does not expose (multi-vector search, partition-aware
+inserts, etc.). Rows keep the layout MilvusVectorStore writes, so Prompt Lab
+and the watsonx.ai vector index read them unchanged.
+"""
+
+import os
+import time
+import numpy as np
+from pymilvus import connections, Collection, DataType
+from utils.tracing import traced
+from utils.slowlog import get_slow_log
+from handlers.storage import (
+    VectorStore, PartitionedVectorStore, OUTPUT_FIELDS, SEARCH_EFFORT, EFFORT_LEVELS, DEFAULT_EFFORT,
+    PARTITION_NU_SYLLABUS, PARTITION_STUDENT, STUDENT_DOCUMENT_TYPES
+)
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# The stable alias (cpl_documents) once utils/milvus_migrations.py has run
+COLLECTION_NAME = os.getenv('MILVUS_COLLECTION', 'cpl_documents_v5')
+
+# Vector storage types (compact schema profiles use 16-bit vectors)
+VECTOR_DTYPES = {
+    DataType.FLOAT_VECTOR: 'float32',
+    DataType.FLOAT16_VECTOR: 'float16',
+    DataType.BFLOAT16_VECTOR: 'bfloat16',
+}
+
+
+def vector_dtype(schema):
+    """'float32' | 'float16' | 'bfloat16' for a collection schema's vector field"""
+    for field in schema.fields:
+        if field.name == 'vector':
+            return VECTOR_DTYPES.get(field.dtype, 'float32')
+    return 'float32'
+
+
+def encode_vector(vector, dtype):
+    """Insert payload for a vector field; 16-bit types are sent as raw bytes"""
+    if dtype == 'float16':
+        return np.asarray(vector, dtype=np.float16).tobytes()
+    if dtype == 'bfloat16':
+        bits = np.asarray(vector, dtype=np.float32).view(np.uint32).astype(np.uint64)
+        # Round to nearest even, keep the upper 16 bits
+        return ((bits + 0x7FFF + ((bits >> 16) & 1)) >> 16).astype(np.uint16).tobytes()
+    return [float(x) for x in vector]
+
+
+def decode_vector(value, dtype):
+    """Vector field value from query()/query_iterator() as a list of floats"""
+    if isinstance(value, (list, tuple)) and len(value) == 1 and isinstance(value[0], bytes):
+        value = value[0]
+    if isinstance(value, bytes):
+        if dtype == 'bfloat16':
+            bits = np.frombuffer(value, dtype=np.uint16).astype(np.uint32) << 16
+            return bits.view(np.float32).tolist()
+        return np.frombuffer(value, dtype=np.float16).astype(np.float32).tolist()
+    if dtype == 'bfloat16' and np.asarray(value).dtype == np.uint16:
+        return (np.asarray(value, dtype=np.uint32) << 16).view(np.float32).tolist()
+    return np.asarray(value, dtype=np.float32).tolist()
+
+
+def search_vector(vector, dtype):
+    """Query vector in the type a 16-bit vector field expects"""
+    if dtype == 'float16':
+        return np.asarray(vector, dtype=np.float16)
+    if dtype == 'bfloat16':
+        # pymilvus only accepts a bfloat16 ndarray here (raw bytes would be sent
+        # as a binary vector); numpy has no native bfloat16, hence ml-dtypes.
+        # Same round-to-nearest-even bits as encode_vector, so queries match inserts.
+        import ml_dtypes
+        return np.frombuffer(encode_vector(vector, dtype), dtype=ml_dtypes.bfloat16)
+    return vector
+
+
+def document_row(document, vector, dtype='float32'):
+    """Collection row for one upload-payload chunk ({'content', 'metadata'}) and its embedding"""
+    metadata = document['metadata']
+    row = {name: metadata.get(name) for name in OUTPUT_FIELDS if name not in ('pk', 'text')}
+    row['pk'] = metadata.get('pk') or f"{metadata['document_id']}_{metadata['sequence_number']}"
+    row['text'] = document['content']
+    row['vector'] = encode_vector(vector, dtype)
+    return row
+
+
+class MilvusHandler(VectorStore):
+    """Search the CPL Milvus collection with pre-computed query vectors"""
+
+    def __init__(self):
+        super().__init__()
+        self.host = os.getenv('MILVUS_HOST')
+        self.port = int(os.getenv('MILVUS_PORT', 19530))
+        self.user = os.getenv('MILVUS_USERNAME')
+        self.password = os.getenv('MILVUS_PASSWORD')
+        self.collection_name = COLLECTION_NAME
+        self.alias = 'cpl_milvus_handler'
+        self.metric_type = 'L2'
+        self.index_type = 'HNSW'
+        self.partition_key = None
+        self.vector_dtype = 'float32'
+
+        # Connection
+        self.collection = None
+
+    @property
+    def connected(self):
+        return self.collection is not None
+
+    @traced('milvus.connect', peer='milvus')
+    def connect(self):
+        """Connect to Milvus and load the collection"""
+        try:
+            connections.connect(
+                alias=self.alias,
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                secure=True
+            )
+            self.collection = Collection(self.collection_name, using=self.alias)
+            self.collection.load()
+            for index in self.collection.indexes:
+                if index.field_name == 'vector':
+                    self.index_type = index.params.get('index_type', self.index_type)
+                    self.metric_type = index.params.get('metric_type', self.metric_type)
+            self.vector_dtype = vector_dtype(self.collection.schema)
+            self.partitions = {p.name for p in self.collection.partitions}
+            self.partition_key = next(
+                (f.name for f in self.collection.schema.fields if getattr(f, 'is_partition_key', False)),
+                None
+            )
+            print(f"[SUCCESS] Connected to Milvus: {self.host}:{self.port} ({self.collection_name})")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Milvus connection error: {str(e)}")
+            return False
+
+    @traced('milvus.insert_documents', peer='milvus')
+    def insert_documents(self, documents, vectors):
+        """
+        Insert pre-embedded chunks, routed to the document-type partition
+
+        Args:
+            documents: List of {'content': str, 'metadata': dict} (the upload payload)
+            vectors: One embedding per document
+
+        Returns:
+            list: Primary keys in input order ({document_id}_{sequence_number} unless metadata has 'pk')
+        """
+        if not self.collection:
+            if not self.connect():
+                raise ConnectionError("Milvus is unavailable")
+
+        by_partition = {}
+        pks = []
+        for doc, vector in zip(documents, vectors):
+            metadata = doc['metadata']
+            row = document_row(doc, vector, self.vector_dtype)
+            by_partition.setdefault(self.partition_for(metadata.get('document_type')), []).append(row)
+            pks.append(row['pk'])
+
+        for partition_name, rows in by_partition.items():
+            self.collection.insert(rows, partition_name=partition_name)
+        return pks
+
+    @traced('milvus.delete_documents', peer='milvus')
+    def delete_documents(self, document_ids, batch_size=500):
+        """
+        Delete every chunk of the given documents
+
+        Returns:
+            int: Delete count reported by Milvus
+        """
+        if not self.collection:
+            if not self.connect():
+                raise ConnectionError("Milvus is unavailable")
+
+        document_ids = sorted(set(document_ids))
+        deleted = 0
+        for start in range(0, len(document_ids), batch_size):
+            quoted = ', '.join(
+                '"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"'
+                for v in document_ids[start:start + batch_size]
+            )
+            result = self.collection.delete(expr=f"document_id in [{quoted}]")
+            deleted += getattr(result, 'delete_count', 0)
+        return deleted
+
+    @traced('milvus.search', peer='milvus')
+    def search(self, vectors, k, expr=None, search_params=None, effort=None, partition_names=None):
+        """
+        Run ONE Milvus search for all query vectors (nq = len(vectors))
+
+        Args:
+            vectors: List of query embeddings
+            k: Hits per query
+            expr: Optional boolean filter expression
+            search_params: Optional override of the effort-derived params
+            effort: 'fast' | 'balanced' | 'thorough' (default balanced)
+            partition_names: Only scan these partitions (see partitions_for_filter)
+
+        Returns:
+            list: One list of hits per query vector, in input order
+        """
+        if not self.collection:
+            if not self.connect():
+                raise ConnectionError("Milvus is unavailable")
+
+        effort = effort or DEFAULT_EFFORT
+        if search_params is None:
+            search_params = self.search_params(effort, k)
+
+        consistency_level = SEARCH_EFFORT[effort]['consistency_level']
+        started = time.perf_counter()
+        with get_slow_log().timed('milvus', 'search', collection=self.collection_name, nq=len(vectors), k=k,
+                                  expr=expr or None, effort=effort, search_params=search_params,
+                                  partitions=partition_names or None,
+                                  consistency_level=consistency_level) as entry:
+            results = self.collection.search(
+                data=[search_vector(vector, self.vector_dtype) for vector in vectors],
+                anns_field='vector',
+                param=search_params,
+                limit=k,
+                expr=expr or None,
+                output_fields=OUTPUT_FIELDS,
+                partition_names=partition_names or None,
+                consistency_level=consistency_level
+            )
+            hits = [[self._to_hit(hit) for hit in query_hits] for query_hits in results]
+            entry['rows'] = sum(len(query_hits) for query_hits in hits)
+        if len(vectors) == 1:
+            # Budgets are per single query; batch timings would skew the estimate
+            self._observe(effort, (time.perf_counter() - started) * 1000.0)
+
+        return hits
+
+    @traced('milvus.query', peer='milvus')
+    def query(self, expr, output_fields=None, limit=16384, consistency_level=None, partition_names=None):
+        """
+        Scalar query (no ranking)
+
+        Args:
+            expr: Boolean filter expression
+            output_fields: Fields to return, e.g. include 'vector' to fetch embeddings
+            limit: Max rows (Milvus caps a single query at 16384)
+            consistency_level: e.g. 'Strong' to read rows inserted moments ago
+            partition_names: Only scan these partitions
+
+        Returns:
+            list: Row dicts
+        """
+        if not self.collection:
+            if not self.connect():
+                raise ConnectionError("Milvus is unavailable")
+
+        kwargs = {'consistency_level': consistency_level} if consistency_level else {}
+        with get_slow_log().timed('milvus', 'query', collection=self.collection_name, expr=expr, limit=limit,
+                                  output_fields=output_fields or OUTPUT_FIELDS,
+                                  partitions=partition_names or None, **kwargs) as entry:
+            rows = self.collection.query(
+                expr=expr,
+                output_fields=output_fields or OUTPUT_FIELDS,
+                limit=limit,
+                partition_names=partition_names or None,
+                **kwargs
+            )
+            entry['rows'] = len(rows)
+        if self.vector_dtype != 'float32' and 'vector' in (output_fields or ()):
+            for row in rows:
+                row['vector'] = decode_vector(row['vector'], self.vector_dtype)
+        return rows
+
+    @staticmethod
+    def _to_hit(hit):
+        """Match the hit layout /api/search returns for vector store results"""
+        fields = {name: hit.entity.get(name) for name in OUTPUT_FIELDS}
+        content = fields.pop('text') or ''
+        return {
+            'content': content,
+            'metadata': fields,
+            'score': float(hit.distance)
+        }
+
+    @traced('milvus.compact', peer='milvus')
+    def compact(self, wait=True, timeout=None):
+        """
+        Flush pending deletes and merge segments so deleted rows are dropped
+
+        Returns:
+            str: Final compaction state name
+        """
+        if not self.collection:
+            if not self.connect():
+                raise ConnectionError("Milvus is unavailable")
+
+        self.collection.flush()
+        self.collection.compact()
+        if wait:
+            self.collection.wait_for_compaction_completed(timeout=timeout)
+        return str(self.collection.get_compaction_state().state)
+
+    def close(self):
+        """Disconnect from Milvus"""
+        if self.collection:
+            connections.disconnect(self.alias)
+            self.collection = None
+            print("[DISCONNECTED] Disconnected from Milvus")
+
+
+# Singleton instance
+_milvus_handler = None
+
+def get_milvus_handler():
+    """Get or create Milvus handler instance"""
+    global _milvus_handler
+    if _milvus_handler is None:
+        _milvus_handler = MilvusHandler()
+    return _milvus_handler
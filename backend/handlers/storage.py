@@ -0,0 +1,363 @@
+"""
+Storage Backends
+The three stores behind the services, and the configuration that picks an
+implementation for each:
+
+    VectorStore   chunk embeddings + metadata   milvus  (MilvusHandler)   | local (NumpyVectorStore)
+    ObjectStore   original files, artifacts     cos     (COSHandler)      | local (FileObjectStore)
+    RequestStore  the CPL request table         iceberg (IcebergHandler)  | local (SQLiteRequestStore)
+
+STORAGE_BACKEND=local switches all three to the embedded implementations in
+handlers/local_storage.py (files under LOCAL_STORAGE_DIR); VECTOR_STORE,
+OBJECT_STORE and REQUEST_STORE override one store. Implementations are
+imported on first use, so a local deployment never loads pymilvus or ibm_boto3.
+"""
+
+import os
+import json
+import math
+import threading
+import importlib
+from abc import ABC, abstractmethod
+from utils.metrics import StageTimer
+
+# Scalar fields returned with every hit (everything except the vector)
+OUTPUT_FIELDS = [
+    'pk', 'text', 'document_id', 'document_name', 'document_type',
+    'page', 'start_index', 'sequence_number',
+    'student_name', 'nuid', 'target_course', 'request_type'
+]
+
+# Search effort levels: recall vs latency, chosen per request
+# ef applies to HNSW, nprobe to IVF indexes; 'balanced' matches the previous fixed ef=64
+SEARCH_EFFORT = {
+    'fast': {'ef': 32, 'nprobe': 8, 'consistency_level': 'Eventually', 'expected_ms': 15.0},
+    'balanced': {'ef': 64, 'nprobe': 16, 'consistency_level': 'Bounded', 'expected_ms': 30.0},
+    'thorough': {'ef': 256, 'nprobe': 64, 'consistency_level': 'Strong', 'expected_ms': 90.0},
+}
+EFFORT_LEVELS = ('fast', 'balanced', 'thorough')
+DEFAULT_EFFORT = 'balanced'
+
+# Partitions of a doc-type partitioned collection (create_cpl_collection.py --layout doc-type)
+PARTITION_NU_SYLLABUS = 'nu_syllabus'
+PARTITION_STUDENT = 'student_documents'
+STUDENT_DOCUMENT_TYPES = ('transcript', 'resume', 'student_syllabus')
+
+# {setting: {choice: 'module:factory'}}; the first choice is the remote default
+IMPLEMENTATIONS = {
+    'VECTOR_STORE': {
+        'milvus': 'handlers.milvus_handler:get_milvus_handler',
+        'local': 'handlers.local_storage:get_local_vector_store',
+    },
+    'OBJECT_STORE': {
+        'cos': 'handlers.cos_handler:get_cos_handler',
+        'local': 'handlers.local_storage:get_local_object_store',
+    },
+    'REQUEST_STORE': {
+        'iceberg': 'handlers.iceberg_handler:get_iceberg_handler',
+        'local': 'handlers.local_storage:get_local_request_store',
+    },
+}
+STORAGE_BACKENDS = ('remote', 'local')
+
+
+class ObjectNotFound(KeyError):
+    """No object under the requested key"""
+
+
+class VectorStore(ABC):
+    """
+    Chunk rows (OUTPUT_FIELDS + 'vector') searched by L2 distance. Effort
+    levels, latency budgets and document-type partitions are shared by every
+    implementation; an exact index simply has no search params to tune.
+    """
+
+    collection_name = None
+    metric_type = 'L2'
+    index_type = 'FLAT'
+
+    def __init__(self):
+        self.partitions = set()
+
+        # Observed latency per effort level (EWMA, ms), seeded with expectations
+        self.latency_ms = {level: SEARCH_EFFORT[level]['expected_ms'] for level in EFFORT_LEVELS}
+        self._latency_lock = threading.Lock()
+
+    @property
+    def location(self):
+        """What /ready reports for this store"""
+        return self.collection_name
+
+    @property
+    @abstractmethod
+    def connected(self):
+        """True once connect() has succeeded"""
+
+    @abstractmethod
+    def connect(self):
+        """Open the store; returns False (not raises) when it is unavailable"""
+
+    def ping(self):
+        return self.connected or self.connect()
+
+    @abstractmethod
+    def insert_documents(self, documents, vectors):
+        """Store pre-embedded upload-payload chunks; returns their primary keys"""
+
+    @abstractmethod
+    def delete_documents(self, document_ids, batch_size=500):
+        """Delete every chunk of the given documents; returns the delete count"""
+
+    @abstractmethod
+    def search(self, vectors, k, expr=None, search_params=None, effort=None, partition_names=None):
+        """One list of {'content', 'metadata', 'score'} hits per query vector, nearest first"""
+
+    @abstractmethod
+    def query(self, expr, output_fields=None, limit=16384, consistency_level=None, partition_names=None):
+        """Row dicts matching a boolean filter expression"""
+
+    def compact(self, wait=True, timeout=None):
+        """Drop deleted rows from storage; returns the final state name"""
+        return 'Completed'
+
+    def close(self):
+        pass
+
+    def resolve_effort(self, effort=None, latency_budget_ms=None):
+        """
+        Pick an effort level: an explicit level wins; otherwise the most
+        thorough level whose observed latency fits the budget
+
+        Both come straight from the request JSON, so any type can arrive.
+
+        Raises:
+            ValueError: Unknown effort level, or a budget that is not a positive number
+        """
+        if effort is not None:
+            if not isinstance(effort, str) or effort not in SEARCH_EFFORT:
+                raise ValueError(f"effort must be one of {', '.join(EFFORT_LEVELS)}")
+            return effort
+        if latency_budget_ms is None:
+            return DEFAULT_EFFORT
+        if isinstance(latency_budget_ms, bool) or not isinstance(latency_budget_ms, (int, float, str)):
+            raise ValueError("latencyBudgetMs must be a number")
+        try:
+            budget = float(latency_budget_ms)
+        except ValueError:
+            raise ValueError("latencyBudgetMs must be a number")
+        if not math.isfinite(budget) or budget <= 0:
+            raise ValueError("latencyBudgetMs must be positive")
+
+        fitting = [level for level in EFFORT_LEVELS if self.latency_ms[level] <= budget]
+        return fitting[-1] if fitting else EFFORT_LEVELS[0]
+
+    def search_params(self, effort, k):
+        """Search params for an effort level on the loaded index type"""
+        profile = SEARCH_EFFORT[effort]
+        if self.index_type.startswith('IVF'):
+            params = {'nprobe': profile['nprobe']}
+        elif self.index_type == 'HNSW':
+            params = {'ef': max(profile['ef'], k)}  # HNSW requires ef >= k
+        else:
+            params = {}
+        return {'metric_type': self.metric_type, 'params': params}
+
+    def partition_for(self, document_type):
+        """Partition an insert belongs in; None for flat or partition-key collections"""
+        if PARTITION_NU_SYLLABUS not in self.partitions:
+            return None
+        return PARTITION_NU_SYLLABUS if document_type == 'nu_syllabus' else PARTITION_STUDENT
+
+    def partitions_for_filter(self, filters):
+        """
+        Partitions a search must scan given its document_type filter
+        None means "all" (flat collection, or no document_type filter)
+        """
+        if PARTITION_NU_SYLLABUS not in self.partitions:
+            return None
+        wanted = (filters or {}).get('document_type')
+        if wanted is None:
+            return None
+        wanted = wanted if isinstance(wanted, (list, tuple)) else [wanted]
+        return sorted({self.partition_for(document_type) for document_type in wanted})
+
+    def _observe(self, effort, elapsed_ms, alpha=0.2):
+        with self._latency_lock:
+            self.latency_ms[effort] = (1 - alpha) * self.latency_ms[effort] + alpha * elapsed_ms
+
+
+class ObjectStore(ABC):
+    """Original documents ({document_id}/{filename}) and JSON artifacts next to them"""
+
+    @property
+    @abstractmethod
+    def location(self):
+        """What /ready reports for this store"""
+
+    @abstractmethod
+    def ping(self):
+        """True when the store answers"""
+
+    @abstractmethod
+    def upload_document(self, file_bytes, document_id, filename, metadata):
+        """Store an original file; returns its key ({document_id}/{filename})"""
+
+    @abstractmethod
+    def get_document(self, object_key):
+        """(file_bytes, metadata_dict); ObjectNotFound (or the service's own error) when missing"""
+
+    @abstractmethod
+    def upload_json(self, object_key, payload):
+        """Store a JSON-serializable dict; returns the key"""
+
+    @abstractmethod
+    def iter_keys(self, prefix="", page_size=1000):
+        """Every key under prefix"""
+
+    @abstractmethod
+    def delete_document(self, object_key):
+        """True if deleted"""
+
+    def get_document_by_id(self, document_id, filename):
+        return self.get_document(f"{document_id}/{filename}")
+
+    def get_json(self, object_key):
+        file_bytes, _ = self.get_document(object_key)
+        return json.loads(file_bytes.decode('utf-8'))
+
+    def list_documents(self, prefix=""):
+        """Up to 1000 keys under prefix"""
+        keys = []
+        for key in self.iter_keys(prefix):
+            keys.append(key)
+            if len(keys) == 1000:
+                break
+        return keys
+
+
+class RequestStore(ABC):
+    """The CPL request table (one row per uploaded document)"""
+
+    @property
+    @abstractmethod
+    def location(self):
+        """What /ready reports for this store"""
+
+    @abstractmethod
+    def ping(self):
+        """True when the store answers"""
+
+    @abstractmethod
+    def insert_request(self, request_data):
+        """New pending request; returns its request_id, or None on failure"""
+
+    @abstractmethod
+    def get_all_requests(self):
+        """Every request as the dicts /api/get-requests returns, newest first"""
+
+    @abstractmethod
+    def update_status(self, request_id, status, credits=None, notes='', updated_by='Advisor'):
+        """True if updated"""
+
+    @abstractmethod
+    def iter_document_ids(self, batch_size=10000):
+        """Distinct document_ids in sorted order; raises on failure"""
+
+    @abstractmethod
+    def find_document_ids(self, document_ids):
+        """Subset of document_ids with a request, or None on failure"""
+
+    def get_document_ids(self, batch_size=10000):
+        """
+        Distinct document_ids referenced by any CPL request
+
+        Returns:
+            set: document_ids, or None if the table could not be read
+                 (callers deleting data must not treat a failure as "no requests")
+        """
+        try:
+            return set(self.iter_document_ids(batch_size))
+        except Exception as e:
+            print(f"[ERROR] Query error: {str(e)}")
+            return None
+
+    def close(self):
+        pass
+
+
+class PartitionedVectorStore:
+    """
+    add_documents() drop-in for MilvusVectorStore that embeds chunks once and
+    writes them through a VectorStore, so each lands in its document-type partition
+    """
+
+    def __init__(self, embedding_function, handler=None):
+        self.embedding_function = embedding_function
+        self.handler = handler or get_vector_store()
+
+    def add_documents(self, documents, timer=None):
+        """
+        Args:
+            documents: List of {'content': str, 'metadata': dict}
+            timer: Optional StageTimer (utils/metrics.py); records 'embed' and 'milvus_insert'
+
+        Returns:
+            list: Primary keys inserted
+        """
+        if not documents:
+            return []
+        timer = timer or StageTimer(None)
+        with timer.stage('embed'):
+            vectors = self.embedding_function.embed_documents([doc['content'] for doc in documents])
+        with timer.stage('milvus_insert'):
+            return self.handler.insert_documents(documents, vectors)
+
+
+# ==================== CONFIGURATION ====================
+
+def store_choice(setting):
+    """
+    Configured implementation name for VECTOR_STORE, OBJECT_STORE or REQUEST_STORE
+
+    Raises:
+        ValueError: Unknown STORAGE_BACKEND or implementation name
+    """
+    backend = os.getenv('STORAGE_BACKEND', 'remote')
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"STORAGE_BACKEND must be one of {', '.join(STORAGE_BACKENDS)}")
+    choices = IMPLEMENTATIONS[setting]
+    choice = os.getenv(setting) or ('local' if backend == 'local' else next(iter(choices)))
+    if choice not in choices:
+        raise ValueError(f"{setting} must be one of {', '.join(choices)}")
+    return choice
+
+
+def storage_config():
+    """{setting: implementation name} for the three stores"""
+    return {setting: store_choice(setting) for setting in IMPLEMENTATIONS}
+
+
+def _factory(setting):
+    module_name, _, name = IMPLEMENTATIONS[setting][store_choice(setting)].partition(':')
+    return getattr(importlib.import_module(module_name), name)
+
+
+def import_implementations():
+    """Import the configured implementations (and their SDKs) without connecting"""
+    for setting in IMPLEMENTATIONS:
+        _factory(setting)
+
+
+def get_vector_store():
+    """The configured VectorStore singleton"""
+    return _factory('VECTOR_STORE')()
+
+
+def get_object_store():
+    """The configured ObjectStore singleton"""
+    return _factory('OBJECT_STORE')()
+
+
+def get_request_store():
+    """The configured RequestStore singleton"""
+    return _factory('REQUEST_STORE')()
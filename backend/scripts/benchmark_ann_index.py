@@ -0,0 +1,120 @@
+"""
+Benchmark ANN Index Configurations
+Measures recall@k (vs exact NumPy ground truth), QPS, p99 latency and memory
+for HNSW at several M / ef values, IVF_FLAT, IVF_SQ8 and a FLAT baseline, so
+the settings in create_cpl_collection.py and verify.py are chosen from data
+
+Usage:
+    python benchmark_ann_index.py --synthetic 20000
+    python benchmark_ann_index.py --vectors exported_vectors.npy --k 10
+    python benchmark_ann_index.py --from-milvus 50000
+    python benchmark_ann_index.py --synthetic 20000 --milvus-uri ./ann_bench.db   (Milvus Lite)
+    python benchmark_ann_index.py --synthetic 20000 --json results.json
+
+HNSW stand-in needs `pip install hnswlib`; Milvus Lite needs `pip install milvus-lite`
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.ann_benchmark import (
+    synthetic_vectors, split_queries, exact_top_k, default_configs, build_groups,
+    run_stand_in_group, run_milvus_group, load_milvus_rows
+)
+
+load_dotenv()
+
+
+def load_from_milvus(limit):
+    """Pull up to `limit` real chunk vectors from the CPL collection"""
+    rows = load_milvus_rows(limit)
+    return np.asarray([row['vector'] for row in rows], dtype=np.float32)
+
+
+def describe(config):
+    return ', '.join(f"{key}={value}" for key, value in config['params'].items()) or '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ANN index configurations")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--synthetic', type=int, default=20000, help="Number of synthetic 768-d vectors")
+    source.add_argument('--vectors', help="Path to an exported (n, d) float32 .npy file")
+    source.add_argument('--from-milvus', type=int, help="Pull this many vectors from the CPL collection")
+    parser.add_argument('--queries', type=int, default=500, help="Held-out query vectors")
+    parser.add_argument('--k', type=int, default=5, help="Neighbours per query (recall@k)")
+    parser.add_argument('--index', action='append', help="Only these index types (repeatable)")
+    parser.add_argument('--milvus-uri', help="Run against Milvus / Milvus Lite instead of in-process stand-ins")
+    parser.add_argument('--milvus-token', default=os.getenv('MILVUS_BENCH_TOKEN'))
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+        source_name = args.vectors
+    elif args.from_milvus:
+        vectors = load_from_milvus(args.from_milvus)
+        source_name = f"milvus ({len(vectors)} vectors)"
+    else:
+        vectors = synthetic_vectors(args.synthetic)
+        source_name = f"synthetic ({args.synthetic} x 768)"
+
+    base, queries = split_queries(vectors, args.queries)
+
+    print("\n" + "="*90)
+    print("[QUERY] ANN INDEX BENCHMARK")
+    print("="*90)
+    print(f"   Data: {source_name}")
+    print(f"   Base: {len(base)}  Queries: {len(queries)}  k: {args.k}")
+    print(f"   Backend: {args.milvus_uri or 'in-process stand-ins'}")
+    print("   Computing exact ground truth...")
+    truth = exact_top_k(base, queries, args.k)
+
+    configs = default_configs(len(base))
+    if args.index:
+        wanted = {name.upper() for name in args.index}
+        configs = [c for c in configs if c['index_type'] in wanted]
+
+    results = []
+    skipped = set()
+    print(f"\n   {'index':<9} {'params':<38} {'recall':>7} {'qps':>9} {'p99 ms':>8} {'mem MB':>8} {'build s':>8}")
+    print("   " + "-"*87)
+    # One build per (index type, build params); ef / nprobe are swept on the built index
+    for group in build_groups(configs):
+        index_type = group[0]['index_type']
+        if index_type in skipped:
+            continue
+        try:
+            if args.milvus_uri:
+                group_results = run_milvus_group(group, base, queries, truth, args.k,
+                                                 args.milvus_uri, args.milvus_token)
+            else:
+                group_results = run_stand_in_group(group, base, queries, truth, args.k)
+        except ImportError as e:
+            print(f"   {index_type:<9} {'':<38} skipped ({e.name} not installed)")
+            skipped.add(index_type)
+            continue
+        except Exception as e:
+            print(f"   {index_type:<9} {describe(group[0]):<38} [ERROR] {str(e)}")
+            continue
+        for result in group_results:
+            results.append(result)
+            print(f"   {result['index_type']:<9} {describe(result):<38} {result['recall']:>7.4f} "
+                  f"{result['qps']:>9.1f} {result['p99_ms']:>8.2f} {result['memory_mb']:>8.1f} {result['build_s']:>8.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'source': source_name, 'base': len(base), 'queries': len(queries),
+                       'k': args.k, 'results': results}, f, indent=2)
+        print(f"\n[SUCCESS] Results written to {args.json}")
+
+    print("="*90 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark the Ingest Hot Path
+Times extract_text (PyPDF2 in the upload service, pdfplumber in the syllabus
+ingest), text splitting, create_embedded_content, safe_truncate_content and
+chunk-to-document assembly on the checked-in fixtures, and compares the
+results with a JSON baseline. Exits 1 when a case is slower than the baseline
+beyond the tolerance, so it can gate a commit or CI job.
+
+Usage:
+    python benchmark_ingest.py                          # check against the baseline
+    python benchmark_ingest.py --save-baseline          # record a new baseline
+    python benchmark_ingest.py --filter extract --tolerance 0.4
+    python benchmark_ingest.py --make-fixtures          # regenerate the fixtures
+
+pdfplumber cases need `pip install pdfplumber`; without it they are skipped
+"""
+
+import io
+import os
+import sys
+import argparse
+import contextlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.ingest_benchmark import (
+    SIZES, FORMATS, make_fixtures, measure, calibrate, machine_info,
+    load_baseline, save_baseline, compare
+)
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tests', 'backend', 'benchmarks')
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'ingest_baseline.json')
+
+CONTEXT = {
+    'document_id': '00000000-0000-0000-0000-000000000000',
+    'filename': 'large.txt',
+    'document_type': 'student_syllabus',
+    'student_name': 'Benchmark Student',
+    'nuid': '001234567',
+    'request_type': 'Credit Transfer',
+    'target_course': 'PJM 5900'
+}
+
+
+def ingest_cases(fixtures_dir):
+    """{case name: zero-argument callable}"""
+    from services import watson_upload as upload
+    try:
+        from utils import syllabus_ingest
+    except ImportError:
+        syllabus_ingest = None
+        print("[WARNING]  pdfplumber not installed: extract_pdfplumber cases skipped")
+
+    cases = {}
+    for size in SIZES:
+        for fmt in FORMATS:
+            name = f"{size}.{fmt}"
+            path = os.path.join(fixtures_dir, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            label = 'pypdf2' if fmt == 'pdf' else fmt
+            cases[f"extract_{label}[{size}]"] = lambda data=data, name=name: upload.extract_text(data, name)
+            if fmt == 'pdf' and syllabus_ingest is not None:
+                cases[f"extract_pdfplumber[{size}]"] = lambda path=path: syllabus_ingest.extract_text(path)
+
+    with open(os.path.join(fixtures_dir, 'large.txt'), 'rb') as f:
+        large_text = upload.extract_text(f.read(), 'large.txt')
+    for size in SIZES:
+        with open(os.path.join(fixtures_dir, f"{size}.txt"), 'rb') as f:
+            text = upload.extract_text(f.read(), f"{size}.txt")
+        cases[f"split[{size}]"] = lambda text=text: upload.text_splitter.split_text(text)
+
+    chunks = upload.text_splitter.split_text(large_text)
+    enriched = [
+        upload.create_embedded_content(chunk, CONTEXT['student_name'], CONTEXT['nuid'], CONTEXT['document_type'],
+                                       CONTEXT['request_type'], CONTEXT['target_course'], CONTEXT['filename'])
+        for chunk in chunks
+    ]
+    cases['create_embedded_content[large]'] = lambda: [
+        upload.create_embedded_content(chunk, CONTEXT['student_name'], CONTEXT['nuid'], CONTEXT['document_type'],
+                                       CONTEXT['request_type'], CONTEXT['target_course'], CONTEXT['filename'])
+        for chunk in chunks
+    ]
+    cases['safe_truncate_content[large]'] = lambda: [upload.safe_truncate_content(e) for e in enriched]
+    cases['build_documents[large]'] = lambda: upload.build_documents(chunks, CONTEXT)
+    return cases
+
+
+def run(cases, repeat):
+    """Time every case (their console output is discarded); returns the report"""
+    calibration = calibrate(repeat)
+    results = {}
+    for case, func in cases.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = measure(func, repeat=repeat)
+        result['calibrated'] = result['best'] / calibration
+        results[case] = result
+        print(f"   {case:<36} {result['best'] * 1000:>10.3f} ms best  "
+              f"{result['median'] * 1000:>10.3f} ms median  ({result['loops']} loops)")
+    return {'calibration_seconds': calibration, 'machine': machine_info(), 'cases': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the ingest hot path")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="Fixture directory")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed rounds per case")
+    parser.add_argument('--filter', help="Only cases containing this text")
+    parser.add_argument('--save-baseline', action='store_true', help="Record results as the baseline")
+    parser.add_argument('--make-fixtures', action='store_true', help="Regenerate the fixtures and exit")
+    parser.add_argument('--json', help="Also write this run's results here")
+    args = parser.parse_args()
+
+    if args.make_fixtures:
+        names = make_fixtures(args.fixtures)
+        print(f"[SUCCESS] Wrote {len(names)} fixtures to {os.path.abspath(args.fixtures)}")
+        return
+
+    print("\n" + "="*70)
+    print("[BENCHMARK] INGEST HOT PATH")
+    print("="*70)
+
+    cases = ingest_cases(args.fixtures)
+    if args.filter:
+        cases = {case: func for case, func in cases.items() if args.filter in case}
+    report = run(cases, args.repeat)
+    print(f"\n   Calibration: {report['calibration_seconds'] * 1000:.3f} ms")
+
+    if args.json:
+        save_baseline(args.json, report)
+
+    baseline = load_baseline(args.baseline)
+    if args.save_baseline:
+        if baseline and args.filter:
+            report['cases'] = dict(baseline['cases'], **report['cases'])
+        save_baseline(args.baseline, report)
+        print(f"\n[SUCCESS] Baseline saved to {os.path.abspath(args.baseline)}")
+        print("="*70 + "\n")
+        return
+
+    if baseline is None:
+        print(f"\n[WARNING]  No baseline at {args.baseline}; run with --save-baseline")
+        print("="*70 + "\n")
+        return
+
+    rows = compare(report, baseline, args.tolerance)
+    print(f"\n   {'case':<36} {'vs baseline':>12}  status")
+    print("   " + "-"*67)
+    for row in rows:
+        ratio = '-' if row['ratio'] is None else f"{row['ratio']:.2f}x"
+        print(f"   {row['case']:<36} {ratio:>12}  {row['status']}")
+
+    regressions = [row for row in rows if row['status'] == 'regression']
+    print("\n" + "="*70)
+    if regressions:
+        print(f"[ERROR] {len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+        print("="*70 + "\n")
+        sys.exit(1)
+    print(f"[SUCCESS] No regressions beyond {args.tolerance:.0%}")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
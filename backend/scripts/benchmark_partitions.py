@@ -0,0 +1,74 @@
+"""
+Benchmark Doc-Type Partitions
+Reference-syllabus search latency with student documents sharing the
+collection (document_type filter) vs isolated in their own partition, as the
+student population grows
+
+Usage:
+    python benchmark_partitions.py
+    python benchmark_partitions.py --reference 2000 --students 10000 50000 200000
+    python benchmark_partitions.py --milvus-uri ./partition_bench.db   (Milvus Lite)
+    python benchmark_partitions.py --json partitions.json
+"""
+
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.ann_benchmark import (
+    synthetic_vectors, split_queries, run_partition_stand_in, run_milvus_partitions
+)
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark doc-type partitions")
+    parser.add_argument('--reference', type=int, default=2000, help="NU reference syllabus chunks")
+    parser.add_argument('--students', type=int, nargs='+', default=[5000, 20000, 50000, 100000],
+                        help="Student chunk volumes to compare")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--milvus-uri', help="Run against Milvus / Milvus Lite instead of in-process FLAT search")
+    parser.add_argument('--milvus-token', default=os.getenv('MILVUS_BENCH_TOKEN'))
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    reference, queries = split_queries(synthetic_vectors(args.reference + args.queries, seed=0), args.queries)
+    all_students = synthetic_vectors(max(args.students), seed=2)
+
+    print("\n" + "="*78)
+    print("[QUERY] DOC-TYPE PARTITION BENCHMARK")
+    print("="*78)
+    print(f"   Reference chunks: {len(reference)}  Queries: {len(queries)}  k: {args.k}")
+    print(f"   Backend: {args.milvus_uri or 'in-process FLAT (filter vs partition)'}")
+    print(f"\n   {'students':>9} {'filter p50':>11} {'filter p99':>11} {'part p50':>9} {'part p99':>9} "
+          f"{'speedup':>8} {'recall':>13}")
+    print("   " + "-"*75)
+
+    results = []
+    for volume in sorted(args.students):
+        students = all_students[:volume]
+        if args.milvus_uri:
+            result = run_milvus_partitions(reference, students, queries, args.k, args.milvus_uri, args.milvus_token)
+        else:
+            result = run_partition_stand_in(reference, students, queries, args.k)
+        results.append(result)
+        unpartitioned, partitioned = result['unpartitioned'], result['partitioned']
+        print(f"   {volume:>9} {unpartitioned['p50_ms']:>11.3f} {unpartitioned['p99_ms']:>11.3f} "
+              f"{partitioned['p50_ms']:>9.3f} {partitioned['p99_ms']:>9.3f} {result['p50_speedup']:>7.1f}x "
+              f"{unpartitioned['recall']:>6.3f}/{partitioned['recall']:<6.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'reference': len(reference), 'queries': len(queries), 'k': args.k, 'results': results}, f, indent=2)
+        print(f"\n[SUCCESS] Results written to {args.json}")
+
+    print("="*78 + "\n")
+
+
+if __name__ == '__main__':
+    main()
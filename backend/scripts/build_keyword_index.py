@@ -0,0 +1,78 @@
+"""
+Rebuild the local keyword index from Milvus
+Walks the whole collection with query_iterator and writes a fresh journal,
+so the index matches Milvus after restores, migrations or manual deletes
+
+Usage:
+    python build_keyword_index.py
+"""
+
+import os
+import sys
+from pymilvus import connections, Collection
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import OUTPUT_FIELDS, COLLECTION_NAME
+from utils.keyword_index import KeywordIndex, DEFAULT_INDEX_PATH
+
+load_dotenv()
+
+INDEX_PATH = os.getenv('KEYWORD_INDEX_PATH', DEFAULT_INDEX_PATH)
+BATCH_SIZE = 1000
+
+print("\n" + "="*70)
+print("[QUERY] REBUILDING KEYWORD INDEX FROM MILVUS")
+print("="*70 + "\n")
+
+connections.connect(
+    alias="default",
+    host=os.getenv('MILVUS_HOST'),
+    port=int(os.getenv('MILVUS_PORT', 19530)),
+    user=os.getenv('MILVUS_USERNAME'),
+    password=os.getenv('MILVUS_PASSWORD'),
+    secure=True
+)
+
+collection = Collection(COLLECTION_NAME)
+collection.load()
+print(f"   Collection: {COLLECTION_NAME} ({collection.num_entities} chunks)")
+print(f"   Index file: {INDEX_PATH}\n")
+
+# Build into a temporary journal, then swap it in; running services reload on next lookup.
+# Lines uploads append to the live journal meanwhile are carried over at the swap
+live = KeywordIndex(path=INDEX_PATH)
+started_at = live.journal_size()
+tmp_path = f"{INDEX_PATH}.rebuild"
+if os.path.exists(tmp_path):
+    os.remove(tmp_path)
+index = KeywordIndex(path=tmp_path)
+
+iterator = collection.query_iterator(
+    batch_size=BATCH_SIZE,
+    expr="pk != ''",
+    output_fields=OUTPUT_FIELDS
+)
+
+total = 0
+while True:
+    rows = iterator.next()
+    if not rows:
+        iterator.close()
+        break
+    index.add_chunks([
+        {
+            'content': row.get('text') or '',
+            'metadata': {name: row.get(name) for name in OUTPUT_FIELDS if name != 'text'}
+        }
+        for row in rows
+    ])
+    total += len(rows)
+    print(f"   Indexed {total} chunks...")
+
+live.swap_in(tmp_path, started_at)
+
+print(f"\n[SUCCESS] Keyword index rebuilt: {len(live)} chunks, {len(live.courses)} courses")
+print("="*70 + "\n")
+
+connections.disconnect("default")
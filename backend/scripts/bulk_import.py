@@ -0,0 +1,288 @@
+"""
+Bulk Import Chunks into the CPL Collection
+Writes chunks, metadata and vectors as Parquet files shaped like the
+collection schema, stages them in the Milvus import bucket and loads them with
+do_bulk_insert (see utils/milvus_bulk_import.py). For full backfills and
+reindexing after an embedding model change, where row-wise add_documents
+is the bottleneck.
+
+Sources:
+    --syllabi DIR            Syllabus files (course code from the file name, or --course)
+    --from-collection NAME   Re-embed the text of every row in an existing collection
+    --synthetic N            Random vectors; exercises the load path against a stand-in
+
+Local stand-in: Milvus standalone from its docker-compose file (MinIO on :9000,
+bucket 'a-bucket', minioadmin/minioadmin). Milvus Lite has no bulk import.
+
+Usage:
+    python bulk_import.py --syllabi PJMSyllabi-Cleaned --collection cpl_documents_v6
+    python bulk_import.py --from-collection cpl_documents_v5 --collection cpl_documents_v6
+    python bulk_import.py --synthetic 1000000 --uri http://localhost:19530 --collection bulk_test
+    python bulk_import.py --syllabi PJMSyllabi-Cleaned --write-only --out ./parquet
+"""
+
+import os
+import sys
+import uuid
+import argparse
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from pymilvus import connections, Collection, utility
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import COLLECTION_NAME, document_row, vector_dtype, OUTPUT_FIELDS
+from utils.milvus_migrations import cpl_fields, route_rows, DOC_TYPE_PARTITIONS, SCHEMA_PROFILES
+from utils.milvus_bulk_import import (
+    ParquetChunkWriter, BulkImportStage, submit_imports, wait_for_imports,
+    DEFAULT_BUCKET, DEFAULT_PREFIX, DEFAULT_ROWS_PER_FILE
+)
+from utils.syllabus_ingest import prepare_file, file_sha256, SyllabusManifest, collect_retired
+from utils.keyword_index import get_keyword_index
+from utils.search_cache import get_search_cache
+
+load_dotenv()
+
+
+def get_embedding():
+    from ibm_watsonx_ai import APIClient, Credentials
+    from ibm_watsonx_ai.foundation_models.embeddings import Embeddings
+
+    credentials = Credentials(
+        api_key=os.getenv('WATSONX_AI_APIKEY'),
+        url=os.getenv('WATSONX_AI_SERVICE_URL')
+    )
+    api_client = APIClient(credentials)
+    api_client.set.default_project(os.getenv('WATSONX_AI_PROJECT_ID'))
+    return Embeddings(model_id='ibm/slate-125m-english-rtrvr-v2', api_client=api_client)
+
+
+def syllabus_documents(folder, course=None, workers=None):
+    """Yield (documents, file entry) per syllabus file, extracted in a process pool"""
+    files = sorted(p for p in Path(folder).iterdir() if p.suffix in ('.pdf', '.docx', '.txt'))
+    jobs = [(str(p), course or p.stem.replace('_', '')) for p in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(pool.submit(prepare_file, path, code, str(uuid.uuid4())), path) for path, code in jobs]
+        for future, path in futures:
+            try:
+                prepared = future.result()
+            except Exception as e:
+                print(f"   [ERROR] {os.path.basename(path)}: {str(e)}")
+                continue
+            yield prepared['documents'], prepared
+
+
+def collection_documents(name, batch_size=1000):
+    """Yield existing rows of `name` as upload-payload documents (text + metadata, no vector)"""
+    source = Collection(name)
+    source.load()
+    iterator = source.query_iterator(batch_size=batch_size, expr="pk != ''", output_fields=OUTPUT_FIELDS)
+    while True:
+        batch = iterator.next()
+        if not batch:
+            break
+        yield [{'content': row['text'], 'metadata': row} for row in batch], None
+    iterator.close()
+
+
+def delete_documents(collection, document_ids, batch_size=500):
+    """Delete every chunk of these documents from the target collection and the keyword index"""
+    document_ids = sorted(set(document_ids))
+    deleted = 0
+    for start in range(0, len(document_ids), batch_size):
+        quoted = ', '.join(
+            '"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"'
+            for v in document_ids[start:start + batch_size]
+        )
+        result = collection.delete(expr=f"document_id in [{quoted}]")
+        deleted += getattr(result, 'delete_count', 0)
+    get_keyword_index().remove_documents(document_ids)
+    return deleted
+
+
+def record_syllabi(manifest, imported_files, delete):
+    """
+    Record imported syllabus files in the manifest; files imported before under
+    another document_id are retired and their old chunks deleted
+
+    Returns:
+        tuple: (documents deleted, chunks deleted)
+    """
+    replaced = [manifest.key(prepared['path']) for prepared in imported_files
+                if manifest.key(prepared['path']) in manifest.files]
+    manifest.retire(replaced)
+    for prepared in imported_files:
+        pks = [doc['metadata']['pk'] for doc in prepared['documents']]
+        manifest.mark_done(prepared['path'], file_sha256(prepared['path']), prepared['document_id'],
+                           prepared['course_code'], pks)
+    return collect_retired(manifest, delete)
+
+
+def synthetic_documents(n, batch_size=10000, seed=0):
+    """Yield (documents, vectors) of random unit vectors with plausible metadata"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, batch_size):
+        count = min(batch_size, n - start)
+        vectors = rng.standard_normal((count, 768)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        documents = []
+        for i in range(start, start + count):
+            document_type = 'nu_syllabus' if i % 4 == 0 else 'resume'
+            documents.append({'content': f"synthetic chunk {i}", 'metadata': {
+                'pk': f"synthetic-{i // 20}_{i % 20}", 'document_id': f"synthetic-{i // 20}",
+                'document_name': f"synthetic-{i // 20}.txt", 'document_type': document_type,
+                'page': i % 20 + 1, 'start_index': 0, 'sequence_number': i % 20,
+                'target_course': f"PJM{5000 + i % 50}", 'student_name': '',
+                'nuid': '' if document_type == 'nu_syllabus' else f"{i % 1000:09d}", 'request_type': ''
+            }})
+        yield documents, vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import chunks into Milvus via Parquet")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--syllabi', help="Folder of syllabus files")
+    source.add_argument('--from-collection', help="Re-embed every row of this collection")
+    source.add_argument('--synthetic', type=int, help="Number of random chunks")
+    parser.add_argument('--course', help="Course code for every --syllabi file (default: from file name)")
+    parser.add_argument('--collection', default=COLLECTION_NAME, help="Target collection (must exist)")
+    parser.add_argument('--profile', choices=sorted(SCHEMA_PROFILES), default='standard',
+                        help="Schema for --write-only (otherwise read from the target)")
+    parser.add_argument('--out', default=os.path.join('bulk_import', uuid.uuid4().hex[:8]))
+    parser.add_argument('--rows-per-file', type=int, default=DEFAULT_ROWS_PER_FILE)
+    parser.add_argument('--embed-batch', type=int, default=2000, help="Chunks per embed_documents call")
+    parser.add_argument('--workers', type=int, help="Extraction processes for --syllabi")
+    parser.add_argument('--write-only', action='store_true', help="Write Parquet files and stop")
+    parser.add_argument('--bucket', default=DEFAULT_BUCKET)
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX)
+    parser.add_argument('--uri', help="Milvus URI for a local stand-in (default: MILVUS_HOST/PORT)")
+    parser.add_argument('--manifest', help="Record imported --syllabi files here (default: SYLLABUS_MANIFEST_PATH)")
+    parser.add_argument('--keep-files', action='store_true', help="Leave staged files in the bucket")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("[MILVUS] BULK IMPORT")
+    print("="*70 + "\n")
+
+    needs_milvus = not args.write_only or args.from_collection
+    if needs_milvus:
+        if args.uri:
+            connections.connect(alias="default", uri=args.uri, token=os.getenv('MILVUS_BENCH_TOKEN', ''))
+        else:
+            connections.connect(
+                alias="default",
+                host=os.getenv('MILVUS_HOST'),
+                port=int(os.getenv('MILVUS_PORT', 19530)),
+                user=os.getenv('MILVUS_USERNAME'),
+                password=os.getenv('MILVUS_PASSWORD'),
+                secure=True
+            )
+
+    if args.write_only:
+        fields = cpl_fields(profile=args.profile)
+        partitions = set()
+        dtype = SCHEMA_PROFILES[args.profile]['vector_dtype']
+    else:
+        if not utility.has_collection(args.collection):
+            print(f"[ERROR] Collection not found: {args.collection} (create it with create_cpl_collection.py)\n")
+            sys.exit(1)
+        target = Collection(args.collection)
+        fields = target.schema.fields
+        partitions = {p.name for p in target.partitions}
+        dtype = vector_dtype(target.schema)
+
+    layout = 'doc-type' if DOC_TYPE_PARTITIONS[0] in partitions else 'single partition'
+    print(f"   Target: {args.collection} ({layout}, {dtype} vectors)")
+    print(f"   Parquet: {args.out} ({args.rows_per_file} rows/file)\n")
+
+    writer = ParquetChunkWriter(args.out, fields, route=lambda rows: route_rows(rows, partitions),
+                                rows_per_file=args.rows_per_file)
+    embedding = None if args.synthetic else get_embedding()
+    if args.syllabi:
+        batches = syllabus_documents(args.syllabi, args.course, args.workers)
+    elif args.from_collection:
+        batches = collection_documents(args.from_collection)
+    else:
+        batches = synthetic_documents(args.synthetic)
+
+    # ==================== STEP 1: EMBED + WRITE PARQUET ====================
+
+    print("[DOCUMENT] STEP 1: Embedding and writing Parquet...")
+    imported_files = []
+    pending = []
+    prepared_chunks = 0
+
+    def flush(documents):
+        vectors = embedding.embed_documents([doc['content'] for doc in documents])
+        writer.add([document_row(doc, vector, dtype) for doc, vector in zip(documents, vectors)])
+
+    for documents, extra in batches:
+        prepared_chunks += len(documents)
+        if args.synthetic:
+            writer.add([document_row(doc, vector, dtype) for doc, vector in zip(documents, extra)])
+        else:
+            pending.extend(documents)
+            if args.syllabi:
+                imported_files.append(extra)
+            while len(pending) >= args.embed_batch:
+                flush(pending[:args.embed_batch])
+                del pending[:args.embed_batch]
+        print(f"      {prepared_chunks:,} chunks prepared", end='\r')
+    if pending:
+        flush(pending)
+    files = writer.close()
+    print(f"\n      [SUCCESS] {writer.rows:,} rows in {len(files)} file(s)\n")
+
+    if args.write_only:
+        print("[SUCCESS] Parquet written (--write-only)\n")
+        return
+
+    # ==================== STEP 2: STAGE ====================
+
+    print(f"[UPLOADING] STEP 2: Staging files in bucket '{args.bucket}'...")
+    stage = BulkImportStage(bucket=args.bucket, prefix=args.prefix)
+    staged = stage.upload(files, os.path.basename(os.path.normpath(args.out)), args.out)
+    print(f"      [SUCCESS] {len(staged)} file(s) under {args.prefix}/\n")
+
+    # ==================== STEP 3: IMPORT ====================
+
+    print("[MILVUS] STEP 3: Running bulk insert tasks...")
+    tasks = submit_imports(args.collection, staged)
+
+    def progress(done, total, rows, states):
+        print(f"      {done}/{total} tasks done, {rows:,} rows imported", end='\r')
+
+    result = wait_for_imports(tasks, on_progress=progress)
+    print()
+    for task in result['failed']:
+        print(f"      [ERROR] {task['remote']}: {task['failed_reason']}")
+    if not args.keep_files:
+        stage.remove(staged)
+
+    if args.syllabi and not result['failed']:
+        get_keyword_index().add_chunks([doc for prepared in imported_files for doc in prepared['documents']])
+        manifest = SyllabusManifest(args.manifest)
+        documents, chunks = record_syllabi(manifest, imported_files,
+                                           delete=lambda ids: delete_documents(target, ids))
+        print(f"      [SUCCESS] Recorded {len(imported_files)} file(s) in {manifest.path}")
+        if documents:
+            print(f"      [SUCCESS] Deleted {chunks} chunk(s) of {documents} replaced document(s)")
+    if result['rows']:
+        # Invalidates cached search results in the upload service (SEARCH_CACHE_GENERATION_FILE).
+        # --from-collection keeps document_ids, so the keyword index already has those chunks
+        get_search_cache().bump_generation()
+
+    print("\n" + "="*70)
+    print("[SUCCESS] BULK IMPORT COMPLETE" if not result['failed'] else "[ERROR] BULK IMPORT FINISHED WITH FAILURES")
+    print("="*70)
+    print(f"   Rows imported: {result['rows']:,} / {writer.rows:,}")
+    print(f"   Tasks: {len(result['completed'])} completed, {len(result['failed'])} failed")
+    print(f"   Import time: {result['seconds']}s")
+    print("="*70 + "\n")
+    if result['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Compare CPL Schema Profiles
+Recall@k and loaded memory for the standard layout (FLOAT32, VARCHAR(65535))
+against the compact profiles in utils/milvus_migrations.py, and how many
+chunks each fits on one query node. Run before migrating with --profile.
+
+Usage:
+    python compare_schema_profiles.py --synthetic 20000
+    python compare_schema_profiles.py --from-milvus 50000      (real vectors + real field lengths)
+    python compare_schema_profiles.py --synthetic 20000 --milvus-uri ./profiles.db   (Milvus Lite)
+    python compare_schema_profiles.py --node-memory-gb 32 --json profiles.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import OUTPUT_FIELDS
+from utils.ann_benchmark import (
+    synthetic_vectors, split_queries, exact_top_k, quantize, run_stand_in, run_milvus,
+    estimate_milvus_memory, load_milvus_rows, VECTOR_BYTES
+)
+from utils.milvus_migrations import SCHEMA_PROFILES
+
+load_dotenv()
+
+# Per-field payload when no real rows are sampled: ~600-1500 char chunks + metadata
+DEFAULT_FIELD_BYTES = {'text': 1000, 'pk': 40, 'document_id': 36, 'document_name': 30, 'document_type': 12,
+                       'student_name': 14, 'nuid': 9, 'target_course': 9, 'request_type': 12}
+# Per-VARCHAR offsets and INT64 columns, independent of declared max_length
+ROW_OVERHEAD_BYTES = 9 * 8 + 3 * 8
+SEARCH_PARAMS = {'HNSW': {'ef': 64}, 'IVF_SQ8': {'nprobe': 16}, 'IVF_FLAT': {'nprobe': 16}}
+
+
+def field_lengths(rows):
+    """Max and mean UTF-8 length per VARCHAR field in the sampled rows"""
+    lengths = {}
+    for name in OUTPUT_FIELDS:
+        sizes = [len(str(row.get(name) or '').encode('utf-8')) for row in rows if name in row]
+        if sizes and name not in ('page', 'start_index', 'sequence_number'):
+            lengths[name] = {'max': max(sizes), 'mean': sum(sizes) / len(sizes)}
+    return lengths
+
+
+def scalar_bytes(lengths, profile):
+    """Loaded scalar bytes per row; memory-mapped fields stay on disk"""
+    means = {name: v['mean'] for name, v in lengths.items()} if lengths else DEFAULT_FIELD_BYTES
+    resident = sum(size for name, size in means.items() if name not in SCHEMA_PROFILES[profile]['mmap_fields'])
+    return resident + ROW_OVERHEAD_BYTES
+
+
+def profile_config(profile):
+    index = SCHEMA_PROFILES[profile]['vector_index']
+    params = dict(index['params'])
+    params.update(SEARCH_PARAMS.get(index['index_type'], {}))
+    return {'index_type': index['index_type'], 'params': params}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPL schema profiles (recall vs memory)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--synthetic', type=int, default=20000, help="Number of synthetic 768-d vectors")
+    source.add_argument('--vectors', help="Path to an exported (n, d) float32 .npy file")
+    source.add_argument('--from-milvus', type=int, help="Sample this many rows from the CPL collection")
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--profile', action='append', choices=sorted(SCHEMA_PROFILES), help="Only these profiles")
+    parser.add_argument('--node-memory-gb', type=float, default=16.0, help="Query node memory for capacity")
+    parser.add_argument('--milvus-uri', help="Measure recall in Milvus / Milvus Lite instead of in-process")
+    parser.add_argument('--milvus-token', default=os.getenv('MILVUS_BENCH_TOKEN'))
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    lengths = None
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+        source_name = args.vectors
+    elif args.from_milvus:
+        rows = load_milvus_rows(args.from_milvus, output_fields=OUTPUT_FIELDS + ['vector'])
+        vectors = np.asarray([row['vector'] for row in rows], dtype=np.float32)
+        lengths = field_lengths(rows)
+        source_name = f"milvus ({len(vectors)} rows)"
+    else:
+        vectors = synthetic_vectors(args.synthetic)
+        source_name = f"synthetic ({args.synthetic} x 768)"
+
+    base, queries = split_queries(vectors, args.queries)
+    n, dim = base.shape
+    node_bytes = args.node_memory_gb * 2 ** 30
+
+    print("\n" + "="*96)
+    print("[QUERY] SCHEMA PROFILE COMPARISON")
+    print("="*96)
+    print(f"   Data: {source_name}   Base: {n}  Queries: {len(queries)}  k: {args.k}")
+    print(f"   Scalar payload: {scalar_bytes(lengths, 'standard'):.0f} bytes/row "
+          f"({'measured' if lengths else 'assumed'}, standard profile)")
+    print("   Computing exact float32 ground truth...")
+    truth = exact_top_k(base, queries, args.k)
+
+    if lengths:
+        print("\n   VARCHAR sizing (observed max vs compact max_length):")
+        compact = SCHEMA_PROFILES['compact']['varchar']
+        for name, observed in lengths.items():
+            state = '[SUCCESS]' if observed['max'] <= compact.get(name, 65535) else '[ERROR] too long'
+            print(f"      {name:<16} max {observed['max']:>6}  mean {observed['mean']:>8.1f}  "
+                  f"limit {compact.get(name, 65535):>6}  {state}")
+
+    results = []
+    print(f"\n   {'profile':<13} {'vectors':<9} {'index':<9} {'recall':>7} {'p99 ms':>8} {'MB/100k':>9} "
+          f"{'chunks/node':>12} {'vs std':>7}")
+    print("   " + "-"*93)
+    for profile in args.profile or list(SCHEMA_PROFILES):
+        dtype = SCHEMA_PROFILES[profile]['vector_dtype']
+        config = profile_config(profile)
+        try:
+            if args.milvus_uri:
+                result = run_milvus(config, base, queries, truth, args.k, args.milvus_uri,
+                                    args.milvus_token, vector_dtype=dtype)
+            else:
+                result = run_stand_in(config, quantize(base, dtype), quantize(queries, dtype), truth, args.k)
+        except ImportError as e:
+            # hnswlib (stand-in) or ml_dtypes (BF16 search) missing: FLAT still shows the precision loss
+            print(f"   {profile:<13} {dtype:<9} {config['index_type']:<9} ({e.name} not installed; FLAT instead)")
+            config = {'index_type': 'FLAT', 'params': {}}
+            result = run_stand_in(config, quantize(base, dtype), quantize(queries, dtype), truth, args.k)
+
+        # Memory of the index the profile deploys, even when recall came from the FLAT fallback
+        deployed = profile_config(profile)
+        build_params = {key: v for key, v in deployed['params'].items() if key not in ('ef', 'nprobe')}
+        vector_bytes = estimate_milvus_memory(deployed['index_type'], build_params, n, dim, VECTOR_BYTES[dtype])
+        row_bytes = vector_bytes / n + scalar_bytes(lengths, profile)
+        result.update({
+            'profile': profile,
+            'vector_dtype': dtype,
+            'bytes_per_row': round(row_bytes, 1),
+            'mb_per_100k': round(row_bytes * 100000 / 2 ** 20, 1),
+            'chunks_per_node': int(node_bytes / row_bytes),
+        })
+        results.append(result)
+
+    standard = next((r for r in results if r['profile'] == 'standard'), None)
+    for result in results:
+        ratio = result['chunks_per_node'] / standard['chunks_per_node'] if standard else 1.0
+        result['capacity_vs_standard'] = round(ratio, 2)
+        print(f"   {result['profile']:<13} {result['vector_dtype']:<9} {result['index_type']:<9} "
+              f"{result['recall']:>7.4f} {result['p99_ms']:>8.2f} {result['mb_per_100k']:>9.1f} "
+              f"{result['chunks_per_node']:>12,} {ratio:>6.2f}x")
+
+    print("\n   Note: VARCHAR max_length is a cap, not an allocation; the compact lengths reject")
+    print("   oversized rows at insert. The saving comes from 16-bit / SQ8 vectors and mmap'd text.")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'source': source_name, 'base': n, 'queries': len(queries), 'k': args.k,
+                       'node_memory_gb': args.node_memory_gb, 'field_lengths': lengths,
+                       'results': results}, f, indent=2)
+        print(f"\n[SUCCESS] Results written to {args.json}")
+
+    print("="*96 + "\n")
+
+
+if __name__ == '__main__':
+    main()
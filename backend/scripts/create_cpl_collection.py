@@ -1,14 +1,51 @@
 """
 Create CPL Milvus Collection - FIXED VERSION
 Uses L2 + HNSW to match watsonx.ai's expectations
+
+Layouts:
+    flat           One population for syllabi and student documents (v5 default)
+    doc-type       Partitions 'nu_syllabus' and 'student_documents'; searches
+                   filtered by document_type scan only their partition
+    partition-key  Milvus hashes rows by --partition-key-field (nuid or
+                   target_course); filters on that field prune partitions
+
+Milvus does not allow manual partitions on a collection that has a partition
+key, so doc-type and partition-key are alternative layouts.
+
+Creates the latest schema version from utils/milvus_migrations.py (vector +
+scalar indexes) and points the stable alias at it. To upgrade a collection
+that already holds data, use migrate_collection.py instead.
+
+Usage:
+    python create_cpl_collection.py
+    python create_cpl_collection.py --layout doc-type
+    python create_cpl_collection.py --layout partition-key --partition-key-field nuid
 """
 
-from pymilvus import connections, FieldSchema, CollectionSchema, DataType, Collection, utility
+from pymilvus import connections, utility
 from dotenv import load_dotenv
+import argparse
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.milvus_migrations import (
+    create_collection, collection_name, point_alias,
+    COLLECTION_ALIAS, DOC_TYPE_PARTITIONS, LATEST_VERSION, SCHEMA_PROFILES
+)
 
 load_dotenv()
 
+parser = argparse.ArgumentParser(description="Create the CPL Milvus collection")
+parser.add_argument('--name', help="Default: cpl_documents_v{latest}[_{profile}]")
+parser.add_argument('--alias', default=COLLECTION_ALIAS, help="Stable alias to point at the new collection ('' to skip)")
+parser.add_argument('--layout', choices=('flat', 'doc-type', 'partition-key'), default='flat')
+parser.add_argument('--partition-key-field', choices=('nuid', 'target_course'), default='nuid')
+parser.add_argument('--num-partitions', type=int, default=64, help="Partition-key layout only")
+parser.add_argument('--profile', choices=sorted(SCHEMA_PROFILES), default='standard',
+                    help="compact profiles are not readable by Prompt Lab (see utils/milvus_migrations.py)")
+args = parser.parse_args()
+
 print("\n" + "="*70)
 print("[UPLOADING] CREATING CPL COLLECTION - WATSONX.AI COMPATIBLE")
 print("="*70 + "\n")
@@ -33,9 +70,9 @@ except Exception as e:
 
 # ==================== STEP 2: COLLECTION NAME ====================
 
-COLLECTION_NAME = "cpl_documents_v5"  # ← New version
+COLLECTION_NAME = args.name or collection_name(LATEST_VERSION, args.profile)
 
-print(f"[REQUEST] STEP 2: Collection name: {COLLECTION_NAME}\n")
+print(f"[REQUEST] STEP 2: Collection name: {COLLECTION_NAME} (layout: {args.layout})\n")
 
 # Check if collection exists
 if utility.has_collection(COLLECTION_NAME):
@@ -50,148 +87,50 @@ if utility.has_collection(COLLECTION_NAME):
         connections.disconnect("default")
         exit(0)
 
-# ==================== STEP 3: DEFINE SCHEMA ====================
-
-print("📐 STEP 3: Defining schema...")
-print("   Matching watsonx.ai's expected field types\n")
-
-fields = [
-    # PRIMARY KEY
-    FieldSchema(
-        name="pk",
-        dtype=DataType.VARCHAR,
-        is_primary=True,
-        auto_id=False,
-        max_length=65535  # ← Match watsonx.ai
-    ),
-    
-    # CONTENT FIELD
-    FieldSchema(
-        name="text",
-        dtype=DataType.VARCHAR,
-        max_length=65535  # ← Match watsonx.ai
-    ),
-    
-    # VECTOR FIELD
-    FieldSchema(
-        name="vector",
-        dtype=DataType.FLOAT_VECTOR,
-        dim=768
-    ),
-    
-    # DOCUMENT METADATA
-    FieldSchema(
-        name="document_id",
-        dtype=DataType.VARCHAR,
-        max_length=65535  # ← Match watsonx.ai
-    ),
-    
-    FieldSchema(
-        name="document_name",
-        dtype=DataType.VARCHAR,
-        max_length=65535  # ← Match watsonx.ai
-    ),
-    
-    FieldSchema(
-        name="document_type",
-        dtype=DataType.VARCHAR,
-        max_length=500
-    ),
-    
-    # CHUNK METADATA - Using INT64 to match watsonx.ai
-    FieldSchema(
-        name="page",
-        dtype=DataType.INT64  # ← Changed from INT32
-    ),
-    
-    FieldSchema(
-        name="start_index",
-        dtype=DataType.INT64  # ← Changed from INT32
-    ),
-    
-    FieldSchema(
-        name="sequence_number",
-        dtype=DataType.INT64  # ← Changed from INT32
-    ),
-    
-    # STUDENT CONTEXT
-    FieldSchema(
-        name="student_name",
-        dtype=DataType.VARCHAR,
-        max_length=500
-    ),
-    
-    FieldSchema(
-        name="nuid",
-        dtype=DataType.VARCHAR,
-        max_length=100
-    ),
-    
-    FieldSchema(
-        name="target_course",
-        dtype=DataType.VARCHAR,
-        max_length=500
-    ),
-    
-    FieldSchema(
-        name="request_type",
-        dtype=DataType.VARCHAR,
-        max_length=200
-    ),
-]
-
-schema = CollectionSchema(
-    fields=fields,
-    description="CPL documents - watsonx.ai compatible (L2 + HNSW)",
-    enable_dynamic_field=False
-)
-
-print("   [SUCCESS] Schema defined with 13 fields")
-print("   [SUCCESS] Using INT64 for numeric fields (matches watsonx.ai)")
-print("   [SUCCESS] Using max_length=65535 for key VARCHAR fields\n")
-
-# ==================== STEP 4: CREATE COLLECTION ====================
-
-print(f"🔨 STEP 4: Creating collection '{COLLECTION_NAME}'...")
-
-collection = Collection(
-    name=COLLECTION_NAME,
-    schema=schema,
-    using='default'
+# ==================== STEP 3: CREATE COLLECTION & INDEXES ====================
+
+print(f"🔨 STEP 3: Creating collection '{COLLECTION_NAME}' (schema v{LATEST_VERSION}, {args.profile} profile)...")
+if args.profile == 'standard':
+    print("   Matching watsonx.ai's expected field types (INT64, max_length=65535 key fields)")
+else:
+    print(f"   Compact layout: {SCHEMA_PROFILES[args.profile]['vector_dtype']} vectors, right-sized VARCHARs")
+
+collection = create_collection(
+    COLLECTION_NAME,
+    version=LATEST_VERSION,
+    layout=args.layout,
+    partition_key_field=args.partition_key_field,
+    num_partitions=args.num_partitions,
+    profile=args.profile
 )
 
-print(f"   [SUCCESS] Collection created!\n")
+print(f"   [SUCCESS] Collection created with {len(collection.schema.fields)} fields")
+if args.layout == 'doc-type':
+    print(f"   [SUCCESS] Partitions: {', '.join(DOC_TYPE_PARTITIONS)}")
+elif args.layout == 'partition-key':
+    print(f"   [SUCCESS] Partition key: {args.partition_key_field} ({args.num_partitions} partitions)")
+print(f"   [SUCCESS] Vector index ({SCHEMA_PROFILES[args.profile]['vector_index']['index_type']}) and scalar indexes created\n")
 
-# ==================== STEP 5: CREATE INDEXES ====================
+# ==================== STEP 4: ALIAS ====================
 
-print("[QUERY] STEP 5: Creating indexes...")
-
-# Vector index - MATCHING WATSONX.AI's SETTINGS
-print("   Creating vector index (L2 + HNSW)...")
-vector_index_params = {
-    "metric_type": "L2",              # ← CRITICAL: Match watsonx.ai
-    "index_type": "HNSW",             # ← CRITICAL: Match watsonx.ai
-    "params": {"M": 8, "efConstruction": 64}
-}
-
-collection.create_index(
-    field_name="vector",
-    index_params=vector_index_params
-)
-print("      [SUCCESS] Vector index created (L2 + HNSW)\n")
+if args.alias:
+    print(f"🔗 STEP 4: Pointing alias '{args.alias}' at {COLLECTION_NAME}...")
+    point_alias(args.alias, COLLECTION_NAME)
+    print("   [SUCCESS] Alias updated\n")
 
-# ==================== STEP 6: LOAD COLLECTION ====================
+# ==================== STEP 5: LOAD COLLECTION ====================
 
-print("[MILVUS] STEP 6: Loading collection...")
+print("[MILVUS] STEP 5: Loading collection...")
 collection.load()
 print("   [SUCCESS] Collection loaded into memory\n")
 
-# ==================== STEP 7: VERIFY ====================
+# ==================== STEP 6: VERIFY ====================
 
-print("[SUCCESS] STEP 7: Verifying collection...")
+print("[SUCCESS] STEP 6: Verifying collection...")
 
 print(f"   Collection: {COLLECTION_NAME}")
 print(f"   Total fields: {len(collection.schema.fields)}")
+print(f"   Partitions: {', '.join(p.name for p in collection.partitions)}")
 
 print("\n   [REQUEST] Index Configuration:")
 for index in collection.indexes:
@@ -207,7 +146,7 @@ print("   • index_type: HNSW (was IVF_FLAT)")
 print("   • INT64 for numeric fields (was INT32)")
 print("   • max_length: 65535 for key fields")
 print("\nNext steps:")
-print(f"   1. Update watson_upload.py to use '{COLLECTION_NAME}'")
+print(f"   1. Set MILVUS_COLLECTION={args.alias or COLLECTION_NAME} for the upload service and scripts")
 print("   2. Re-upload your documents")
 print("   3. Create new vector index in watsonx.ai")
 print("   4. Test in Prompt Lab")
@@ -0,0 +1,128 @@
+"""
+Export and Audit the CPL Collection
+Streams every chunk with query_iterator (bounded memory at any collection
+size) to NDJSON and/or Parquet, and audits chunk counts and sizes on the fly.
+Parquet exports use the bulk-import layout, so bulk_import.py-style loads can
+restore them into another collection.
+
+Usage:
+    python export_collection.py                                   (audit only)
+    python export_collection.py --ndjson chunks.ndjson
+    python export_collection.py --parquet chunks.parquet --vectors
+    python export_collection.py --documents documents.ndjson --json audit.json
+    python export_collection.py --expr "document_type == 'nu_syllabus'"
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+from pymilvus import connections, Collection, utility
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import COLLECTION_NAME, vector_dtype
+from utils.collection_export import NdjsonSink, ParquetSink, CollectionAudit, export_collection
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream-export and audit the CPL collection")
+    parser.add_argument('--collection', default=COLLECTION_NAME)
+    parser.add_argument('--ndjson', help="Write every chunk as NDJSON")
+    parser.add_argument('--parquet', help="Write every chunk to one Parquet file")
+    parser.add_argument('--vectors', action='store_true', help="Include the vector field in exports")
+    parser.add_argument('--documents', help="Write per-document stats as NDJSON")
+    parser.add_argument('--expr', default="pk != ''", help="Filter expression")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Rows per query_iterator page")
+    parser.add_argument('--top', type=int, default=10, help="Largest / incomplete documents to show")
+    parser.add_argument('--json', help="Write the audit summary to this file")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("[MILVUS] COLLECTION EXPORT & AUDIT")
+    print("="*70 + "\n")
+
+    connections.connect(
+        alias="default",
+        host=os.getenv('MILVUS_HOST'),
+        port=int(os.getenv('MILVUS_PORT', 19530)),
+        user=os.getenv('MILVUS_USERNAME'),
+        password=os.getenv('MILVUS_PASSWORD'),
+        secure=True
+    )
+    if not utility.has_collection(args.collection):
+        print(f"[ERROR] Collection '{args.collection}' does not exist!\n")
+        sys.exit(1)
+
+    collection = Collection(args.collection)
+    collection.load()
+    fields = [f for f in collection.schema.fields if args.vectors or f.name != 'vector']
+    print(f"   Collection: {args.collection} (~{collection.num_entities:,} chunks)")
+    print(f"   Fields: {', '.join(f.name for f in fields)}")
+    print(f"   Filter: {args.expr}\n")
+
+    sinks = []
+    if args.ndjson:
+        sinks.append(NdjsonSink(args.ndjson, vector_dtype(collection.schema)))
+    if args.parquet:
+        sinks.append(ParquetSink(args.parquet, fields))
+
+    documents_file = open(args.documents, 'w', encoding='utf-8') if args.documents else None
+    on_document = (lambda doc: documents_file.write(json.dumps(doc, default=str) + '\n')) if documents_file else None
+    audit = CollectionAudit(top=args.top, on_document=on_document)
+
+    started = time.perf_counter()
+
+    def progress(rows):
+        print(f"      {rows:,} chunks read", end='\r')
+
+    try:
+        rows = export_collection(collection, fields, sinks, audit, args.batch_size, args.expr, progress)
+    finally:
+        if documents_file:
+            documents_file.close()
+    summary = audit.finish()
+    seconds = time.perf_counter() - started
+    print()
+
+    sizes = summary['chunk_bytes']
+    print("\n" + "="*70)
+    print("[SUCCESS] AUDIT")
+    print("="*70)
+    print(f"   Chunks: {summary['chunks']:,}   Documents: {summary['documents']:,}   "
+          f"Chunks/document: {summary['chunks_per_document']}")
+    print(f"   Chunk bytes: min {sizes['min']}  p50 {sizes['p50']}  p95 {sizes['p95']}  "
+          f"max {sizes['max']}  mean {sizes['mean']}")
+    print(f"   Text total: {summary['text_bytes'] / 2 ** 20:.1f} MB   Empty chunks: {summary['empty_text']}")
+    for document_type, count in summary['by_type'].items():
+        print(f"      {document_type}: {count:,}")
+    print(f"\n   Largest documents:")
+    for doc in summary['largest_documents']:
+        print(f"      {doc['chunks']:>6}  {doc['document_name']} ({doc['document_id']})")
+    if summary['incomplete_documents']:
+        print(f"\n   [WARNING]  {summary['incomplete_documents']} document(s) with missing or duplicate chunks:")
+        for doc in summary['incomplete_sample']:
+            print(f"      {doc['document_name']} ({doc['document_id']}): "
+                  f"{doc['missing_sequence_numbers']} missing, {doc['duplicates']} duplicate")
+    if summary['split_documents']:
+        print(f"   [WARNING]  {summary['split_documents']} document(s) not contiguous in pk order "
+              f"(per-document stats split)")
+    for path in (args.ndjson, args.parquet, args.documents):
+        if path:
+            print(f"   Wrote: {path}")
+    print(f"   Time: {seconds:.1f}s ({rows / seconds if seconds else 0:,.0f} chunks/s)")
+    print("="*70 + "\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+        print(f"[SUCCESS] Audit written to {args.json}\n")
+
+    connections.disconnect("default")
+
+
+if __name__ == '__main__':
+    main()
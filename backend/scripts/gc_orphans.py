@@ -0,0 +1,116 @@
+"""
+Garbage-Collect Orphaned CPL Chunks
+Deletes chunks whose document_id has no Iceberg request and no syllabus
+manifest entry (failed uploads, superseded syllabi, check.py test data), then
+compacts the collection. Dry run unless --apply; see utils/milvus_gc.py.
+
+nu_syllabus chunks are skipped unless --include-syllabi is given: syllabi
+uploaded before the manifest existed have no entry and would look orphaned.
+
+Unlike flush.py this never drops the collection.
+
+Usage:
+    python gc_orphans.py                          (report only)
+    python gc_orphans.py --apply
+    python gc_orphans.py --apply --skip-type student_syllabus --confirm-after 120
+    python gc_orphans.py --apply --include-syllabi   (after upload_nu_syllabi.py --sync)
+    python gc_orphans.py --apply --no-compact --json gc.json
+"""
+
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import get_milvus_handler
+from handlers.iceberg_handler import get_iceberg_handler
+from utils.keyword_index import get_keyword_index
+from utils.search_cache import get_search_cache
+from utils.syllabus_ingest import SyllabusManifest
+from utils.milvus_gc import collect_garbage
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete orphaned chunks from the CPL collection")
+    parser.add_argument('--apply', action='store_true', help="Delete (default: report only)")
+    parser.add_argument('--collection', help="Default: MILVUS_COLLECTION")
+    parser.add_argument('--manifest', help="Syllabus manifest (default: SYLLABUS_MANIFEST_PATH)")
+    parser.add_argument('--skip-type', action='append', default=[],
+                        help="Never collect this document_type (nu_syllabus is always skipped unless --include-syllabi)")
+    parser.add_argument('--include-syllabi', action='store_true',
+                        help="Also collect nu_syllabus chunks missing from the manifest")
+    parser.add_argument('--confirm-after', type=int, default=60,
+                        help="Seconds to wait before re-checking candidates against Iceberg")
+    parser.add_argument('--batch-size', type=int, default=500, help="document_ids per delete(expr)")
+    parser.add_argument('--no-compact', action='store_true')
+    parser.add_argument('--show', type=int, default=20, help="Orphans to list")
+    parser.add_argument('--json', help="Write the full orphan report to this file")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("[MILVUS] ORPHAN CHUNK GC" + ("" if args.apply else " (DRY RUN)"))
+    print("="*70 + "\n")
+
+    milvus = get_milvus_handler()
+    if args.collection:
+        milvus.collection_name = args.collection
+    manifest = SyllabusManifest(args.manifest)
+    skip_types = set(args.skip_type)
+    if not args.include_syllabi:
+        skip_types.add('nu_syllabus')
+    print(f"   Collection: {milvus.collection_name}")
+    print(f"   Manifest: {manifest.path} ({len(manifest.files)} file(s))")
+    print(f"   Skipped types: {', '.join(sorted(skip_types)) or 'none'}\n")
+
+    try:
+        result = collect_garbage(
+            milvus, get_iceberg_handler(), manifest,
+            keyword_index=get_keyword_index(),
+            apply=args.apply,
+            confirm_after=args.confirm_after,
+            batch_size=args.batch_size,
+            skip_types=tuple(skip_types),
+            compact=not args.no_compact
+        )
+    except (RuntimeError, ConnectionError) as e:
+        print(f"[ERROR] {str(e)}\n")
+        sys.exit(1)
+
+    orphans = result['orphans']
+    print(f"\n   {'document_id':<40} {'type':<18} {'chunks':>7}")
+    print("   " + "-"*67)
+    for document_id, info in sorted(orphans.items(), key=lambda item: -item[1]['chunks'])[:args.show]:
+        print(f"   {str(document_id):<40} {str(info['document_type']):<18} {info['chunks']:>7}")
+    if len(orphans) > args.show:
+        print(f"   ... {len(orphans) - args.show} more")
+
+    print("\n" + "="*70)
+    print("[SUCCESS] GC COMPLETE" if args.apply else "[SUCCESS] DRY RUN COMPLETE (re-run with --apply)")
+    print("="*70)
+    print(f"   Orphaned documents: {len(orphans)}")
+    for document_type, chunks in sorted(result['by_type'].items(), key=lambda item: str(item[0])):
+        print(f"      {document_type}: {chunks} chunk(s)")
+    if args.apply:
+        print(f"   Deleted: {result['documents_deleted']} document(s), {result['chunks_deleted']} chunk(s)")
+        print(f"   Compaction: {result['compaction'] or 'skipped'}")
+    print(f"   Time: {result['seconds']}s")
+    print("="*70 + "\n")
+
+    if args.apply and result['documents_deleted']:
+        # Cached searches may still return deleted chunks
+        get_search_cache().bump_generation()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"[SUCCESS] Report written to {args.json}\n")
+
+    milvus.close()
+
+
+if __name__ == '__main__':
+    main()
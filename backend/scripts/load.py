@@ -1,5 +1,8 @@
 from pymilvus import connections, Collection, utility
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import COLLECTION_NAME
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,10 +16,10 @@ connections.connect(
     secure=True
 )
 
-collection = Collection("cpl_documents_v3")
+collection = Collection(COLLECTION_NAME)
 
 # Check load state
-load_state = utility.load_state("cpl_documents_v3")
+load_state = utility.load_state(COLLECTION_NAME)
 print(f"Collection load state: {load_state}")
 
 # Load the collection
@@ -25,7 +28,7 @@ collection.load()
 print("[SUCCESS] Collection loaded!")
 
 # Verify
-load_state = utility.load_state("cpl_documents_v3")
+load_state = utility.load_state(COLLECTION_NAME)
 print(f"Collection load state after: {load_state}")
 
 connections.disconnect("default")
\ No newline at end of file
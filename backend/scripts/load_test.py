@@ -0,0 +1,345 @@
+"""
+Offline Load Test
+Serves the upload service (watson_upload.py) and the student lookup
+(simple_server.py) on local threaded servers with every cloud backend
+replaced by its embedded implementation (handlers/local_storage.py) or an
+in-process stand-in (utils/local_backends.py), then drives a
+weighted mix of uploads, searches, request listings, status updates and
+student lookups from concurrent clients. Reports throughput and
+p50/p95/p99 latency per endpoint, so a concurrency change can be checked on a
+laptop before it meets watsonx.ai, Milvus, COS and Presto.
+
+Usage:
+    python load_test.py                                     # 8 clients, 30 s
+    python load_test.py --concurrency 32 --duration 60
+    python load_test.py --mix upload=1,search=10 --latency embed=120,milvus=25
+    python load_test.py --errors milvus=0.02,presto=0.01 --json load.json
+
+--latency sets each backend's mean call latency in ms (+/- 25% jitter),
+--errors the fraction of its calls that fail. Defaults approximate the
+managed services: embed=80, milvus=20, cos=40, presto=150.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tests', 'backend', 'benchmarks', 'fixtures')
+
+BACKENDS = ('embed', 'milvus', 'cos', 'presto')
+DEFAULT_LATENCY = {'embed': 80.0, 'milvus': 20.0, 'cos': 40.0, 'presto': 150.0}
+DEFAULT_MIX = {'upload': 1, 'search': 6, 'list': 2, 'update': 1, 'student': 1}
+ENDPOINTS = {
+    'upload': 'POST /api/upload-to-watsonx',
+    'search': 'POST /api/search',
+    'list': 'GET /api/get-requests',
+    'update': 'PUT /api/update-status',
+    'student': 'POST /query-student',
+}
+
+COURSES = ['PJM 5900', 'CS 5800', 'DS 5110']
+REQUEST_TYPES = ['Credit Transfer', 'Experience-based waiver', 'Portfolio review']
+UPLOAD_FILES = ['small.pdf', 'small.docx', 'small.txt', 'medium.txt']
+SEARCH_QUERIES = [
+    'risk management and stakeholder analysis',
+    'students design algorithms using dynamic programming',
+    'hypothesis testing with weekly lab assignments',
+    'query optimization and indexing in relational databases',
+    'PJM 5900',
+    'CS 5800',
+    '"critical path"',
+    'agile sprints covered in PJM 5900',
+]
+
+
+def parse_spec(text, names, cast=float):
+    """'embed=80,milvus=20' -> {'embed': 80.0, 'milvus': 20.0}"""
+    spec = {}
+    for part in filter(None, (text or '').split(',')):
+        name, _, value = part.partition('=')
+        name = name.strip()
+        if name not in names or not value:
+            raise ValueError(f"Expected name=value with name in {', '.join(names)}: {part!r}")
+        spec[name] = cast(value)
+    return spec
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# ==================== SETUP ====================
+
+def install_stand_ins(work_dir, latency, errors, seed):
+    """
+    Point both services at local stand-ins
+
+    Returns:
+        tuple: (watson_upload module, simple_server module)
+    """
+    # Never the deployment's keyword index or cache generation: load-test uploads
+    # would land in the real index and every bump would flush the real search cache
+    os.environ['KEYWORD_INDEX_PATH'] = os.path.join(work_dir, 'keyword_index.ndjson')
+    os.environ['SEARCH_CACHE_GENERATION_FILE'] = os.path.join(work_dir, 'search_generation')
+    os.environ.setdefault('PROFILE_DIR', os.path.join(work_dir, 'profiles'))
+    os.environ['TRACE_EXPORTER'] = 'none'
+
+    from handlers.local_storage import NumpyVectorStore, FileObjectStore, SQLiteRequestStore
+    from utils.local_backends import Faults, HashEmbeddings, PrestoRestStandIn, with_faults, FAULT_OPERATIONS
+    from services import watson_upload as upload
+    from services import simple_server
+
+    faults = {
+        name: Faults(latency.get(name, 0.0), error_rate=errors.get(name, 0.0), seed=seed + i)
+        for i, name in enumerate(BACKENDS)
+    }
+    store = SQLiteRequestStore(os.path.join(work_dir, 'requests.sqlite3'))
+    upload.embedding.set(HashEmbeddings(faults=faults['embed']))
+    upload.milvus.set(with_faults(NumpyVectorStore(os.path.join(work_dir, 'vectors')),
+                                  faults['milvus'], FAULT_OPERATIONS['vector']))
+    upload.cos.set(with_faults(FileObjectStore(os.path.join(work_dir, 'objects')),
+                               faults['cos'], FAULT_OPERATIONS['object']))
+    upload.iceberg.set(with_faults(store, faults['presto'], FAULT_OPERATIONS['request']))
+    simple_server.session = PrestoRestStandIn(store, faults=faults['presto'])
+    simple_server.LOCAL_REQUESTS = False  # exercise the Presto REST path, whatever STORAGE_BACKEND says
+    return upload, simple_server
+
+
+def seed_reference_syllabi(upload):
+    """NU reference syllabus chunks for COURSES, so uploads compute coverage"""
+    from utils.ingest_benchmark import syllabus_lines
+    from utils.local_backends import HashEmbeddings
+
+    embedder = HashEmbeddings()  # same vectors as the service's, without its injected faults
+
+    for i, course in enumerate(COURSES):
+        text = '\n'.join('\n'.join(lines) for lines in syllabus_lines(3, seed=100 + i))
+        documents, _, _ = upload.build_documents(upload.text_splitter.split_text(text), {
+            'document_id': f"nu-reference-{i}",
+            'filename': f"{course.replace(' ', '_')}_syllabus.pdf",
+            'document_type': 'nu_syllabus',
+            'student_name': 'Northeastern University',
+            'nuid': 'N/A',
+            'request_type': 'Reference',
+            'target_course': course
+        })
+        upload.milvus.insert_documents(documents, embedder.embed_documents([d['content'] for d in documents]))
+        upload.keyword_index.add_chunks(documents)
+
+
+def serve(app):
+    """Threaded WSGI server on a free port; returns (server, base url)"""
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# ==================== LOAD ====================
+
+class Workload:
+    """The request mix; shares the request ids and NUIDs created by uploads"""
+
+    def __init__(self, upload_url, student_url, fixtures_dir, mix):
+        self.upload_url = upload_url
+        self.student_url = student_url
+        self.ops = [op for op in mix if mix[op] > 0]
+        self.weights = [mix[op] for op in self.ops]
+        self.files = {}
+        for name in UPLOAD_FILES:
+            with open(os.path.join(fixtures_dir, name), 'rb') as f:
+                self.files[name] = f.read()
+        self.request_ids = []
+        self.nuids = []
+        self._lock = threading.Lock()
+
+    def _known(self, values, rng):
+        with self._lock:
+            return rng.choice(values) if values else None
+
+    def upload(self, session, rng):
+        name = rng.choice(UPLOAD_FILES)
+        nuid = f"{rng.randrange(10**9):09d}"
+        kind = rng.choice(['syllabus', 'syllabus', 'transcript', 'resume'])
+        response = session.post(f"{self.upload_url}/api/upload-to-watsonx", files={
+            'file': (f"{kind}_{nuid}.{name.split('.')[-1]}", self.files[name])
+        }, data={
+            'studentName': f"Load Student {nuid[-4:]}",
+            'nuid': nuid,
+            'requestType': rng.choice(REQUEST_TYPES),
+            'targetCourse': rng.choice(COURSES)
+        })
+        if response.ok and response.json().get('request_id'):
+            with self._lock:
+                self.request_ids.append(response.json()['request_id'])
+                self.nuids.append(nuid)
+        return response
+
+    def search(self, session, rng):
+        body = {'query': rng.choice(SEARCH_QUERIES), 'topK': rng.choice([5, 10]),
+                'effort': rng.choice(['fast', 'balanced', 'balanced', 'thorough'])}
+        if rng.random() < 0.3:
+            body['filters'] = {'target_course': rng.choice(COURSES)}
+        return session.post(f"{self.upload_url}/api/search", json=body)
+
+    def list(self, session, rng):
+        return session.get(f"{self.upload_url}/api/get-requests")
+
+    def update(self, session, rng):
+        request_id = self._known(self.request_ids, rng) or 'REQ000000'
+        return session.put(f"{self.upload_url}/api/update-status", json={
+            'requestId': request_id,
+            'status': rng.choice(['approved', 'rejected', 'in_review']),
+            'credits': rng.choice([None, 3, 4]),
+            'notes': 'Reviewed under load',
+            'updatedBy': 'Load Advisor'
+        })
+
+    def student(self, session, rng):
+        nuid = self._known(self.nuids, rng) or '000000000'
+        return session.post(f"{self.student_url}/query-student", json={'nuid': nuid})
+
+
+def client(workload, results, started, warmup_until, stop_at, seed):
+    """One virtual user: back-to-back requests until stop_at"""
+    import requests
+
+    rng = random.Random(seed)
+    session = requests.Session()
+    samples = []
+    while time.perf_counter() < stop_at:
+        op = rng.choices(workload.ops, workload.weights)[0]
+        begin = time.perf_counter()
+        try:
+            ok = getattr(workload, op)(session, rng).ok
+        except Exception:
+            ok = False
+        end = time.perf_counter()
+        if begin >= warmup_until:
+            samples.append((op, end - begin, ok, end - started))
+    results.extend(samples)
+
+
+def run_load(workload, concurrency, duration, warmup, seed):
+    """Returns the samples (op, seconds, ok, finished at) recorded after warm-up"""
+    results = []
+    started = time.perf_counter()
+    warmup_until = started + warmup
+    stop_at = warmup_until + duration
+    threads = [
+        threading.Thread(target=client, args=(workload, results, started, warmup_until, stop_at, seed + i), daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(samples, duration):
+    """{endpoint: {'count', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}} plus 'total'"""
+    groups = {}
+    for op, seconds, ok, _ in samples:
+        groups.setdefault(op, []).append((seconds, ok))
+    groups['total'] = [(seconds, ok) for _, seconds, ok, _ in samples]
+
+    summary = {}
+    for op, rows in groups.items():
+        if not rows:
+            continue
+        latencies = [seconds * 1000.0 for seconds, _ in rows]
+        summary[op] = {
+            'count': len(rows),
+            'errors': sum(1 for _, ok in rows if not ok),
+            'rps': round(len(rows) / duration, 2),
+            'p50_ms': round(percentile(latencies, 0.50), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'p99_ms': round(percentile(latencies, 0.99), 1),
+            'max_ms': round(max(latencies), 1),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test both services against in-process backend stand-ins")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients")
+    parser.add_argument('--duration', type=float, default=30.0, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Unmeasured seconds before that")
+    parser.add_argument('--mix', help="Request weights, e.g. upload=1,search=6,list=2,update=1,student=1")
+    parser.add_argument('--latency', help="Mean backend latency in ms, e.g. embed=80,milvus=20,cos=40,presto=150")
+    parser.add_argument('--errors', help="Backend failure rates, e.g. milvus=0.01")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the mix and the injected faults")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="Upload files (benchmark fixtures)")
+    parser.add_argument('--json', help="Also write the summary here")
+    args = parser.parse_args()
+
+    try:
+        mix = dict(DEFAULT_MIX, **parse_spec(args.mix, tuple(ENDPOINTS), cast=int)) if args.mix else dict(DEFAULT_MIX)
+        latency = dict(DEFAULT_LATENCY, **parse_spec(args.latency, BACKENDS))
+        errors = parse_spec(args.errors, BACKENDS)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print("\n" + "="*70)
+    print("[LOAD] OFFLINE LOAD TEST")
+    print("="*70)
+    print(f"   Clients: {args.concurrency}   Duration: {args.duration:g}s (+{args.warmup:g}s warm-up)")
+    print(f"   Mix: {', '.join(f'{op}={weight}' for op, weight in mix.items())}")
+    print(f"   Backend latency (ms): {', '.join(f'{name}={latency[name]:g}' for name in BACKENDS)}")
+    if errors:
+        print(f"   Injected failure rates: {', '.join(f'{name}={rate:g}' for name, rate in errors.items())}")
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory(prefix='cpl-load-') as work_dir:
+        # The services narrate every request; keep the report readable
+        with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            upload, simple_server = install_stand_ins(work_dir, latency, errors, args.seed)
+            seed_reference_syllabi(upload)
+            upload_server, upload_url = serve(upload.app)
+            student_server, student_url = serve(simple_server.app)
+            workload = Workload(upload_url, student_url, args.fixtures, mix)
+            samples = run_load(workload, args.concurrency, args.duration, args.warmup, args.seed)
+            upload_server.shutdown()
+            student_server.shutdown()
+
+    summary = summarize(samples, args.duration)
+    duplicates = len(workload.request_ids) - len(set(workload.request_ids))
+
+    print(f"\n   {'endpoint':<30} {'count':>6} {'err':>5} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    print("   " + "-"*86)
+    for op in list(ENDPOINTS) + ['total']:
+        if op not in summary:
+            continue
+        row = summary[op]
+        label = ENDPOINTS.get(op, 'total')
+        print(f"   {label:<30} {row['count']:>6} {row['errors']:>5} {row['rps']:>7.1f} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+    print("   (latencies in ms)")
+
+    if duplicates:
+        print(f"\n[WARNING]  {duplicates} upload(s) were given a request id that was already in use")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'concurrency': args.concurrency, 'duration': args.duration, 'mix': mix,
+                       'latency_ms': latency, 'error_rates': errors, 'endpoints': summary,
+                       'duplicate_request_ids': duplicates}, f, indent=2)
+            f.write('\n')
+        print(f"\n[SUCCESS] Summary written to {os.path.abspath(args.json)}")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
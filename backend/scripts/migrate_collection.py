@@ -0,0 +1,91 @@
+"""
+Migrate the CPL Milvus Collection to a New Schema Version
+Creates cpl_documents_v{N+1} with its indexes, copies every row across with
+query_iterator (stored vectors are reused - nothing is re-embedded), catches
+up writes made during the copy, then atomically repoints the stable alias.
+Readers and writers using the alias never see downtime.
+
+Usage:
+    python migrate_collection.py --status
+    python migrate_collection.py --from cpl_documents_v5     (first run: alias does not exist yet)
+    python migrate_collection.py                             (alias -> latest version)
+    python migrate_collection.py --to 6 --drop-old
+    python migrate_collection.py --profile compact           (re-encode stored vectors as FLOAT16)
+"""
+
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+from pymilvus import connections, utility
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.milvus_migrations import (
+    migrate, current_version, MIGRATIONS, LATEST_VERSION, COLLECTION_ALIAS, SCHEMA_PROFILES
+)
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the CPL collection behind its alias")
+    parser.add_argument('--to', type=int, default=LATEST_VERSION, help="Target schema version")
+    parser.add_argument('--from', dest='source', help="Versioned collection to start from if the alias is missing")
+    parser.add_argument('--alias', default=COLLECTION_ALIAS)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--profile', choices=sorted(SCHEMA_PROFILES), help="Switch schema profile (default: keep)")
+    parser.add_argument('--drop-old', action='store_true', help="Drop superseded versions after the swap")
+    parser.add_argument('--status', action='store_true', help="Show the current version and exit")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("[MILVUS] CPL COLLECTION MIGRATION")
+    print("="*70 + "\n")
+
+    connections.connect(
+        alias="default",
+        host=os.getenv('MILVUS_HOST'),
+        port=int(os.getenv('MILVUS_PORT', 19530)),
+        user=os.getenv('MILVUS_USERNAME'),
+        password=os.getenv('MILVUS_PASSWORD'),
+        secure=True
+    )
+
+    version, name = current_version(args.alias)
+    print(f"   Alias: {args.alias} -> {name or '(not created)'}")
+    print(f"   Latest schema: v{LATEST_VERSION}")
+    for number, migration in sorted(MIGRATIONS.items()):
+        state = 'applied' if version and number <= version else 'pending'
+        print(f"      v{number}: {migration['description']} [{state}]")
+    print()
+
+    if args.status:
+        connections.disconnect("default")
+        return
+
+    try:
+        applied = migrate(args.to, alias=args.alias, source_name=args.source,
+                          batch_size=args.batch_size, profile=args.profile)
+    except ValueError as e:
+        print(f"[ERROR] {str(e)}\n")
+        connections.disconnect("default")
+        sys.exit(1)
+
+    if not applied:
+        print("[SUCCESS] Already at the requested version\n")
+    for step in applied:
+        print(f"\n   [SUCCESS] {step['from']} -> {step['to']}: {step['rows']} rows "
+              f"({step['caught_up']} caught up, {step['deleted']} deleted) in {step['seconds']}s")
+        if args.drop_old:
+            utility.drop_collection(step['from'])
+            print(f"   [SUCCESS] Dropped {step['from']}")
+
+    if applied and os.getenv('MILVUS_COLLECTION') != args.alias:
+        print(f"\n   [WARNING]  Set MILVUS_COLLECTION={args.alias} so services follow future migrations")
+
+    print("\n" + "="*70 + "\n")
+    connections.disconnect("default")
+
+
+if __name__ == '__main__':
+    main()
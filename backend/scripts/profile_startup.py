@@ -0,0 +1,123 @@
+"""
+Profile Upload Service Startup
+Imports services/watson_upload.py in fresh interpreters and reports where the
+cold start goes: the slowest modules from `python -X importtime`, and the
+time to import the module and answer the first /health.
+
+Backends are initialized on first use, so neither step should touch
+watsonx.ai, COS, Iceberg or Milvus; --ready additionally times the first
+/ready call, which does.
+
+Usage:
+    python profile_startup.py
+    python profile_startup.py --runs 10 --top 30
+    python profile_startup.py --ready --json startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+FIRST_REQUEST = """
+import json, sys, time
+started = time.perf_counter()
+import services.watson_upload as service
+imported = time.perf_counter()
+client = service.app.test_client()
+status = client.get('/health').status_code
+health = time.perf_counter()
+timings = {'import_s': imported - started, 'health_s': health - imported, 'health_status': status}
+if '--ready' in sys.argv:
+    timings['ready_status'] = client.get('/ready').status_code
+    timings['ready_s'] = time.perf_counter() - health
+print(json.dumps(timings))
+"""
+
+
+def import_profile():
+    """{module: cumulative microseconds} from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import services.watson_upload'],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = max(modules.get(name.strip(), 0), int(cumulative))
+    return modules
+
+
+def first_request(ready=False):
+    """Timings of one fresh interpreter: import, first /health (and /ready)"""
+    args = [sys.executable, '-c', FIRST_REQUEST] + (['--ready'] if ready else [])
+    started = time.perf_counter()
+    result = subprocess.run(args, cwd=BACKEND_DIR, capture_output=True, text=True)
+    total = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process_s'] = total
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cold start of the upload service")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument('--top', type=int, default=20, help="Slowest imports to list")
+    parser.add_argument('--ready', action='store_true', help="Also time the first /ready (initializes backends)")
+    parser.add_argument('--json', help="Write the profile to this file")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("[PROFILE] UPLOAD SERVICE STARTUP")
+    print("="*70 + "\n")
+
+    modules = import_profile()
+    total_us = modules.get('services.watson_upload', 0)
+    print(f"   Import of services.watson_upload: {total_us / 1000:.0f} ms (cumulative, -X importtime)\n")
+    print(f"   {'module':<50} {'ms':>8}")
+    print("   " + "-"*59)
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    for name, cumulative in slowest:
+        print(f"   {name:<50} {cumulative / 1000:>8.1f}")
+
+    try:
+        runs = [first_request(args.ready) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"\n[ERROR] Service failed to start: {str(e)}\n")
+        sys.exit(1)
+
+    summary = {
+        key: round(statistics.median(run[key] for run in runs) * 1000, 1)
+        for key in ('process_s', 'import_s', 'health_s', 'ready_s') if key in runs[0]
+    }
+    print(f"\n   Median of {args.runs} fresh interpreter(s):")
+    print(f"      Whole process (start to exit):      {summary['process_s']:.0f} ms")
+    print(f"      Module import:                      {summary['import_s']:.0f} ms")
+    print(f"      First /health:                      {summary['health_s']:.1f} ms "
+          f"(HTTP {runs[0]['health_status']})")
+    if 'ready_s' in summary:
+        print(f"      First /ready:                       {summary['ready_s']:.0f} ms "
+              f"(HTTP {runs[0]['ready_status']})")
+
+    print("\n" + "="*70)
+    print("[SUCCESS] Startup profiled")
+    print("="*70 + "\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'median_ms': summary, 'runs': runs,
+                       'slowest_imports_ms': {name: cumulative / 1000 for name, cumulative in slowest}}, f, indent=2)
+        print(f"[SUCCESS] Profile written to {args.json}\n")
+
+
+if __name__ == '__main__':
+    main()
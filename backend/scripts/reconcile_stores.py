@@ -0,0 +1,152 @@
+"""
+Reconcile Milvus, COS and Iceberg
+Streams the document_id set of each store, compares them with an external
+sorted merge (bounded memory at any catalog size) and prints a drift report.
+With --repair, untracked uploads and orphaned vectors/objects are deleted
+after a grace period and a per-batch re-check against Iceberg and the syllabus
+manifest. nu_syllabus chunks are never repaired unless --include-syllabi is
+given. See utils/reconcile.py.
+
+Usage:
+    python reconcile_stores.py
+    python reconcile_stores.py --drift-file drift.ndjson --json report.json
+    python reconcile_stores.py --repair
+    python reconcile_stores.py --repair --confirm-after 120
+    python reconcile_stores.py --repair --include-syllabi   (after upload_nu_syllabi.py --sync)
+    python reconcile_stores.py --run-size 50000 --tmp-dir /scratch
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import get_milvus_handler
+from handlers.cos_handler import get_cos_handler
+from handlers.iceberg_handler import get_iceberg_handler
+from utils.keyword_index import get_keyword_index
+from utils.search_cache import get_search_cache
+from utils.syllabus_ingest import SyllabusManifest
+from utils.reconcile import (
+    MILVUS, COS, ICEBERG, REPAIRABLE, OrphanRepair,
+    milvus_document_ids, cos_document_ids, sorted_unique, reconcile
+)
+
+load_dotenv()
+
+DESCRIPTIONS = {
+    'missing_original': "Iceberg + Milvus, original missing in COS",
+    'missing_vectors': "Iceberg request without chunks in Milvus",
+    'untracked_upload': "Milvus + COS without an Iceberg request",
+    'orphan_vectors': "Chunks only in Milvus",
+    'orphan_objects': "Objects only in COS",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare document_ids across Milvus, COS and Iceberg")
+    parser.add_argument('--repair', action='store_true',
+                        help=f"Delete {', '.join(REPAIRABLE)} (default: report only)")
+    parser.add_argument('--include-syllabi', action='store_true',
+                        help="Also repair nu_syllabus chunks missing from the manifest")
+    parser.add_argument('--confirm-after', type=int, default=60,
+                        help="Seconds after the first candidate before re-checking and deleting")
+    parser.add_argument('--manifest', help="Syllabus manifest (default: SYLLABUS_MANIFEST_PATH)")
+    parser.add_argument('--run-size', type=int, default=200000, help="document_ids held in memory per sorted run")
+    parser.add_argument('--tmp-dir', help="Where sorted runs spill (default: system temp)")
+    parser.add_argument('--batch-size', type=int, default=500, help="Repair batch size")
+    parser.add_argument('--sample', type=int, default=10, help="Example ids per category")
+    parser.add_argument('--drift-file', help="Write every inconsistent document_id as NDJSON")
+    parser.add_argument('--json', help="Write the report to this file")
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("[QUERY] CROSS-STORE RECONCILIATION" + (" + REPAIR" if args.repair else ""))
+    print("="*70 + "\n")
+
+    milvus = get_milvus_handler()
+    cos = get_cos_handler()
+    iceberg = get_iceberg_handler()
+    if not milvus.connect():
+        sys.exit(1)
+    manifest = SyllabusManifest(args.manifest)
+    skip_ids = manifest.referenced_ids() | set(manifest.pending.values())
+    # Filled with nu_syllabus document_ids while the Milvus scan runs
+    protected_ids = set()
+    started = time.perf_counter()
+
+    def sort(stream):
+        return sorted_unique(stream, run_size=args.run_size, tmp_dir=args.tmp_dir)
+
+    # Every scan completes inside its external sort before the merge yields,
+    # so repairs never delete under a running iterator
+    streams = {
+        MILVUS: sort(milvus_document_ids(milvus.collection, protected=protected_ids)),
+        COS: sort(cos_document_ids(cos)),
+        ICEBERG: sort(iceberg.iter_document_ids()),
+    }
+
+    drift_file = open(args.drift_file, 'w', encoding='utf-8') if args.drift_file else None
+    repair = OrphanRepair(milvus, cos, iceberg, keyword_index=get_keyword_index(), manifest=manifest,
+                          protected_ids=() if args.include_syllabi else protected_ids,
+                          confirm_after=args.confirm_after, batch_size=args.batch_size) if args.repair else None
+
+    def on_drift(document_id, category, stores):
+        if drift_file:
+            drift_file.write(json.dumps({'document_id': document_id, 'category': category,
+                                         'stores': sorted(stores)}) + '\n')
+        if repair:
+            repair(document_id, category, stores)
+
+    try:
+        report = reconcile(streams, skip_ids=skip_ids, sample_size=args.sample, on_drift=on_drift)
+        if repair:
+            repair.flush()
+    except Exception as e:
+        print(f"[ERROR] Reconciliation failed: {str(e)}\n")
+        sys.exit(1)
+    finally:
+        if drift_file:
+            drift_file.close()
+    report['seconds'] = round(time.perf_counter() - started, 1)
+
+    print(f"   Documents per store:")
+    for name, total in report['totals'].items():
+        print(f"      {name:<8} {total:>9,}")
+    print(f"   Syllabi skipped (manifest): {report['skipped']:,}")
+    print(f"   Consistent: {report['counts']['consistent']:,}\n")
+
+    print(f"   {'drift':<18} {'count':>9}  description")
+    print("   " + "-"*67)
+    for category, description in DESCRIPTIONS.items():
+        print(f"   {category:<18} {report['counts'][category]:>9,}  {description}")
+        for document_id in report['samples'].get(category, []):
+            print(f"      {document_id}")
+
+    if repair:
+        report['repair'] = repair.repaired
+        print(f"\n   Repair: {repair.repaired['documents_deleted']} document(s), "
+              f"{repair.repaired['vectors_deleted']} chunk(s), {repair.repaired['objects_deleted']} object(s) deleted; "
+              f"{repair.repaired['spared']} spared (request or manifest entry appeared), "
+              f"{repair.repaired['protected']} protected (nu_syllabus)")
+        if repair.repaired['documents_deleted']:
+            get_search_cache().bump_generation()
+
+    print("\n" + "="*70)
+    print(f"[SUCCESS] {report['drift']:,} inconsistent document(s) in {report['seconds']}s"
+          if report['drift'] else f"[SUCCESS] Stores are consistent ({report['seconds']}s)")
+    print("="*70 + "\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"[SUCCESS] Report written to {args.json}\n")
+
+    milvus.close()
+
+
+if __name__ == '__main__':
+    main()
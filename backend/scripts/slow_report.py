@@ -0,0 +1,80 @@
+"""
+Summarize the Slow-Operation Log
+Groups the NDJSON entries written with SLOW_LOG_FILE by operation and
+statement shape (literals replaced by ?), so a query that starts scanning the
+whole table shows up as one growing line rather than many single entries.
+
+Usage:
+    python slow_report.py slow_operations.ndjson
+    python slow_report.py slow_operations.ndjson --kind presto --top 10
+"""
+
+import re
+import sys
+import json
+import argparse
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def shape(entry):
+    """Statement or filter with literals replaced by ?"""
+    text = entry.get('sql') or entry.get('expr') or ''
+    return LITERALS.sub('?', ' '.join(str(text).split()))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slowest Presto and Milvus operations by statement shape")
+    parser.add_argument('path', help="NDJSON slow-operation log")
+    parser.add_argument('--kind', choices=['presto', 'milvus'], help="Only this backend")
+    parser.add_argument('--top', type=int, default=20, help="Groups to show")
+    args = parser.parse_args()
+
+    groups = {}
+    try:
+        with open(args.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if args.kind and entry.get('kind') != args.kind:
+                    continue
+                groups.setdefault((entry['kind'], entry['operation'], shape(entry)), []).append(entry)
+    except OSError as e:
+        print(f"[ERROR] Cannot read {args.path}: {str(e)}\n")
+        sys.exit(1)
+
+    ranked = sorted(groups.items(), key=lambda item: sum(e['durationMs'] for e in item[1]), reverse=True)
+
+    print("\n" + "="*70)
+    print(f"[SLOW] SLOW OPERATIONS ({sum(len(v) for v in groups.values())} entries, {len(groups)} shapes)")
+    print("="*70)
+
+    for (kind, operation, statement), entries in ranked[:args.top]:
+        durations = [e['durationMs'] for e in entries]
+        scanned = [e['processedRows'] for e in entries if e.get('processedRows') is not None]
+        returned = [e['rows'] for e in entries if e.get('rows') is not None]
+        errors = sum(1 for e in entries if e.get('error'))
+        print(f"\n   {kind} {operation}: {len(entries)} slow, p50 {percentile(durations, 0.5):.0f} ms, "
+              f"p95 {percentile(durations, 0.95):.0f} ms, max {max(durations):.0f} ms"
+              + (f", {errors} failed" if errors else ""))
+        if scanned:
+            print(f"   rows scanned: max {max(scanned)}" + (f", returned: max {max(returned)}" if returned else ""))
+        elif returned:
+            print(f"   rows returned: max {max(returned)}")
+        slowest = max(entries, key=lambda e: e['durationMs'])
+        if slowest.get('queryId'):
+            print(f"   slowest query id: {slowest['queryId']} (trace {slowest.get('traceId')})")
+        print(f"   {statement[:200]}")
+
+    print("\n" + "="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Break Slow Requests Down by Hop
+Reads the NDJSON span file written with TRACE_EXPORTER=file (Flask services)
+and TRACE_FILE (Node gateway), rebuilds each trace and prints the slowest
+ones as a span tree: gateway -> Flask route -> stage -> backend call.
+
+Usage:
+    python trace_report.py traces.ndjson
+    python trace_report.py traces.ndjson --top 5 --min-ms 500
+    python trace_report.py traces.ndjson --trace 4bf92f3577b34da6a3ce929d0e0e4736
+"""
+
+import sys
+import json
+import argparse
+
+
+def load_traces(path):
+    """{trace_id: [span dicts]}"""
+    traces = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                span = json.loads(line)
+            except ValueError:
+                continue
+            traces.setdefault(span['traceId'], []).append(span)
+    return traces
+
+
+def roots(spans):
+    """Spans whose parent is not in the file (the gateway span, or a Flask span without one)"""
+    ids = {span['spanId'] for span in spans}
+    return sorted((s for s in spans if s.get('parentSpanId') not in ids), key=lambda s: int(s['startTimeUnixNano']))
+
+
+def print_tree(span, children, trace_start, depth=0):
+    offset_ms = (int(span['startTimeUnixNano']) - trace_start) / 1e6
+    marker = '  [ERROR] ' + str(span['error']) if span.get('status') == 'ERROR' else ''
+    print(f"   {offset_ms:>9.1f} {span['durationMs']:>10.1f}  {'  ' * depth}{span['name']} "
+          f"({span['service']}){marker}")
+    for child in sorted(children.get(span['spanId'], []), key=lambda s: int(s['startTimeUnixNano'])):
+        print_tree(child, children, trace_start, depth + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-hop breakdown of the slowest traced requests")
+    parser.add_argument('path', help="NDJSON span file")
+    parser.add_argument('--top', type=int, default=10, help="Slowest traces to show")
+    parser.add_argument('--min-ms', type=float, default=0, help="Only traces at least this slow")
+    parser.add_argument('--trace', help="Show one trace id")
+    args = parser.parse_args()
+
+    try:
+        traces = load_traces(args.path)
+    except OSError as e:
+        print(f"[ERROR] Cannot read {args.path}: {str(e)}\n")
+        sys.exit(1)
+
+    ranked = []
+    for trace_id, spans in traces.items():
+        if args.trace and trace_id != args.trace:
+            continue
+        top_level = roots(spans)
+        duration = max(span['durationMs'] for span in top_level)
+        if duration >= args.min_ms:
+            ranked.append((duration, trace_id, spans, top_level))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+
+    print("\n" + "="*70)
+    print(f"[TRACE] SLOWEST REQUESTS ({len(ranked)} of {len(traces)} traces)")
+    print("="*70)
+
+    for duration, trace_id, spans, top_level in ranked[:args.top]:
+        children = {}
+        for span in spans:
+            children.setdefault(span.get('parentSpanId'), []).append(span)
+        trace_start = int(top_level[0]['startTimeUnixNano'])
+        print(f"\n   Trace {trace_id}: {duration:.1f} ms, {len(spans)} span(s)")
+        print(f"   {'start ms':>9} {'took ms':>10}  span")
+        print("   " + "-"*67)
+        for root in top_level:
+            print_tree(root, children, trace_start)
+
+    print("\n" + "="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Gunicorn configuration for the CPL Flask services (production entry point)
+
+    gunicorn -c backend/services/gunicorn.conf.py                       (upload service, :5000)
+    gunicorn -c backend/services/gunicorn.conf.py services.simple_server:app --bind 0.0.0.0:5001
+
+The app is imported once in the master (preload_app) and shared with the
+forked workers. Backends are lazy (utils/lazy.py), so nothing is connected
+before fork; when_ready imports the backend SDKs in the master, then each
+worker runs the app module's warm_up() - watsonx.ai token, COS, Presto,
+Milvus - before it accepts connections.
+
+Set METRICS_DIR so /metrics sums the counters of all workers (utils/metrics.py).
+SEARCH_CACHE_GENERATION_FILE defaults to backend/data/search_generation so an
+upload in one worker invalidates the search cache of every other worker
+(utils/search_cache.py); point upload_nu_syllabi.py at the same file.
+
+Every setting below can be overridden with an environment variable or on the
+command line (GUNICORN_CMD_ARGS / flags win over this file).
+"""
+
+import os
+import sys
+import glob
+import multiprocessing
+
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+wsgi_app = os.getenv('GUNICORN_APP', 'services.watson_upload:app')
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Uploads and searches mostly wait on watsonx.ai / Milvus / Presto, so each
+# worker process runs a few threads; throughput scales with workers x threads
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# An upload embeds every chunk in one request; allow for large PDFs
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then to bound memory growth (0 disables)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Shared write generation: without it each worker's search cache only sees its own uploads
+_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+if not os.getenv('SEARCH_CACHE_GENERATION_FILE'):
+    os.makedirs(_data_dir, exist_ok=True)
+    os.environ['SEARCH_CACHE_GENERATION_FILE'] = os.path.join(_data_dir, 'search_generation')
+
+preload_app = True
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def _app_module(app):
+    """Module that defines the Flask app (holds import_backends / warm_up)"""
+    return sys.modules.get(getattr(app, 'import_name', ''))
+
+
+def on_starting(server):
+    """Master, at startup before any worker exists: drop metric snapshots of a previous run"""
+    metrics_dir = os.getenv('METRICS_DIR')
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, 'metrics-*.json')):
+            os.remove(path)
+
+
+def when_ready(server):
+    """Master, after preload and before fork: import SDKs once so workers share them"""
+    module = _app_module(server.app.wsgi())
+    if hasattr(module, 'import_backends'):
+        module.import_backends()
+        server.log.info("Backend SDKs imported before fork")
+
+
+def post_worker_init(worker):
+    """Worker, after fork and before accept: connect every backend"""
+    module = _app_module(worker.wsgi)
+    if hasattr(module, 'warm_up'):
+        try:
+            module.warm_up()
+        except Exception as e:
+            # The worker still serves; lazy backends retry on first use and /ready reports them
+            worker.log.warning(f"Warm-up failed in worker {worker.pid}: {str(e)}")
+
+
+def worker_exit(server, worker):
+    """Worker, on exit (max_requests recycling, shutdown): write its last metric snapshot"""
+    if not os.getenv('METRICS_DIR'):
+        return
+    from utils.metrics import get_metrics
+    try:
+        get_metrics().flush()
+    except OSError as e:
+        worker.log.warning(f"Metrics snapshot of worker {worker.pid} failed: {str(e)}")
@@ -8,10 +8,23 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import requests
 import time
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.metrics import init_app, current_timer
+from utils import tracing
+from utils import profiling
+from utils.slowlog import get_slow_log, presto_details
+from handlers.storage import store_choice, get_request_store
 
 app = Flask(__name__)
 CORS(app)
 
+# Per-stage timings and counters, scraped at GET /metrics
+metrics = init_app(app, ('query_student',))
+tracing.init_app(app, 'cpl-query-service')
+profiling.init_app(app)
+
 # ==================== YOUR CONFIGURATION ====================
 PRESTO_HOST = "dd963065-e56e-4069-90cb-46167114f4b1.ct7kqd4s0l8kkd26qgo0.lakehouse.ibmappdomain.cloud"
 PRESTO_PORT = "30670"
@@ -20,18 +33,44 @@ PASSWORD = "oa6updVpfRktCbXRtxMwcLhYivPg4odcB8Gb03Eu8Pdt"
 
 PRESTO_URL = f"https://{PRESTO_HOST}:{PRESTO_PORT}/v1/statement"
 
+# One keep-alive session per process: queries and their nextUri polls reuse
+# the TLS connection instead of opening one per request
+session = requests.Session()
+
+# REQUEST_STORE=local (or STORAGE_BACKEND=local): the same SQL runs on the
+# embedded SQLite request table (handlers/local_storage.py) instead of Presto
+LOCAL_REQUESTS = store_choice('REQUEST_STORE') == 'local'
+
 # ==================== PRESTO QUERY FUNCTION ====================
 
+@tracing.traced('presto.query', peer='presto')
 def query_presto(sql):
     """
     Execute Presto SQL query and handle nextUri pagination
     Returns: (result_dict, error_message)
     """
+    with get_slow_log().timed('presto', 'query_presto', sql=' '.join(sql.split())) as entry:
+        result, error = (_query_local if LOCAL_REQUESTS else _query_presto)(sql, entry)
+        if error:
+            entry['error'] = error
+        return result, error
+
+def _query_local(sql, entry):
+    """query_presto on the local request store"""
+    try:
+        columns, rows = get_request_store().execute(sql)
+        entry['rows'] = len(rows)
+        return {'columns': columns, 'data': [list(row) for row in rows]}, None
+    except Exception as e:
+        return None, f"Query error: {str(e)}"
+
+def _query_presto(sql, entry):
+    """query_presto body; fills the slow-log entry with the query id, stats and rows"""
     try:
         print(f"\n[ICEBERG] Executing SQL: {sql[:100]}...")
         
         # Step 1: Submit query
-        response = requests.post(
+        response = session.post(
             PRESTO_URL,
             data=sql,
             auth=(USERNAME, PASSWORD),
@@ -46,6 +85,7 @@ def query_presto(sql):
             return None, f"Query submission failed: {response.status_code}"
         
         result = response.json()
+        entry['queryId'] = result.get('id')
         next_uri = result.get('nextUri')
         
         # Step 2: Poll for results (handle pagination)
@@ -60,7 +100,7 @@ def query_presto(sql):
             
             print(f"  [POLLING] Polling attempt {attempts}...")
             
-            result_response = requests.get(
+            result_response = session.get(
                 next_uri,
                 auth=(USERNAME, PASSWORD),
                 headers={'X-Presto-User': 'admin'},
@@ -88,6 +128,9 @@ def query_presto(sql):
             
             next_uri = result.get('nextUri')
         
+        entry.update(presto_details(dict(result.get('stats') or {}, queryId=entry['queryId']),
+                                    rows=len(data)))
+        entry['polls'] = attempts
         return {'columns': columns, 'data': data}, None
         
     except Exception as e:
@@ -104,7 +147,9 @@ def home():
         'service': 'CPL Query Service',
         'endpoints': {
             '/query-student': 'POST {"nuid": "1"}',
-            '/health': 'GET'
+            '/health': 'GET',
+            '/metrics': 'GET',
+            '/admin/profiles': 'GET (X-Admin-Token)'
         }
     })
 
@@ -154,9 +199,12 @@ def query_student():
         """
         
         print("[ICEBERG] Querying Iceberg table...")
-        result, error = query_presto(sql)
+        timer = current_timer()
+        with timer.stage('presto_query'):
+            result, error = query_presto(sql)
         
         if error:
+            timer.error('presto_query')
             print(f"[ERROR] Error: {error}")
             return jsonify({'error': error}), 500
         
@@ -190,6 +238,14 @@ def query_student():
         return jsonify({'error': str(e)}), 500
 
 
+def warm_up():
+    """Open the Presto session before this worker takes traffic (gunicorn post_worker_init)"""
+    result, error = query_presto("SELECT 1")
+    if error:
+        print(f"[WARNING]  Presto warm-up failed: {error}")
+    return error is None
+
+
 # ==================== START SERVER ====================
 
 if __name__ == '__main__':
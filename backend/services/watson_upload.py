@@ -4,84 +4,178 @@ from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
-from ibm_watsonx_ai import APIClient, Credentials
-from ibm_watsonx_ai.foundation_models.embeddings import Embeddings
-from ibm_watsonx_ai.foundation_models.extensions.rag.vector_stores import MilvusVectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
-import PyPDF2
-import docx
 import io
 import uuid
+import time
 from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from handlers.iceberg_handler import get_iceberg_handler
-from handlers.cos_handler import get_cos_handler
+from utils.search_cache import get_search_cache, CachedEmbeddings
+from utils.keyword_index import get_keyword_index, classify_query, reciprocal_rank_fusion
+from utils.coverage import compute_coverage, course_variants
+from utils.lazy import LazyBackend
+from utils.metrics import init_app, current_timer
+from utils.memory import MB, MemoryBudgetExceeded, get_upload_budget
+from utils import tracing
+from utils import profiling
+from handlers.storage import storage_config
 
 load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
+# Per-stage timings and counters, scraped at GET /metrics
+metrics = init_app(app, ('upload_to_watsonx', 'search_documents', 'search_documents_batch',
+                         'get_requests', 'update_status'))
+
+# Server span per request, continuing the gateway's traceparent (TRACE_EXPORTER enables export)
+tracing.init_app(app, 'cpl-upload-service')
+
+# Admin on-demand profiles (X-Profile header) and the slowest N (PROFILE_KEEP_SLOWEST)
+profiling.init_app(app)
+
 # Configuration
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 150
+SEARCH_BATCH_MAX = int(os.getenv('SEARCH_BATCH_MAX', 64))
+COVERAGE_OBJECT_NAME = '_coverage.json'
+
+# Upload memory budget (UPLOAD_MEMORY_BUDGET_MB, 0 = off): uploads whose
+# in-memory peak would not fit are ingested on the streaming path, with at most
+# UPLOAD_STREAM_BATCH chunks (and their vectors) alive at a time
+upload_budget = get_upload_budget()
+UPLOAD_STREAM_BATCH = int(os.getenv('UPLOAD_STREAM_BATCH', 64))
+STREAM_WINDOW_CHARS = CHUNK_SIZE * 20
+
+EMBEDDING_MODEL = 'ibm/slate-125m-english-rtrvr-v2'
+
+# Store implementations ({'VECTOR_STORE': 'milvus', ...}); a typo fails the import, not the first upload
+STORAGE = storage_config()
 
 # Initialize services
-credentials = Credentials(
-    api_key=os.getenv('WATSONX_AI_APIKEY'),
-    url=os.getenv('WATSONX_AI_SERVICE_URL')
-)
-api_client = APIClient(credentials)
-api_client.set.default_project(os.getenv('WATSONX_AI_PROJECT_ID'))
-embedding = Embeddings(
-    model_id='ibm/slate-125m-english-rtrvr-v2',
-    api_client=api_client
-)
-
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=CHUNK_SIZE,
-    chunk_overlap=CHUNK_OVERLAP,
-    length_function=len,
-    is_separator_regex=False,
-)
-
-vector_store = MilvusVectorStore(
-    api_client=api_client,
-    connection_id=os.getenv('MILVUS_CONNECTION_ID'),
-    collection_name='cpl_documents_v5',
-    embedding_function=embedding
-)
-
-iceberg = get_iceberg_handler()
-
-cos = get_cos_handler()
+# watsonx.ai and the three stores (and their SDK imports) are built on first
+# use (see utils/lazy.py): importing this module does no network I/O, so /health answers as soon as the
+# process is up and an unreachable backend fails its requests, not the import.
+# GET /ready initializes and checks every backend.
+# The stores are COS, Iceberg and Milvus unless configured otherwise
+# (STORAGE_BACKEND=local, see handlers/storage.py); cos, iceberg and milvus
+# below name the role, whichever implementation fills it.
+
+def create_embedding():
+    from ibm_watsonx_ai import APIClient, Credentials
+    from ibm_watsonx_ai.foundation_models.embeddings import Embeddings
+
+    credentials = Credentials(
+        api_key=os.getenv('WATSONX_AI_APIKEY'),
+        url=os.getenv('WATSONX_AI_SERVICE_URL')
+    )
+    api_client = APIClient(credentials)
+    api_client.set.default_project(os.getenv('WATSONX_AI_PROJECT_ID'))
+    return Embeddings(
+        model_id=EMBEDDING_MODEL,
+        api_client=api_client
+    )
+
+def create_cos():
+    from handlers.storage import get_object_store
+
+    return get_object_store()
+
+def create_iceberg():
+    from handlers.storage import get_request_store
+
+    return get_request_store()
+
+def create_milvus():
+    # pymilvus (and the pandas it pulls in) is the slowest import of the service
+    from handlers.storage import get_vector_store
+
+    return get_vector_store()
+
+def create_vector_store():
+    from handlers.storage import PartitionedVectorStore
+
+    # Chunks go to the student_documents partition when the collection is partitioned
+    return PartitionedVectorStore(embedding_function=embedding, handler=milvus.get())
+
+def create_text_splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+        is_separator_regex=False,
+    )
+
+embedding = LazyBackend('watsonx.ai embeddings', create_embedding)
+
+# Repeated queries skip the embedding API (and, until the next insert, Milvus)
+search_cache = get_search_cache()
+query_embedding = CachedEmbeddings(embedding, search_cache)
+
+# Course codes and exact terms are served locally, never by the embedding API
+keyword_index = get_keyword_index()
+
+text_splitter = LazyBackend('text splitter', create_text_splitter)
+
+iceberg = LazyBackend('request store', create_iceberg)
+
+cos = LazyBackend('object store', create_cos)
+
+milvus = LazyBackend('vector index', create_milvus)
+
+vector_store = LazyBackend('vector store', create_vector_store)
 
 # Helper functions
 
-def extract_text(file_bytes, filename):
+def iter_text(file_bytes, filename):
+    """Text of an upload piece by piece: PDF pages, DOCX paragraphs, 1 MB of TXT"""
     try:
         if filename.endswith('.pdf'):
+            import PyPDF2
             pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-            text = ""
+            current_timer().count('cpl_upload_pages_total', len(pdf_reader.pages))
             for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+                yield page.extract_text() + "\n"
 
         elif filename.endswith('.docx'):
+            import docx
             doc = docx.Document(io.BytesIO(file_bytes))
-            text = "\n".join([para.text for para in doc.paragraphs])
-            return text.strip()
+            for para in doc.paragraphs:
+                yield para.text + "\n"
 
         elif filename.endswith('.txt'):
-            return file_bytes.decode('utf-8')
+            import codecs
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            for start in range(0, len(file_bytes), MB):
+                yield decoder.decode(file_bytes[start:start + MB], final=start + MB >= len(file_bytes))
 
         else:
             raise ValueError("Unsupported file type")
     except Exception as e:
         raise ValueError(f"Text extraction failed: {str(e)}")
 
+def extract_text(file_bytes, filename):
+    return "".join(iter_text(file_bytes, filename)).strip()
+
+def iter_chunks(pieces, window_chars=STREAM_WINDOW_CHARS):
+    """
+    Split text as it arrives (streaming path): each window of about
+    window_chars is split and its last chunk is carried into the next window,
+    so no chunk is cut at a window boundary
+    """
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) >= window_chars:
+            chunks = text_splitter.split_text(buffer)
+            yield from chunks[:-1]
+            buffer = chunks[-1] if chunks else ""
+    if buffer.strip():
+        yield from text_splitter.split_text(buffer)
+
 def create_embedded_content(chunk_text, student_name, nuid, document_type, request_type, target_course, filename):
     enriched_content = f"""[DOCUMENT METADATA]
 NUID: {nuid}
@@ -111,12 +205,178 @@ def safe_truncate_content(enriched_content, max_tokens=450):
 
     return enriched_content
 
+def build_documents(chunk_texts, context, first_index=0, char_position=0):
+    """
+    Milvus rows for a run of chunks: metadata embedded in the content, then
+    truncated to the token limit
+
+    Args:
+        context: document_id, filename, document_type, student_name, nuid,
+                 request_type, target_course
+        first_index: Sequence number of the first chunk (streaming batches)
+
+    Returns:
+        tuple: (documents, truncated_count, char_position after the run)
+    """
+    documents = []
+    truncated_count = 0
+
+    for i, chunk_text in enumerate(chunk_texts, start=first_index):
+        # Create content with EMBEDDED metadata
+        enriched_content = create_embedded_content(
+            chunk_text=chunk_text,
+            student_name=context['student_name'],
+            nuid=context['nuid'],
+            document_type=context['document_type'],
+            request_type=context['request_type'],
+            target_course=context['target_course'],
+            filename=context['filename']
+        )
+
+        # Safety truncation to stay under 512 token limit
+        original_len = len(enriched_content)
+        enriched_content = safe_truncate_content(enriched_content, max_tokens=450)
+        if len(enriched_content) < original_len:
+            truncated_count += 1
+
+        # Use 'content' key (watsonx.ai SDK maps this to 'text' field)
+        documents.append({
+            'content': enriched_content,  # Embedded metadata + safety truncated
+            'metadata': {
+                'document_id': context['document_id'],
+                'document_name': context['filename'],
+                'document_type': context['document_type'],
+                'page': i + 1,
+                'start_index': char_position,
+                'sequence_number': i,
+                # Student context (also in separate fields for filtering)
+                'student_name': context['student_name'],
+                'nuid': context['nuid'],
+                'target_course': context['target_course'],
+                'request_type': context['request_type']
+            }
+        })
+
+        char_position += len(chunk_text)
+
+    return documents, truncated_count, char_position
+
+def stream_documents(file_bytes, context, timer):
+    """
+    Bounded-memory ingest: extract, chunk, embed and insert UPLOAD_STREAM_BATCH
+    chunks at a time, so the text, chunks and vectors of the whole file are
+    never alive together
+
+    Returns:
+        tuple: (chunks_created, truncated_count, characters_processed)
+    """
+    totals = {'chunks': 0, 'truncated': 0, 'characters': 0, 'position': 0}
+
+    def pieces():
+        for piece in iter_text(file_bytes, context['filename']):
+            totals['characters'] += len(piece)
+            yield piece
+
+    def ingest(batch):
+        with timer.stage('prepare'):
+            documents, truncated, totals['position'] = build_documents(
+                batch, context, totals['chunks'], totals['position'])
+        vector_store.add_documents(documents, timer=timer)
+        with timer.stage('keyword_index'):
+            keyword_index.add_chunks(documents)
+        totals['chunks'] += len(batch)
+        totals['truncated'] += truncated
+
+    batch = []
+    for chunk_text in iter_chunks(pieces()):
+        batch.append(chunk_text)
+        if len(batch) >= UPLOAD_STREAM_BATCH:
+            ingest(batch)
+            batch = []
+    if batch:
+        ingest(batch)
+
+    return totals['chunks'], totals['truncated'], totals['characters']
+
+# Metadata fields that /api/search accepts as filters
+FILTER_FIELDS = ('document_id', 'document_type', 'nuid', 'target_course', 'request_type')
+
+def build_filter_expr(filters):
+    """
+    Build a Milvus boolean expression from {field: value | [values]}
+    Raises ValueError for unknown fields
+    """
+    clauses = []
+    for field, value in sorted((filters or {}).items()):
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"Unsupported filter field: {field}")
+        values = value if isinstance(value, (list, tuple)) else [value]
+        quoted = [
+            '"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"'
+            for v in values
+        ]
+        if len(quoted) == 1:
+            clauses.append(f"{field} == {quoted[0]}")
+        else:
+            clauses.append(f"{field} in [{', '.join(quoted)}]")
+    return " and ".join(clauses)
+
+def build_coverage(document_id, target_course):
+    """
+    Coverage of the NU reference syllabus by a just-uploaded document:
+    ONE Milvus query fetches both sides' vectors, ONE matrix compares them
+    """
+    expr = (
+        f"{build_filter_expr({'document_id': document_id})} or "
+        f"(document_type == \"nu_syllabus\" and {build_filter_expr({'target_course': course_variants(target_course)})})"
+    )
+    rows = milvus.query(
+        expr=expr,
+        output_fields=['document_id', 'document_type', 'sequence_number', 'text', 'vector'],
+        consistency_level='Strong'
+    )
+
+    student = sorted(
+        (r for r in rows if r['document_id'] == document_id),
+        key=lambda r: r['sequence_number']
+    )
+    reference = sorted(
+        (r for r in rows if r['document_id'] != document_id),
+        key=lambda r: (r['document_id'], r['sequence_number'])
+    )
+
+    summary = compute_coverage(
+        [r['vector'] for r in student],
+        reference,
+        [r['vector'] for r in reference]
+    )
+    if summary:
+        summary.update({
+            'document_id': document_id,
+            'target_course': target_course,
+            'computed_at': datetime.utcnow().isoformat()
+        })
+    return summary
+
 @app.route('/api/upload-to-watsonx', methods=['POST'])
 def upload_to_watsonx():
+    timer = current_timer()
     try:
+        # Reject before the body is read when the raw upload alone is over budget
+        if upload_budget.plan(request.content_length or 0) == 'reject':
+            timer.count('cpl_upload_memory_budget_total', action='rejected')
+            return jsonify({
+                'success': False,
+                'error': f"Upload of {request.content_length / MB:.1f} MB exceeds the "
+                         f"{upload_budget.budget_bytes / MB:.0f} MB memory budget"
+            }), 413
+
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
 
+        if upload_budget.tracking and not timer.track_memory(upload_budget.budget_bytes):
+            # Another upload in this worker is being measured; the size-based plan() still applies
+            timer.count('cpl_upload_memory_budget_total', action='untracked')
         file = request.files['file']
         filename = file.filename
         file_bytes = file.read()
@@ -134,109 +394,126 @@ def upload_to_watsonx():
             document_type = 'resume'
         else:
             document_type = 'student_syllabus'
+        timer.count('cpl_upload_bytes_total', len(file_bytes), document_type=document_type)
 
-        
-
-        
-        # Extract text
-        text_content = extract_text(file_bytes, filename)
-
-        # Chunk document
-        doc = Document(
-            page_content=text_content,
-            metadata={'document_name': filename}
-        )
-        chunks = text_splitter.split_documents([doc])
-
-        # Prepare documents for Milvus
-        documents = []
-        char_position = 0
-        truncated_count = 0
-
-        for i, chunk in enumerate(chunks):
-            chunk_text = chunk.page_content
-
-            # Create content with EMBEDDED metadata
-            enriched_content = create_embedded_content(
-                chunk_text=chunk_text,
-                student_name=student_name,
-                nuid=nuid,
-                document_type=document_type,
-                request_type=request_type,
-                target_course=target_course,
-                filename=filename
-            )
-
-            # Safety truncation to stay under 512 token limit
-            original_len = len(enriched_content)
-            enriched_content = safe_truncate_content(enriched_content, max_tokens=450)
-            if len(enriched_content) < original_len:
-                truncated_count += 1
-
-            # Use 'content' key (watsonx.ai SDK maps this to 'text' field)
-            documents.append({
-                'content': enriched_content,  # Embedded metadata + safety truncated
-                'metadata': {
-                    'document_id': document_id,
-                    'document_name': filename,
-                    'document_type': document_type,
-                    'page': i + 1,
-                    'start_index': char_position,
-                    'sequence_number': i,
-                    # Student context (also in separate fields for filtering)
-                    'student_name': student_name,
-                    'nuid': nuid,
-                    'target_course': target_course,
-                    'request_type': request_type
-                }
-            })
-
-            char_position += len(chunk_text)
+        context = {
+            'document_id': document_id,
+            'filename': filename,
+            'document_type': document_type,
+            'student_name': student_name,
+            'nuid': nuid,
+            'request_type': request_type,
+            'target_course': target_course
+        }
 
+        streamed = upload_budget.plan(len(file_bytes)) == 'stream'
+        if not streamed:
+            try:
+                # Extract text
+                with timer.stage('extract'):
+                    text_content = extract_text(file_bytes, filename)
+
+                # Chunk document
+                with timer.stage('chunk'):
+                    from langchain_core.documents import Document
+                    doc = Document(
+                        page_content=text_content,
+                        metadata={'document_name': filename}
+                    )
+                    chunks = [chunk.page_content for chunk in text_splitter.split_documents([doc])]
+
+                # Prepare documents for Milvus
+                with timer.stage('prepare'):
+                    documents, truncated_count, _ = build_documents(chunks, context)
+            except MemoryBudgetExceeded as budget_error:
+                # Nothing is stored yet: start over on the streaming path
+                print(f"   [WARNING]  {str(budget_error)}, switching to streaming ingest")
+                text_content = doc = chunks = documents = None
+                streamed = True
+
+        if streamed:
+            timer.count('cpl_upload_memory_budget_total', action='streamed')
+            print(f"\n   [UPLOADING] Streaming ingest, {UPLOAD_STREAM_BATCH} chunks per batch...")
+            chunks_created, truncated_count, characters_processed = stream_documents(file_bytes, context, timer)
+            search_cache.bump_generation()
+        else:
+            chunks_created, characters_processed = len(chunks), len(text_content)
+
+            # Show sample
+            if documents:
+                print(f"\n   [REQUEST] Sample chunk preview:")
+                sample = documents[0]['content'][:350].replace('\n', '\n   ')
+                print(f"   {sample}")
+
+            # Upload to Milvus
+            print(f"\n   [UPLOADING] STEP 4: Uploading to Milvus...")
+            result = vector_store.add_documents(documents, timer=timer)
+            search_cache.bump_generation()
+            with timer.stage('keyword_index'):
+                keyword_index.add_chunks(documents)
+
+        timer.count('cpl_upload_chunks_total', chunks_created)
+        timer.count('cpl_upload_truncated_chunks_total', truncated_count)
         if truncated_count > 0:
+            print(f"   [WARNING]  {truncated_count} chunk(s) truncated to stay under the token limit")
 
-        # Show sample
-        if documents:
-            print(f"\n   [REQUEST] Sample chunk preview:")
-            sample = documents[0]['content'][:350].replace('\n', '\n   ')
-
-        # Upload to Milvus
-        print(f"\n   [UPLOADING] STEP 4: Uploading to Milvus...")
-        result = vector_store.add_documents(documents)
-
+        # The chunks are stored: from here on only account memory, never abort a half-stored upload
+        if timer.memory:
+            timer.memory.budget_bytes = 0
         
         print("\n   [COS]  PART 2: Storing in COS...")
 
         try:
-            cos_key = cos.upload_document(
-                file_bytes=file_bytes,
-                document_id=document_id,
-                filename=filename,
-                metadata={
-                    'student_name': student_name,
-                    'nuid': nuid,
-                    'request_type': request_type,
-                    'target_course': target_course
-                }
-            )
+            with timer.stage('cos_upload'):
+                cos_key = cos.upload_document(
+                    file_bytes=file_bytes,
+                    document_id=document_id,
+                    filename=filename,
+                    metadata={
+                        'student_name': student_name,
+                        'nuid': nuid,
+                        'request_type': request_type,
+                        'target_course': target_course
+                    }
+                )
+            if not cos_key:
+                timer.error('cos_upload')
         except Exception as cos_error:
             cos_key = None
 
+        # Precompute the advisor's syllabus comparison once, at ingest
+        coverage = None
+        try:
+            with timer.stage('coverage'):
+                coverage = build_coverage(document_id, target_course)
+            if coverage:
+                cos.upload_json(f"{document_id}/{COVERAGE_OBJECT_NAME}", coverage)
+                print(f"   [SUCCESS] Coverage vs {target_course}: {coverage['overall_score']} "
+                      f"({coverage['covered_fraction']:.0%} of reference chunks covered)")
+            else:
+                print(f"   [WARNING]  No NU reference syllabus found for {target_course}")
+        except Exception as coverage_error:
+            print(f"   [WARNING]  Coverage computation failed: {str(coverage_error)}")
+
         
         print("\n   [ICEBERG] PART 3: Storing in ICEBERG...")
 
-        request_id = iceberg.insert_request({
-            'document_id': document_id,
-            'student_name': student_name,
-            'nuid': nuid,
-            'request_type': request_type,
-            'target_course': target_course,
-            'document_name': filename,
-            'cos_key': cos_key  # Store COS reference
-        })
+        with timer.stage('iceberg_insert'):
+            request_id = iceberg.insert_request({
+                'document_id': document_id,
+                'student_name': student_name,
+                'nuid': nuid,
+                'request_type': request_type,
+                'target_course': target_course,
+                'document_name': filename,
+                'cos_key': cos_key  # Store COS reference
+            })
 
         if request_id:
+            print(f"   [SUCCESS] Iceberg request created: {request_id}")
         else:
+            timer.error('iceberg_insert')
+            print("   [WARNING]  Iceberg insert failed")
 
         # ==================== COMPLETE ====================
 
@@ -252,19 +529,40 @@ def upload_to_watsonx():
             'nuid': nuid,
             'request_type': request_type,
             'target_course': target_course,
-            'chunks_created': len(chunks),
+            'chunks_created': chunks_created,
             'chunks_truncated': truncated_count,
             'chunk_size': CHUNK_SIZE,
-            'characters_processed': len(text_content),
+            'characters_processed': characters_processed,
+            'ingest_mode': 'streaming' if streamed else 'in_memory',
             'metadata_embedded': True,
             'cos_key': cos_key,
+            'coverage': {
+                'overall_score': coverage['overall_score'],
+                'covered_fraction': coverage['covered_fraction'],
+                'reference_chunks': coverage['reference_chunks']
+            } if coverage else None,
             'storage': {
-                'milvus': f'{len(chunks)} chunks (embedded metadata, token-safe)',
+                'milvus': f'{chunks_created} chunks (embedded metadata, token-safe)',
                 'cos': f'Original file stored: {cos_key}' if cos_key else 'COS upload failed',
                 'iceberg': 'Student metadata stored'
-            }
+            },
+            'timings_ms': dict(timer.stages, total=round((time.perf_counter() - timer.started) * 1000.0, 2)),
+            'memory_peak_mb': dict(timer.memory.stages_mb(), total=round(timer.memory.finish() / MB, 2))
+                              if timer.memory else None
         })
 
+    except MemoryBudgetExceeded as e:
+        # Over budget even when streaming: drop the chunks stored so far
+        print(f"\n[ERROR] {filename}: {str(e)}")
+        timer.count('cpl_upload_memory_budget_total', action='rejected')
+        try:
+            milvus.delete_documents([document_id])
+            keyword_index.remove_document(document_id)
+            search_cache.bump_generation()
+        except Exception as cleanup_error:
+            print(f"   [WARNING]  Cleanup of {document_id} failed: {str(cleanup_error)}")
+        return jsonify({'success': False, 'error': str(e)}), 413
+
     except Exception as e:
         print(f"\n[ERROR] ========== ERROR ==========")
         print(f"File: {filename if 'filename' in locals() else 'Unknown'}")
@@ -349,12 +647,27 @@ def view_document(document_id, filename):
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+@app.route('/api/coverage/<document_id>', methods=['GET'])
+def get_coverage(document_id):
+    """Precomputed syllabus coverage for a request (built at upload time)"""
+    try:
+        coverage = cos.get_json(f"{document_id}/{COVERAGE_OBJECT_NAME}")
+        return jsonify({'success': True, 'coverage': coverage})
+
+    except Exception as e:
+        from handlers.storage import ObjectNotFound
+
+        error_code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+        if isinstance(e, ObjectNotFound) or error_code in ('NoSuchKey', '404'):
+            return jsonify({'success': False, 'error': 'Coverage not available'}), 404
+        return jsonify({'success': False, 'error': str(e)}), 500
 @app.route('/api/get-requests', methods=['GET'])
 def get_requests():
     """Get all CPL requests FROM ICEBERG TABLE"""
     try:
         print("\n[QUERY] ========== QUERYING ICEBERG FOR REQUESTS ==========")
-        requests = iceberg.get_all_requests()
+        with current_timer().stage('iceberg_query'):
+            requests = iceberg.get_all_requests()
 
         return jsonify({
             'success': True,
@@ -373,13 +686,14 @@ def update_status():
     """Update request status in Iceberg table"""
     try:
         data = request.json
-        success = iceberg.update_status(
-            request_id=data.get('requestId'),
-            status=data.get('status'),
-            credits=data.get('credits'),
-            notes=data.get('notes', ''),
-            updated_by=data.get('updatedBy', 'Advisor')
-        )
+        with current_timer().stage('iceberg_update'):
+            success = iceberg.update_status(
+                request_id=data.get('requestId'),
+                status=data.get('status'),
+                credits=data.get('credits'),
+                notes=data.get('notes', ''),
+                updated_by=data.get('updatedBy', 'Advisor')
+            )
 
         if success:
             return jsonify({'success': True})
@@ -389,24 +703,162 @@ def update_status():
     except Exception as e:
         print(f"[ERROR] Status update error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
+def vector_search(query, top_k, filters, expr, effort):
+    """
+    Milvus vector search through the result cache
+
+    Returns:
+        tuple: (results, served_from_cache)
+    """
+    timer = current_timer()
+    # Read the generation BEFORE searching so a concurrent upload invalidates this entry
+    generation = search_cache.generation()
+    results = search_cache.get_results(query, top_k, filters, variant=effort)
+    if results is not None:
+        return results, True
+
+    with timer.stage('embed'):
+        vector = query_embedding.embed_query(query)
+    with timer.stage('milvus_search'):
+        results = milvus.search(
+            [vector], k=top_k, expr=expr, effort=effort,
+            partition_names=milvus.partitions_for_filter(filters)
+        )[0]
+    search_cache.put_results(query, top_k, filters, results, generation, variant=effort)
+    return results, False
+
+def describe_effort(effort, top_k):
+    """The effort actually applied, for the response"""
+    from handlers.storage import SEARCH_EFFORT
+
+    return {
+        'level': effort,
+        'params': milvus.search_params(effort, top_k)['params'],
+        'consistency_level': SEARCH_EFFORT[effort]['consistency_level']
+    }
+
 @app.route('/api/search', methods=['POST'])
 def search_documents():
-    """Search documents in Milvus vector store"""
+    """
+    Search documents
+    Course codes and "quoted exact terms" are answered from the local keyword
+    index (no embedding call); free text mentioning them fuses keyword and
+    vector rankings; everything else is a Milvus vector search
+
+    Optional "effort" ('fast' | 'balanced' | 'thorough') or "latencyBudgetMs"
+    trades recall for latency per caller
+    """
     try:
+        started = time.perf_counter()
         data = request.json
         query = data.get('query')
         top_k = data.get('topK', 5)
+        filters = data.get('filters') or {}
 
         if not query:
             return jsonify({'success': False, 'error': 'Query required'}), 400
 
-        results = vector_store.search(query, k=top_k)
+        try:
+            expr = build_filter_expr(filters)
+            effort = milvus.resolve_effort(data.get('effort'), data.get('latencyBudgetMs'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        mode, terms = classify_query(query)
+        results = []
+        cached = False
+
+        timer = current_timer()
+        if mode == 'course':
+            with timer.stage('keyword'):
+                results = keyword_index.lookup_course(terms[0], top_k, filters)
+        elif mode == 'phrase':
+            with timer.stage('keyword'):
+                results = keyword_index.search(terms[0], top_k, filters, phrase=True)
+
+        if mode in ('course', 'phrase') and not results:
+            mode = 'vector'  # identifier unknown to the index; fall back to semantic search
+
+        if mode in ('hybrid', 'vector'):
+            results, cached = vector_search(query, top_k, filters, expr, effort)
+            if mode == 'hybrid':
+                with timer.stage('keyword'):
+                    keyword_hits = keyword_index.search(query, top_k, filters)
+                results = reciprocal_rank_fusion(keyword_hits, results)[:top_k]
 
         return jsonify({
             'success': True,
             'query': query,
+            'mode': mode,
             'results': results,
-            'count': len(results)
+            'count': len(results),
+            'cached': cached,
+            'effort': describe_effort(effort, top_k) if mode in ('hybrid', 'vector') else None,
+            'latency_ms': round((time.perf_counter() - started) * 1000.0, 2)
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+@app.route('/api/search/batch', methods=['POST'])
+def search_documents_batch():
+    """
+    Search many queries at once: ONE embedding request and ONE Milvus search (nq > 1)
+
+    Request: {"queries": ["...", "..."], "topK": 5, "filters": {...}, "effort": "fast"}
+    """
+    try:
+        data = request.json
+        queries = data.get('queries')
+        top_k = data.get('topK', 5)
+        filters = data.get('filters') or {}
+
+        if not queries or not isinstance(queries, list) or not all(isinstance(q, str) and q for q in queries):
+            return jsonify({'success': False, 'error': 'queries must be a non-empty list of strings'}), 400
+        if len(queries) > SEARCH_BATCH_MAX:
+            return jsonify({'success': False, 'error': f'At most {SEARCH_BATCH_MAX} queries per batch'}), 400
+
+        try:
+            expr = build_filter_expr(filters)
+            effort = milvus.resolve_effort(data.get('effort'), data.get('latencyBudgetMs'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        generation = search_cache.generation()
+        grouped = [search_cache.get_results(query, top_k, filters, variant=effort) for query in queries]
+        cached = [results is not None for results in grouped]
+        pending = [i for i, hit in enumerate(cached) if not hit]
+
+        embedding_calls = 0
+        milvus_calls = 0
+        if pending:
+            timer = current_timer()
+            with timer.stage('embed'):
+                vectors, embedding_calls = query_embedding.embed_queries([queries[i] for i in pending])
+            with timer.stage('milvus_search'):
+                hits_per_query = milvus.search(
+                    vectors, k=top_k, expr=expr, effort=effort,
+                    partition_names=milvus.partitions_for_filter(filters)
+                )
+            milvus_calls = 1
+            for i, hits in zip(pending, hits_per_query):
+                grouped[i] = hits
+                search_cache.put_results(queries[i], top_k, filters, hits, generation, variant=effort)
+
+        return jsonify({
+            'success': True,
+            'results': [
+                {
+                    'query': query,
+                    'results': results,
+                    'count': len(results),
+                    'cached': hit
+                }
+                for query, results, hit in zip(queries, grouped, cached)
+            ],
+            'count': len(queries),
+            'embedding_calls': embedding_calls,
+            'milvus_calls': milvus_calls,
+            'effort': describe_effort(effort, top_k)
         })
 
     except Exception as e:
@@ -418,17 +870,96 @@ def health():
         'status': 'OK',
         'service': 'watsonx.ai Upload Service',
         'configuration': {
-            'embedding_model': 'ibm/slate-125m-english-rtrvr-v2',
+            'embedding_model': EMBEDDING_MODEL,
             'token_limit': 512,
             'chunk_size': CHUNK_SIZE,
             'chunk_overlap': CHUNK_OVERLAP,
-            'milvus_collection': 'cpl_documents_v5',
+            'storage': STORAGE,
+            'milvus_collection': milvus.collection_name if milvus.initialized else None,
             'cos_bucket': os.getenv('COS_BUCKET_NAME', 'cpl-documents'),
             'metadata_embedded': True,
             'safety_truncation': True,
             'cos_enabled': True
+        },
+        'search_cache': search_cache.stats(),
+        'keyword_index_chunks': len(keyword_index),
+        'backends': {
+            'embedding': embedding.initialized,
+            'cos': cos.initialized,
+            'iceberg': iceberg.initialized,
+            'milvus': milvus.initialized and milvus.connected
         }
     })
+
+def check_backends():
+    """Initialize every backend and report {name: (ready, detail)}"""
+    def check_embedding():
+        embedding.get()
+        return True, EMBEDDING_MODEL
+
+    def check_cos():
+        return cos.ping(), cos.location
+
+    def check_iceberg():
+        return iceberg.ping(), iceberg.location
+
+    def check_milvus():
+        return milvus.ping(), milvus.location
+
+    checks = {'embedding': check_embedding, 'cos': check_cos, 'iceberg': check_iceberg, 'milvus': check_milvus}
+    results = {}
+    for name, check in checks.items():
+        started = time.perf_counter()
+        try:
+            ready, detail = check()
+        except Exception as e:
+            ready, detail = False, str(e)
+        results[name] = {
+            'ready': bool(ready),
+            'detail': detail,
+            'ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+    return results
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once every backend is initialized and reachable, 503 otherwise"""
+    backends = check_backends()
+    is_ready = all(backend['ready'] for backend in backends.values())
+    return jsonify({
+        'status': 'READY' if is_ready else 'NOT_READY',
+        'backends': backends
+    }), 200 if is_ready else 503
+
+def import_backends():
+    """
+    Import every deferred SDK without opening a connection. Safe before fork:
+    gunicorn's master calls it once so workers share the loaded modules.
+    """
+    import PyPDF2
+    import docx
+    import ibm_watsonx_ai.foundation_models.embeddings
+    from handlers.storage import import_implementations
+    import_implementations()
+    from langchain_core.documents import Document
+    text_splitter.get()
+
+def warm_up():
+    """
+    Open every backend connection (watsonx.ai token, COS, Presto, Milvus) in
+    this process before it takes traffic. Called per worker after fork; a
+    backend that is down is logged and retried on first use.
+    """
+    started = time.perf_counter()
+    import_backends()
+    backends = check_backends()
+    for name, backend in backends.items():
+        status = '[SUCCESS]' if backend['ready'] else '[WARNING] '
+        print(f"{status} Warm-up {name}: {backend['detail']} ({backend['ms']} ms)")
+    ready = sum(1 for backend in backends.values() if backend['ready'])
+    print(f"[SUCCESS] Process {os.getpid()} warmed up in {time.perf_counter() - started:.1f}s "
+          f"({ready}/{len(backends)} backends ready)")
+    return backends
 @app.route('/', methods=['GET'])
 def home():
     """API information"""
@@ -447,9 +978,15 @@ def home():
             'upload': 'POST /api/upload-to-watsonx',
             'download': 'GET /api/download-document/<document_id>/<filename>',
             'view': 'GET /api/view-document/<document_id>/<filename>',
+            'coverage': 'GET /api/coverage/<document_id>',
             'get_requests': 'GET /api/get-requests',
             'update_status': 'PUT /api/update-status',
-            'search': 'POST /api/search'
+            'search': 'POST /api/search',
+            'search_batch': 'POST /api/search/batch',
+            'health': 'GET /health',
+            'ready': 'GET /ready',
+            'metrics': 'GET /metrics',
+            'profiles': 'GET /admin/profiles (X-Admin-Token)'
         }
     })
 # ==================== START SERVER ====================
@@ -458,7 +995,7 @@ if __name__ == '__main__':
     print("\n[UPLOADING] ========== STARTING SERVER ==========")
     print(f"Service: watsonx.ai Upload Service v7.0")
     print(f"Port: 5000")
-    print(f"Collection: cpl_documents_v5")
+    print(f"Collection: {milvus.collection_name}")
     print(f"COS Bucket: {os.getenv('COS_BUCKET_NAME', 'cpl-documents')}")
     print(f"Chunk size: {CHUNK_SIZE} (with {CHUNK_OVERLAP} overlap)")
     print(f"Token limit: 512 (with safety truncation at 450)")
@@ -0,0 +1,503 @@
+"""
+ANN Index Benchmark Helpers
+Exact NumPy ground truth, in-process stand-ins for the Milvus index types we
+consider (FLAT, IVF_FLAT, IVF_SQ8, HNSW via hnswlib) and an optional adapter
+that runs the same configurations against a real Milvus / Milvus Lite
+"""
+
+import os
+import time
+import numpy as np
+
+DIM = 768
+
+
+# ==================== DATA ====================
+
+def synthetic_vectors(n, dim=DIM, clusters=64, seed=0):
+    """
+    Clustered Gaussian data: embeddings of syllabi are far from uniform,
+    and uniform data makes every ANN index look worse than it is
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors.astype(np.float32)
+
+
+def quantize(vectors, dtype):
+    """
+    Round-trip float32 vectors through a 16-bit storage type, so stand-ins
+    see exactly the precision a FLOAT16 / BF16 collection keeps
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == 'float16':
+        return vectors.astype(np.float16).astype(np.float32)
+    if dtype == 'bfloat16':
+        bits = vectors.view(np.uint32).astype(np.uint64)
+        rounded = ((bits + 0x7FFF + ((bits >> 16) & 1)) >> 16).astype(np.uint32) << 16
+        return rounded.view(np.float32)
+    return vectors
+
+
+VECTOR_BYTES = {'float32': 4, 'float16': 2, 'bfloat16': 2}
+
+
+def load_milvus_rows(limit, output_fields=('vector',)):
+    """Pull up to `limit` rows from the CPL collection (MILVUS_COLLECTION)"""
+    from pymilvus import connections, Collection
+    from handlers.milvus_handler import COLLECTION_NAME, vector_dtype, decode_vector
+
+    connections.connect(
+        alias="default",
+        host=os.getenv('MILVUS_HOST'),
+        port=int(os.getenv('MILVUS_PORT', 19530)),
+        user=os.getenv('MILVUS_USERNAME'),
+        password=os.getenv('MILVUS_PASSWORD'),
+        secure=True
+    )
+    try:
+        collection = Collection(COLLECTION_NAME)
+        collection.load()
+        dtype = vector_dtype(collection.schema)
+        iterator = collection.query_iterator(batch_size=1000, expr="pk != ''", output_fields=list(output_fields))
+        rows = []
+        while len(rows) < limit:
+            batch = iterator.next()
+            if not batch:
+                break
+            rows.extend(batch)
+        iterator.close()
+    finally:
+        connections.disconnect("default")
+
+    rows = rows[:limit]
+    if 'vector' in output_fields:
+        for row in rows:
+            row['vector'] = decode_vector(row['vector'], dtype)
+    return rows
+
+
+def split_queries(vectors, n_queries, seed=1):
+    """Hold out n_queries rows as queries; the rest is the indexed base"""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(vectors))
+    return vectors[order[n_queries:]], vectors[order[:n_queries]]
+
+
+def exact_top_k(base, queries, k, batch=256):
+    """Exact L2 top-k ids for every query (batched to bound memory)"""
+    base_sq = (base ** 2).sum(axis=1)
+    result = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), batch):
+        q = queries[start:start + batch]
+        distances = base_sq[None, :] - 2.0 * (q @ base.T)
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, top, axis=1).argsort(axis=1)
+        result[start:start + batch] = np.take_along_axis(top, order, axis=1)
+    return result
+
+
+def recall_at_k(found, truth):
+    """Mean fraction of true neighbours returned"""
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / float(truth.size)
+
+
+# ==================== IN-PROCESS STAND-INS ====================
+
+def _kmeans(vectors, nlist, iterations=10, seed=0, sample=50000):
+    rng = np.random.default_rng(seed)
+    train = vectors[rng.choice(len(vectors), size=min(sample, len(vectors)), replace=False)]
+    centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(train, centroids)
+        for c in range(nlist):
+            members = train[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+    return centroids
+
+
+def _nearest(vectors, centroids, batch=4096):
+    centroid_sq = (centroids ** 2).sum(axis=1)
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), batch):
+        chunk = vectors[start:start + batch]
+        assign[start:start + batch] = (centroid_sq[None, :] - 2.0 * chunk @ centroids.T).argmin(axis=1)
+    return assign
+
+
+class FlatIndex:
+    """Brute force; the recall = 1.0 latency baseline"""
+
+    def __init__(self, params):
+        self.params = params
+
+    def set_search_params(self, params):
+        pass
+
+    def build(self, base):
+        self.base = base
+        self.base_sq = (base ** 2).sum(axis=1)
+
+    def search(self, query, k, mask=None):
+        distances = self.base_sq - 2.0 * (self.base @ query)
+        if mask is not None:
+            # Filtered search: every row is still scored, as in an unpartitioned segment
+            distances = np.where(mask, distances, np.inf)
+        top = np.argpartition(distances, k - 1)[:k]
+        return top[distances[top].argsort()]
+
+    def memory_bytes(self):
+        return self.base.nbytes
+
+
+class IVFFlatIndex:
+    """Inverted lists over k-means cells; scans nprobe cells with full vectors"""
+
+    def __init__(self, params):
+        self.nlist = params['nlist']
+        self.nprobe = params['nprobe']
+
+    def set_search_params(self, params):
+        self.nprobe = params['nprobe']
+
+    def build(self, base):
+        self.centroids = _kmeans(base, self.nlist)
+        assign = _nearest(base, self.centroids)
+        self.lists = [np.flatnonzero(assign == c) for c in range(self.nlist)]
+        self.vectors = [self._encode(base[ids]) for ids in self.lists]
+
+    def _encode(self, vectors):
+        return vectors
+
+    def _decode(self, codes):
+        return codes
+
+    def search(self, query, k):
+        cells = ((self.centroids - query) ** 2).sum(axis=1).argsort()[:self.nprobe]
+        ids = np.concatenate([self.lists[c] for c in cells])
+        if len(ids) == 0:
+            return ids
+        candidates = np.concatenate([self._decode(self.vectors[c]) for c in cells])
+        distances = ((candidates - query) ** 2).sum(axis=1)
+        top = np.argsort(distances)[:k]
+        return ids[top]
+
+    def memory_bytes(self):
+        return self.centroids.nbytes + sum(v.nbytes + ids.nbytes for v, ids in zip(self.vectors, self.lists))
+
+
+class IVFSQ8Index(IVFFlatIndex):
+    """IVF with 8-bit scalar quantization per dimension (4x smaller lists)"""
+
+    def build(self, base):
+        self.low = base.min(axis=0)
+        self.scale = (base.max(axis=0) - self.low) / 255.0
+        self.scale[self.scale == 0] = 1.0
+        super().build(base)
+
+    def _encode(self, vectors):
+        return np.round((vectors - self.low) / self.scale).astype(np.uint8)
+
+    def _decode(self, codes):
+        return codes.astype(np.float32) * self.scale + self.low
+
+
+class HNSWIndex:
+    """HNSW through hnswlib (optional dependency; same algorithm Milvus uses)"""
+
+    def __init__(self, params):
+        self.M = params['M']
+        self.ef_construction = params['efConstruction']
+        self.ef = params['ef']
+
+    def build(self, base):
+        import hnswlib
+        self.count, self.dim = base.shape
+        self.index = hnswlib.Index(space='l2', dim=self.dim)
+        self.index.init_index(max_elements=self.count, M=self.M, ef_construction=self.ef_construction)
+        self.index.add_items(base, np.arange(self.count))
+        self.index.set_ef(self.ef)
+
+    def set_search_params(self, params):
+        self.ef = params['ef']
+        self.index.set_ef(self.ef)
+
+    def search(self, query, k):
+        self.index.set_ef(max(self.ef, k))
+        labels, _ = self.index.knn_query(query, k=k)
+        return labels[0]
+
+    def memory_bytes(self):
+        # hnswlib layout per node: level 0 holds the vector, 2M links + count and
+        # the label; a node reaches level l with probability M^-l, so upper
+        # levels add (M links + count) / (M - 1) on average, plus their pointer
+        level0 = self.dim * 4 + self.M * 2 * 4 + 4 + 8
+        upper = (self.M * 4 + 4) / (self.M - 1) + 8
+        return int(self.count * (level0 + upper))
+
+
+STAND_INS = {
+    'FLAT': FlatIndex,
+    'IVF_FLAT': IVFFlatIndex,
+    'IVF_SQ8': IVFSQ8Index,
+    'HNSW': HNSWIndex,
+}
+
+
+def default_configs(n):
+    """Candidate index configurations, scaled to the number of vectors"""
+    nlist = int(max(16, min(4096, 4 * np.sqrt(n))))
+    configs = [{'index_type': 'FLAT', 'params': {}}]
+    for M, ef_construction in ((8, 64), (16, 128), (32, 200)):
+        for ef in (32, 64, 128, 256):
+            configs.append({'index_type': 'HNSW', 'params': {'M': M, 'efConstruction': ef_construction, 'ef': ef}})
+    for index_type in ('IVF_FLAT', 'IVF_SQ8'):
+        for nprobe in (8, 16, 32, 64):
+            configs.append({'index_type': index_type, 'params': {'nlist': nlist, 'nprobe': nprobe}})
+    return configs
+
+
+# Applied at search time; every other param shapes the built index
+SEARCH_PARAMS = ('ef', 'nprobe')
+
+
+def build_groups(configs):
+    """
+    Group configurations that share one built index (same type and build
+    params, different ef / nprobe), keeping their order
+    """
+    groups = {}
+    for config in configs:
+        build = {key: v for key, v in config['params'].items() if key not in SEARCH_PARAMS}
+        key = (config['index_type'], tuple(sorted(build.items())))
+        groups.setdefault(key, []).append(config)
+    return list(groups.values())
+
+
+# ==================== MEASUREMENT ====================
+
+def latency_summary(latencies, elapsed):
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return {
+        'qps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def _timed_searches(search, queries):
+    found, latencies = [], []
+    started = time.perf_counter()
+    for query in queries:
+        t0 = time.perf_counter()
+        found.append(search(query))
+        latencies.append(time.perf_counter() - t0)
+    return found, latencies, time.perf_counter() - started
+
+
+def run_stand_in(config, base, queries, truth, k):
+    """Build and query one configuration in-process"""
+    return run_stand_in_group([config], base, queries, truth, k)[0]
+
+
+def run_stand_in_group(configs, base, queries, truth, k):
+    """
+    Build one index in-process and query it with each configuration's search
+    params (one group from build_groups); build_s is the shared build
+    """
+    index = STAND_INS[configs[0]['index_type']](configs[0]['params'])
+    started = time.perf_counter()
+    index.build(base)
+    build_s = time.perf_counter() - started
+
+    results = []
+    for config in configs:
+        index.set_search_params(config['params'])
+        found, latencies, elapsed = _timed_searches(lambda query: index.search(query, k), queries)
+        results.append(dict(
+            config,
+            backend='in-process',
+            build_s=round(build_s, 2),
+            recall=round(recall_at_k(found, truth), 4),
+            memory_mb=round(index.memory_bytes() / 2 ** 20, 1),
+            **latency_summary(latencies, elapsed)
+        ))
+    return results
+
+
+def estimate_milvus_memory(index_type, params, n, dim, vector_bytes=4):
+    """Rough loaded-segment size for Milvus index types (vectors + structure)"""
+    raw = n * dim * vector_bytes
+    if index_type == 'IVF_SQ8':
+        return n * dim + params.get('nlist', 0) * dim * 4 + n * 8
+    if index_type == 'IVF_FLAT':
+        return raw + params.get('nlist', 0) * dim * 4 + n * 8
+    if index_type == 'HNSW':
+        return raw + n * params.get('M', 16) * 2 * 4 * 3 // 2
+    return raw
+
+
+def run_milvus(config, base, queries, truth, k, uri, token=None, batch=2000, vector_dtype='float32'):
+    """
+    Build and query one configuration in a real Milvus (server URI or a Milvus Lite .db file)
+    vector_dtype 'float16' / 'bfloat16' stores the base as a 16-bit vector field
+    """
+    return run_milvus_group([config], base, queries, truth, k, uri, token, batch, vector_dtype)[0]
+
+
+def run_milvus_group(configs, base, queries, truth, k, uri, token=None, batch=2000, vector_dtype='float32'):
+    """
+    Build one collection and query it with each configuration's search params
+    (one group from build_groups); search params (ef / nprobe) are split from
+    build params as Milvus expects
+    """
+    from pymilvus import MilvusClient, DataType
+    from handlers.milvus_handler import encode_vector, search_vector
+
+    field_types = {'float32': DataType.FLOAT_VECTOR, 'float16': DataType.FLOAT16_VECTOR,
+                   'bfloat16': DataType.BFLOAT16_VECTOR}
+
+    index_type = configs[0]['index_type']
+    client = MilvusClient(uri=uri, token=token or '')
+    name = f"ann_bench_{index_type.lower()}_{int(time.time() * 1000)}"
+    build_params = {key: v for key, v in configs[0]['params'].items() if key not in SEARCH_PARAMS}
+
+    schema = MilvusClient.create_schema(auto_id=False)
+    schema.add_field('id', DataType.INT64, is_primary=True)
+    schema.add_field('vector', field_types[vector_dtype], dim=base.shape[1])
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name='vector', index_type=index_type, metric_type='L2', params=build_params)
+    memory_mb = round(estimate_milvus_memory(index_type, build_params, *base.shape,
+                                             vector_bytes=VECTOR_BYTES[vector_dtype]) / 2 ** 20, 1)
+
+    results = []
+    try:
+        started = time.perf_counter()
+        client.create_collection(name, schema=schema, index_params=index_params)
+        for start in range(0, len(base), batch):
+            rows = [{'id': start + i, 'vector': encode_vector(v, vector_dtype)}
+                    for i, v in enumerate(base[start:start + batch])]
+            client.insert(name, rows)
+        client.flush(name)
+        client.load_collection(name)
+        build_s = time.perf_counter() - started
+
+        for config in configs:
+            search_params = {key: v for key, v in config['params'].items() if key in SEARCH_PARAMS}
+
+            def search(query):
+                hits = client.search(name, data=[search_vector(query.tolist(), vector_dtype)], limit=k,
+                                     search_params={'metric_type': 'L2', 'params': search_params})
+                return [hit['id'] for hit in hits[0]]
+
+            found, latencies, elapsed = _timed_searches(search, queries)
+            results.append(dict(
+                config,
+                backend='milvus',
+                build_s=round(build_s, 2),
+                recall=round(recall_at_k(found, truth), 4),
+                memory_mb=memory_mb,
+                **latency_summary(latencies, elapsed)
+            ))
+    finally:
+        client.drop_collection(name)
+    return results
+
+
+# ==================== PARTITIONS ====================
+
+def run_partition_stand_in(reference, students, queries, k):
+    """
+    Reference-syllabus search with student documents in the same population
+    (document_type filter) vs in their own partition (scan reference rows only)
+    """
+    base = np.vstack([reference, students])
+    is_reference = np.arange(len(base)) < len(reference)
+    truth = exact_top_k(reference, queries, k)
+
+    flat = FlatIndex({})
+    flat.build(base)
+    partition = FlatIndex({})
+    partition.build(reference)
+
+    filtered, filtered_latencies, filtered_elapsed = _timed_searches(
+        lambda q: flat.search(q, k, mask=is_reference), queries)
+    pruned, pruned_latencies, pruned_elapsed = _timed_searches(
+        lambda q: partition.search(q, k), queries)
+
+    return _partition_result('in-process', len(reference), len(students),
+                             (filtered, filtered_latencies, filtered_elapsed),
+                             (pruned, pruned_latencies, pruned_elapsed), truth)
+
+
+def run_milvus_partitions(reference, students, queries, k, uri, token=None, batch=2000,
+                          index_params=None, ef=64):
+    """
+    Same comparison in a real Milvus: one collection with doc-type partitions,
+    searched with a document_type filter only vs with partition_names
+    Defaults match create_cpl_collection.py (HNSW M=8, efConstruction=64, ef=64)
+    """
+    from pymilvus import MilvusClient, DataType
+
+    client = MilvusClient(uri=uri, token=token or '')
+    name = f"partition_bench_{int(time.time() * 1000)}"
+    truth = exact_top_k(reference, queries, k)
+
+    schema = MilvusClient.create_schema(auto_id=False)
+    schema.add_field('id', DataType.INT64, is_primary=True)
+    schema.add_field('document_type', DataType.VARCHAR, max_length=64)
+    schema.add_field('vector', DataType.FLOAT_VECTOR, dim=reference.shape[1])
+    prepared = client.prepare_index_params()
+    prepared.add_index(field_name='vector', metric_type='L2',
+                       **(index_params or {'index_type': 'HNSW', 'params': {'M': 8, 'efConstruction': 64}}))
+    search_params = {'metric_type': 'L2', 'params': {'ef': max(ef, k)}}
+
+    try:
+        client.create_collection(name, schema=schema, index_params=prepared)
+        for partition_name, document_type, vectors, offset in (
+            ('nu_syllabus', 'nu_syllabus', reference, 0),
+            ('student_documents', 'student_syllabus', students, len(reference)),
+        ):
+            client.create_partition(name, partition_name)
+            for start in range(0, len(vectors), batch):
+                rows = [{'id': offset + start + i, 'document_type': document_type, 'vector': v.tolist()}
+                        for i, v in enumerate(vectors[start:start + batch])]
+                client.insert(name, rows, partition_name=partition_name)
+        client.flush(name)
+        client.load_collection(name)
+
+        def search(partition_names):
+            def run(query):
+                hits = client.search(name, data=[query.tolist()], limit=k,
+                                     filter='document_type == "nu_syllabus"',
+                                     partition_names=partition_names, search_params=search_params)
+                return [hit['id'] for hit in hits[0]]
+            return run
+
+        filtered = _timed_searches(search(None), queries)
+        pruned = _timed_searches(search(['nu_syllabus']), queries)
+    finally:
+        client.drop_collection(name)
+
+    return _partition_result('milvus', len(reference), len(students), filtered, pruned, truth)
+
+
+def _partition_result(backend, n_reference, n_students, filtered, pruned, truth):
+    filtered_found, filtered_latencies, filtered_elapsed = filtered
+    pruned_found, pruned_latencies, pruned_elapsed = pruned
+    unpartitioned = dict(recall=round(recall_at_k(filtered_found, truth), 4),
+                         **latency_summary(filtered_latencies, filtered_elapsed))
+    partitioned = dict(recall=round(recall_at_k(pruned_found, truth), 4),
+                       **latency_summary(pruned_latencies, pruned_elapsed))
+    return {
+        'backend': backend,
+        'reference': n_reference,
+        'students': n_students,
+        'unpartitioned': unpartitioned,
+        'partitioned': partitioned,
+        'p50_speedup': round(unpartitioned['p50_ms'] / partitioned['p50_ms'], 2) if partitioned['p50_ms'] else None,
+    }
@@ -1,5 +1,8 @@
 from pymilvus import connections, Collection
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import COLLECTION_NAME
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,7 +16,7 @@ connections.connect(
     secure=True
 )
 
-collection = Collection("cpl_documents_v4")
+collection = Collection(COLLECTION_NAME)
 collection.load()
 
 # Get samples from PJM5900.pdf
@@ -1,5 +1,9 @@
 # Check what's actually in your Milvus collection
+import os
+import sys
 from pymilvus import connections, Collection
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import COLLECTION_NAME
 
 connections.connect(
     alias="default",
@@ -10,7 +14,7 @@ connections.connect(
     secure=True
 )
 
-collection = Collection("cpl_documents_v5")
+collection = Collection(COLLECTION_NAME)
 collection.load()
 
 # Search for John Smith
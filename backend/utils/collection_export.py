@@ -0,0 +1,256 @@
+"""
+Streaming Collection Export & Audit
+Walks the whole CPL collection with query_iterator in fixed-size pages, so
+memory stays bounded by the page size, not the collection size.
+
+    iter_rows           every row, page by page
+    NdjsonSink          one JSON object per line
+    ParquetSink         one row group per page; same layout bulk_import.py loads
+    CollectionAudit     chunk/size statistics computed on the fly
+
+query_iterator pages in primary-key order and pks are {document_id}_{n}, so a
+document's chunks arrive together; the audit keeps only the current
+document's run and flushes its stats when the next document starts.
+"""
+
+import json
+import heapq
+import random
+from collections import deque
+import pyarrow as pa
+import pyarrow.parquet as pq
+from handlers.milvus_handler import decode_vector
+from utils.milvus_bulk_import import arrow_schema, column_value
+
+
+def iter_rows(collection, output_fields, batch_size=1000, expr="pk != ''"):
+    """Yield pages (lists of row dicts) of the whole collection"""
+    iterator = collection.query_iterator(batch_size=batch_size, expr=expr, output_fields=list(output_fields))
+    try:
+        while True:
+            page = iterator.next()
+            if not page:
+                break
+            yield page
+    finally:
+        iterator.close()
+
+
+# ==================== SINKS ====================
+
+class NdjsonSink:
+    """Write rows as NDJSON; vectors are decoded to float lists"""
+
+    def __init__(self, path, vector_dtype='float32'):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.vector_dtype = vector_dtype
+        self.rows = 0
+
+    def write(self, page):
+        lines = []
+        for row in page:
+            if 'vector' in row:
+                row = dict(row, vector=decode_vector(row['vector'], self.vector_dtype))
+            lines.append(json.dumps(row, ensure_ascii=False, default=str))
+        self.file.write('\n'.join(lines) + '\n')
+        self.rows += len(page)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """Write rows to one Parquet file, a row group per page"""
+
+    def __init__(self, path, fields):
+        self.fields = list(fields)
+        self.writer = pq.ParquetWriter(path, arrow_schema(self.fields))
+        self.rows = 0
+
+    def write(self, page):
+        columns = {
+            field.name: [column_value(_raw_vector(row.get(field.name)), field.dtype) for row in page]
+            for field in self.fields
+        }
+        self.writer.write_table(pa.table(columns, schema=self.writer.schema))
+        self.rows += len(page)
+
+    def close(self):
+        self.writer.close()
+
+
+def _raw_vector(value):
+    # 16-bit vectors come back from query as [bytes]
+    if isinstance(value, (list, tuple)) and len(value) == 1 and isinstance(value[0], bytes):
+        return value[0]
+    return value
+
+
+# ==================== AUDIT ====================
+
+class CollectionAudit:
+    """
+    Statistics over a stream of rows in bounded memory
+
+    Per chunk: text length (min/max/mean, p50/p95 from a fixed-size reservoir),
+    empty texts, counts per document_type. Per document: chunk count, text
+    bytes and sequence_number gaps/duplicates, flushed to on_document as each
+    document's run ends. Keeps the largest documents in a top-N heap.
+    """
+
+    def __init__(self, top=10, reservoir_size=10000, on_document=None, seed=0):
+        self.top = top
+        self.reservoir_size = reservoir_size
+        self.on_document = on_document
+        self._random = random.Random(seed)
+
+        self.chunks = 0
+        self.documents = 0
+        self.text_bytes = 0
+        self.min_length = None
+        self.max_length = 0
+        self.empty_text = 0
+        self.by_type = {}
+        self.reservoir = []
+        self.largest = []           # heap of (chunks, document_id, document_name)
+        self.incomplete = []        # first `top` documents with gaps or duplicate sequence numbers
+        self.incomplete_count = 0
+        self.split_documents = 0    # document_id seen again after its run ended
+
+        self._current = None
+        self._recent = deque(maxlen=1000)
+        self._recent_ids = set()
+
+    def add(self, page):
+        for row in page:
+            self._add_row(row)
+
+    def _add_row(self, row):
+        text = row.get('text') or ''
+        length = len(text.encode('utf-8'))
+        self.chunks += 1
+        self.text_bytes += length
+        self.min_length = length if self.min_length is None else min(self.min_length, length)
+        self.max_length = max(self.max_length, length)
+        if not text.strip():
+            self.empty_text += 1
+        document_type = row.get('document_type') or 'unknown'
+        self.by_type[document_type] = self.by_type.get(document_type, 0) + 1
+
+        # Reservoir sample of lengths for percentiles
+        if len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(length)
+        else:
+            slot = self._random.randrange(self.chunks)
+            if slot < self.reservoir_size:
+                self.reservoir[slot] = length
+
+        document_id = row.get('document_id')
+        if self._current is None or self._current['document_id'] != document_id:
+            self._flush_document()
+            self._current = {
+                'document_id': document_id,
+                'document_name': row.get('document_name'),
+                'document_type': document_type,
+                'chunks': 0,
+                'text_bytes': 0,
+                'sequence_numbers': set(),
+                'duplicates': 0,
+            }
+        current = self._current
+        current['chunks'] += 1
+        current['text_bytes'] += length
+        sequence_number = row.get('sequence_number')
+        if sequence_number in current['sequence_numbers']:
+            current['duplicates'] += 1
+        current['sequence_numbers'].add(sequence_number)
+
+    def _flush_document(self):
+        current, self._current = self._current, None
+        if current is None:
+            return
+        self.documents += 1
+        document_id = current['document_id']
+        # Only a window of recent ids is remembered; a split run is a pk-order anomaly
+        if document_id in self._recent_ids:
+            self.split_documents += 1
+        else:
+            if len(self._recent) == self._recent.maxlen:
+                self._recent_ids.discard(self._recent[0])
+            self._recent.append(document_id)
+            self._recent_ids.add(document_id)
+
+        numbers = {n for n in current.pop('sequence_numbers') if isinstance(n, int)}
+        missing = (max(numbers) + 1 - len(numbers)) if numbers else 0
+        current['missing_sequence_numbers'] = missing
+        if missing or current['duplicates']:
+            self.incomplete_count += 1
+            if len(self.incomplete) < self.top:
+                self.incomplete.append(current)
+
+        entry = (current['chunks'], str(document_id), current['document_name'])
+        if len(self.largest) < self.top:
+            heapq.heappush(self.largest, entry)
+        else:
+            heapq.heappushpop(self.largest, entry)
+
+        if self.on_document:
+            self.on_document(current)
+
+    def finish(self):
+        """Flush the last document and return the summary dict"""
+        self._flush_document()
+        lengths = sorted(self.reservoir)
+
+        def percentile(q):
+            return lengths[min(len(lengths) - 1, int(q * len(lengths)))] if lengths else 0
+
+        return {
+            'chunks': self.chunks,
+            'documents': self.documents,
+            'text_bytes': self.text_bytes,
+            'chunk_bytes': {
+                'min': self.min_length or 0,
+                'max': self.max_length,
+                'mean': round(self.text_bytes / self.chunks, 1) if self.chunks else 0,
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+            },
+            'chunks_per_document': round(self.chunks / self.documents, 2) if self.documents else 0,
+            'empty_text': self.empty_text,
+            'by_type': dict(sorted(self.by_type.items())),
+            'largest_documents': [
+                {'document_id': document_id, 'document_name': name, 'chunks': chunks}
+                for chunks, document_id, name in sorted(self.largest, reverse=True)
+            ],
+            'incomplete_documents': self.incomplete_count,
+            'incomplete_sample': self.incomplete,
+            'split_documents': self.split_documents,
+        }
+
+
+def export_collection(collection, fields, sinks=(), audit=None, batch_size=1000, expr="pk != ''", progress=None):
+    """
+    Stream every row through the sinks and the audit
+
+    Args:
+        fields: FieldSchema list to read (vector included only if a sink needs it)
+        progress: callable(rows) after each page
+
+    Returns:
+        int: Rows read
+    """
+    rows = 0
+    try:
+        for page in iter_rows(collection, [field.name for field in fields], batch_size, expr):
+            for sink in sinks:
+                sink.write(page)
+            if audit is not None:
+                audit.add(page)
+            rows += len(page)
+            if progress:
+                progress(rows)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return rows
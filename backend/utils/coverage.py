@@ -0,0 +1,74 @@
+"""
+Syllabus Coverage
+Compares a student's document chunks against the NU reference syllabus for the
+same target_course with ONE NumPy similarity matrix (student x reference)
+"""
+
+import os
+import numpy as np
+from utils.keyword_index import normalize_course_code
+
+# Cosine similarity at or above which a reference chunk counts as covered
+COVERAGE_THRESHOLD = float(os.getenv('COVERAGE_THRESHOLD', 0.75))
+
+
+def course_variants(target_course):
+    """Spellings a course may be stored under ('PJM 5900' -> PJM 5900, PJM5900)"""
+    variants = [str(target_course).strip()]
+    code = normalize_course_code(target_course)
+    if code:
+        spaced = f"{code[:-4]} {code[-4:]}"
+        variants.extend(v for v in (code, spaced) if v not in variants)
+    return variants
+
+
+def _unit_rows(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def compute_coverage(student_vectors, reference_chunks, reference_vectors, threshold=None):
+    """
+    Summarize how well the student chunks cover each reference chunk
+
+    Args:
+        student_vectors: (n, d) embeddings of the student's chunks
+        reference_chunks: List of m reference chunk dicts (document_id, sequence_number, text)
+        reference_vectors: (m, d) embeddings of the reference chunks
+        threshold: Cosine similarity counted as "covered"
+
+    Returns:
+        dict: Compact summary, or None if either side is empty
+    """
+    if threshold is None:
+        threshold = COVERAGE_THRESHOLD
+    if len(student_vectors) == 0 or len(reference_vectors) == 0:
+        return None
+
+    # (n, m) cosine similarity matrix in one matmul
+    similarity = _unit_rows(student_vectors) @ _unit_rows(reference_vectors).T
+    best_student = similarity.argmax(axis=0)
+    best_score = similarity[best_student, np.arange(similarity.shape[1])]
+
+    per_reference = []
+    for j, chunk in enumerate(reference_chunks):
+        per_reference.append({
+            'document_id': chunk.get('document_id'),
+            'sequence_number': chunk.get('sequence_number'),
+            'preview': (chunk.get('text') or '')[:160],
+            'best_student_chunk': int(best_student[j]),
+            'similarity': round(float(best_score[j]), 4),
+            'covered': bool(best_score[j] >= threshold)
+        })
+
+    return {
+        'student_chunks': int(similarity.shape[0]),
+        'reference_chunks': int(similarity.shape[1]),
+        'reference_document_ids': sorted({c.get('document_id') for c in reference_chunks}),
+        'overall_score': round(float(best_score.mean()), 4),
+        'covered_fraction': round(float((best_score >= threshold).mean()), 4),
+        'threshold': threshold,
+        'per_reference': per_reference
+    }
@@ -3,8 +3,11 @@
 Flush/Delete Milvus Collection
 """
 import os
+import sys
 from dotenv import load_dotenv
 from pymilvus import connections, utility
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import COLLECTION_NAME
 
 load_dotenv()
 
@@ -14,7 +17,7 @@ host = os.environ.get("MILVUS_HOST")
 port = os.environ.get("MILVUS_PORT", "19530")
 
 # Collection to delete
-COLLECTION_TO_DELETE = "cpl_documents_v5"
+COLLECTION_TO_DELETE = sys.argv[1] if len(sys.argv) > 1 else COLLECTION_NAME
 
 print(f"Connecting to Milvus at {host}:{port}...")
 
@@ -0,0 +1,209 @@
+"""
+Ingest Micro-Benchmark Helpers
+Deterministic synthetic fixtures (PDF, DOCX, TXT in three sizes), the timed
+cases behind benchmark_ingest.py and the baseline comparison.
+
+Timings are divided by a fixed pure-Python calibration workload measured in
+the same run, so a baseline recorded on one machine can be checked on another:
+a case regresses when its calibrated time grows beyond the tolerance. Both use
+the best round, which other load on the machine can only make slower; the
+median is reported alongside to show how noisy the run was.
+"""
+
+import os
+import io
+import json
+import zlib
+import random
+import timeit
+import platform
+import statistics
+
+SIZES = {'small': 2, 'medium': 20, 'large': 100}  # pages (paragraph groups for DOCX/TXT)
+LINES_PER_PAGE = 40
+FORMATS = ('pdf', 'docx', 'txt')
+
+TOPICS = [
+    'project scope', 'risk management', 'stakeholder analysis', 'earned value', 'agile sprints',
+    'critical path', 'resource leveling', 'procurement', 'quality assurance', 'change control',
+    'data structures', 'algorithm design', 'dynamic programming', 'graph traversal', 'hash tables',
+    'relational databases', 'normalization', 'query optimization', 'transactions', 'indexing',
+    'linear regression', 'hypothesis testing', 'probability', 'sampling', 'neural networks',
+]
+WORDS = ['students', 'will', 'analyze', 'apply', 'evaluate', 'design', 'implement', 'the', 'of',
+         'and', 'using', 'case', 'studies', 'weekly', 'assignments', 'exam', 'lab', 'team', 'report',
+         'lecture', 'reading', 'methods', 'tools', 'practice', 'outcomes', 'course', 'module']
+
+
+# ==================== FIXTURES ====================
+
+def syllabus_lines(pages, seed=0):
+    """Syllabus-like text, LINES_PER_PAGE lines of at most ~90 chars per page"""
+    rng = random.Random(seed)
+    pages_lines = []
+    for page in range(pages):
+        lines = [f"Week {page + 1}: {rng.choice(TOPICS).title()}"]
+        while len(lines) < LINES_PER_PAGE:
+            words = [rng.choice(TOPICS)] + [rng.choice(WORDS) for _ in range(rng.randint(6, 11))]
+            lines.append(' '.join(words).capitalize() + '.')
+        pages_lines.append(lines)
+    return pages_lines
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(pages_lines):
+    """
+    Minimal text PDF (Helvetica, Flate-compressed content streams); written by
+    hand so generating fixtures needs no PDF library
+    """
+    objects = []  # 1-based object bodies
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    pages_obj = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    page_ids = []
+    for lines in pages_lines:
+        text = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        text += [f"({_pdf_escape(line)}) Tj T*" for line in lines]
+        text.append("ET")
+        stream = zlib.compress('\n'.join(text).encode('latin-1'))
+        content = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_obj, font, content)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    kids = b' '.join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref))
+    return out.getvalue()
+
+
+def make_docx(pages_lines):
+    import docx
+
+    document = docx.Document()
+    for lines in pages_lines:
+        document.add_heading(lines[0], level=2)
+        for start in range(1, len(lines), 5):
+            document.add_paragraph(' '.join(lines[start:start + 5]))
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def make_txt(pages_lines):
+    return '\n\n'.join('\n'.join(lines) for lines in pages_lines).encode('utf-8')
+
+
+def make_fixtures(directory):
+    """Write {size}.{pdf,docx,txt} for every size; returns the file names"""
+    os.makedirs(directory, exist_ok=True)
+    makers = {'pdf': make_pdf, 'docx': make_docx, 'txt': make_txt}
+    names = []
+    for size, pages in SIZES.items():
+        pages_lines = syllabus_lines(pages, seed=pages)
+        for fmt in FORMATS:
+            name = f"{size}.{fmt}"
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(makers[fmt](pages_lines))
+            names.append(name)
+    return names
+
+
+# ==================== TIMING ====================
+
+def measure(func, repeat=5, min_seconds=0.05):
+    """
+    Seconds per call over `repeat` rounds, each long enough (timeit
+    autorange) to swamp timer resolution
+
+    Returns:
+        dict: {'best', 'median', 'loops'}; 'best' is what baselines compare
+    """
+    timer = timeit.Timer(func)
+    loops, elapsed = timer.autorange()
+    if elapsed < min_seconds:
+        loops = max(1, int(loops * min_seconds / max(elapsed, 1e-9)))
+    rounds = [elapsed / loops] + [t / loops for t in timer.repeat(repeat=repeat - 1, number=loops)]
+    return {'best': min(rounds), 'median': statistics.median(rounds), 'loops': loops}
+
+
+def calibration_workload():
+    """Fixed string-heavy pure-Python work, a stand-in for this machine's speed"""
+    text = ' '.join(WORDS * 200)
+    for _ in range(20):
+        parts = text.split(' ')
+        text = ' '.join(sorted(parts[:2000]) + parts[2000:])
+        text.replace('the', 'THE').find('zzz')
+    return len(text)
+
+
+def calibrate(repeat=5):
+    return measure(calibration_workload, repeat=repeat)['best']
+
+
+# ==================== BASELINE ====================
+
+def machine_info():
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'platform': platform.platform()}
+
+
+def load_baseline(path):
+    """Baseline dict, or None if there is none yet"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(report, baseline, tolerance=0.25):
+    """
+    Calibrated time of each case against the baseline
+
+    Returns:
+        list: {'case', 'ratio', 'status'} with status 'regression' (slower than
+              1 + tolerance), 'improvement', 'ok' or 'new', slowest ratio first
+    """
+    rows = []
+    base_cases = (baseline or {}).get('cases', {})
+    for case, result in report['cases'].items():
+        base = base_cases.get(case)
+        if base is None:
+            rows.append({'case': case, 'ratio': None, 'status': 'new'})
+            continue
+        ratio = result['calibrated'] / base['calibrated']
+        if ratio > 1 + tolerance:
+            status = 'regression'
+        elif ratio < 1 / (1 + tolerance):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'case': case, 'ratio': ratio, 'status': status})
+    rows.sort(key=lambda row: -1 if row['ratio'] is None else -row['ratio'])
+    return rows
@@ -0,0 +1,353 @@
+"""
+Local Keyword Index for CPL chunks
+Inverted index over chunk text and target_course values so course codes
+("PJM 5900", "PJM6005") and exact terms are answered without the embedding API
+
+Persistence is an append-only JSONL journal shared by every writer
+(watson_upload.py, upload_nu_syllabi.py, build_keyword_index.py); readers
+replay new journal lines before each lookup. Appends, compaction and the
+rebuild swap hold an exclusive lock on {journal}.lock, so a journal replaced
+by compaction or a rebuild never loses another process's lines.
+"""
+
+import os
+import re
+import json
+import math
+import fcntl
+import threading
+from contextlib import contextmanager
+from collections import Counter, defaultdict
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'keyword_index.jsonl')
+
+# "PJM 5900", "PJM-5900", "pjm5900"; a candidate is a course code when its subject
+# is written in capitals or is a known subject, so "in 2024" or "Fall 2024" is not
+COURSE_CODE_PATTERN = re.compile(r'\b([A-Za-z]{2,5})[\s\-_]?(\d{4})\b')
+SUBJECT_PREFIXES = {
+    'ACCT', 'ALY', 'BUSN', 'CS', 'CSYE', 'DS', 'EAI', 'ECON', 'ENGL', 'FINA', 'HRM',
+    'INFO', 'ITC', 'LDR', 'MATH', 'MGMT', 'MKTG', 'PJM', 'POLS', 'PSYC', 'SCHM',
+}
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with'
+}
+
+# Reciprocal rank fusion constant (Cormack et al. use 60)
+RRF_K = 60
+
+
+def _is_course_code(match):
+    subject = match.group(1)
+    return subject.isupper() or subject.upper() in SUBJECT_PREFIXES
+
+
+def find_course_codes(text):
+    """Every course code mentioned in text, normalized ('PJM5900')"""
+    return [f"{m.group(1).upper()}{m.group(2)}" for m in COURSE_CODE_PATTERN.finditer(str(text))
+            if _is_course_code(m)]
+
+
+def normalize_course_code(text):
+    """Return 'PJM5900' for any spelling of a single course code, else None"""
+    match = COURSE_CODE_PATTERN.fullmatch(str(text).strip())
+    if not match or not _is_course_code(match):
+        return None
+    return f"{match.group(1).upper()}{match.group(2)}"
+
+
+def tokenize(text):
+    """Lower-case word tokens plus one merged token per course code mention"""
+    text = str(text)
+    tokens = [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+    tokens.extend(code.lower() for code in find_course_codes(text))
+    return tokens
+
+
+def chunk_key(metadata):
+    """Stable chunk id shared by the index and Milvus hits: {document_id}_{sequence_number}"""
+    return f"{metadata.get('document_id')}_{metadata.get('sequence_number')}"
+
+
+def classify_query(query):
+    """
+    Decide how a query should be answered
+
+    Returns:
+        tuple: (mode, terms) where mode is
+            'course'  - the whole query is one course code
+            'phrase'  - the whole query is a "quoted exact term"
+            'hybrid'  - free text that mentions course codes or quoted terms
+            'vector'  - plain natural language
+    """
+    stripped = str(query).strip()
+    code = normalize_course_code(stripped)
+    if code:
+        return 'course', [code]
+
+    quoted = re.findall(r'"([^"]+)"', stripped)
+    if quoted and re.fullmatch(r'\s*"[^"]+"\s*', stripped):
+        return 'phrase', quoted
+
+    codes = find_course_codes(stripped)
+    if codes or quoted:
+        return 'hybrid', codes + quoted
+    return 'vector', []
+
+
+def reciprocal_rank_fusion(*rankings, k=RRF_K):
+    """
+    Fuse ranked hit lists by chunk key
+
+    Args:
+        rankings: Lists of hits ({'content', 'metadata', ...}), best first
+
+    Returns:
+        list: Fused hits, each with 'score' set to its RRF score
+    """
+    scores = defaultdict(float)
+    hits = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking):
+            key = chunk_key(hit['metadata'])
+            scores[key] += 1.0 / (k + rank + 1)
+            hits.setdefault(key, hit)
+    fused = sorted(scores, key=scores.get, reverse=True)
+    return [dict(hits[key], score=scores[key]) for key in fused]
+
+
+class KeywordIndex:
+    """BM25 inverted index + target_course lookup over CPL chunks"""
+
+    def __init__(self, path=None, k1=1.2, b=0.75):
+        self.path = path if path is not None else os.getenv('KEYWORD_INDEX_PATH', DEFAULT_INDEX_PATH)
+        self.k1 = k1
+        self.b = b
+
+        self._reset()
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self.chunks = {}                      # key -> {'content', 'metadata', 'length'}
+        self.postings = defaultdict(dict)     # token -> {key: term frequency}
+        self.courses = defaultdict(set)       # normalized target_course -> {key}
+        self.by_document = defaultdict(set)   # document_id -> {key}
+        self.total_length = 0
+        self._offset = 0
+
+    # ---------- Writes ----------
+
+    def add_chunks(self, chunks):
+        """
+        Index chunks and append them to the journal
+
+        Args:
+            chunks: List of {'content': str, 'metadata': dict} (the Milvus upload payload)
+        """
+        records = [{'op': 'add', 'content': c['content'], 'metadata': c['metadata']} for c in chunks]
+        self._append(records)
+
+    def remove_document(self, document_id):
+        """Drop every chunk of a document (e.g. superseded syllabus)"""
+        self._append([{'op': 'remove', 'document_id': document_id}])
+
+    def remove_documents(self, document_ids):
+        """Drop many documents with one journal write (sync, GC)"""
+        self._append([{'op': 'remove', 'document_id': document_id} for document_id in document_ids])
+
+    def _append(self, records):
+        with self._lock:
+            if not self.path:
+                for record in records:
+                    self._apply(record)
+                return
+            payload = ''.join(json.dumps(r, default=str) + '\n' for r in records)
+            # Replaying afterwards applies our records and any other writer's in journal order
+            with self._journal_lock():
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(payload)
+            self._replay()
+
+    @contextmanager
+    def _journal_lock(self):
+        """Exclusive across processes; held while the journal is appended to or replaced"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _apply(self, record):
+        if record['op'] == 'remove':
+            for key in list(self.by_document.pop(record['document_id'], ())):
+                self._remove_chunk(key)
+            return
+
+        metadata = record['metadata']
+        key = chunk_key(metadata)
+        if key in self.chunks:
+            self._remove_chunk(key)
+
+        terms = Counter(tokenize(record['content']))
+        self.chunks[key] = {
+            'content': record['content'],
+            'metadata': metadata,
+            'length': sum(terms.values())
+        }
+        self.total_length += self.chunks[key]['length']
+        for term, tf in terms.items():
+            self.postings[term][key] = tf
+        course = normalize_course_code(metadata.get('target_course', ''))
+        if course:
+            self.courses[course].add(key)
+        self.by_document[metadata.get('document_id')].add(key)
+
+    def _remove_chunk(self, key):
+        chunk = self.chunks.pop(key)
+        self.total_length -= chunk['length']
+        for term in set(tokenize(chunk['content'])):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+        course = normalize_course_code(chunk['metadata'].get('target_course', ''))
+        if course:
+            self.courses[course].discard(key)
+        self.by_document[chunk['metadata'].get('document_id')].discard(key)
+
+    def _replay(self):
+        """Apply journal lines written since the last read (by this or another process)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        stat = os.stat(self.path)
+        if stat.st_ino != self._inode:
+            # Journal was compacted (replaced); rebuild from the new file
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size <= self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # partially written line; pick it up next time
+                self._apply(json.loads(line.decode('utf-8')))
+                self._offset += len(line)
+
+    def refresh(self):
+        with self._lock:
+            self._replay()
+
+    def compact(self):
+        """Rewrite the journal with only the live chunks (other readers reload on next lookup)"""
+        with self._lock, self._journal_lock():
+            self._replay()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for chunk in self.chunks.values():
+                    f.write(json.dumps({'op': 'add', 'content': chunk['content'], 'metadata': chunk['metadata']}, default=str) + '\n')
+            os.replace(tmp_path, self.path)
+            stat = os.stat(self.path)
+            self._inode = stat.st_ino
+            self._offset = stat.st_size
+
+    def journal_size(self):
+        """Current journal length in bytes (a line boundary); mark it before a rebuild"""
+        with self._journal_lock():
+            return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def swap_in(self, rebuilt_path, since):
+        """
+        Replace the journal with a rebuilt one, carrying over every line other
+        writers appended after byte offset `since` (see journal_size)
+        """
+        with self._lock, self._journal_lock():
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as live, open(rebuilt_path, 'ab') as rebuilt:
+                    live.seek(since)
+                    rebuilt.write(live.read())
+            os.replace(rebuilt_path, self.path)
+            self._replay()
+
+    # ---------- Reads ----------
+
+    def lookup_course(self, course_code, k, filters=None):
+        """
+        Chunks for one course: chunks filed under target_course first
+        (NU reference syllabus before student documents), then text mentions
+        """
+        self.refresh()
+        code = normalize_course_code(course_code)
+        if not code:
+            return []
+        with self._lock:
+            filed = [key for key in self.courses.get(code, ()) if self._matches(key, filters)]
+            filed.sort(key=lambda key: (
+                self.chunks[key]['metadata'].get('document_type') != 'nu_syllabus',
+                str(self.chunks[key]['metadata'].get('document_id')),
+                int(self.chunks[key]['metadata'].get('sequence_number') or 0)
+            ))
+            hits = [self._hit(key, 1.0) for key in filed[:k]]
+        if len(hits) < k:
+            seen = set(filed)
+            mentions = [h for h in self.search(code, k, filters) if chunk_key(h['metadata']) not in seen]
+            hits.extend(mentions[:k - len(hits)])
+        return hits
+
+    def search(self, query, k, filters=None, phrase=False):
+        """BM25 ranking; with phrase=True only chunks containing the exact phrase"""
+        self.refresh()
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self.chunks:
+                return []
+            n = len(self.chunks)
+            avg_length = self.total_length / n
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self.postings.get(term, {})
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    length = self.chunks[key]['length']
+                    scores[key] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+
+            candidates = [key for key in scores if self._matches(key, filters)]
+            if phrase:
+                needle = ' '.join(str(query).lower().split())
+                candidates = [key for key in candidates if needle in ' '.join(self.chunks[key]['content'].lower().split())]
+            ranked = sorted(candidates, key=scores.get, reverse=True)[:k]
+            return [self._hit(key, scores[key]) for key in ranked]
+
+    def _matches(self, key, filters):
+        metadata = self.chunks[key]['metadata']
+        for field, value in (filters or {}).items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            if metadata.get(field) not in values:
+                return False
+        return True
+
+    def _hit(self, key, score):
+        chunk = self.chunks[key]
+        return {
+            'content': chunk['content'],
+            'metadata': dict(chunk['metadata']),
+            'score': float(score)
+        }
+
+    def __len__(self):
+        return len(self.chunks)
+
+
+# Singleton instance
+_keyword_index = None
+
+def get_keyword_index():
+    """Get or create keyword index instance"""
+    global _keyword_index
+    if _keyword_index is None:
+        _keyword_index = KeywordIndex()
+    return _keyword_index
@@ -0,0 +1,59 @@
+"""
+Lazy Backends
+Module-level stand-ins for clients that are expensive to build (network
+authentication, heavy imports). The factory runs on first attribute access,
+once, under a lock; a failing factory raises to the caller and is retried on
+the next access instead of taking the whole process down at import.
+
+    embedding = LazyBackend('embedding', create_embedding)
+    embedding.embed_query(text)     # builds the client here, not at import
+"""
+
+import time
+import threading
+
+
+class LazyBackend:
+    """Proxy that builds its backend with factory() on first use"""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.init_seconds = None
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self):
+        return self._instance is not None
+
+    def get(self):
+        """The backend instance, building it if needed"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    self._instance = self.factory()
+                    self.init_seconds = round(time.perf_counter() - started, 3)
+                    print(f"[SUCCESS] {self.name} initialized on first use ({self.init_seconds}s)")
+                instance = self._instance
+        return instance
+
+    def set(self, instance):
+        """Use this instance instead of building one (local stand-ins, tests)"""
+        with self._lock:
+            self._instance = instance
+            self.init_seconds = 0.0
+
+    def __getattr__(self, attr):
+        # Only reached for names the proxy itself does not define; private
+        # names stay unproxied so introspection (mock.patch, copy, pickle)
+        # never builds a backend
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
+
+    def __repr__(self):
+        state = 'initialized' if self.initialized else 'not initialized'
+        return f"<LazyBackend {self.name} ({state})>"
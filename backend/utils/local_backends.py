@@ -0,0 +1,142 @@
+"""
+Local Backend Stand-ins
+In-process replacements for watsonx.ai and Presto, plus fault injection for
+the embedded stores (handlers/local_storage.py), so the Flask services run
+without cloud accounts under realistic latency (load tests, laptops, CI):
+
+    HashEmbeddings      hashed bag-of-words vectors: texts sharing words are close
+    PrestoRestStandIn   requests.Session speaking Presto's REST protocol (simple_server)
+    with_faults()       slows down / fails calls of a NumpyVectorStore,
+                        FileObjectStore or SQLiteRequestStore
+
+A Faults object adds latency (mean ms +/- jitter) and fails a fraction of
+calls with BackendFault, the way a slow or flaky remote would.
+"""
+
+import re
+import time
+import zlib
+import random
+import threading
+import itertools
+import numpy as np
+
+DIM = 768
+
+# Calls that reach the remote service in the implementation each store stands in for
+FAULT_OPERATIONS = {
+    'vector': ('insert_documents', 'delete_documents', 'search', 'query'),
+    'object': ('upload_document', 'get_document', 'upload_json', 'delete_document'),
+    'request': ('_run',),  # IcebergHandler's statement choke point: its own error handling applies
+}
+
+
+class BackendFault(ConnectionError):
+    """Failure injected by Faults"""
+
+
+class Faults:
+    """Latency and error injection for one backend"""
+
+    def __init__(self, latency_ms=0.0, jitter=0.25, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, operation):
+        with self._lock:
+            spread = self._rng.uniform(-self.jitter, self.jitter)
+            failed = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms * (1 + spread) / 1000.0)
+        if failed:
+            raise BackendFault(f"Injected fault in {operation}")
+
+
+def with_faults(store, faults, operations):
+    """
+    Route the named methods of one store instance through faults first
+
+    Returns:
+        The same store
+    """
+    for name in operations:
+        method = getattr(store, name)
+
+        def call(*args, _method=method, _name=name, **kwargs):
+            faults(_name)
+            return _method(*args, **kwargs)
+
+        setattr(store, name, call)
+    return store
+
+
+# ==================== WATSONX.AI ====================
+
+class HashEmbeddings:
+    """Embeddings interface (embed_documents / embed_query) with no model behind it"""
+
+    def __init__(self, dim=DIM, faults=None):
+        self.dim = dim
+        self.faults = faults or Faults()
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r'\w+', text.lower()):
+            h = zlib.crc32(token.encode('utf-8'))
+            vector[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        self.faults('embed_documents')
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.faults('embed_query')
+        return self._vector(text)
+
+
+# ==================== PRESTO ====================
+
+class _RestResponse:
+
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+
+class PrestoRestStandIn:
+    """post() submits a statement, get(nextUri) returns all of its rows in one page"""
+
+    def __init__(self, store, faults=None):
+        self.store = store
+        self.faults = faults or Faults()
+        self._results = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def post(self, url, data=None, **kwargs):
+        self.faults('presto.submit')
+        query_id = f"local_{next(self._ids):06d}"
+        columns, rows = self.store.execute(data)
+        with self._lock:
+            self._results[query_id] = (columns, rows)
+        return _RestResponse({'id': query_id, 'nextUri': f"local://presto/{query_id}/1", 'stats': {'state': 'QUEUED'}})
+
+    def get(self, url, **kwargs):
+        self.faults('presto.fetch')
+        query_id = url.split('/')[-2]
+        with self._lock:
+            columns, rows = self._results.pop(query_id, ([], []))
+        return _RestResponse({
+            'id': query_id,
+            'columns': [{'name': name, 'type': 'varchar'} for name in columns],
+            'data': [list(row) for row in rows],
+            'stats': {'state': 'FINISHED', 'processedRows': len(rows), 'queuedTimeMillis': 0, 'elapsedTimeMillis': 0}
+        })
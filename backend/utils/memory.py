@@ -0,0 +1,143 @@
+"""
+Request Memory Accounting
+Allocation peaks per request and per stage (tracemalloc), and the upload
+memory budget.
+
+    timer.track_memory(budget.budget_bytes)   # StageTimer, see utils/metrics.py
+    with timer.stage('extract'):              # peak of the stage is recorded and,
+        ...                                   # over budget, MemoryBudgetExceeded
+
+tracemalloc is process-wide and a stage boundary resets its peak, so only one
+request per process is tracked at a time: under gunicorn's gthread workers a
+second upload arriving while another is tracked is not measured (its tracker
+is not `tracking`) and relies on MemoryBudget.plan()'s size-based decision
+instead of waiting. Untracked requests running alongside cannot reset the
+peak; their allocations only add to the tracked upload's figures. Tracing slows allocation down, so it is
+only started when a budget or UPLOAD_MEMORY_TRACKING=1 asks for it.
+"""
+
+import os
+import threading
+import tracemalloc
+
+MB = 1024 * 1024
+
+
+class MemoryBudgetExceeded(Exception):
+    """A request allocated more than its memory budget"""
+
+    def __init__(self, stage, used_bytes, budget_bytes):
+        self.stage = stage
+        self.used_bytes = used_bytes
+        self.budget_bytes = budget_bytes
+        super().__init__(
+            f"Memory budget exceeded during {stage}: "
+            f"{used_bytes / MB:.1f} MB used, budget is {budget_bytes / MB:.1f} MB"
+        )
+
+
+class MemoryTracker:
+    """
+    Peak traced memory above the request's starting point, overall and per
+    stage. Stages may nest: the peak seen so far is folded into every open
+    stage before tracemalloc's peak is reset.
+
+    Takes the process's tracking slot without waiting and holds it until
+    finish() or close(), so no other tracker resets the peak under it. When
+    another tracker holds the slot, tracking is False and nothing is measured.
+    """
+
+    _slot = threading.Lock()
+
+    def __init__(self, budget_bytes=0):
+        self.budget_bytes = budget_bytes
+        self.stages = {}
+        self.peak = 0
+        self._open = []
+        self.tracking = self._holding = self._slot.acquire(blocking=False)
+        self.baseline = 0
+        if not self.tracking:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def _fold(self):
+        if not self._holding:
+            return 0
+        peak = max(0, tracemalloc.get_traced_memory()[1] - self.baseline)
+        tracemalloc.reset_peak()
+        self.peak = max(self.peak, peak)
+        for frame in self._open:
+            frame[1] = max(frame[1], peak)
+        return peak
+
+    def enter(self, stage):
+        self._fold()
+        self._open.append([stage, 0])
+
+    def exit(self):
+        """Close the innermost stage; returns (stage, its peak in bytes)"""
+        self._fold()
+        stage, peak = self._open.pop()
+        self.stages[stage] = max(self.stages.get(stage, 0), peak)
+        return stage, peak
+
+    def check(self, stage, peak):
+        if self.budget_bytes and peak > self.budget_bytes:
+            raise MemoryBudgetExceeded(stage, peak, self.budget_bytes)
+
+    def finish(self):
+        """Peak of the whole request in bytes; releases the tracking slot"""
+        self._fold()
+        self.close()
+        return self.peak
+
+    def close(self):
+        """Release the tracking slot (idempotent); later folds measure nothing"""
+        if self._holding:
+            self._holding = False
+            self._slot.release()
+
+    def stages_mb(self):
+        return {stage: round(peak / MB, 2) for stage, peak in self.stages.items()}
+
+
+class MemoryBudget:
+    """
+    Decide up front how an upload of a given size is processed
+
+    factor is the in-memory pipeline's peak per upload byte (raw bytes,
+    extracted text, chunks, enriched copies and vectors alive together).
+    """
+
+    def __init__(self, budget_mb=0, factor=8.0, tracking=False):
+        self.budget_bytes = int(budget_mb * MB)
+        self.factor = factor
+        self.tracking = tracking or bool(self.budget_bytes)
+
+    def plan(self, upload_bytes):
+        """'memory', 'stream', or 'reject' (the raw upload alone does not fit)"""
+        if not self.budget_bytes:
+            return 'memory'
+        if upload_bytes > self.budget_bytes:
+            return 'reject'
+        if upload_bytes * self.factor > self.budget_bytes:
+            return 'stream'
+        return 'memory'
+
+
+# Singleton instance
+_upload_budget = None
+
+def get_upload_budget():
+    """Get or create the upload memory budget from UPLOAD_MEMORY_* environment variables"""
+    global _upload_budget
+    if _upload_budget is None:
+        _upload_budget = MemoryBudget(
+            budget_mb=float(os.getenv('UPLOAD_MEMORY_BUDGET_MB', 0)),
+            factor=float(os.getenv('UPLOAD_MEMORY_FACTOR', 8)),
+            tracking=os.getenv('UPLOAD_MEMORY_TRACKING', '0') == '1'
+        )
+    return _upload_budget
@@ -0,0 +1,329 @@
+"""
+Request Metrics
+Per-stage latency histograms and counters for the Flask services, exposed at
+/metrics in the Prometheus text format (0.0.4).
+
+    timer = current_timer()             # one per request, see init_app
+    with timer.stage('embed'):
+        vectors = embedding.embed_documents(texts)
+    timer.stages                        # {'embed': 812.4} ms, for the response
+
+Under gunicorn every worker has its own registry. With METRICS_DIR set, each
+worker periodically writes a snapshot to METRICS_DIR/metrics-<pid>.json and
+/metrics sums all snapshots, so any worker answers for the whole server (files
+of recycled workers are kept: their counts stay part of the totals).
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from utils.tracing import span
+from utils.memory import MB, MemoryTracker
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MEMORY_BUCKETS = tuple(mb * MB for mb in (1, 4, 16, 64, 128, 256, 512, 1024, 2048, 4096))
+
+# name -> (type, help)
+FAMILIES = {
+    'cpl_requests_total': ('counter', "Requests by endpoint and HTTP status"),
+    'cpl_request_duration_seconds': ('histogram', "Request latency by endpoint and HTTP status"),
+    'cpl_stage_duration_seconds': ('histogram', "Latency of one stage of a request"),
+    'cpl_stage_errors_total': ('counter', "Stages that raised or reported a failure"),
+    'cpl_upload_bytes_total': ('counter', "Bytes of uploaded files"),
+    'cpl_upload_pages_total': ('counter', "PDF pages extracted from uploads"),
+    'cpl_upload_chunks_total': ('counter', "Chunks created from uploads"),
+    'cpl_upload_truncated_chunks_total': ('counter', "Chunks truncated to fit the embedding token limit"),
+    'cpl_stage_peak_memory_bytes': ('histogram', "Peak traced memory of one stage of a request"),
+    'cpl_request_peak_memory_bytes': ('histogram', "Peak traced memory of a request"),
+    'cpl_upload_memory_budget_total': ('counter', "Uploads the memory budget sent to streaming, rejected or left untracked"),
+}
+
+# Histograms that are not latencies
+FAMILY_BUCKETS = {
+    'cpl_stage_peak_memory_bytes': MEMORY_BUCKETS,
+    'cpl_request_peak_memory_bytes': MEMORY_BUCKETS,
+}
+
+
+class MetricsRegistry:
+    """Counters and fixed-bucket histograms keyed by (name, sorted label pairs)"""
+
+    def __init__(self, directory=None, flush_seconds=5.0, buckets=DEFAULT_BUCKETS):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.histograms = {}  # key -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _key(name, labels):
+        if name not in FAMILIES:
+            raise KeyError(f"Unknown metric: {name}")
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        self._maybe_flush()
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        buckets = self._buckets(name)
+        with self._lock:
+            counts = self.histograms.get(key)
+            if counts is None:
+                counts = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            slot = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            counts[slot] += 1
+            counts[-1] += value
+        self._maybe_flush()
+
+    def _buckets(self, name):
+        return FAMILY_BUCKETS.get(name, self.buckets)
+
+    def timer(self, endpoint):
+        return StageTimer(endpoint, self)
+
+    # ==================== MULTI-PROCESS ====================
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': [[name, list(map(list, labels)), value]
+                             for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(map(list, labels)), list(counts)]
+                               for (name, labels), counts in self.histograms.items()],
+            }
+
+    def flush(self):
+        """Write this process's snapshot to METRICS_DIR (atomic replace)"""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+        self._last_flush = time.monotonic()
+
+    def _maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_seconds:
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[WARNING]  Metrics snapshot failed: {str(e)}")
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for filename in sorted(os.listdir(self.directory)):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # a worker is mid-write; its counts show up on the next scrape
+        return snapshots
+
+    # ==================== EXPOSITION ====================
+
+    def render(self):
+        """All metrics (summed across workers with METRICS_DIR) in Prometheus text format"""
+        counters, histograms = {}, {}
+        for snapshot in self._snapshots():
+            if snapshot['buckets'] != list(self.buckets):
+                continue
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(counts))
+                histograms[key] = [a + b for a, b in zip(merged, counts)]
+
+        lines = []
+        for name, (kind, help_text) in FAMILIES.items():
+            series = counters if kind == 'counter' else histograms
+            keys = sorted(key for key in series if key[0] == name)
+            if not keys:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key in keys:
+                labels = key[1]
+                if kind == 'counter':
+                    lines.append(f"{name}{_labels(labels)} {_number(series[key])}")
+                    continue
+                counts = series[key]
+                cumulative = 0
+                for bound, count in zip(self._buckets(name) + (float('inf'),), counts[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(counts[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        f'{k}="' + v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for k, v in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ==================== STAGE TIMER ====================
+
+class StageTimer:
+    """
+    Times the stages of one request; with a registry every stage is also
+    observed in cpl_stage_duration_seconds{endpoint, stage}. Each stage is a
+    trace span too (utils/tracing.py), parent of the backend calls inside it.
+    After track_memory() stages also record their allocation peak
+    (utils/memory.py) and raise MemoryBudgetExceeded when it is over budget.
+    """
+
+    def __init__(self, endpoint, registry=None):
+        self.endpoint = endpoint
+        self.registry = registry
+        self.stages = {}
+        self.memory = None
+        self.started = time.perf_counter()
+
+    def track_memory(self, budget_bytes=0):
+        """
+        Start per-stage peak memory accounting for the rest of the request
+
+        Returns:
+            MemoryTracker, or None when another request in this process is
+            tracked (this one then runs unmeasured); finish() releases the slot
+        """
+        if self.memory:
+            self.memory.close()
+        tracker = MemoryTracker(budget_bytes)
+        self.memory = tracker if tracker.tracking else None
+        return self.memory
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        memory = self.memory
+        if memory:
+            memory.enter(name)
+        try:
+            with span(name, **{'cpl.endpoint': self.endpoint or ''}):
+                yield
+        except Exception:
+            self.error(name)
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            self.stages[name] = round(self.stages.get(name, 0.0) + seconds * 1000.0, 2)
+            if self.registry:
+                self.registry.observe('cpl_stage_duration_seconds', seconds, endpoint=self.endpoint, stage=name)
+            if memory:
+                _, peak = memory.exit()
+                if self.registry:
+                    self.registry.observe('cpl_stage_peak_memory_bytes', peak, endpoint=self.endpoint, stage=name)
+        if memory:
+            memory.check(name, peak)
+
+    def error(self, stage):
+        """Count a stage failure that was handled instead of raised"""
+        if self.registry:
+            self.registry.inc('cpl_stage_errors_total', endpoint=self.endpoint, stage=stage)
+
+    def count(self, name, value=1, **labels):
+        if self.registry and value:
+            self.registry.inc(name, value, **labels)
+
+    def finish(self, status):
+        """Record the whole request; returns its duration in seconds"""
+        seconds = time.perf_counter() - self.started
+        peak = self.memory.finish() if self.memory else None
+        if self.registry:
+            self.registry.observe('cpl_request_duration_seconds', seconds, endpoint=self.endpoint, status=status)
+            self.registry.inc('cpl_requests_total', endpoint=self.endpoint, status=status)
+            if peak is not None:
+                self.registry.observe('cpl_request_peak_memory_bytes', peak, endpoint=self.endpoint)
+        return seconds
+
+
+# ==================== FLASK ====================
+
+def init_app(app, endpoints, registry=None):
+    """
+    Time the given view functions (by name) and serve GET /metrics
+
+    Views get their request's timer with current_timer().
+    """
+    from flask import g, request, Response
+
+    registry = registry or get_metrics()
+    endpoints = set(endpoints)
+
+    @app.before_request
+    def _start_timer():
+        if request.endpoint in endpoints:
+            g.stage_timer = registry.timer(request.endpoint)
+
+    @app.after_request
+    def _finish_timer(response):
+        timer = g.pop('stage_timer', None)
+        if timer is not None:
+            timer.finish(response.status_code)
+        return response
+
+    @app.teardown_request
+    def _release_memory_tracking(error=None):
+        # after_request is skipped when a view raises; never keep the tracking slot
+        timer = g.pop('stage_timer', None)
+        if timer is not None and timer.memory:
+            timer.memory.close()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus scrape endpoint"""
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    return registry
+
+
+def current_timer():
+    """The running request's StageTimer; a detached one outside instrumented requests"""
+    from flask import g, has_request_context
+
+    if has_request_context():
+        timer = g.get('stage_timer')
+        if timer is not None:
+            return timer
+    return StageTimer(None)
+
+
+# Singleton instance
+_metrics = None
+
+def get_metrics():
+    """Get or create the process metrics registry"""
+    global _metrics
+    if _metrics is None:
+        _metrics = MetricsRegistry(directory=os.getenv('METRICS_DIR') or None)
+    return _metrics
@@ -0,0 +1,204 @@
+"""
+Milvus Bulk Import
+Catalog-scale loads (historical backfill, reindex after an embedding model
+change) without row-wise inserts:
+
+    1. ParquetChunkWriter   chunks + metadata + vectors -> columnar Parquet files
+                            laid out like create_cpl_collection.py's schema,
+                            one folder per doc-type partition
+    2. BulkImportStage      upload the files to the bucket Milvus reads imports
+                            from (MinIO for a local stand-in, COS/S3 in prod)
+    3. submit_imports       one do_bulk_insert task per file
+    4. wait_for_imports     poll task state and report progress
+
+Milvus reads the staged files directly on its data nodes, so load time is
+bound by object storage and index building rather than RPC round trips.
+"""
+
+import os
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pymilvus import utility, DataType, BulkInsertState
+
+# Where the Milvus deployment reads bulk-import files from (minio.bucketName in milvus.yaml)
+DEFAULT_BUCKET = os.getenv('MILVUS_BULK_BUCKET', 'a-bucket')
+DEFAULT_PREFIX = os.getenv('MILVUS_BULK_PREFIX', 'bulk_import')
+DEFAULT_ROWS_PER_FILE = 100000
+
+# Parquet column types per Milvus field type; 16-bit vectors are their raw bytes as uint8 lists
+ARROW_TYPES = {
+    DataType.VARCHAR: pa.string(),
+    DataType.INT64: pa.int64(),
+    DataType.FLOAT_VECTOR: pa.list_(pa.float32()),
+    DataType.FLOAT16_VECTOR: pa.list_(pa.uint8()),
+    DataType.BFLOAT16_VECTOR: pa.list_(pa.uint8()),
+}
+
+DONE_STATES = (BulkInsertState.ImportCompleted, BulkInsertState.ImportFailed,
+               BulkInsertState.ImportFailedAndCleaned)
+
+
+def arrow_schema(fields):
+    """Parquet schema matching the collection's FieldSchema list"""
+    return pa.schema([(field.name, ARROW_TYPES[field.dtype]) for field in fields])
+
+
+def column_value(value, dtype):
+    """Parquet cell for a Milvus field value"""
+    if dtype in (DataType.FLOAT16_VECTOR, DataType.BFLOAT16_VECTOR) and isinstance(value, bytes):
+        return list(value)
+    return value
+
+
+# ==================== WRITE ====================
+
+class ParquetChunkWriter:
+    """
+    Buffer collection rows and write them as Parquet files of rows_per_file rows
+
+    Rows are routed with route(rows) -> {partition_name or None: rows}, so a
+    doc-type collection gets one file set per partition (do_bulk_insert
+    targets a single partition per task).
+    """
+
+    def __init__(self, out_dir, fields, route=None, rows_per_file=DEFAULT_ROWS_PER_FILE):
+        self.out_dir = out_dir
+        self.fields = list(fields)
+        self.schema = arrow_schema(self.fields)
+        self.route = route or (lambda rows: {None: rows})
+        self.rows_per_file = rows_per_file
+        self.buffers = {}
+        self.files = []  # [{'path', 'partition', 'rows'}]
+        self.rows = 0
+
+    def add(self, rows):
+        for partition, partition_rows in self.route(rows).items():
+            buffer = self.buffers.setdefault(partition, [])
+            buffer.extend(partition_rows)
+            while len(buffer) >= self.rows_per_file:
+                self._flush(partition, buffer[:self.rows_per_file])
+                del buffer[:self.rows_per_file]
+
+    def close(self):
+        """Write what is left in the buffers; returns the written file list"""
+        for partition, buffer in self.buffers.items():
+            if buffer:
+                self._flush(partition, buffer)
+        self.buffers = {}
+        return self.files
+
+    def _flush(self, partition, rows):
+        folder = os.path.join(self.out_dir, partition or '_default')
+        os.makedirs(folder, exist_ok=True)
+        count = sum(1 for f in self.files if f['partition'] == partition)
+        path = os.path.join(folder, f"part-{count:05d}.parquet")
+        columns = {
+            field.name: [column_value(row.get(field.name), field.dtype) for row in rows]
+            for field in self.fields
+        }
+        pq.write_table(pa.table(columns, schema=self.schema), path)
+        self.files.append({'path': path, 'partition': partition, 'rows': len(rows)})
+        self.rows += len(rows)
+
+
+# ==================== STAGE ====================
+
+class BulkImportStage:
+    """
+    Upload Parquet files to the object store Milvus imports from
+
+    Uses the S3-compatible ibm_boto3 client the COS handler already depends on;
+    pointed at MinIO (MILVUS_BULK_ENDPOINT=http://localhost:9000) it serves as
+    the local stand-in for a Milvus standalone deployment.
+    """
+
+    def __init__(self, client=None, bucket=DEFAULT_BUCKET, prefix=DEFAULT_PREFIX):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = client or self._default_client()
+
+    @staticmethod
+    def _default_client():
+        import ibm_boto3
+        return ibm_boto3.client(
+            's3',
+            endpoint_url=os.getenv('MILVUS_BULK_ENDPOINT', 'http://localhost:9000'),
+            aws_access_key_id=os.getenv('MILVUS_BULK_ACCESS_KEY', 'minioadmin'),
+            aws_secret_access_key=os.getenv('MILVUS_BULK_SECRET_KEY', 'minioadmin')
+        )
+
+    def upload(self, files, run_id, local_root):
+        """
+        Upload written files under {prefix}/{run_id}/ keeping their layout
+
+        Returns:
+            list: Same entries with 'remote' (object key Milvus is given)
+        """
+        staged = []
+        for entry in files:
+            relative = os.path.relpath(entry['path'], local_root).replace(os.sep, '/')
+            key = f"{self.prefix}/{run_id}/{relative}"
+            self.client.upload_file(entry['path'], self.bucket, key)
+            staged.append(dict(entry, remote=key))
+        return staged
+
+    def remove(self, staged):
+        for entry in staged:
+            self.client.delete_object(Bucket=self.bucket, Key=entry['remote'])
+
+
+# ==================== IMPORT ====================
+
+def submit_imports(collection_name, staged, using='default'):
+    """Start one bulk insert task per staged file; returns entries with 'task_id'"""
+    tasks = []
+    for entry in staged:
+        task_id = utility.do_bulk_insert(
+            collection_name=collection_name,
+            files=[entry['remote']],
+            partition_name=entry['partition'],
+            using=using
+        )
+        tasks.append(dict(entry, task_id=task_id))
+    return tasks
+
+
+def wait_for_imports(tasks, poll_seconds=5, timeout=None, on_progress=None, using='default'):
+    """
+    Poll bulk insert tasks until every one completes or fails
+
+    Args:
+        on_progress: callable(done, total, rows, states) after each poll
+
+    Returns:
+        dict: completed / failed (task entries with 'failed_reason') / rows / seconds
+    """
+    started = time.perf_counter()
+    pending = {task['task_id']: task for task in tasks}
+    completed, failed, states = [], [], {}
+    rows = 0
+
+    while pending:
+        for task_id in list(pending):
+            state = utility.get_bulk_insert_state(task_id=task_id, using=using)
+            states[task_id] = state.state_name
+            if state.state not in DONE_STATES:
+                continue
+            task = pending.pop(task_id)
+            if state.state == BulkInsertState.ImportCompleted:
+                rows += state.row_count
+                completed.append(dict(task, rows_imported=state.row_count))
+            else:
+                failed.append(dict(task, failed_reason=state.failed_reason))
+
+        if on_progress:
+            on_progress(len(completed) + len(failed), len(tasks), rows, dict(states))
+        if not pending:
+            break
+        if timeout is not None and time.perf_counter() - started > timeout:
+            raise TimeoutError(f"{len(pending)} bulk insert task(s) still running after {timeout}s")
+        time.sleep(poll_seconds)
+
+    return {'completed': completed, 'failed': failed, 'rows': rows,
+            'seconds': round(time.perf_counter() - started, 1)}
@@ -0,0 +1,114 @@
+"""
+Orphan Chunk Garbage Collection
+A chunk is live while its document_id is referenced by an Iceberg request or
+by the syllabus manifest (utils/syllabus_ingest.py). Everything else -
+uploads whose Iceberg insert failed, superseded syllabi, script test data -
+is an orphan and only costs memory and search time.
+
+    1. scan       query_iterator over document_id / document_type only
+    2. confirm    re-read the live set after a grace period, so an upload
+                  between its Milvus insert and its Iceberg insert is spared
+    3. delete     batched delete(expr) by document_id, keyword index too
+    4. compact    flush + compact so deleted rows leave the segments
+"""
+
+import time
+
+
+def live_document_ids(iceberg, manifest):
+    """
+    Union of Iceberg request ids and manifest ids (finished and mid-write)
+
+    The manifest is reloaded from disk on every call, so syllabi ingested by
+    another process since the last read (e.g. during the confirm wait) count.
+
+    Raises:
+        RuntimeError: Iceberg could not be read - deleting against a partial
+                      live set would remove real submissions
+    """
+    request_ids = iceberg.get_document_ids()
+    if request_ids is None:
+        raise RuntimeError("Could not read document_ids from Iceberg; refusing to collect")
+    manifest.reload()
+    return set(request_ids) | manifest.referenced_ids() | set(manifest.pending.values())
+
+
+def find_orphans(collection, live_ids, batch_size=5000, skip_types=()):
+    """
+    Chunks per unreferenced document_id
+
+    Returns:
+        dict: document_id -> {'chunks': int, 'document_type': str}
+    """
+    iterator = collection.query_iterator(
+        batch_size=batch_size,
+        expr="pk != ''",
+        output_fields=['document_id', 'document_type']
+    )
+    orphans = {}
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            for row in batch:
+                document_id = row.get('document_id')
+                if document_id in live_ids or row.get('document_type') in skip_types:
+                    continue
+                entry = orphans.setdefault(document_id, {'chunks': 0, 'document_type': row.get('document_type')})
+                entry['chunks'] += 1
+    finally:
+        iterator.close()
+    return orphans
+
+
+def collect_garbage(handler, iceberg, manifest, keyword_index=None, apply=False, confirm_after=60,
+                    batch_size=500, scan_batch_size=5000, skip_types=(), compact=True, log=print):
+    """
+    Find and (with apply=True) delete orphaned chunks, then compact
+
+    Args:
+        handler: MilvusHandler (connected on demand)
+        iceberg: IcebergHandler
+        manifest: SyllabusManifest
+        keyword_index: Optional KeywordIndex kept in step with Milvus
+        confirm_after: Seconds before re-reading the live set; 0 skips the wait
+        batch_size: document_ids per delete(expr)
+
+    Returns:
+        dict: orphans (document_id -> info), documents / chunks deleted, by_type, compaction, seconds
+    """
+    started = time.perf_counter()
+    if not handler.collection and not handler.connect():
+        raise ConnectionError("Milvus is unavailable")
+
+    live = live_document_ids(iceberg, manifest)
+    log(f"   Live documents: {len(live)} (Iceberg + syllabus manifest)")
+    orphans = find_orphans(handler.collection, live, scan_batch_size, skip_types)
+    log(f"   Orphan candidates: {len(orphans)} document(s), {sum(o['chunks'] for o in orphans.values())} chunk(s)")
+
+    if orphans and apply and confirm_after:
+        log(f"   Waiting {confirm_after}s before confirming against a fresh live set...")
+        time.sleep(confirm_after)
+    if orphans and apply:
+        live = live_document_ids(iceberg, manifest)
+        orphans = {document_id: info for document_id, info in orphans.items() if document_id not in live}
+
+    by_type = {}
+    for info in orphans.values():
+        by_type[info['document_type']] = by_type.get(info['document_type'], 0) + info['chunks']
+
+    result = {'orphans': orphans, 'by_type': by_type, 'documents_deleted': 0,
+              'chunks_deleted': 0, 'compaction': None}
+    if apply and orphans:
+        document_ids = sorted(orphans)
+        result['chunks_deleted'] = handler.delete_documents(document_ids, batch_size=batch_size)
+        result['documents_deleted'] = len(document_ids)
+        if keyword_index is not None:
+            keyword_index.remove_documents(document_ids)
+        if compact:
+            log("   Compacting...")
+            result['compaction'] = handler.compact()
+
+    result['seconds'] = round(time.perf_counter() - started, 1)
+    return result
@@ -0,0 +1,412 @@
+"""
+Milvus Schema Migrations
+Versioned CPL collection schemas (cpl_documents_v{N}) behind one stable alias.
+A migration creates the next version with its indexes, copies every row
+(vectors included, so nothing is re-embedded) with query_iterator, catches up
+writes that landed during the copy, then atomically repoints the alias. A last
+copy-only pass picks up rows written to the old version just before the swap;
+it never deletes, since uploads after the swap exist only in the new version.
+
+Services and scripts address the alias (MILVUS_COLLECTION=cpl_documents), so
+an upgrade is invisible to them.
+
+Schema profiles:
+    standard      FLOAT32 vectors, VARCHAR(65535) keys - what watsonx.ai's
+                  MilvusVectorStore creates and Prompt Lab expects
+    compact       FLOAT16 vectors (half the vector memory), VARCHARs sized to the
+                  data, chunk text memory-mapped (read only for returned hits)
+    compact-bf16  As compact with BF16 vectors (search queries go through ml-dtypes)
+    compact-sq8   FLOAT32 vectors, IVF_SQ8 index (~1 byte per dimension loaded)
+Compare them with scripts/compare_schema_profiles.py before switching.
+"""
+
+import re
+import time
+from pymilvus import FieldSchema, CollectionSchema, DataType, Collection, utility
+from handlers.milvus_handler import vector_dtype, encode_vector, decode_vector
+
+COLLECTION_ALIAS = 'cpl_documents'
+COLLECTION_PREFIX = 'cpl_documents_v'
+BASELINE_VERSION = 5  # last hand-built collection (create_cpl_collection.py before migrations)
+
+# MUST match watsonx.ai's expectations (L2 + HNSW)
+VECTOR_INDEX = {
+    'metric_type': 'L2',
+    'index_type': 'HNSW',
+    'params': {'M': 8, 'efConstruction': 64}
+}
+
+# Observed maxima: upload chunks are capped at ~600 chars (safe_truncate_content),
+# syllabus chunks at 1500; pks are {uuid}_{seq} or a 64-char sha256
+COMPACT_VARCHAR = {
+    'pk': 128, 'text': 4096, 'document_id': 64, 'document_name': 512,
+    'document_type': 32, 'student_name': 256, 'nuid': 32, 'target_course': 128, 'request_type': 64,
+}
+STANDARD_VARCHAR = {
+    'pk': 65535, 'text': 65535, 'document_id': 65535, 'document_name': 65535,
+    'document_type': 500, 'student_name': 500, 'nuid': 100, 'target_course': 500, 'request_type': 200,
+}
+
+# mmap_fields are served from disk / page cache instead of query node memory
+SCHEMA_PROFILES = {
+    'standard': {'vector_dtype': 'float32', 'vector_index': VECTOR_INDEX, 'varchar': STANDARD_VARCHAR,
+                 'mmap_fields': ()},
+    'compact': {'vector_dtype': 'float16', 'vector_index': VECTOR_INDEX, 'varchar': COMPACT_VARCHAR,
+                'mmap_fields': ('text',)},
+    'compact-bf16': {'vector_dtype': 'bfloat16', 'vector_index': VECTOR_INDEX, 'varchar': COMPACT_VARCHAR,
+                     'mmap_fields': ('text',)},
+    'compact-sq8': {
+        'vector_dtype': 'float32',
+        'vector_index': {'metric_type': 'L2', 'index_type': 'IVF_SQ8', 'params': {'nlist': 1024}},
+        'varchar': COMPACT_VARCHAR,
+        'mmap_fields': ('text',),
+    },
+}
+VECTOR_FIELD_TYPES = {
+    'float32': DataType.FLOAT_VECTOR,
+    'float16': DataType.FLOAT16_VECTOR,
+    'bfloat16': DataType.BFLOAT16_VECTOR,
+}
+
+# Fields every filtered query (/api/search filters, coverage, GC) depends on
+SCALAR_INDEX_FIELDS = ('nuid', 'document_id', 'document_type', 'target_course')
+
+DOC_TYPE_PARTITIONS = ('nu_syllabus', 'student_documents')  # see handlers/milvus_handler.py
+
+
+# ==================== SCHEMA ====================
+
+def cpl_fields(partition_key_field=None, profile='standard'):
+    """
+    v5 field layout - watsonx.ai compatible with the standard profile
+
+    Args:
+        partition_key_field: Optional 'nuid' or 'target_course' partition key
+        profile: Key of SCHEMA_PROFILES (vector type and VARCHAR lengths)
+    """
+    varchar = SCHEMA_PROFILES[profile]['varchar']
+    text_mmap = {'mmap_enabled': True} if 'text' in SCHEMA_PROFILES[profile]['mmap_fields'] else {}
+    return [
+        # PRIMARY KEY
+        FieldSchema(name="pk", dtype=DataType.VARCHAR, is_primary=True, auto_id=False,
+                    max_length=varchar['pk']),  # ← 65535 matches watsonx.ai
+
+        # CONTENT FIELD
+        FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=varchar['text'], **text_mmap),
+
+        # VECTOR FIELD
+        FieldSchema(name="vector", dtype=VECTOR_FIELD_TYPES[SCHEMA_PROFILES[profile]['vector_dtype']], dim=768),
+
+        # DOCUMENT METADATA
+        FieldSchema(name="document_id", dtype=DataType.VARCHAR, max_length=varchar['document_id']),
+        FieldSchema(name="document_name", dtype=DataType.VARCHAR, max_length=varchar['document_name']),
+        FieldSchema(name="document_type", dtype=DataType.VARCHAR, max_length=varchar['document_type']),
+
+        # CHUNK METADATA - Using INT64 to match watsonx.ai
+        FieldSchema(name="page", dtype=DataType.INT64),
+        FieldSchema(name="start_index", dtype=DataType.INT64),
+        FieldSchema(name="sequence_number", dtype=DataType.INT64),
+
+        # STUDENT CONTEXT
+        FieldSchema(name="student_name", dtype=DataType.VARCHAR, max_length=varchar['student_name']),
+        FieldSchema(name="nuid", dtype=DataType.VARCHAR, max_length=varchar['nuid'],
+                    is_partition_key=(partition_key_field == 'nuid')),
+        FieldSchema(name="target_course", dtype=DataType.VARCHAR, max_length=varchar['target_course'],
+                    is_partition_key=(partition_key_field == 'target_course')),
+        FieldSchema(name="request_type", dtype=DataType.VARCHAR, max_length=varchar['request_type']),
+    ]
+
+
+# Schema history; every version after the baseline is reachable by migration
+# fields:          callable(partition_key_field, profile) -> FieldSchema list
+# scalar_indexes:  fields that get an INVERTED index
+# transform:       optional callable(row) -> row applied while copying
+MIGRATIONS = {
+    6: {
+        'description': 'INVERTED scalar indexes on nuid, document_id, document_type, target_course',
+        'fields': cpl_fields,
+        'scalar_indexes': SCALAR_INDEX_FIELDS,
+        'transform': None,
+    },
+}
+LATEST_VERSION = max(MIGRATIONS)
+
+
+# cpl_documents_v6, or cpl_documents_v6_compact for a non-standard profile
+VERSIONED_NAME = re.compile(re.escape(COLLECTION_PREFIX) + r'(\d+)(?:_[a-z0-9_]+)?')
+
+
+def collection_name(version, profile='standard'):
+    suffix = '' if profile == 'standard' else '_' + profile.replace('-', '_')
+    return f"{COLLECTION_PREFIX}{version}{suffix}"
+
+
+def create_collection(name, version=LATEST_VERSION, layout='flat', partition_key_field=None,
+                      num_partitions=64, profile='standard', using='default'):
+    """
+    Create a CPL collection at a schema version, with its vector and scalar indexes
+
+    Args:
+        layout: 'flat' | 'doc-type' | 'partition-key' (see create_cpl_collection.py)
+        profile: Key of SCHEMA_PROFILES
+    """
+    migration = MIGRATIONS.get(version)
+    fields = migration['fields'] if migration else cpl_fields
+    schema = CollectionSchema(
+        fields=fields(partition_key_field if layout == 'partition-key' else None, profile),
+        description=f"CPL documents v{version} ({profile} profile)",
+        enable_dynamic_field=False
+    )
+    kwargs = {'num_partitions': num_partitions} if layout == 'partition-key' else {}
+    collection = Collection(name=name, schema=schema, using=using, **kwargs)
+
+    if layout == 'doc-type':
+        for partition_name in DOC_TYPE_PARTITIONS:
+            collection.create_partition(partition_name)
+
+    collection.create_index(field_name='vector', index_params=SCHEMA_PROFILES[profile]['vector_index'])
+    for field_name in (migration['scalar_indexes'] if migration else ()):
+        collection.create_index(field_name=field_name, index_params={'index_type': 'INVERTED'},
+                                index_name=f"{field_name}_idx")
+    return collection
+
+
+def describe_profile(collection):
+    """Schema profile of an existing collection (vector type, VARCHAR sizing, index)"""
+    dtype = vector_dtype(collection.schema)
+    if dtype == 'float16':
+        return 'compact'
+    if dtype == 'bfloat16':
+        return 'compact-bf16'
+    pk = next(f for f in collection.schema.fields if f.name == 'pk')
+    if pk.params.get('max_length', 65535) < 65535:
+        return 'compact-sq8'
+    return 'standard'
+
+
+def describe_layout(collection):
+    """The layout and profile a migration must reproduce on the next version"""
+    partitions = {p.name for p in collection.partitions}
+    profile = describe_profile(collection)
+    key = next((f.name for f in collection.schema.fields if getattr(f, 'is_partition_key', False)), None)
+    if key:
+        return {'layout': 'partition-key', 'partition_key_field': key,
+                'num_partitions': max(len(partitions), 1), 'profile': profile}
+    if DOC_TYPE_PARTITIONS[0] in partitions:
+        return {'layout': 'doc-type', 'partition_key_field': None, 'profile': profile}
+    return {'layout': 'flat', 'partition_key_field': None, 'profile': profile}
+
+
+# ==================== VERSIONS & ALIAS ====================
+
+def current_version(alias=COLLECTION_ALIAS, using='default'):
+    """
+    Version the alias points to, or None before the first migration
+
+    Returns:
+        tuple: (version, collection name) or (None, None)
+    """
+    for name in utility.list_collections(using=using):
+        match = VERSIONED_NAME.fullmatch(name)
+        if match and alias in utility.list_aliases(name, using=using):
+            return int(match.group(1)), name
+    return None, None
+
+
+def point_alias(alias, target, using='default'):
+    """Atomically repoint (or create) the stable alias"""
+    for name in utility.list_collections(using=using):
+        if alias in utility.list_aliases(name, using=using):
+            utility.alter_alias(target, alias, using=using)
+            return
+    utility.create_alias(target, alias, using=using)
+
+
+# ==================== DATA COPY ====================
+
+def route_rows(rows, target_partitions):
+    """Group rows by doc-type partition; {None: rows} when the target has no doc-type partitions"""
+    if DOC_TYPE_PARTITIONS[0] not in target_partitions:
+        return {None: rows}
+    routed = {}
+    for row in rows:
+        partition = 'nu_syllabus' if row.get('document_type') == 'nu_syllabus' else 'student_documents'
+        routed.setdefault(partition, []).append(row)
+    return routed
+
+
+def _insert(target, rows, transform, source_dtype='float32', target_dtype='float32'):
+    if source_dtype != target_dtype:
+        # Profile change: re-encode stored vectors (never re-embed)
+        for row in rows:
+            if 'vector' in row:
+                row['vector'] = encode_vector(decode_vector(row['vector'], source_dtype), target_dtype)
+    if transform:
+        rows = [transform(row) for row in rows]
+    target_partitions = {p.name for p in target.partitions}
+    for partition_name, partition_rows in route_rows(rows, target_partitions).items():
+        target.insert(partition_rows, partition_name=partition_name)
+    return len(rows)
+
+
+def copy_rows(source, target, expr="pk != ''", batch_size=1000, transform=None, progress=None,
+              consistency_level=None):
+    """
+    Stream rows (including vectors) from source into target
+
+    Args:
+        consistency_level: Optional read consistency (catch-up reads rows written moments ago)
+
+    Returns:
+        int: Rows copied
+    """
+    output_fields = [f.name for f in source.schema.fields]
+    source_dtype, target_dtype = vector_dtype(source.schema), vector_dtype(target.schema)
+    kwargs = {'consistency_level': consistency_level} if consistency_level else {}
+    iterator = source.query_iterator(batch_size=batch_size, expr=expr, output_fields=output_fields, **kwargs)
+    copied = 0
+    try:
+        while True:
+            rows = iterator.next()
+            if not rows:
+                break
+            copied += _insert(target, rows, transform, source_dtype, target_dtype)
+            if progress:
+                progress(copied)
+    finally:
+        iterator.close()
+    return copied
+
+
+def primary_keys(collection, batch_size=5000):
+    """
+    Every pk in a collection (scalar-only scan, no vectors)
+    Strong consistency: a Bounded read can miss rows inserted just before the scan
+    """
+    iterator = collection.query_iterator(batch_size=batch_size, expr="pk != ''", output_fields=['pk'],
+                                         consistency_level='Strong')
+    pks = set()
+    try:
+        while True:
+            rows = iterator.next()
+            if not rows:
+                break
+            pks.update(row['pk'] for row in rows)
+    finally:
+        iterator.close()
+    return pks
+
+
+def catch_up(source, target, batch_size=1000, transform=None, delete=True):
+    """
+    Apply writes that reached source after the bulk copy started:
+    copy rows missing from target, delete rows removed from source
+
+    Args:
+        delete: False once the alias points at target - rows only in target are
+                then new uploads, not rows deleted from source
+
+    Returns:
+        dict: {'copied': n, 'deleted': n}
+    """
+    source_pks = primary_keys(source)
+    target_pks = primary_keys(target)
+    missing = sorted(source_pks - target_pks)
+    removed = sorted(target_pks - source_pks) if delete else []
+
+    copied = 0
+    for start in range(0, len(missing), batch_size):
+        expr = f"pk in {_quote_list(missing[start:start + batch_size])}"
+        copied += copy_rows(source, target, expr=expr, batch_size=batch_size, transform=transform,
+                            consistency_level='Strong')
+    for start in range(0, len(removed), batch_size):
+        target.delete(f"pk in {_quote_list(removed[start:start + batch_size])}")
+    return {'copied': copied, 'deleted': len(removed)}
+
+
+def _quote_list(values):
+    return '[' + ', '.join('"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values) + ']'
+
+
+# ==================== RUNNER ====================
+
+def migrate(target_version=LATEST_VERSION, alias=COLLECTION_ALIAS, source_name=None,
+            batch_size=1000, profile=None, using='default', log=print):
+    """
+    Bring the alias to target_version one migration at a time
+
+    Args:
+        source_name: Collection to start from when the alias does not exist yet
+                     (e.g. cpl_documents_v5); it must be a versioned name
+        profile: Switch schema profile on the way (default: keep the source's).
+                 At the target version already, the switch is its own step
+                 into cpl_documents_v{N}_{profile}
+
+    Returns:
+        list: One summary dict per applied migration
+    """
+    version, name = current_version(alias, using=using)
+    if version is None:
+        if not source_name:
+            raise ValueError(f"Alias '{alias}' does not exist; pass the collection to migrate from")
+        match = VERSIONED_NAME.fullmatch(source_name)
+        if not match or not utility.has_collection(source_name, using=using):
+            raise ValueError(f"Unknown source collection: {source_name}")
+        version, name = int(match.group(1)), source_name
+
+    steps = []
+    while version + len(steps) < target_version:
+        next_version = version + len(steps) + 1
+        if next_version not in MIGRATIONS:
+            raise ValueError(f"No migration defined for v{next_version}")
+        steps.append(next_version)
+    if not steps and profile and profile != describe_profile(Collection(name, using=using)):
+        steps.append(version)
+
+    applied = []
+    for next_version in steps:
+        summary = _apply_step(name, version, next_version, alias, profile, batch_size, using, log)
+        applied.append(summary)
+        version, name = next_version, summary['to']
+    return applied
+
+
+def _apply_step(name, version, next_version, alias, profile, batch_size, using, log):
+    """Copy one collection into the next (version and/or profile) and swap the alias"""
+    migration = MIGRATIONS.get(next_version, {})
+    transform = migration.get('transform')
+    source = Collection(name, using=using)
+    source.load()
+    layout = describe_layout(source)
+    if profile:
+        layout['profile'] = profile
+    next_name = collection_name(next_version, layout['profile'])
+    if utility.has_collection(next_name, using=using):
+        raise ValueError(f"{next_name} already exists; drop it or finish that migration by hand")
+
+    log(f"   v{version} -> v{next_version} ({layout['profile']}): "
+        f"{migration.get('description', 'schema profile change')}")
+    started = time.perf_counter()
+    target = create_collection(next_name, version=next_version, using=using, **layout)
+    target.load()
+
+    copied = copy_rows(source, target, batch_size=batch_size, transform=transform,
+                       progress=lambda n: log(f"      copied {n} rows"))
+    target.flush()
+    first_pass = catch_up(source, target, batch_size, transform)
+
+    point_alias(alias, next_name, using=using)
+    # Anything written to the old version between catch-up and the swap. Copy only:
+    # uploads now land in target, so rows missing from source must stay
+    final_pass = catch_up(source, target, batch_size, transform, delete=False)
+    target.flush()
+
+    log(f"      [SUCCESS] {alias} -> {next_name}")
+    return {
+        'from': name,
+        'to': next_name,
+        'rows': copied + first_pass['copied'] + final_pass['copied'],
+        'caught_up': first_pass['copied'] + final_pass['copied'],
+        'deleted': first_pass['deleted'] + final_pass['deleted'],
+        'seconds': round(time.perf_counter() - started, 1),
+    }
@@ -0,0 +1,241 @@
+"""
+Request Profiling
+Profile single requests of the Flask services in place:
+
+    on demand   an admin sends  X-Profile: sample | cprofile  (or ?profile=...)
+                with  X-Admin-Token: $ADMIN_TOKEN ; the response carries
+                X-Profile-Id, fetch it from GET /admin/profiles/<id>
+    automatic   with PROFILE_KEEP_SLOWEST=N every request runs under the
+                sampler and the N slowest profiles are kept
+
+Sampled profiles are collapsed stacks ("frame;frame;frame count" per line),
+which flamegraph.pl, speedscope and inferno read directly; cprofile profiles
+are pstats dumps (snakeviz, flameprof). Profiles live in PROFILE_DIR, shared by
+all gunicorn workers. Without ADMIN_TOKEN on-demand profiling is disabled.
+"""
+
+import os
+import sys
+import time
+import hmac
+import uuid
+import cProfile
+import threading
+from collections import Counter
+
+DEFAULT_EXCLUDE = ('/health', '/metrics', '/ready')
+AUTO_PREFIX = 'auto-'
+ON_DEMAND_PREFIX = 'req-'
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse(frame):
+    """Stack of a frame, root first, as one collapsed-stack key"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """
+    One background thread samples the stacks of every tracked thread each
+    interval; a tracked thread's samples go to its own Counter
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._tracked = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def track(self, thread_id):
+        samples = Counter()
+        with self._lock:
+            self._tracked[thread_id] = samples
+        if self._pid != os.getpid():
+            self._start()
+        return samples
+
+    def untrack(self, thread_id):
+        with self._lock:
+            return self._tracked.pop(thread_id, None)
+
+    def _start(self):
+        # (Re)started lazily so it also runs in workers forked after import
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='stack-sampler', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._tracked:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self._tracked.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[collapse(frame)] += 1
+
+
+class ProfileStore:
+    """
+    Profile files in one directory; automatic profiles beyond keep_slowest are
+    evicted fastest-first, on-demand ones beyond keep_on_demand oldest-first
+    """
+
+    def __init__(self, directory, keep_slowest=0, keep_on_demand=50):
+        self.directory = directory
+        self.keep_slowest = keep_slowest
+        self.keep_on_demand = keep_on_demand
+
+    def _files(self, prefix):
+        try:
+            return sorted(name for name in os.listdir(self.directory) if name.startswith(prefix))
+        except FileNotFoundError:
+            return []
+
+    def slowest_ms(self):
+        """Duration an automatic profile must beat to be kept (0 while there is room)"""
+        names = self._files(AUTO_PREFIX)
+        if len(names) < self.keep_slowest:
+            return 0
+        return int(names[0][len(AUTO_PREFIX):].split('-', 1)[0])
+
+    def save(self, profile_id, endpoint, duration_ms, mode, data, automatic=False):
+        """
+        Write a profile; returns its file name
+
+        Automatic names start with the zero-padded duration, so the directory
+        listing is already ordered fastest to slowest.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        extension = 'pstats' if mode == 'cprofile' else 'collapsed'
+        if automatic:
+            name = f"{AUTO_PREFIX}{int(duration_ms):09d}-{endpoint}-{profile_id}.{extension}"
+        else:
+            name = f"{ON_DEMAND_PREFIX}{time.strftime('%Y%m%d%H%M%S')}-{endpoint}-{profile_id}.{extension}"
+        path = os.path.join(self.directory, name)
+        if mode == 'cprofile':
+            data.dump_stats(path)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in sorted(data.items()))
+        self._evict(AUTO_PREFIX if automatic else ON_DEMAND_PREFIX,
+                    self.keep_slowest if automatic else self.keep_on_demand)
+        return name
+
+    def _evict(self, prefix, keep):
+        names = self._files(prefix)
+        for name in names[:max(0, len(names) - keep)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass  # another worker evicted it first
+
+    def list(self):
+        """Kept profiles, slowest automatic first, then on-demand newest first"""
+        return ([name for name in reversed(self._files(AUTO_PREFIX))] +
+                [name for name in reversed(self._files(ON_DEMAND_PREFIX))])
+
+    def path(self, name):
+        """Absolute path of a kept profile, or None (also for names outside the directory)"""
+        if name != os.path.basename(name) or name not in self.list():
+            return None
+        return os.path.join(self.directory, name)
+
+
+def is_admin(headers):
+    """X-Admin-Token matches ADMIN_TOKEN (never true when ADMIN_TOKEN is unset)"""
+    expected = os.getenv('ADMIN_TOKEN')
+    supplied = headers.get('X-Admin-Token')
+    return bool(expected) and bool(supplied) and hmac.compare_digest(expected, supplied)
+
+
+# ==================== FLASK ====================
+
+def init_app(app, store=None, sampler=None, exclude=DEFAULT_EXCLUDE):
+    """
+    Profile requests on demand (admins) or automatically (slowest N), and
+    serve the kept profiles at /admin/profiles
+    """
+    from flask import g, request, jsonify, send_file, abort
+
+    store = store or ProfileStore(
+        os.getenv('PROFILE_DIR', 'profiles'),
+        keep_slowest=int(os.getenv('PROFILE_KEEP_SLOWEST', 0))
+    )
+    sampler = sampler or StackSampler(float(os.getenv('PROFILE_INTERVAL_MS', 5)) / 1000.0)
+    exclude = set(exclude)
+
+    @app.before_request
+    def _start_profile():
+        if request.path in exclude or request.path.startswith('/admin/'):
+            return
+        mode = request.headers.get('X-Profile') or request.args.get('profile')
+        on_demand = bool(mode) and is_admin(request.headers)
+        if not on_demand:
+            if not store.keep_slowest:
+                return
+            mode = 'sample'
+        mode = 'cprofile' if mode == 'cprofile' else 'sample'
+
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one active cProfile per process; sample instead
+                mode = 'sample'
+        if mode == 'sample':
+            profiler = sampler.track(threading.get_ident())
+        g.profile = {'mode': mode, 'profiler': profiler, 'on_demand': on_demand,
+                     'started': time.perf_counter()}
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        duration_ms = (time.perf_counter() - profile['started']) * 1000.0
+        if profile['mode'] == 'cprofile':
+            profile['profiler'].disable()
+            data = profile['profiler']
+        else:
+            data = sampler.untrack(threading.get_ident()) or Counter()
+
+        endpoint = request.endpoint or 'unknown'
+        profile_id = uuid.uuid4().hex[:12]
+        try:
+            if profile['on_demand']:
+                name = store.save(profile_id, endpoint, duration_ms, profile['mode'], data)
+                response.headers['X-Profile-Id'] = name
+            elif data and duration_ms > store.slowest_ms():
+                store.save(profile_id, endpoint, duration_ms, profile['mode'], data, automatic=True)
+        except OSError as e:
+            print(f"[WARNING]  Could not store profile: {str(e)}")
+        return response
+
+    @app.route('/admin/profiles', methods=['GET'])
+    def list_profiles():
+        """Kept profiles (admin only)"""
+        if not is_admin(request.headers):
+            abort(403)
+        return jsonify({'success': True, 'profiles': store.list()})
+
+    @app.route('/admin/profiles/<name>', methods=['GET'])
+    def get_profile(name):
+        """Download one profile (admin only)"""
+        if not is_admin(request.headers):
+            abort(403)
+        path = store.path(name)
+        if path is None:
+            abort(404)
+        return send_file(os.path.abspath(path), as_attachment=True, download_name=name)
+
+    return store
@@ -0,0 +1,261 @@
+"""
+Cross-Store Reconciler
+One upload writes to Milvus (chunks), COS (original file) and Iceberg (the
+request row); a failure in any later step leaves the stores disagreeing. This
+compares the document_id sets of all three in bounded memory:
+
+    sources          Milvus query_iterator, COS paginated listing, Iceberg
+                     fetchmany scan - each a stream of document_ids
+    sorted_unique    external sort: sorted runs of run_size ids spill to temp
+                     files, then heapq.merge streams them back deduplicated
+    merge_sources    sorted merge of the three streams -> (document_id, stores)
+
+Drift categories (syllabi from the manifest are Milvus-only by design and skipped;
+nu_syllabus chunks missing from the manifest are reported but never repaired
+unless the caller opts in):
+    missing_original    Iceberg + Milvus, no COS    (swallowed COS failure)
+    missing_vectors     Iceberg, no Milvus          (re-upload needed)
+    untracked_upload    Milvus + COS, no Iceberg    (Iceberg insert failed)
+    orphan_vectors      Milvus only
+    orphan_objects      COS only
+"""
+
+import os
+import time
+import heapq
+import tempfile
+from itertools import groupby
+
+MILVUS = 'milvus'
+COS = 'cos'
+ICEBERG = 'iceberg'
+STORES = (MILVUS, COS, ICEBERG)
+
+CATEGORIES = {
+    frozenset((MILVUS, COS, ICEBERG)): 'consistent',
+    frozenset((MILVUS, ICEBERG)): 'missing_original',
+    frozenset((COS, ICEBERG)): 'missing_vectors',
+    frozenset((ICEBERG,)): 'missing_vectors',
+    frozenset((MILVUS, COS)): 'untracked_upload',
+    frozenset((MILVUS,)): 'orphan_vectors',
+    frozenset((COS,)): 'orphan_objects',
+}
+REPAIRABLE = ('untracked_upload', 'orphan_vectors', 'orphan_objects')
+PROTECTED_TYPES = ('nu_syllabus',)
+
+
+# ==================== SOURCES ====================
+
+def milvus_document_ids(collection, batch_size=5000, protected=None, protected_types=PROTECTED_TYPES):
+    """
+    document_id of every chunk, consecutive duplicates collapsed
+
+    Args:
+        protected: Optional set filled with the document_ids whose document_type
+                   is in protected_types (syllabi uploaded before the manifest)
+    """
+    iterator = collection.query_iterator(batch_size=batch_size, expr="pk != ''",
+                                         output_fields=['document_id', 'document_type'])
+    try:
+        previous = None
+        while True:
+            page = iterator.next()
+            if not page:
+                break
+            for row in page:
+                document_id = row.get('document_id')
+                if protected is not None and document_id and row.get('document_type') in protected_types:
+                    protected.add(document_id)
+                if document_id and document_id != previous:
+                    yield document_id
+                    previous = document_id
+    finally:
+        iterator.close()
+
+
+def cos_document_ids(cos, page_size=1000):
+    """Leading path segment of every object key ({document_id}/{filename})"""
+    previous = None
+    for key in cos.iter_keys(page_size=page_size):
+        document_id = key.split('/', 1)[0]
+        if '/' in key and document_id != previous:
+            yield document_id
+            previous = document_id
+
+
+# ==================== EXTERNAL SORT ====================
+
+def _spill(run, tmp_dir):
+    handle = tempfile.NamedTemporaryFile('w', delete=False, dir=tmp_dir, suffix='.run', encoding='utf-8')
+    with handle:
+        handle.writelines(f"{document_id}\n" for document_id in sorted(run))
+    return handle.name
+
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield line.rstrip('\n')
+
+
+def sorted_unique(document_ids, run_size=200000, tmp_dir=None):
+    """
+    Sorted, deduplicated stream of document_ids holding at most run_size in memory
+
+    Input order does not matter; when everything fits in one run nothing is written to disk.
+    """
+    run, paths = set(), []
+    try:
+        for document_id in document_ids:
+            run.add(document_id)
+            if len(run) >= run_size:
+                paths.append(_spill(run, tmp_dir))
+                run = set()
+        streams = [_read_run(path) for path in paths] + [iter(sorted(run))]
+        run = None
+        for document_id, _ in groupby(heapq.merge(*streams)):
+            yield document_id
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+# ==================== MERGE ====================
+
+def _tag(stream, name):
+    for document_id in stream:
+        yield document_id, name
+
+
+def merge_sources(streams):
+    """
+    Sorted merge of named sorted streams
+
+    Args:
+        streams: {store name: sorted unique document_id iterator}
+
+    Yields:
+        (document_id, frozenset of store names holding it)
+    """
+    tagged = [_tag(stream, name) for name, stream in streams.items()]
+    for document_id, group in groupby(heapq.merge(*tagged), key=lambda item: item[0]):
+        yield document_id, frozenset(name for _, name in group)
+
+
+def reconcile(streams, skip_ids=(), sample_size=10, on_drift=None):
+    """
+    Classify every document_id across the stores
+
+    Args:
+        streams: {MILVUS/COS/ICEBERG: sorted unique iterator}
+        skip_ids: document_ids that legitimately live in one store only (syllabus manifest)
+        on_drift: callable(document_id, category, stores) for every inconsistent id
+
+    Returns:
+        dict: totals per store, counts per category, first sample_size ids per category
+    """
+    skip_ids = set(skip_ids)
+    report = {
+        'totals': {name: 0 for name in streams},
+        'counts': {category: 0 for category in set(CATEGORIES.values())},
+        'samples': {},
+        'skipped': 0,
+    }
+    for document_id, stores in merge_sources(streams):
+        for name in stores:
+            report['totals'][name] += 1
+        if document_id in skip_ids:
+            report['skipped'] += 1
+            continue
+        category = CATEGORIES[stores]
+        report['counts'][category] += 1
+        if category == 'consistent':
+            continue
+        samples = report['samples'].setdefault(category, [])
+        if len(samples) < sample_size:
+            samples.append(document_id)
+        if on_drift:
+            on_drift(document_id, category, stores)
+    report['drift'] = sum(count for category, count in report['counts'].items() if category != 'consistent')
+    return report
+
+
+# ==================== REPAIR ====================
+
+class OrphanRepair:
+    """
+    on_drift callback that deletes untracked / orphaned data in batches
+
+    Like the orphan GC (utils/milvus_gc.py), nothing is deleted until
+    confirm_after seconds have passed since the first candidate was found, and
+    each batch is then re-checked against Iceberg and a freshly reloaded
+    syllabus manifest, so an upload or ingest that landed after the scan is
+    left alone. protected_ids (see milvus_document_ids) are never repaired.
+    Missing originals and missing vectors cannot be rebuilt here and are only
+    reported.
+    """
+
+    def __init__(self, milvus, cos, iceberg, keyword_index=None, manifest=None, protected_ids=(),
+                 confirm_after=60, batch_size=500, log=print):
+        self.milvus = milvus
+        self.cos = cos
+        self.iceberg = iceberg
+        self.keyword_index = keyword_index
+        self.manifest = manifest
+        self.protected_ids = protected_ids
+        self.confirm_after = confirm_after
+        self.batch_size = batch_size
+        self.log = log
+        self.pending = []
+        self._first_found = None
+        self.repaired = {'vectors_deleted': 0, 'documents_deleted': 0, 'objects_deleted': 0,
+                         'spared': 0, 'protected': 0}
+
+    def __call__(self, document_id, category, stores):
+        if category not in REPAIRABLE:
+            return
+        if document_id in self.protected_ids:
+            self.repaired['protected'] += 1
+            return
+        if self._first_found is None:
+            self._first_found = time.monotonic()
+        self.pending.append((document_id, stores))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _live_ids(self, document_ids):
+        """Candidates that gained an Iceberg request or a manifest entry since the scan"""
+        tracked = self.iceberg.find_document_ids(document_ids)
+        if tracked is None:
+            raise RuntimeError("Could not re-check document_ids in Iceberg; stopping repairs")
+        live = set(tracked)
+        if self.manifest is not None:
+            self.manifest.reload()
+            live |= self.manifest.referenced_ids() | set(self.manifest.pending.values())
+        return live
+
+    def flush(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        wait = self.confirm_after - (time.monotonic() - self._first_found)
+        if wait > 0:
+            self.log(f"      Waiting {wait:.0f}s before confirming repairs...")
+            time.sleep(wait)
+        live = self._live_ids([document_id for document_id, _ in batch])
+        spared = [document_id for document_id, _ in batch if document_id in live]
+        batch = [(document_id, stores) for document_id, stores in batch if document_id not in live]
+        self.repaired['spared'] += len(spared)
+
+        in_milvus = [document_id for document_id, stores in batch if MILVUS in stores]
+        if in_milvus:
+            self.repaired['vectors_deleted'] += self.milvus.delete_documents(in_milvus, batch_size=self.batch_size)
+            if self.keyword_index is not None:
+                self.keyword_index.remove_documents(in_milvus)
+        for document_id, stores in batch:
+            if COS in stores:
+                for key in self.cos.iter_keys(prefix=f"{document_id}/"):
+                    if self.cos.delete_document(key):
+                        self.repaired['objects_deleted'] += 1
+        self.repaired['documents_deleted'] += len(batch)
+        self.log(f"      Repaired {self.repaired['documents_deleted']} document(s)")
@@ -0,0 +1,210 @@
+"""
+Search Cache for the CPL Upload Service
+Level 1: query embeddings, keyed by normalized query text
+Level 2: search results, keyed by (query, k, filters) and tagged with the
+         collection write generation so an upload never serves stale hits
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text):
+    """Lower-case and collapse whitespace so trivial variants share a cache key"""
+    return " ".join(str(text).lower().split())
+
+
+class _LRU:
+    """Small thread-safe LRU map"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SearchCache:
+    """Two-level cache for query embeddings and search results"""
+
+    def __init__(self, max_embeddings=None, max_results=None, generation_file=None):
+        if max_embeddings is None:
+            max_embeddings = int(os.getenv('SEARCH_CACHE_EMBEDDINGS', 2048))
+        if max_results is None:
+            max_results = int(os.getenv('SEARCH_CACHE_RESULTS', 512))
+        if generation_file is None:
+            generation_file = os.getenv('SEARCH_CACHE_GENERATION_FILE')
+
+        self.embeddings = _LRU(max_embeddings)
+        self.results = _LRU(max_results)
+
+        # When a generation file is configured, every process sharing it
+        # (other workers, upload_nu_syllabi.py) invalidates every other cache
+        self.generation_file = generation_file
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = {'embedding': 0, 'results': 0}
+        self.misses = {'embedding': 0, 'results': 0}
+
+    # ---------- Level 1: embeddings ----------
+
+    def get_embedding(self, text):
+        vector = self.embeddings.get(normalize_query(text))
+        self._count('embedding', vector is not None)
+        return vector
+
+    def put_embedding(self, text, vector):
+        self.embeddings.put(normalize_query(text), list(vector))
+
+    # ---------- Level 2: search results ----------
+
+    @staticmethod
+    def result_key(query, k, filters=None, variant=None):
+        """Build the cache key for a search; filters are order-insensitive"""
+        return (
+            normalize_query(query),
+            int(k),
+            json.dumps(filters or {}, sort_keys=True, default=str),
+            variant
+        )
+
+    def get_results(self, query, k, filters=None, variant=None):
+        """
+        Return cached results, or None if missing or written under an older generation
+        variant separates searches whose settings change results (e.g. effort level)
+        """
+        entry = self.results.get(self.result_key(query, k, filters, variant))
+        if entry is not None and entry[0] != self.generation():
+            entry = None
+        self._count('results', entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put_results(self, query, k, filters, results, generation, variant=None):
+        """
+        Store results tagged with the generation read BEFORE the search ran,
+        so an upload that lands mid-search still invalidates them
+        """
+        self.results.put(self.result_key(query, k, filters, variant), (generation, results))
+
+    # ---------- Write generation ----------
+
+    def generation(self):
+        """Current collection write generation"""
+        if self.generation_file:
+            try:
+                with open(self.generation_file, 'r') as f:
+                    return f.read().strip()
+            except FileNotFoundError:
+                return ''
+        return self._generation
+
+    def bump_generation(self):
+        """Advance the write generation; call after every insert into the collection"""
+        with self._lock:
+            self._generation += 1
+            if self.generation_file:
+                # Opaque unique token: two writers can never land on the same value
+                token = f"{time.time_ns()}-{os.getpid()}-{self._generation}"
+                tmp_path = f"{self.generation_file}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.write(token)
+                os.replace(tmp_path, self.generation_file)
+        return self.generation()
+
+    def clear(self):
+        self.embeddings.clear()
+        self.results.clear()
+
+    def stats(self):
+        return {
+            'generation': self.generation(),
+            'embeddings_cached': len(self.embeddings),
+            'results_cached': len(self.results),
+            'hits': dict(self.hits),
+            'misses': dict(self.misses)
+        }
+
+    def _count(self, level, hit):
+        if hit:
+            self.hits[level] += 1
+        else:
+            self.misses[level] += 1
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embedding function wrapper that serves repeated queries from SearchCache.
+    Document embeddings (ingest) always go to the wrapped model.
+    """
+
+    def __init__(self, embedding, cache):
+        self.embedding = embedding
+        self.cache = cache
+
+    def embed_query(self, text):
+        vector = self.cache.get_embedding(text)
+        if vector is None:
+            vector = self.embedding.embed_query(text)
+            self.cache.put_embedding(text, vector)
+        return vector
+
+    def embed_queries(self, texts):
+        """
+        Embed many queries with at most ONE remote call (cache misses only)
+
+        Returns:
+            tuple: (vectors in input order, number of remote calls made)
+        """
+        vectors = [self.cache.get_embedding(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors, 0
+
+        # Duplicate queries inside one batch are embedded once
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        embedded = dict(zip(unique, self.embedding.embed_documents(unique)))
+        for i in missing:
+            vectors[i] = embedded[texts[i]]
+            self.cache.put_embedding(texts[i], vectors[i])
+        return vectors, 1
+
+    def embed_documents(self, texts):
+        return self.embedding.embed_documents(texts)
+
+
+# Singleton instance
+_search_cache = None
+
+def get_search_cache():
+    """Get or create search cache instance"""
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache()
+    return _search_cache
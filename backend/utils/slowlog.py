@@ -0,0 +1,114 @@
+"""
+Slow-Operation Log
+Presto statements and Milvus searches/queries slower than a threshold are
+logged with what is needed to explain them: the SQL or filter expression,
+row counts, the Presto query id and stats, the Milvus search parameters.
+
+    with get_slow_log().timed('presto', 'get_all_requests', sql=sql) as entry:
+        cursor.execute(sql)
+        entry.update(presto_details(cursor.stats))
+
+Thresholds: SLOW_PRESTO_MS (default 1000) and SLOW_MILVUS_MS (default 500);
+0 logs every call, a negative value turns the kind off. Entries are printed as
+"[SLOW] {json}" and, with SLOW_LOG_FILE set, appended there as NDJSON. Each one
+carries the current trace id (utils/tracing.py) to find the whole request.
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from utils.tracing import current_span
+
+DEFAULT_THRESHOLDS_MS = {'presto': 1000.0, 'milvus': 500.0}
+
+# Client-side StatementStats fields worth keeping (planning time is only in the
+# coordinator's /v1/query/<queryId>, hence the query id)
+PRESTO_STATS = ('state', 'queuedTimeMillis', 'elapsedTimeMillis', 'cpuTimeMillis', 'wallTimeMillis',
+                'processedRows', 'processedBytes', 'peakMemoryBytes', 'totalSplits')
+
+
+def presto_details(stats, rows=None):
+    """Slow-log fields from a Presto stats payload (prestodb cursor.stats or a REST response's 'stats')"""
+    stats = stats if isinstance(stats, dict) else {}
+    details = {'queryId': stats.get('queryId')}
+    details.update({key: stats[key] for key in PRESTO_STATS if key in stats})
+    if 'elapsedTimeMillis' in stats and 'queuedTimeMillis' in stats:
+        details['executionTimeMillis'] = stats['elapsedTimeMillis'] - stats['queuedTimeMillis']
+    if rows is not None:
+        details['rows'] = rows
+    return details
+
+
+class SlowLog:
+    """Record operations slower than their kind's threshold"""
+
+    def __init__(self, path=None, thresholds_ms=None):
+        self.path = path
+        self.thresholds_ms = dict(DEFAULT_THRESHOLDS_MS, **(thresholds_ms or {}))
+        self._lock = threading.Lock()
+
+    def record(self, kind, operation, duration_ms, **details):
+        """
+        Log one operation if it was slow
+
+        Returns:
+            bool: True if it was logged
+        """
+        threshold = self.thresholds_ms.get(kind, 0)
+        if threshold < 0 or duration_ms < threshold:
+            return False
+
+        span = current_span()
+        entry = {
+            'time': datetime.utcnow().isoformat() + 'Z',
+            'kind': kind,
+            'operation': operation,
+            'durationMs': round(duration_ms, 2),
+            'thresholdMs': threshold,
+            'traceId': span.trace_id if span else None,
+        }
+        entry.update(details)
+        line = json.dumps(entry, default=str)
+        print(f"[SLOW] {line}")
+
+        if self.path:
+            try:
+                with self._lock:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(line + '\n')
+            except OSError as e:
+                print(f"[WARNING]  Slow log write failed: {str(e)}")
+        return True
+
+    @contextmanager
+    def timed(self, kind, operation, **details):
+        """Time the block; it may add fields (rows, stats) to the yielded dict"""
+        entry = dict(details)
+        started = time.perf_counter()
+        try:
+            yield entry
+        except Exception as e:
+            entry['error'] = str(e) or type(e).__name__
+            raise
+        finally:
+            self.record(kind, operation, (time.perf_counter() - started) * 1000.0, **entry)
+
+
+# Singleton instance
+_slow_log = None
+
+def get_slow_log():
+    """Get or create the slow-operation log from SLOW_* environment variables"""
+    global _slow_log
+    if _slow_log is None:
+        _slow_log = SlowLog(
+            path=os.getenv('SLOW_LOG_FILE') or None,
+            thresholds_ms={
+                'presto': float(os.getenv('SLOW_PRESTO_MS', DEFAULT_THRESHOLDS_MS['presto'])),
+                'milvus': float(os.getenv('SLOW_MILVUS_MS', DEFAULT_THRESHOLDS_MS['milvus'])),
+            }
+        )
+    return _slow_log
@@ -0,0 +1,491 @@
+"""
+NU Reference Syllabus Ingest
+Extraction, chunking and the bulk pipeline behind upload_nu_syllabi.py.
+Kept free of watsonx.ai / Milvus initialization so pool workers can import it.
+
+Bulk pipeline:
+    process pool    extract + chunk files in parallel
+    main thread     gathers chunks from many files into large batches
+    writer thread   embeds each batch in one call, inserts it in one call
+    manifest        records finished files; reruns skip them, and chunks of
+                    a file interrupted mid-write are deleted before retrying
+
+Sync (sync_ingest) diffs a folder against the manifest: only new or changed
+files are embedded, and chunks of changed or removed files are deleted by
+document_id once nothing in the manifest references them.
+"""
+
+import os
+import json
+import uuid
+import time
+import fcntl
+import hashlib
+import threading
+import multiprocessing
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+import pdfplumber
+import docx
+
+# Safe size: 1500 chars ≈ 375 tokens (well under 512 limit)
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 150
+
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'syllabus_manifest.json')
+
+text_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    length_function=len,
+    is_separator_regex=False,
+)
+
+
+# ==================== EXTRACT & CHUNK ====================
+
+def extract_text(file_path):
+    """
+    Extract text from PDF/DOCX/TXT
+    Uses pdfplumber for PDFs (handles font encoding issues better than PyPDF2)
+    """
+    try:
+        if file_path.endswith('.pdf'):
+            text = ""
+            with pdfplumber.open(file_path) as pdf:
+                for page in pdf.pages:
+                    page_text = page.extract_text()
+                    if page_text:
+                        text += page_text + "\n"
+
+            if not text.strip():
+                raise ValueError("No text extracted from PDF. It may be scanned/image-based.")
+
+            return text.strip()
+
+        elif file_path.endswith('.docx'):
+            doc = docx.Document(file_path)
+            text = "\n".join([para.text for para in doc.paragraphs])
+            return text.strip()
+
+        elif file_path.endswith('.txt'):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+
+        else:
+            raise ValueError(f"Unsupported file type: {file_path}")
+    except Exception as e:
+        raise ValueError(f"Text extraction failed for {file_path}: {str(e)}")
+
+
+def build_documents(text_content, filename, document_id, course_code):
+    """Chunk a syllabus into Milvus-ready documents (reference: no student metadata)"""
+    chunks = text_splitter.split_documents([
+        Document(page_content=text_content, metadata={'document_name': filename})
+    ])
+
+    documents = []
+    char_position = 0
+    for i, chunk in enumerate(chunks):
+        chunk_text = chunk.page_content
+        documents.append({
+            'content': chunk_text,  # ← CRITICAL: Must be 'content', not 'text'
+            'metadata': {
+                'pk': f"{document_id}_{i}",
+                'document_id': document_id,
+                'document_name': filename,
+                'document_type': 'nu_syllabus',
+                'page': i + 1,
+                'start_index': char_position,
+                'sequence_number': i,
+                'target_course': course_code,
+                'student_name': '',
+                'nuid': '',
+                'request_type': ''
+            }
+        })
+        char_position += len(chunk_text)
+    return documents
+
+
+def prepare_file(file_path, course_code, document_id):
+    """Pool worker: extract and chunk one file"""
+    documents = build_documents(extract_text(file_path), os.path.basename(file_path), document_id, course_code)
+    return {'path': file_path, 'document_id': document_id, 'course_code': course_code, 'documents': documents}
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ==================== MANIFEST ====================
+
+class SyllabusManifest:
+    """
+    Record of ingested syllabus files: path -> content hash, document_id, chunk count
+    'pending' holds files whose chunks were being written when the run stopped
+    'retired' holds document_ids of replaced or removed files awaiting deletion
+
+    Stored as a JSON snapshot plus an append-only journal ({path}.journal) of
+    changes. Every change is one journal line written under an exclusive lock
+    ({path}.lock) after replaying other processes' lines, so concurrent runs
+    (a single-file upload during a bulk or sync run) never drop each other's
+    entries; the snapshot is rewritten only every COMPACT_AFTER lines.
+    """
+
+    COMPACT_AFTER = 1000
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('SYLLABUS_MANIFEST_PATH', DEFAULT_MANIFEST_PATH)
+        self.journal_path = f"{self.path}.journal"
+        self._lock = threading.Lock()
+        self.reload()
+
+    @staticmethod
+    def key(file_path):
+        return os.path.abspath(file_path)
+
+    def is_current(self, file_path, sha256, course_code=None):
+        entry = self.files.get(self.key(file_path))
+        if entry is None or entry['sha256'] != sha256:
+            return False
+        return course_code is None or entry.get('course_code') == course_code
+
+    def mark_pending(self, file_path, document_id):
+        self._record({'op': 'pending', 'key': self.key(file_path), 'document_id': document_id})
+
+    def mark_done(self, file_path, sha256, document_id, course_code, pks):
+        self._record({'op': 'done', 'key': self.key(file_path), 'entry': {
+            'sha256': sha256,
+            'document_id': document_id,
+            'course_code': course_code,
+            'chunks': len(pks),
+            'completed_at': datetime.utcnow().isoformat()
+        }})
+
+    def clear_pending(self, keys=None):
+        """Forget pending files (these keys, default all) once their chunks are cleaned up"""
+        self._record({'op': 'clear_pending', 'keys': keys})
+
+    def retire(self, keys, forget=False):
+        """Queue the document_ids of these files for deletion; forget=True also drops their entries"""
+        self._record({'op': 'retire', 'keys': list(keys), 'forget': forget})
+
+    def referenced_ids(self):
+        return {entry['document_id'] for entry in self.files.values()}
+
+    def clear_retired(self, document_ids):
+        self._record({'op': 'clear_retired', 'document_ids': list(document_ids)})
+
+    def reload(self):
+        """Re-read the snapshot and journal (changes by other processes included)"""
+        with self._lock, self._file_lock():
+            self._load()
+        return self
+
+    # ---------- Persistence ----------
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _load(self):
+        self.files, self.pending, self.retired = {}, {}, {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.files = data.get('files', {})
+            self.pending = data.get('pending', {})
+            self.retired = data.get('retired', {})
+            for entry in self.files.values():
+                entry.pop('pks', None)  # older snapshots listed every chunk pk
+        self._inode, self._offset, self._lines = None, 0, 0
+        self._replay()
+
+    def _replay(self):
+        """Apply journal lines appended since the last read"""
+        if not os.path.exists(self.journal_path):
+            return
+        stat = os.stat(self.journal_path)
+        if self._inode is not None and stat.st_ino != self._inode:
+            # Compacted by another process: the snapshot now holds what we replayed
+            self._load()
+            return
+        self._inode = stat.st_ino
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                self._apply(json.loads(line.decode('utf-8')))
+                self._offset += len(line)
+                self._lines += 1
+
+    def _apply(self, record):
+        op = record['op']
+        if op == 'pending':
+            self.pending[record['key']] = record['document_id']
+        elif op == 'done':
+            self.pending.pop(record['key'], None)
+            self.files[record['key']] = record['entry']
+        elif op == 'clear_pending':
+            keys = self.pending.keys() if record['keys'] is None else record['keys']
+            for key in list(keys):
+                self.pending.pop(key, None)
+        elif op == 'retire':
+            for key in record['keys']:
+                entry = self.files.pop(key, None) if record['forget'] else self.files.get(key)
+                if entry is not None:
+                    self.retired[entry['document_id']] = key
+        elif op == 'clear_retired':
+            for document_id in record['document_ids']:
+                self.retired.pop(document_id, None)
+
+    def _record(self, record):
+        with self._lock, self._file_lock():
+            self._replay()
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+            self._replay()
+            if self._lines >= self.COMPACT_AFTER:
+                self._compact()
+
+    def _compact(self):
+        """Fold the journal into the snapshot (caller holds the file lock)"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 2, 'files': self.files, 'pending': self.pending,
+                       'retired': self.retired}, f, indent=1)
+        os.replace(tmp_path, self.path)
+        tmp_journal = f"{self.journal_path}.{os.getpid()}.tmp"
+        open(tmp_journal, 'w').close()
+        os.replace(tmp_journal, self.journal_path)
+        self._inode, self._offset, self._lines = os.stat(self.journal_path).st_ino, 0, 0
+
+
+# ==================== BULK PIPELINE ====================
+
+def _pool_context():
+    # fork keeps workers from re-running upload_nu_syllabi.py's service setup
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def bulk_ingest(jobs, vector_store, manifest, cleanup=None, on_batch=None,
+                workers=None, batch_size=2000, log=print):
+    """
+    Ingest many syllabus files with parallel extraction and cross-file batches
+
+    Args:
+        jobs: List of (file_path, course_code)
+        vector_store: Object with add_documents(documents) -> pks (PartitionedVectorStore)
+        manifest: SyllabusManifest checkpoint
+        cleanup: callable(document_ids) removing chunks of interrupted files
+        on_batch: callable(documents) after each insert (keyword index)
+        workers: Extraction processes (default: CPU count)
+        batch_size: Chunks per embedding + insert call
+
+    Returns:
+        dict: files / skipped / failed / chunks / batches / seconds
+    """
+    started = time.perf_counter()
+    summary = {'files': 0, 'skipped': 0, 'failed': 0, 'chunks': 0, 'batches': 0}
+
+    if manifest.pending:
+        interrupted = dict(manifest.pending)
+        log(f"   [WARNING]  Cleaning up {len(interrupted)} file(s) interrupted mid-write")
+        if cleanup:
+            cleanup(list(interrupted.values()))
+        manifest.clear_pending(list(interrupted))
+
+    todo = []
+    for file_path, course_code in jobs:
+        sha256 = file_sha256(file_path)
+        if manifest.is_current(file_path, sha256, course_code):
+            summary['skipped'] += 1
+        else:
+            todo.append((file_path, course_code, sha256))
+    log(f"   {len(todo)} file(s) to ingest, {summary['skipped']} already done")
+
+    # Per-file bookkeeping shared with the writer thread
+    remaining, written, meta = {}, {}, {}
+    state_lock = threading.Lock()
+
+    def write(batch):
+        pks = vector_store.add_documents(batch)
+        if on_batch:
+            on_batch(batch)
+        finished = []
+        with state_lock:
+            for doc, pk in zip(batch, pks):
+                path = doc['_path']
+                written[path].append(pk)
+                remaining[path] -= 1
+                if remaining[path] == 0:
+                    finished.append(path)
+        for path in finished:
+            sha256, document_id, course_code = meta[path]
+            manifest.mark_done(path, sha256, document_id, course_code, written[path])
+        return len(batch)
+
+    buffer = []
+    in_flight = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool, \
+            ThreadPoolExecutor(max_workers=1) as writer:
+        futures = {
+            pool.submit(prepare_file, file_path, course_code, str(uuid.uuid4())): (file_path, sha256)
+            for file_path, course_code, sha256 in todo
+        }
+        for future in as_completed(futures):
+            file_path, sha256 = futures[future]
+            try:
+                prepared = future.result()
+            except Exception as e:
+                log(f"   [ERROR] {os.path.basename(file_path)}: {str(e)}")
+                summary['failed'] += 1
+                continue
+
+            documents = prepared['documents']
+            summary['files'] += 1
+            summary['chunks'] += len(documents)
+            meta[file_path] = (sha256, prepared['document_id'], prepared['course_code'])
+            if not documents:
+                manifest.mark_done(file_path, sha256, prepared['document_id'], prepared['course_code'], [])
+                continue
+
+            with state_lock:
+                remaining[file_path] = len(documents)
+                written[file_path] = []
+            manifest.mark_pending(file_path, prepared['document_id'])
+            for doc in documents:
+                buffer.append(dict(doc, _path=file_path))
+
+            while len(buffer) >= batch_size:
+                batch, buffer = buffer[:batch_size], buffer[batch_size:]
+                in_flight.append(writer.submit(write, batch))
+                summary['batches'] += 1
+            # Bound memory: at most two batches queued behind the writer
+            while len(in_flight) > 2:
+                in_flight.pop(0).result()
+
+        if buffer:
+            in_flight.append(writer.submit(write, buffer))
+            summary['batches'] += 1
+        for future in in_flight:
+            future.result()  # re-raises insert failures; pending files are cleaned up next run
+
+    summary['seconds'] = round(time.perf_counter() - started, 1)
+    return summary
+
+
+# ==================== SYNC ====================
+
+def plan_sync(jobs, manifest, root):
+    """
+    Diff the files in `root` against the manifest
+
+    Args:
+        jobs: List of (file_path, course_code) currently in root
+        manifest: SyllabusManifest
+        root: Folder being synced; manifest entries directly in it but not in jobs are removed
+
+    Returns:
+        dict: added / changed / unchanged -> [(file_path, course_code)], removed -> [manifest key]
+    """
+    diff = {'added': [], 'changed': [], 'unchanged': [], 'removed': []}
+    present = set()
+    for file_path, course_code in jobs:
+        key = manifest.key(file_path)
+        present.add(key)
+        if key not in manifest.files:
+            diff['added'].append((file_path, course_code))
+        elif manifest.is_current(file_path, file_sha256(file_path), course_code):
+            diff['unchanged'].append((file_path, course_code))
+        else:
+            diff['changed'].append((file_path, course_code))
+
+    root_key = manifest.key(root)
+    diff['removed'] = sorted(
+        key for key in manifest.files
+        if os.path.dirname(key) == root_key and key not in present
+    )
+    return diff
+
+
+def collect_retired(manifest, delete):
+    """
+    Delete retired document_ids no longer referenced by any manifest entry
+
+    A changed file whose re-ingest failed still references its old document_id,
+    so its chunks are kept and it simply drops off the retired list.
+
+    Returns:
+        tuple: (documents deleted, chunks deleted as reported by `delete`)
+    """
+    retired = list(manifest.retired)
+    if not retired:
+        return 0, 0
+    referenced = manifest.referenced_ids()
+    orphaned = [document_id for document_id in retired if document_id not in referenced]
+    chunks = (delete(orphaned) or 0) if orphaned else 0
+    manifest.clear_retired(retired)
+    return len(orphaned), chunks
+
+
+def sync_ingest(jobs, root, vector_store, manifest, delete, on_batch=None,
+                workers=None, batch_size=2000, log=print):
+    """
+    Bring the collection in line with the files in `root`
+
+    New and changed files go through bulk_ingest under fresh document_ids; the
+    old document_ids of changed and removed files are deleted afterwards. The
+    retired list is persisted first, so an interrupted sync finishes the
+    deletes on the next run.
+
+    Args:
+        delete: callable(document_ids) -> chunks deleted (Milvus + keyword index)
+
+    Returns:
+        dict: added / changed / removed (paths), unchanged (count),
+              retired_documents, deleted_chunks, ingest (bulk_ingest summary), seconds
+    """
+    started = time.perf_counter()
+    recovered, recovered_chunks = collect_retired(manifest, delete)
+    if recovered:
+        log(f"   [WARNING]  Deleted {recovered} document(s) left over from an interrupted sync")
+
+    diff = plan_sync(jobs, manifest, root)
+    log(f"   Diff: +{len(diff['added'])} added, ~{len(diff['changed'])} changed, "
+        f"-{len(diff['removed'])} removed, ={len(diff['unchanged'])} unchanged")
+
+    manifest.retire(diff['removed'], forget=True)
+    manifest.retire([manifest.key(file_path) for file_path, _ in diff['changed']])
+
+    summary = {'ingest': {'files': 0, 'skipped': 0, 'failed': 0, 'chunks': 0, 'batches': 0}}
+    todo = diff['added'] + diff['changed']
+    if todo:
+        summary['ingest'] = bulk_ingest(todo, vector_store, manifest, cleanup=delete, on_batch=on_batch,
+                                        workers=workers, batch_size=batch_size, log=log)
+
+    documents, chunks = collect_retired(manifest, delete)
+    summary.update({
+        'added': [file_path for file_path, _ in diff['added']],
+        'changed': [file_path for file_path, _ in diff['changed']],
+        'removed': diff['removed'],
+        'unchanged': len(diff['unchanged']),
+        'retired_documents': documents + recovered,
+        'deleted_chunks': chunks + recovered_chunks,
+        'seconds': round(time.perf_counter() - started, 1)
+    })
+    return summary
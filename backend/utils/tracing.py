@@ -0,0 +1,333 @@
+"""
+Request Tracing
+W3C trace context (traceparent) propagation and spans for the Flask services,
+so one upload can be followed server.js -> Flask -> watsonx.ai -> Milvus ->
+COS -> Presto hop by hop.
+
+    init_app(app, 'cpl-upload')         # server span per request, continues the
+                                        # gateway's traceparent header
+    with span('embed'):                 # child of whatever span is current
+        ...
+    @traced('cos.upload_document', peer='cos')
+    def upload_document(...):           # client span around a backend call
+
+Export is off unless TRACE_EXPORTER is set:
+    file    one JSON span per line in TRACE_FILE (default traces.ndjson)
+    otlp    OTLP/HTTP JSON batches to TRACE_OTLP_ENDPOINT
+            (default http://localhost:4318/v1/traces, e.g. a local collector or Jaeger)
+"""
+
+import os
+import json
+import time
+import random
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+SPAN_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+DEFAULT_EXCLUDE = ('/health', '/metrics', '/ready')
+
+_current = contextvars.ContextVar('cpl_current_span', default=None)
+
+
+def _new_id(size):
+    return os.urandom(size).hex()
+
+
+def parse_traceparent(header):
+    """(trace_id, parent_span_id, sampled) from a traceparent header, or None if invalid"""
+    parts = (header or '').strip().split('-')
+    if len(parts) != 4 or parts[0] != '00' or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class Span:
+    """One timed operation; ids are lowercase hex as in traceparent"""
+
+    def __init__(self, name, trace_id, parent_id=None, kind='internal', sampled=True, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.sampled = sampled
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, error):
+        self.error = str(error) or type(error).__name__
+
+    def to_dict(self, service):
+        return {
+            'service': service,
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'durationMs': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'attributes': self.attributes,
+            'status': 'ERROR' if self.error else 'OK',
+            'error': self.error,
+        }
+
+
+# ==================== EXPORTERS ====================
+
+class FileSpanExporter:
+    """Append finished spans as NDJSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span_dicts):
+        lines = ''.join(json.dumps(s, default=str) + '\n' for s in span_dicts)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+class OtlpHttpExporter:
+    """
+    Batch spans and POST them as OTLP/HTTP JSON
+
+    A daemon thread sends every flush_seconds or batch_size spans; it is
+    (re)started lazily, so it also runs in workers forked after import.
+    """
+
+    def __init__(self, endpoint, batch_size=256, flush_seconds=2.0, timeout=5, session=None):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.timeout = timeout
+        self.session = session
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def export(self, span_dicts):
+        with self._lock:
+            self._pending.extend(span_dicts)
+            full = len(self._pending) >= self.batch_size
+        if self._pid != os.getpid():
+            self._start()
+        if full:
+            self._wake.set()
+
+    def _start(self):
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='otlp-exporter', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            if self.session is None:
+                import requests
+                self.session = requests.Session()
+            self.session.post(self.endpoint, json=otlp_payload(batch), timeout=self.timeout)
+        except Exception as e:
+            print(f"[WARNING]  Trace export failed ({len(batch)} spans dropped): {str(e)}")
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_payload(span_dicts):
+    """OTLP/HTTP JSON body (ExportTraceServiceRequest) grouped by service"""
+    by_service = {}
+    for s in span_dicts:
+        by_service.setdefault(s['service'], []).append({
+            'traceId': s['traceId'],
+            'spanId': s['spanId'],
+            'parentSpanId': s['parentSpanId'] or '',
+            'name': s['name'],
+            'kind': SPAN_KINDS.get(s['kind'], 1),
+            'startTimeUnixNano': str(s['startTimeUnixNano']),
+            'endTimeUnixNano': str(s['endTimeUnixNano']),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in s['attributes'].items()],
+            'status': {'code': 2, 'message': s['error']} if s['error'] else {'code': 1},
+        })
+    return {'resourceSpans': [
+        {
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service}}]},
+            'scopeSpans': [{'scope': {'name': 'cpl.tracing'}, 'spans': spans}],
+        }
+        for service, spans in by_service.items()
+    ]}
+
+
+# ==================== TRACER ====================
+
+class Tracer:
+    """Creates spans and hands sampled, finished ones to the exporter"""
+
+    def __init__(self, service='cpl-backend', exporter=None, sample_ratio=1.0):
+        self.service = service
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    def start(self, name, kind='internal', parent=None, attributes=None):
+        """
+        Start a span and make it current
+
+        Args:
+            parent: (trace_id, span_id, sampled) from a traceparent; defaults to the current span
+
+        Returns:
+            tuple: (span, token for finish())
+        """
+        if parent is None:
+            current = _current.get()
+            if current is not None:
+                parent = (current.trace_id, current.span_id, current.sampled)
+        if parent is None:
+            trace_id, parent_id = _new_id(16), None
+            sampled = self.exporter is not None and random.random() < self.sample_ratio
+        else:
+            trace_id, parent_id, sampled = parent
+        new_span = Span(name, trace_id, parent_id, kind, sampled, attributes)
+        return new_span, _current.set(new_span)
+
+    def finish(self, span, token):
+        span.end_ns = time.time_ns()
+        _current.reset(token)
+        if self.exporter is not None and span.sampled:
+            try:
+                self.exporter.export([span.to_dict(self.service)])
+            except Exception as e:
+                print(f"[WARNING]  Trace export failed: {str(e)}")
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def span(name, kind='internal', **attributes):
+    """Child span of the current one (a new trace if there is none)"""
+    tracer = get_tracer()
+    new_span, token = tracer.start(name, kind, attributes=attributes)
+    try:
+        yield new_span
+    except Exception as e:
+        new_span.set_error(e)
+        raise
+    finally:
+        tracer.finish(new_span, token)
+
+
+def traced(name, **attributes):
+    """Decorator: client span around every call of a backend method"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind='client', **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ==================== FLASK ====================
+
+def init_app(app, service, exclude=DEFAULT_EXCLUDE):
+    """
+    One server span per request, continuing an incoming traceparent; the
+    response carries the request span's traceparent for correlation
+    """
+    from flask import g, request
+
+    tracer = get_tracer()
+    tracer.service = service
+    exclude = set(exclude)
+
+    @app.before_request
+    def _start_span():
+        if request.path in exclude:
+            return
+        rule = request.url_rule.rule if request.url_rule else request.path
+        g.trace_span, g.trace_token = tracer.start(
+            f"{request.method} {rule}", kind='server',
+            parent=parse_traceparent(request.headers.get('traceparent')),
+            attributes={'http.method': request.method, 'http.route': rule}
+        )
+
+    @app.after_request
+    def _tag_response(response):
+        server_span = g.get('trace_span')
+        if server_span is not None:
+            server_span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                server_span.error = server_span.error or f"HTTP {response.status_code}"
+            response.headers['traceparent'] = server_span.traceparent
+        return response
+
+    @app.teardown_request
+    def _finish_span(error=None):
+        server_span = g.pop('trace_span', None)
+        if server_span is None:
+            return
+        if error is not None:
+            server_span.set_error(error)
+        tracer.finish(server_span, g.pop('trace_token'))
+
+    return tracer
+
+
+# Singleton instance
+_tracer = None
+
+def get_tracer():
+    """Get or create the process tracer from TRACE_* environment variables"""
+    global _tracer
+    if _tracer is None:
+        kind = os.getenv('TRACE_EXPORTER', 'none').lower()
+        exporter = None
+        if kind == 'file':
+            exporter = FileSpanExporter(os.getenv('TRACE_FILE', 'traces.ndjson'))
+        elif kind == 'otlp':
+            exporter = OtlpHttpExporter(os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces'))
+        _tracer = Tracer(
+            service=os.getenv('TRACE_SERVICE_NAME', 'cpl-backend'),
+            exporter=exporter,
+            sample_ratio=float(os.getenv('TRACE_SAMPLE_RATIO', 1.0))
+        )
+    return _tracer
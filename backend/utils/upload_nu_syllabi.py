@@ -10,6 +10,16 @@ Or upload multiple:
 
 Or upload all PJM syllabi:
     python upload_nu_syllabi.py --all
+
+Bulk mode (parallel extraction, cross-file embedding batches, resumable):
+    python upload_nu_syllabi.py --all --bulk
+    python upload_nu_syllabi.py path/to/syllabi_folder/ "INFO 5100" --bulk --workers=8 --batch-size=2000
+    Finished files are recorded in SYLLABUS_MANIFEST_PATH (backend/data/syllabus_manifest.json)
+    and skipped on rerun
+
+Sync mode (re-embed only new/changed files, delete chunks of changed/removed files):
+    python upload_nu_syllabi.py --all --sync
+    python upload_nu_syllabi.py path/to/syllabi_folder/ "INFO 5100" --sync
 """
 
 import os
@@ -19,11 +29,14 @@ from pathlib import Path
 from dotenv import load_dotenv
 from ibm_watsonx_ai import APIClient, Credentials
 from ibm_watsonx_ai.foundation_models.embeddings import Embeddings
-from ibm_watsonx_ai.foundation_models.extensions.rag.vector_stores import MilvusVectorStore
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
-import pdfplumber
-import docx
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import get_milvus_handler, PartitionedVectorStore
+from utils.search_cache import get_search_cache
+from utils.keyword_index import get_keyword_index
+from utils.syllabus_ingest import (
+    extract_text, build_documents, bulk_ingest, sync_ingest, SyllabusManifest, file_sha256, collect_retired,
+    CHUNK_SIZE, CHUNK_OVERLAP
+)
 
 load_dotenv()
 
@@ -45,65 +58,20 @@ embedding = Embeddings(
     api_client=api_client
 )
 
-# Initialize Text Splitter
-# Safe size: 1500 chars ≈ 375 tokens (well under 512 limit)
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1500,      # ← Safe size, under 512 token limit
-    chunk_overlap=150,    # ← 10% overlap
-    length_function=len,
-    is_separator_regex=False,
-)
+# Text splitting (1500 chars ≈ 375 tokens, 150 overlap) lives in utils/syllabus_ingest.py
 
-# Initialize Milvus Vector Store
-vector_store = MilvusVectorStore(
-    api_client=api_client,
-    connection_id=os.getenv('MILVUS_CONNECTION_ID'),
-    collection_name='cpl_documents_v5',
-    embedding_function=embedding
-)
+# Initialize Milvus Vector Store (reference syllabi go to the nu_syllabus partition when present)
+milvus = get_milvus_handler()
+vector_store = PartitionedVectorStore(embedding_function=embedding, handler=milvus)
 
 print("[SUCCESS] Services initialized")
-print(f"   Collection: cpl_documents_v5 (L2 + HNSW)")
+print(f"   Collection: {milvus.collection_name} (L2 + HNSW)")
 print(f"   Model: ibm/slate-125m-english-rtrvr-v2")
-print(f"   Chunk size: 1500 chars (~375 tokens, safe limit)")
-print(f"   Overlap: 150 chars\n")
+print(f"   Chunk size: {CHUNK_SIZE} chars (~375 tokens, safe limit)")
+print(f"   Overlap: {CHUNK_OVERLAP} chars\n")
 
 # ==================== HELPER FUNCTIONS ====================
 
-def extract_text(file_path):
-    """
-    Extract text from PDF/DOCX/TXT
-    Uses pdfplumber for PDFs (handles font encoding issues better than PyPDF2)
-    """
-    try:
-        if file_path.endswith('.pdf'):
-            text = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            if not text.strip():
-                raise ValueError("No text extracted from PDF. It may be scanned/image-based.")
-            
-            return text.strip()
-        
-        elif file_path.endswith('.docx'):
-            doc = docx.Document(file_path)
-            text = "\n".join([para.text for para in doc.paragraphs])
-            return text.strip()
-        
-        elif file_path.endswith('.txt'):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        
-        else:
-            raise ValueError(f"Unsupported file type: {file_path}")
-    except Exception as e:
-        raise ValueError(f"Text extraction failed for {file_path}: {str(e)}")
-
-
 def upload_nu_syllabus(file_path, course_code):
     """
     Upload a single NU reference syllabus
@@ -134,54 +102,31 @@ def upload_nu_syllabus(file_path, course_code):
     print(f"      📝 Preview: {preview}...\n")
     
     # Chunk document
-    print(f"   [CHUNKING]  STEP 2: Chunking (size=1500, overlap=150)...")
-    doc = Document(
-        page_content=text_content,
-        metadata={'document_name': filename}
-    )
-    chunks = text_splitter.split_documents([doc])
-    print(f"      [SUCCESS] Created {len(chunks)} chunks\n")
-    
-    # Prepare documents for Milvus
-    print("   [MILVUS] STEP 3: Preparing for Milvus...")
-    documents = []
-    char_position = 0
-    
-    for i, chunk in enumerate(chunks):
-        chunk_text = chunk.page_content
-        pk = f"{document_id}_{i}"
-        
-        documents.append({
-            'content': chunk_text,  # ← CRITICAL: Must be 'content', not 'text'
-            'metadata': {
-                'pk': pk,
-                'document_id': document_id,
-                'document_name': filename,
-                'document_type': 'nu_syllabus',
-                'page': i + 1,
-                'start_index': char_position,
-                'sequence_number': i,
-                'target_course': course_code,
-                'student_name': '',
-                'nuid': '',
-                'request_type': ''
-            }
-        })
-        
-        char_position += len(chunk_text)
-    
-    print(f"      [SUCCESS] Prepared {len(documents)} documents\n")
+    print(f"   [CHUNKING]  STEP 2: Chunking (size={CHUNK_SIZE}, overlap={CHUNK_OVERLAP})...")
+    documents = build_documents(text_content, filename, document_id, course_code)
+    print(f"      [SUCCESS] Created {len(documents)} chunks\n")
     
     # Upload to Milvus
     print(f"   [UPLOADING] STEP 4: Uploading to Milvus...")
     result = vector_store.add_documents(documents)
+    get_keyword_index().add_chunks(documents)
+    # Recorded so the orphan GC keeps it; a previous upload of this file is retired and deleted
+    manifest = SyllabusManifest(BULK_OPTIONS['manifest'])
+    if manifest.key(file_path) in manifest.files:
+        manifest.retire([manifest.key(file_path)])
+    manifest.mark_done(file_path, file_sha256(file_path), document_id, course_code, result)
+    replaced, replaced_chunks = collect_retired(manifest, delete_syllabus_documents)
+    if replaced:
+        print(f"      [SUCCESS] Deleted previous upload ({replaced_chunks} chunks)")
+    # Invalidates cached search results in the upload service (SEARCH_CACHE_GENERATION_FILE)
+    get_search_cache().bump_generation()
     
     print(f"\n{'='*70}")
     print(f"[SUCCESS] UPLOAD COMPLETE!")
     print(f"{'='*70}")
     print(f"   Document: {filename}")
     print(f"   Course: {course_code}")
-    print(f"   Chunks stored: {len(chunks)}")
+    print(f"   Chunks stored: {len(documents)}")
     print(f"{'='*70}\n")
     
     return document_id
@@ -206,6 +151,13 @@ def upload_directory(directory_path, course_code):
     print(f"\n📂 Found {len(files)} file(s) in {directory_path}")
     print(f"   Course: {course_code}\n")
     
+    if BULK_OPTIONS['sync']:
+        sync_upload([(str(file_path), course_code) for file_path in files], directory_path)
+        return
+    if BULK_OPTIONS['bulk']:
+        bulk_upload([(str(file_path), course_code) for file_path in files])
+        return
+    
     success_count = 0
     fail_count = 0
     
@@ -248,10 +200,20 @@ def upload_all_pjm_syllabi():
     print(f"   Found {len(files)} files:")
     for f in files:
         print(f"      - {f}")
-    print(f"   Chunk size: 1500 chars (safe, under token limit)")
-    print(f"   Collection: cpl_documents_v5")
+    print(f"   Chunk size: {CHUNK_SIZE} chars (safe, under token limit)")
+    print(f"   Collection: {milvus.collection_name}")
     print(f"{'='*70}\n")
     
+    # Extract course code from filename (e.g., PJM5900.txt -> PJM5900)
+    jobs = [(os.path.join(syllabi_folder, filename), filename.replace(".txt", "").replace("_", ""))
+            for filename in files]
+    if BULK_OPTIONS['sync']:
+        sync_upload(jobs, syllabi_folder)
+        return
+    if BULK_OPTIONS['bulk']:
+        bulk_upload(jobs)
+        return
+    
     success_count = 0
     fail_count = 0
     
@@ -276,16 +238,139 @@ def upload_all_pjm_syllabi():
     print(f"{'='*70}\n")
 
 
+# Set from --bulk / --workers= / --batch-size= / --manifest= in __main__
+BULK_OPTIONS = {'bulk': False, 'sync': False, 'workers': None, 'batch_size': 2000, 'manifest': None}
+
+
+def delete_syllabus_documents(document_ids):
+    """Delete every chunk of these documents from Milvus and the keyword index"""
+    deleted = milvus.delete_documents(document_ids)
+    get_keyword_index().remove_documents(document_ids)
+    return deleted
+
+
+def bulk_upload(jobs):
+    """
+    Pipelined upload of many syllabi (--bulk)
+    Extraction runs in a process pool; chunks from many files are embedded and
+    inserted in large batches. Files recorded in the manifest are skipped on rerun.
+
+    Args:
+        jobs: List of (file_path, course_code)
+    """
+    manifest = SyllabusManifest(BULK_OPTIONS['manifest'])
+
+    print(f"\n{'='*70}")
+    print(f"[ICEBERG] BULK UPLOAD")
+    print(f"{'='*70}")
+    print(f"   Files: {len(jobs)}")
+    print(f"   Workers: {BULK_OPTIONS['workers'] or os.cpu_count()}")
+    print(f"   Batch size: {BULK_OPTIONS['batch_size']} chunks")
+    print(f"   Manifest: {manifest.path}")
+    print(f"{'='*70}\n")
+
+    summary = bulk_ingest(
+        jobs, vector_store, manifest,
+        cleanup=delete_syllabus_documents,
+        on_batch=get_keyword_index().add_chunks,
+        workers=BULK_OPTIONS['workers'],
+        batch_size=BULK_OPTIONS['batch_size']
+    )
+    # Invalidates cached search results in the upload service (SEARCH_CACHE_GENERATION_FILE)
+    get_search_cache().bump_generation()
+
+    rate = summary['chunks'] / summary['seconds'] if summary['seconds'] else 0
+    print(f"\n{'='*70}")
+    print(f"[SUCCESS] BULK UPLOAD COMPLETE")
+    print(f"{'='*70}")
+    print(f"   [SUCCESS] Uploaded: {summary['files']} file(s), {summary['chunks']} chunks in {summary['batches']} batch(es)")
+    print(f"   ⏭️  Skipped (already in manifest): {summary['skipped']}")
+    print(f"   [ERROR] Failed: {summary['failed']}")
+    print(f"   ⏱️  {summary['seconds']}s ({rate:.0f} chunks/s)")
+    print(f"{'='*70}\n")
+    return summary
+
+
+def sync_upload(jobs, root):
+    """
+    Incremental sync of a syllabus folder (--sync)
+    Only new or changed files are embedded; chunks of changed or removed files
+    are deleted by document_id. Cost scales with the diff, not the catalog.
+
+    Args:
+        jobs: List of (file_path, course_code) currently in root
+        root: Folder being synced
+    """
+    manifest = SyllabusManifest(BULK_OPTIONS['manifest'])
+
+    print(f"\n{'='*70}")
+    print(f"🔄 SYLLABUS SYNC")
+    print(f"{'='*70}")
+    print(f"   Folder: {root}")
+    print(f"   Files on disk: {len(jobs)}")
+    print(f"   Manifest: {manifest.path}")
+    print(f"{'='*70}\n")
+
+    summary = sync_ingest(
+        jobs, root, vector_store, manifest,
+        delete=delete_syllabus_documents,
+        on_batch=get_keyword_index().add_chunks,
+        workers=BULK_OPTIONS['workers'],
+        batch_size=BULK_OPTIONS['batch_size']
+    )
+    if summary['ingest']['chunks'] or summary['deleted_chunks']:
+        # Invalidates cached search results in the upload service (SEARCH_CACHE_GENERATION_FILE)
+        get_search_cache().bump_generation()
+
+    print(f"\n{'='*70}")
+    print(f"[SUCCESS] SYNC COMPLETE")
+    print(f"{'='*70}")
+    for label, key in (('+ Added', 'added'), ('~ Changed', 'changed'), ('- Removed', 'removed')):
+        print(f"   {label}: {len(summary[key])}")
+        for file_path in summary[key]:
+            print(f"      {os.path.basename(file_path)}")
+    print(f"   = Unchanged: {summary['unchanged']}")
+    print(f"   Chunks embedded: {summary['ingest']['chunks']}")
+    print(f"   Chunks deleted: {summary['deleted_chunks']} ({summary['retired_documents']} document(s))")
+    print(f"   [ERROR] Failed: {summary['ingest']['failed']}")
+    print(f"   ⏱️  {summary['seconds']}s")
+    print(f"{'='*70}\n")
+    return summary
+
+
+def parse_bulk_options(argv):
+    """Pull --bulk / --sync / --workers=N / --batch-size=N / --manifest=path out of argv"""
+    options = {'bulk': False, 'sync': False, 'workers': None, 'batch_size': 2000, 'manifest': None}
+    positional = []
+    for arg in argv:
+        if arg == '--bulk':
+            options['bulk'] = True
+        elif arg == '--sync':
+            options['sync'] = True
+        elif arg.startswith('--workers='):
+            options['workers'] = int(arg.split('=', 1)[1])
+        elif arg.startswith('--batch-size='):
+            options['batch_size'] = int(arg.split('=', 1)[1])
+        elif arg.startswith('--manifest='):
+            options['manifest'] = arg.split('=', 1)[1]
+        else:
+            positional.append(arg)
+    return options, positional
+
+
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
     
+    options, args = parse_bulk_options(sys.argv[1:])
+    BULK_OPTIONS.update(options)
+    
     # Check for --all flag
-    if len(sys.argv) == 2 and sys.argv[1] == '--all':
+    if len(args) == 1 and args[0] == '--all':
         upload_all_pjm_syllabi()
         sys.exit(0)
     
-    if len(sys.argv) < 3:
+    if len(args) < 2:
         print("\n[ERROR] Usage Error\n")
         print("Upload single file:")
         print("   python upload_nu_syllabi.py path/to/syllabus.pdf 'PJM5900'\n")
@@ -293,18 +378,22 @@ if __name__ == '__main__':
         print("   python upload_nu_syllabi.py path/to/syllabi_folder/ 'PJM5900'\n")
         print("Upload ALL PJM syllabi from PJMSyllabi-Cleaned folder:")
         print("   python upload_nu_syllabi.py --all\n")
+        print("Bulk mode (parallel, batched, resumable) for a directory or --all:")
+        print("   python upload_nu_syllabi.py --all --bulk [--workers=8] [--batch-size=2000] [--manifest=path]\n")
+        print("Sync a directory or --all (only new/changed files; removes deleted ones):")
+        print("   python upload_nu_syllabi.py --all --sync\n")
         sys.exit(1)
     
-    path_arg = sys.argv[1]
-    course_code = sys.argv[2]
+    path_arg = args[0]
+    course_code = args[1]
     
     print(f"\n{'='*70}")
     print(f"🎓 NU REFERENCE SYLLABUS UPLOADER")
     print(f"{'='*70}")
     print(f"   Target: {path_arg}")
     print(f"   Course: {course_code}")
-    print(f"   Collection: cpl_documents_v5 (L2 + HNSW)")
-    print(f"   Chunk size: 1500 chars")
+    print(f"   Collection: {milvus.collection_name} (L2 + HNSW)")
+    print(f"   Chunk size: {CHUNK_SIZE} chars")
     print(f"{'='*70}\n")
     
     # Check if path is file or directory
@@ -4,14 +4,15 @@ Verify Milvus Collection Contents
 Shows what's actually stored in your vector index
 """
 import os
+import sys
 from dotenv import load_dotenv
 from pymilvus import connections, Collection, utility
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import COLLECTION_NAME
+from utils.collection_export import CollectionAudit, iter_rows
 
 load_dotenv()
 
-# Configuration
-COLLECTION_NAME = "cpl_documents_v5"
-
 # Connect to Milvus
 print(f"Connecting to Milvus...")
 connections.connect(
@@ -55,41 +56,54 @@ for field in schema.fields:
 # Get ALL fields from the collection
 all_fields = [field.name for field in schema.fields if field.name != "vector"]  # exclude vector for readability
 
-print(f"\n[ICEBERG] QUERYING DATA WITH ALL METADATA FIELDS...")
+print(f"\n[ICEBERG] SCANNING ALL CHUNKS (query_iterator, bounded memory)...")
 
-results = collection.query(
-    expr="pk != ''",
-    output_fields=all_fields,
-    limit=100
-)
+# Walk the whole collection page by page; only the first chunk of each document
+# (for the metadata preview) is kept, and only for the first MAX_PREVIEW documents
+MAX_PREVIEW = 20
+previews = {}
+
+def keep_preview(page):
+    for r in page:
+        doc_name = r.get('document_name', 'Unknown')
+        if doc_name not in previews and len(previews) < MAX_PREVIEW:
+            previews[doc_name] = r
 
-# Group by document
-docs = {}
-for r in results:
-    doc_name = r.get('document_name', 'Unknown')
-    if doc_name not in docs:
-        docs[doc_name] = []
-    docs[doc_name].append(r)
+chunk_counts = {}
 
-print(f"\nFound {len(docs)} unique documents:\n")
+def count_chunks(doc):
+    if doc['document_name'] in previews:
+        chunk_counts[doc['document_name']] = chunk_counts.get(doc['document_name'], 0) + doc['chunks']
 
-for doc_name, chunks in sorted(docs.items()):
+audit = CollectionAudit(top=MAX_PREVIEW, on_document=count_chunks)
+for page in iter_rows(collection, all_fields):
+    keep_preview(page)
+    audit.add(page)
+summary = audit.finish()
+
+print(f"\nFound {summary['documents']} unique documents ({summary['chunks']} chunks)")
+print(f"   By type: {summary['by_type']}")
+print(f"   Chunk bytes: p50 {summary['chunk_bytes']['p50']}, p95 {summary['chunk_bytes']['p95']}, "
+      f"max {summary['chunk_bytes']['max']}")
+if summary['incomplete_documents']:
+    print(f"   [WARNING]  {summary['incomplete_documents']} document(s) with missing/duplicate chunks")
+print(f"   Showing the first {len(previews)} (full export: scripts/export_collection.py)\n")
+
+for doc_name, first in sorted(previews.items()):
     print(f"{'='*70}")
     print(f"[DOCUMENT] {doc_name}")
     print(f"{'='*70}")
-    print(f"   Chunks: {len(chunks)}")
+    print(f"   Chunks: {chunk_counts.get(doc_name, 0)}")
     
     # Show first chunk's FULL metadata
-    if chunks:
-        first = chunks[0]
-        print(f"\n   [REQUEST] METADATA (from first chunk):")
-        for key, value in first.items():
-            if key != 'text':  # Skip text content for brevity
-                print(f"      {key}: {value}")
-        
-        # Show text preview
-        text_preview = first.get('text', '')[:150]
-        print(f"\n   📝 Text preview: {text_preview}...")
+    print(f"\n   [REQUEST] METADATA (from first chunk):")
+    for key, value in first.items():
+        if key != 'text':  # Skip text content for brevity
+            print(f"      {key}: {value}")
+    
+    # Show text preview
+    text_preview = first.get('text', '')[:150]
+    print(f"\n   📝 Text preview: {text_preview}...")
     print()
 
 # Search test
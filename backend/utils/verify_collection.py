@@ -6,6 +6,9 @@ Run this after creating the collection to ensure everything is set up correctly
 from pymilvus import connections, Collection, utility
 from dotenv import load_dotenv
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from handlers.milvus_handler import COLLECTION_NAME
 import json
 
 load_dotenv()
@@ -27,7 +30,7 @@ connections.connect(
 print(f"   [SUCCESS] Connected\n")
 
 # Collection name
-collection_name = "cpl_documents_v5"
+collection_name = COLLECTION_NAME
 
 # Check if collection exists
 if not utility.has_collection(collection_name):
@@ -3,6 +3,8 @@ const multer = require('multer');
 const cors = require('cors');
 const FormData = require('form-data');
 const fetch = require('node-fetch');
+const crypto = require('crypto');
+const fs = require('fs');
 
 const app = express();
 const upload = multer({ storage: multer.memoryStorage() });
@@ -12,6 +14,57 @@ app.use(express.json());
 
 const WATSONX_SERVICE_URL = 'http://localhost:5000';
 
+// ==================== TRACE CONTEXT ====================
+// Every request gets a gateway span; its W3C traceparent is forwarded to the
+// Flask services, which continue the trace (backend/utils/tracing.py).
+// TRACE_FILE=traces.ndjson writes gateway spans in the same NDJSON format.
+const TRACE_FILE = process.env.TRACE_FILE;
+const TRACEPARENT = /^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$/;
+
+app.use((req, res, next) => {
+    const incoming = TRACEPARENT.exec(req.get('traceparent') || '');
+    const span = {
+        traceId: incoming ? incoming[1] : crypto.randomBytes(16).toString('hex'),
+        spanId: crypto.randomBytes(8).toString('hex'),
+        parentSpanId: incoming ? incoming[2] : null,
+        start: process.hrtime.bigint(),
+        startTimeUnixNano: BigInt(Date.now()) * 1000000n
+    };
+    req.traceparent = `00-${span.traceId}-${span.spanId}-01`;
+    res.set('traceparent', req.traceparent);
+
+    res.on('finish', () => {
+        if (!TRACE_FILE) return;
+        const durationNs = process.hrtime.bigint() - span.start;
+        const record = {
+            service: 'cpl-gateway',
+            traceId: span.traceId,
+            spanId: span.spanId,
+            parentSpanId: span.parentSpanId,
+            name: `${req.method} ${req.route ? req.route.path : req.path}`,
+            kind: 'server',
+            startTimeUnixNano: span.startTimeUnixNano.toString(),
+            endTimeUnixNano: (span.startTimeUnixNano + durationNs).toString(),
+            durationMs: Number(durationNs) / 1e6,
+            attributes: { 'http.method': req.method, 'http.status_code': res.statusCode },
+            status: res.statusCode >= 500 ? 'ERROR' : 'OK',
+            error: null
+        };
+        fs.appendFile(TRACE_FILE, JSON.stringify(record) + '\n', (err) => {
+            if (err) console.error('[WARNING]  Trace export failed:', err.message);
+        });
+    });
+    next();
+});
+
+// fetch() to the Flask services with the request's trace context
+function tracedFetch(req, url, options = {}) {
+    return fetch(url, {
+        ...options,
+        headers: { ...(options.headers || {}), traceparent: req.traceparent }
+    });
+}
+
 app.post('/api/upload', upload.single('file'), async (req, res) => {
     try {
         const file = req.file;
@@ -33,7 +86,7 @@ app.post('/api/upload', upload.single('file'), async (req, res) => {
         formData.append('requestType', requestType);
         formData.append('targetCourse', targetCourse);
         
-        const response = await fetch(`${WATSONX_SERVICE_URL}/api/upload-to-watsonx`, {
+        const response = await tracedFetch(req, `${WATSONX_SERVICE_URL}/api/upload-to-watsonx`, {
             method: 'POST',
             body: formData
         });
@@ -63,7 +116,8 @@ app.get('/api/download-document/:documentId/:filename', async (req, res) => {
         
         console.log(`[RECEIVED] Download request: ${documentId}/${filename}`);
         
-        const response = await fetch(
+        const response = await tracedFetch(
+            req,
             `${WATSONX_SERVICE_URL}/api/download-document/${documentId}/${filename}`
         );
         
@@ -93,7 +147,8 @@ app.get('/api/preview-document/:documentId/:filename', async (req, res) => {
         
         console.log(`[PREVIEW] Preview request: ${documentId}/${filename}`);
         
-        const response = await fetch(
+        const response = await tracedFetch(
+            req,
             `${WATSONX_SERVICE_URL}/api/preview-document/${documentId}/${filename}`
         );
         
@@ -123,7 +178,8 @@ app.get('/api/view-document/:documentId/:filename', async (req, res) => {
     try {
         const { documentId, filename } = req.params;
         
-        const response = await fetch(
+        const response = await tracedFetch(
+            req,
             `${WATSONX_SERVICE_URL}/api/view-document/${documentId}/${filename}`
         );
         
@@ -138,11 +194,28 @@ app.get('/api/view-document/:documentId/:filename', async (req, res) => {
 
 
 
+app.get('/api/coverage/:documentId', async (req, res) => {
+    try {
+        const { documentId } = req.params;
+        
+        const response = await tracedFetch(req, `${WATSONX_SERVICE_URL}/api/coverage/${documentId}`);
+        
+        const result = await response.json();
+        res.status(response.status).json(result);
+        
+    } catch (error) {
+        console.error('[ERROR] Coverage error:', error);
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
+
+
 app.get('/api/requests', async (req, res) => {
     try {
         console.log('[REQUEST] Fetching CPL requests from Iceberg...');
         
-        const response = await fetch(`${WATSONX_SERVICE_URL}/api/get-requests`);
+        const response = await tracedFetch(req, `${WATSONX_SERVICE_URL}/api/get-requests`);
         
         if (!response.ok) {
             throw new Error('Iceberg service unavailable');
@@ -178,7 +251,7 @@ app.get('/api/requests-by-nuid/:nuid', async (req, res) => {
         const { nuid } = req.params;
         console.log(`[FOUND] Fetching requests for NUID: ${nuid}`);
         
-        const response = await fetch(`${WATSONX_SERVICE_URL}/api/get-requests-by-nuid/${nuid}`);
+        const response = await tracedFetch(req, `${WATSONX_SERVICE_URL}/api/get-requests-by-nuid/${nuid}`);
         
         if (!response.ok) {
             throw new Error('Iceberg query failed');
@@ -218,7 +291,7 @@ app.put('/api/requests/:id/status', async (req, res) => {
         console.log(`   Credits: ${credits || 'N/A'}`);
         console.log(`   Updated by: ${updatedBy || 'Unknown'}`);
         
-        const response = await fetch(`${WATSONX_SERVICE_URL}/api/update-status`, {
+        const response = await tracedFetch(req, `${WATSONX_SERVICE_URL}/api/update-status`, {
             method: 'PUT',
             headers: {
                 'Content-Type': 'application/json'
@@ -263,6 +336,7 @@ app.get('/health', (req, res) => {
             upload: 'POST /api/upload',
             download: 'GET /api/download-document/:documentId/:filename',
             view: 'GET /api/view-document/:documentId/:filename',
+            coverage: 'GET /api/coverage/:documentId',
             requests: 'GET /api/requests',
             requestsByNuid: 'GET /api/requests-by-nuid/:nuid',
             updateStatus: 'PUT /api/requests/:id/status'
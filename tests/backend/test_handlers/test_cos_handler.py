@@ -80,4 +80,17 @@ class TestCOSHandler:
                 metadata={'student_name': 'John Doe'}
             )
 
-        assert "COS upload failed" in str(exc_info.value)
\ No newline at end of file
+        assert "COS upload failed" in str(exc_info.value)
+    @patch('handlers.cos_handler.ibm_boto3')
+    def test_iter_keys_follows_continuation_tokens(self, mock_boto3, mock_cos_client):
+        """Listing walks every page instead of stopping at the first 1000 keys"""
+        mock_boto3.client.return_value = mock_cos_client
+        mock_cos_client.list_objects_v2.side_effect = [
+            {'Contents': [{'Key': 'a/x.pdf'}, {'Key': 'b/y.pdf'}], 'IsTruncated': True, 'NextContinuationToken': 't1'},
+            {'Contents': [{'Key': 'c/z.pdf'}], 'IsTruncated': False},
+        ]
+
+        keys = list(COSHandler().iter_keys(page_size=2))
+
+        assert keys == ['a/x.pdf', 'b/y.pdf', 'c/z.pdf']
+        assert mock_cos_client.list_objects_v2.call_args.kwargs['ContinuationToken'] == 't1'
@@ -58,6 +58,24 @@ class TestIcebergHandler:
 
         assert result is False
 
+    @patch('handlers.iceberg_handler.prestodb')
+    def test_ping_runs_round_trip(self, mock_prestodb, mock_iceberg_connection):
+        """ping connects on demand and runs SELECT 1"""
+        mock_prestodb.dbapi.connect.return_value = mock_iceberg_connection
+
+        handler = IcebergHandler()
+
+        assert handler.ping() is True
+        mock_iceberg_connection.cursor.return_value.execute.assert_called_with("SELECT 1")
+
+    @patch('handlers.iceberg_handler.prestodb')
+    def test_ping_failure(self, mock_prestodb, mock_iceberg_connection):
+        """An unreachable coordinator is reported, not raised"""
+        mock_prestodb.dbapi.connect.return_value = mock_iceberg_connection
+        mock_iceberg_connection.cursor.return_value.execute.side_effect = Exception("Connection refused")
+
+        assert IcebergHandler().ping() is False
+
     def test_generate_request_id_no_connection(self):
         """Test request ID generation without database connection"""
         handler = IcebergHandler()
@@ -66,4 +84,24 @@ class TestIcebergHandler:
         request_id = handler._generate_request_id()
 
         assert request_id.startswith('REQ')
-        assert len(request_id) > 3
\ No newline at end of file
+        assert len(request_id) > 3
+
+    @patch('handlers.iceberg_handler.prestodb')
+    def test_get_document_ids_streams_distinct_ids(self, mock_prestodb, mock_iceberg_connection):
+        """Document ids are read in fetchmany pages"""
+        mock_prestodb.dbapi.connect.return_value = mock_iceberg_connection
+        mock_iceberg_connection.cursor().fetchmany.side_effect = [[('doc-1',), ('doc-2',)], [('doc-3',)], []]
+
+        handler = IcebergHandler()
+        document_ids = handler.get_document_ids(batch_size=2)
+
+        assert document_ids == {'doc-1', 'doc-2', 'doc-3'}
+        assert 'DISTINCT document_id' in mock_iceberg_connection.cursor().execute.call_args.args[0]
+
+    @patch('handlers.iceberg_handler.prestodb')
+    def test_get_document_ids_failure_is_not_empty(self, mock_prestodb, mock_iceberg_connection):
+        """A failed read returns None so callers never mistake it for an empty table"""
+        mock_prestodb.dbapi.connect.return_value = mock_iceberg_connection
+        mock_iceberg_connection.cursor().execute.side_effect = Exception("Presto down")
+
+        assert IcebergHandler().get_document_ids() is None
@@ -0,0 +1,126 @@
+"""
+Tests for the embedded storage backends and store configuration
+"""
+import pytest
+from unittest.mock import patch
+from handlers.storage import VectorStore, ObjectStore, RequestStore, ObjectNotFound, store_choice
+from handlers.local_storage import compile_expr, NumpyVectorStore, FileObjectStore, SQLiteRequestStore
+
+def chunk(document_id, sequence_number, text, document_type='student_syllabus', target_course='PJM 5900'):
+    return {'content': text, 'metadata': {
+        'document_id': document_id, 'document_name': f"{document_id}.pdf", 'document_type': document_type,
+        'page': 0, 'start_index': 0, 'sequence_number': sequence_number, 'student_name': 'Jane Doe',
+        'nuid': '001234567', 'target_course': target_course, 'request_type': 'Credit Transfer'
+    }}
+
+def unit(dim, i):
+    vector = [0.0] * dim
+    vector[i] = 1.0
+    return vector
+
+class TestLocalStorage:
+
+    def test_store_choice(self):
+        """Remote services by default; STORAGE_BACKEND=local switches all three, per-store settings win"""
+        with patch.dict('os.environ', {}, clear=True):
+            assert store_choice('VECTOR_STORE') == 'milvus'
+            assert store_choice('REQUEST_STORE') == 'iceberg'
+        with patch.dict('os.environ', {'STORAGE_BACKEND': 'local', 'VECTOR_STORE': 'milvus'}, clear=True):
+            assert store_choice('VECTOR_STORE') == 'milvus'
+            assert store_choice('OBJECT_STORE') == 'local'
+        with patch.dict('os.environ', {'OBJECT_STORE': 's3'}, clear=True):
+            with pytest.raises(ValueError):
+                store_choice('OBJECT_STORE')
+
+    def test_compile_expr(self):
+        """The filter expressions the services build evaluate like Milvus would"""
+        row = {'document_id': 'doc-1', 'document_type': 'nu_syllabus', 'target_course': 'PJM 5900', 'page': 3}
+
+        assert compile_expr('')(row)
+        assert compile_expr('document_id == "doc-1"')(row)
+        assert compile_expr('target_course in ["CS 5800", "PJM 5900"] and page >= 3')(row)
+        assert compile_expr('document_id == "doc-2" or (document_type == "nu_syllabus" and '
+                            'target_course in ["PJM5900", "PJM 5900"])')(row)
+        assert not compile_expr('not (page < 5) and pk != \'\'')(row)
+        with pytest.raises(ValueError):
+            compile_expr('document_id like "doc%"')
+
+    def test_numpy_vector_store(self, tmp_path):
+        """Nearest chunks first, filtered, in the MilvusHandler hit layout; deletes by document"""
+        store = NumpyVectorStore(str(tmp_path / 'vectors'), dim=4)
+        docs = [chunk('doc-1', 0, 'risk management'), chunk('doc-1', 1, 'sampling'),
+                chunk('ref-1', 0, 'risk plans', document_type='nu_syllabus')]
+        assert isinstance(store, VectorStore)
+
+        assert store.insert_documents(docs, [unit(4, 0), unit(4, 1), [0.9, 0.1, 0.0, 0.0]]) == \
+            ['doc-1_0', 'doc-1_1', 'ref-1_0']
+        hits = store.search([[1.0, 0.0, 0.0, 0.0]], k=2, expr='document_type == "student_syllabus"')[0]
+
+        assert [hit['metadata']['pk'] for hit in hits] == ['doc-1_0', 'doc-1_1']
+        assert hits[0]['content'] == 'risk management' and hits[0]['score'] == pytest.approx(0.0, abs=1e-6)
+        assert hits[1]['score'] == pytest.approx(2.0)
+        assert store.search([[1.0, 0.0, 0.0, 0.0]], k=5)[0][1]['metadata']['pk'] == 'ref-1_0'
+        assert store.query('document_id == "ref-1"', output_fields=['pk', 'vector']) == \
+            [{'pk': 'ref-1_0', 'vector': pytest.approx([0.9, 0.1, 0.0, 0.0])}]
+        assert store.delete_documents(['doc-1']) == 2
+        assert store.query("pk != ''", output_fields=['pk']) == [{'pk': 'ref-1_0'}]
+        with pytest.raises(ValueError):
+            store.insert_documents([chunk('doc-2', 0, 'x')], [[1.0, 0.0]])
+
+    def test_numpy_vector_store_shared_and_compacted(self, tmp_path):
+        """A second instance (another worker) sees appends and deletes; compaction keeps live rows"""
+        writer = NumpyVectorStore(str(tmp_path / 'vectors'), dim=4)
+        reader = NumpyVectorStore(str(tmp_path / 'vectors'), dim=4)
+        writer.insert_documents([chunk('doc-1', 0, 'a'), chunk('doc-2', 0, 'b')], [unit(4, 0), unit(4, 1)])
+        assert len(reader) == 2
+
+        writer.delete_documents(['doc-1'])
+        assert writer.compact() == 'Completed'
+        writer.insert_documents([chunk('doc-3', 0, 'c')], [unit(4, 2)])
+
+        hits = reader.search([unit(4, 1)], k=3)[0]
+        assert [hit['metadata']['pk'] for hit in hits] == ['doc-2_0', 'doc-3_0']
+        assert hits[0]['score'] == pytest.approx(0.0, abs=1e-6)
+        assert len(list((tmp_path / 'vectors').glob('vectors-*.f32'))) == 1
+        with pytest.raises(ConnectionError):
+            NumpyVectorStore(str(tmp_path / 'vectors'), dim=8).query("pk != ''")
+
+    def test_file_object_store(self, tmp_path):
+        """COSHandler round trip with metadata; missing keys raise ObjectNotFound, keys stay inside the root"""
+        store = FileObjectStore(str(tmp_path / 'objects'))
+        assert isinstance(store, ObjectStore) and store.ping()
+
+        key = store.upload_document(b'%PDF-1.4', 'doc-1', 'syllabus.pdf', {'student_name': 'Jane Doe'})
+        store.upload_json('doc-1/_coverage.json', {'overall_score': 0.8})
+
+        assert key == 'doc-1/syllabus.pdf'
+        file_bytes, metadata = store.get_document_by_id('doc-1', 'syllabus.pdf')
+        assert file_bytes == b'%PDF-1.4' and metadata['student-name'] == 'Jane Doe'
+        assert store.get_json('doc-1/_coverage.json') == {'overall_score': 0.8}
+        assert store.list_documents('doc-1/') == ['doc-1/_coverage.json', 'doc-1/syllabus.pdf']
+        assert store.delete_document(key) and store.list_documents() == ['doc-1/_coverage.json']
+        with pytest.raises(ObjectNotFound):
+            store.get_document(key)
+        with pytest.raises(ValueError):
+            store.get_document('../outside.txt')
+        with pytest.raises(ValueError):
+            store.get_document('.metadata/doc-1/_coverage.json.json')
+
+    def test_sqlite_request_store(self, tmp_path):
+        """IcebergHandler's own SQL runs on SQLite"""
+        store = SQLiteRequestStore(str(tmp_path / 'requests.sqlite3'))
+        assert isinstance(store, RequestStore)
+
+        request_id = store.insert_request({'document_id': 'doc-1', 'student_name': 'Jane Doe', 'nuid': '001234567',
+                                           'request_type': 'Credit Transfer', 'target_course': 'PJM 5900',
+                                           'document_name': 'syllabus.pdf'})
+        assert request_id == 'REQ000001'
+        assert store.update_status(request_id, 'approved', credits=3, notes="Advisor's note")
+
+        requests = store.get_all_requests()
+        assert len(requests) == 1
+        assert requests[0]['status'] == 'approved' and requests[0]['credits'] == 3
+        assert requests[0]['notes'] == "Advisor's note" and requests[0]['documentName'] == 'syllabus.pdf'
+        assert store.get_document_ids() == {'doc-1'}
+        assert store.find_document_ids(['doc-1', 'doc-9']) == {'doc-1'}
+        assert store.ping()
@@ -0,0 +1,174 @@
+"""
+Tests for the direct Milvus search handler
+"""
+import pytest
+from unittest.mock import Mock, patch
+from handlers.milvus_handler import MilvusHandler, PartitionedVectorStore, encode_vector, decode_vector
+
+def _hit(pk, distance):
+    hit = Mock()
+    hit.distance = distance
+    hit.entity.get = lambda name: {'pk': pk, 'text': f'text {pk}'}.get(name)
+    return hit
+
+class TestMilvusHandler:
+
+    @patch('handlers.milvus_handler.Collection')
+    @patch('handlers.milvus_handler.connections')
+    def test_search_issues_one_call_for_all_queries(self, mock_connections, mock_collection_cls):
+        """nq > 1: every query vector goes to Milvus in a single search"""
+        mock_collection = Mock()
+        mock_collection.indexes = []
+        mock_collection.partitions = []
+        mock_collection.schema.fields = []
+        mock_collection.search.return_value = [[_hit('a_0', 0.1)], [_hit('b_0', 0.2), _hit('b_1', 0.3)]]
+        mock_collection_cls.return_value = mock_collection
+
+        handler = MilvusHandler()
+        grouped = handler.search([[0.1], [0.2]], k=2, expr='document_type == "nu_syllabus"')
+
+        mock_collection.search.assert_called_once()
+        kwargs = mock_collection.search.call_args.kwargs
+        assert kwargs['data'] == [[0.1], [0.2]]
+        assert kwargs['expr'] == 'document_type == "nu_syllabus"'
+        assert [len(hits) for hits in grouped] == [1, 2]
+        assert grouped[1][0] == {'content': 'text b_0', 'metadata': grouped[1][0]['metadata'], 'score': 0.2}
+        assert grouped[1][0]['metadata']['pk'] == 'b_0'
+
+    @patch('handlers.milvus_handler.connections')
+    def test_search_connection_failure(self, mock_connections):
+        """An unreachable Milvus surfaces as ConnectionError"""
+        mock_connections.connect.side_effect = Exception("refused")
+
+        handler = MilvusHandler()
+        with pytest.raises(ConnectionError):
+            handler.search([[0.1]], k=3)
+
+    def test_resolve_effort_explicit_and_default(self):
+        handler = MilvusHandler()
+
+        assert handler.resolve_effort('thorough') == 'thorough'
+        assert handler.resolve_effort() == 'balanced'
+        with pytest.raises(ValueError):
+            handler.resolve_effort('maximum')
+
+    def test_resolve_effort_from_latency_budget(self):
+        """The most thorough level whose observed latency fits the budget wins"""
+        handler = MilvusHandler()
+        handler.latency_ms = {'fast': 10.0, 'balanced': 40.0, 'thorough': 200.0}
+
+        assert handler.resolve_effort(latency_budget_ms=50) == 'balanced'
+        assert handler.resolve_effort(latency_budget_ms=500) == 'thorough'
+        assert handler.resolve_effort(latency_budget_ms=1) == 'fast'
+
+    def test_resolve_effort_rejects_malformed_json_values(self):
+        """Lists, objects, booleans and non-numeric budgets are ValueError (400), not TypeError (500)"""
+        handler = MilvusHandler()
+
+        for effort in (['fast'], {'level': 'fast'}, 1):
+            with pytest.raises(ValueError):
+                handler.resolve_effort(effort)
+        for budget in ([50], {'ms': 50}, True, 'soon', 'nan', 'inf', -5):
+            with pytest.raises(ValueError):
+                handler.resolve_effort(latency_budget_ms=budget)
+        assert handler.resolve_effort(latency_budget_ms='500') == handler.resolve_effort(latency_budget_ms=500)
+
+    def test_search_params_follow_index_type(self):
+        handler = MilvusHandler()
+
+        handler.index_type = 'HNSW'
+        assert handler.search_params('fast', k=50)['params'] == {'ef': 50}
+        handler.index_type = 'IVF_SQ8'
+        assert handler.search_params('thorough', k=5)['params'] == {'nprobe': 64}
+
+    @patch('handlers.milvus_handler.Collection')
+    @patch('handlers.milvus_handler.connections')
+    def test_search_applies_effort_consistency(self, mock_connections, mock_collection_cls):
+        mock_collection = Mock()
+        mock_collection.indexes = []
+        mock_collection.partitions = []
+        mock_collection.schema.fields = []
+        mock_collection.search.return_value = [[]]
+        mock_collection_cls.return_value = mock_collection
+
+        handler = MilvusHandler()
+        handler.search([[0.1]], k=5, effort='fast')
+
+        kwargs = mock_collection.search.call_args.kwargs
+        assert kwargs['consistency_level'] == 'Eventually'
+        assert kwargs['param']['params'] == {'ef': 32}
+
+    def test_partitions_for_filter_on_doc_type_layout(self):
+        """Searches filtered by document_type scan only their partition"""
+        handler = MilvusHandler()
+        handler.partitions = {'_default', 'nu_syllabus', 'student_documents'}
+
+        assert handler.partitions_for_filter({'document_type': 'nu_syllabus'}) == ['nu_syllabus']
+        assert handler.partitions_for_filter({'document_type': ['resume', 'transcript']}) == ['student_documents']
+        assert handler.partitions_for_filter({'nuid': '001'}) is None
+
+    def test_flat_collection_never_targets_partitions(self):
+        handler = MilvusHandler()
+        handler.partitions = {'_default'}
+
+        assert handler.partition_for('nu_syllabus') is None
+        assert handler.partitions_for_filter({'document_type': 'nu_syllabus'}) is None
+
+    def test_insert_documents_routes_by_document_type(self):
+        handler = MilvusHandler()
+        handler.collection = Mock()
+        handler.partitions = {'_default', 'nu_syllabus', 'student_documents'}
+        documents = [
+            {'content': 'ref', 'metadata': {'document_id': 'r', 'sequence_number': 0, 'document_type': 'nu_syllabus'}},
+            {'content': 'cv', 'metadata': {'document_id': 's', 'sequence_number': 0, 'document_type': 'resume'}},
+        ]
+
+        pks = handler.insert_documents(documents, [[0.1], [0.2]])
+
+        assert pks == ['r_0', 's_0']  # input order, not partition order
+        inserted = {c.kwargs['partition_name']: c.args[0] for c in handler.collection.insert.call_args_list}
+        assert [row['text'] for row in inserted['nu_syllabus']] == ['ref']
+        assert inserted['student_documents'][0]['vector'] == [0.2]
+
+    def test_delete_documents_batches_by_document_id(self):
+        handler = MilvusHandler()
+        handler.collection = Mock()
+        handler.collection.delete.return_value = Mock(delete_count=3)
+
+        deleted = handler.delete_documents(['b', 'a', 'c', 'a'], batch_size=2)
+
+        assert deleted == 6
+        exprs = [c.kwargs['expr'] for c in handler.collection.delete.call_args_list]
+        assert exprs == ['document_id in ["a", "b"]', 'document_id in ["c"]']
+
+    def test_compact_flushes_deletes_first(self):
+        handler = MilvusHandler()
+        handler.collection = Mock()
+        handler.collection.get_compaction_state.return_value = Mock(state='Completed')
+
+        assert handler.compact(timeout=5) == 'Completed'
+        calls = [c[0] for c in handler.collection.method_calls]
+        assert calls[:3] == ['flush', 'compact', 'wait_for_compaction_completed']
+
+    def test_partitioned_vector_store_embeds_once(self):
+        embedding = Mock()
+        embedding.embed_documents.return_value = [[0.1], [0.2]]
+        handler = Mock()
+        documents = [{'content': 'a', 'metadata': {}}, {'content': 'b', 'metadata': {}}]
+
+        PartitionedVectorStore(embedding, handler).add_documents(documents)
+
+        embedding.embed_documents.assert_called_once_with(['a', 'b'])
+        handler.insert_documents.assert_called_once_with(documents, [[0.1], [0.2]])
+
+    def test_sixteen_bit_vectors_round_trip(self):
+        """Compact profiles store FLOAT16 / BF16 bytes; decoding stays within their precision"""
+        vector = [0.1234, -1.5, 3.0, 0.0]
+
+        for dtype, tolerance in (('float16', 1e-3), ('bfloat16', 1e-2)):
+            encoded = encode_vector(vector, dtype)
+            assert isinstance(encoded, bytes) and len(encoded) == 8
+            decoded = decode_vector(encoded, dtype)
+            assert all(abs(a - b) <= tolerance * max(1.0, abs(a)) for a, b in zip(vector, decoded))
+
+        assert encode_vector(vector, 'float32') == vector
@@ -0,0 +1,63 @@
+"""
+Tests for the gunicorn production configuration
+"""
+import os
+import sys
+import runpy
+import types
+from unittest.mock import Mock, patch
+
+CONF_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'backend', 'services', 'gunicorn.conf.py')
+
+class TestGunicornConf:
+
+    def load(self, **env):
+        with patch.dict(os.environ, env):
+            return runpy.run_path(CONF_PATH)
+
+    def test_settings_from_environment(self):
+        """Worker count, threads and timeouts are configurable"""
+        conf = self.load(GUNICORN_WORKERS='6', GUNICORN_THREADS='8', GUNICORN_TIMEOUT='300')
+
+        assert conf['workers'] == 6
+        assert conf['threads'] == 8
+        assert conf['timeout'] == 300
+        assert conf['preload_app'] is True
+        assert conf['wsgi_app'] == 'services.watson_upload:app'
+
+    def test_search_cache_generation_is_shared(self):
+        """Workers share one write generation file unless one is configured"""
+        with patch.dict(os.environ, {'SEARCH_CACHE_GENERATION_FILE': ''}):
+            runpy.run_path(CONF_PATH)
+            assert os.environ['SEARCH_CACHE_GENERATION_FILE'].endswith(os.path.join('data', 'search_generation'))
+        with patch.dict(os.environ, {'SEARCH_CACHE_GENERATION_FILE': '/shared/generation'}):
+            runpy.run_path(CONF_PATH)
+            assert os.environ['SEARCH_CACHE_GENERATION_FILE'] == '/shared/generation'
+
+    def test_hooks_import_in_master_and_warm_up_in_worker(self):
+        """SDKs are imported before fork; each worker warms its backends"""
+        conf = self.load()
+        module = types.ModuleType('fake_service')
+        module.import_backends = Mock()
+        module.warm_up = Mock(side_effect=ConnectionError("Milvus down"))
+        app = Mock(import_name='fake_service')
+
+        with patch.dict(sys.modules, {'fake_service': module}):
+            conf['when_ready'](Mock(app=Mock(wsgi=Mock(return_value=app))))
+            worker = Mock(wsgi=app, pid=123)
+            conf['post_worker_init'](worker)
+
+        module.import_backends.assert_called_once()
+        module.warm_up.assert_called_once()
+        worker.log.warning.assert_called_once()
+
+    def test_worker_exit_flushes_metrics(self, tmp_path):
+        """A recycled worker's last counts reach METRICS_DIR"""
+        conf = self.load()
+        registry = Mock()
+
+        with patch.dict(os.environ, {'METRICS_DIR': str(tmp_path)}), \
+                patch('utils.metrics.get_metrics', return_value=registry):
+            conf['worker_exit'](Mock(), Mock(pid=123))
+
+        registry.flush.assert_called_once()
@@ -54,4 +54,156 @@ class TestWatsonUploadService:
 
     def test_upload_to_watsonx_missing_metadata(self):
         """Test upload with missing student metadata"""
-        pass
\ No newline at end of file
+        pass
+
+class TestLazyStartup:
+
+    def test_import_and_health_do_not_initialize_backends(self):
+        """The service imports without credentials and /health touches no backend"""
+        from services import watson_upload
+
+        response = watson_upload.app.test_client().get('/health')
+
+        assert response.status_code == 200
+        backends = response.get_json()['backends']
+        assert backends == {'embedding': False, 'cos': False, 'iceberg': False, 'milvus': False}
+        assert not watson_upload.embedding.initialized
+
+    @patch('services.watson_upload.milvus')
+    @patch('services.watson_upload.iceberg')
+    @patch('services.watson_upload.cos')
+    @patch('services.watson_upload.embedding')
+    def test_ready_reports_unreachable_backend(self, mock_embedding, mock_cos, mock_iceberg, mock_milvus):
+        """/ready initializes every backend and answers 503 when one is down"""
+        from services import watson_upload
+        mock_cos.location = 'cpl-documents'
+        mock_milvus.location = 'cpl_documents_v5'
+        mock_iceberg.location = 'localhost:8443'
+        mock_iceberg.ping.return_value = False
+
+        response = watson_upload.app.test_client().get('/ready')
+
+        assert response.status_code == 503
+        backends = response.get_json()['backends']
+        assert backends['iceberg']['ready'] is False
+        assert backends['embedding']['ready'] and backends['cos']['ready'] and backends['milvus']['ready']
+        mock_embedding.get.assert_called_once()
+        mock_cos.ping.assert_called_once()
+        assert backends['milvus']['detail'] == 'cpl_documents_v5'
+
+
+class TestUploadMetrics:
+
+    @patch('services.watson_upload.build_coverage', return_value=None)
+    @patch('services.watson_upload.keyword_index')
+    @patch('services.watson_upload.search_cache')
+    @patch('services.watson_upload.vector_store')
+    @patch('services.watson_upload.cos')
+    @patch('services.watson_upload.iceberg')
+    def test_upload_reports_stage_timings(self, mock_iceberg, mock_cos, mock_vector_store,
+                                          mock_search_cache, mock_keyword_index, mock_coverage):
+        """The upload response carries per-stage timings that /metrics also exposes"""
+        from services import watson_upload
+        mock_cos.upload_document.return_value = 'doc-123/syllabus.txt'
+        mock_iceberg.insert_request.return_value = 'REQ001'
+        client = watson_upload.app.test_client()
+
+        response = client.post('/api/upload-to-watsonx', data={
+            'file': (io.BytesIO(b"Project scope and risk management. " * 40), 'syllabus.txt'),
+            'targetCourse': 'PJM 5900'
+        }, content_type='multipart/form-data')
+
+        assert response.status_code == 200
+        timings = response.get_json()['timings_ms']
+        assert {'extract', 'chunk', 'keyword_index', 'cos_upload', 'iceberg_insert', 'total'} <= set(timings)
+
+        metrics = client.get('/metrics').get_data(as_text=True)
+        assert 'cpl_stage_duration_seconds_count{endpoint="upload_to_watsonx",stage="extract"}' in metrics
+        assert 'cpl_requests_total{endpoint="upload_to_watsonx",status="200"}' in metrics
+        assert 'cpl_upload_bytes_total{document_type="student_syllabus"}' in metrics
+
+
+class TestUploadMemoryBudget:
+
+    def post(self, client, text, filename='syllabus.txt'):
+        return client.post('/api/upload-to-watsonx', data={
+            'file': (io.BytesIO(text.encode('utf-8')), filename),
+            'targetCourse': 'PJM 5900'
+        }, content_type='multipart/form-data')
+
+    @patch('services.watson_upload.vector_store')
+    def test_rejects_upload_over_budget_before_reading(self, mock_vector_store):
+        """An upload larger than the whole budget is refused with 413"""
+        from services import watson_upload
+        from utils.memory import MemoryBudget
+
+        with patch.object(watson_upload, 'upload_budget', MemoryBudget(budget_mb=0.01)):
+            response = self.post(watson_upload.app.test_client(), "Risk management. " * 1000)
+
+        assert response.status_code == 413
+        assert 'memory budget' in response.get_json()['error']
+        mock_vector_store.add_documents.assert_not_called()
+
+    @patch('services.watson_upload.UPLOAD_STREAM_BATCH', 3)
+    @patch('services.watson_upload.build_coverage', return_value=None)
+    @patch('services.watson_upload.keyword_index')
+    @patch('services.watson_upload.search_cache')
+    @patch('services.watson_upload.vector_store')
+    @patch('services.watson_upload.cos')
+    @patch('services.watson_upload.iceberg')
+    def test_large_upload_takes_streaming_path(self, mock_iceberg, mock_cos, mock_vector_store,
+                                               mock_search_cache, mock_keyword_index, mock_coverage):
+        """Uploads whose in-memory peak would not fit are ingested in bounded batches"""
+        from services import watson_upload
+        from utils.memory import MemoryBudget
+        mock_cos.upload_document.return_value = 'doc-123/syllabus.txt'
+        mock_iceberg.insert_request.return_value = 'REQ001'
+        text = " ".join(f"Week {i}: project scope, schedule and risk management." for i in range(400))
+
+        with patch.object(watson_upload, 'upload_budget', MemoryBudget(budget_mb=64, factor=10000)):
+            response = self.post(watson_upload.app.test_client(), text)
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['ingest_mode'] == 'streaming'
+        assert body['memory_peak_mb']['total'] > 0 and 'prepare' in body['memory_peak_mb']
+
+        batches = [call.args[0] for call in mock_vector_store.add_documents.call_args_list]
+        assert max(len(batch) for batch in batches) <= 3
+        documents = [doc for batch in batches for doc in batch]
+        assert len(documents) == body['chunks_created'] > 3
+        assert [doc['metadata']['sequence_number'] for doc in documents] == list(range(len(documents)))
+
+        pieces = [text[start:start + 500] for start in range(0, len(text), 500)]
+        chunks = list(watson_upload.iter_chunks(pieces, window_chars=2000))
+        assert max(len(chunk) for chunk in chunks) <= watson_upload.CHUNK_SIZE
+        assert chunks[0].startswith('Week 0:') and chunks[-1].endswith('Week 399: project scope, schedule and risk management.')
+
+    @patch('services.watson_upload.build_coverage', return_value=None)
+    @patch('services.watson_upload.milvus')
+    @patch('services.watson_upload.keyword_index')
+    @patch('services.watson_upload.search_cache')
+    @patch('services.watson_upload.vector_store')
+    @patch('services.watson_upload.cos')
+    @patch('services.watson_upload.iceberg')
+    def test_over_budget_after_insert_is_rejected_and_cleaned_up(self, mock_iceberg, mock_cos, mock_vector_store,
+                                                                 mock_search_cache, mock_keyword_index,
+                                                                 mock_milvus, mock_coverage):
+        """A stage over budget once chunks are stored fails the upload and deletes them"""
+        from services import watson_upload
+        from utils.memory import MemoryBudget
+
+        def add_documents(documents, timer):
+            with timer.stage('embed'):
+                vectors = bytearray(2 * 1024 * 1024)
+            return []
+        mock_vector_store.add_documents.side_effect = add_documents
+
+        with patch.object(watson_upload, 'upload_budget', MemoryBudget(budget_mb=1, factor=1)):
+            response = self.post(watson_upload.app.test_client(), "Project scope and risk management. " * 40)
+
+        assert response.status_code == 413
+        assert 'during embed' in response.get_json()['error']
+        document_id = mock_milvus.delete_documents.call_args.args[0][0]
+        mock_keyword_index.remove_document.assert_called_once_with(document_id)
+        mock_iceberg.insert_request.assert_not_called()
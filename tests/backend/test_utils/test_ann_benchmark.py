@@ -0,0 +1,81 @@
+"""
+Tests for the ANN benchmark helpers
+"""
+import numpy as np
+from utils.ann_benchmark import (
+    synthetic_vectors, split_queries, exact_top_k, recall_at_k, run_stand_in,
+    run_partition_stand_in, quantize, estimate_milvus_memory, default_configs, build_groups, run_stand_in_group
+)
+
+class TestAnnBenchmark:
+
+    def test_exact_top_k_matches_brute_force(self):
+        base = synthetic_vectors(300, dim=16)
+        queries = base[:5] + 0.01
+
+        truth = exact_top_k(base, queries, k=3, batch=2)
+
+        for query, ids in zip(queries, truth):
+            expected = np.argsort(((base - query) ** 2).sum(axis=1))[:3]
+            assert list(ids) == list(expected)
+
+    def test_flat_stand_in_has_perfect_recall(self):
+        base, queries = split_queries(synthetic_vectors(500, dim=16), 20)
+        truth = exact_top_k(base, queries, k=5)
+
+        result = run_stand_in({'index_type': 'FLAT', 'params': {}}, base, queries, truth, 5)
+
+        assert result['recall'] == 1.0
+        assert result['qps'] > 0
+
+    def test_ivf_sq8_is_smaller_than_ivf_flat(self):
+        base, queries = split_queries(synthetic_vectors(800, dim=32), 20)
+        truth = exact_top_k(base, queries, k=5)
+        params = {'nlist': 16, 'nprobe': 16}
+
+        flat = run_stand_in({'index_type': 'IVF_FLAT', 'params': params}, base, queries, truth, 5)
+        sq8 = run_stand_in({'index_type': 'IVF_SQ8', 'params': params}, base, queries, truth, 5)
+
+        assert flat['recall'] == 1.0
+        assert sq8['memory_mb'] < flat['memory_mb']
+
+    def test_search_params_swept_on_one_build(self):
+        """ef / nprobe variants share a build: 3 HNSW and 2 IVF builds, not 12 and 8"""
+        groups = build_groups(default_configs(10000))
+        assert sorted(len(group) for group in groups if group[0]['index_type'] == 'HNSW') == [4, 4, 4]
+        assert len(groups) == 1 + 3 + 2
+
+        base, queries = split_queries(synthetic_vectors(800, dim=32), 20)
+        truth = exact_top_k(base, queries, k=5)
+        configs = [{'index_type': 'IVF_FLAT', 'params': {'nlist': 16, 'nprobe': nprobe}} for nprobe in (1, 16)]
+
+        narrow, wide = run_stand_in_group(configs, base, queries, truth, 5)
+
+        assert (narrow['params']['nprobe'], wide['params']['nprobe']) == (1, 16)
+        assert wide['recall'] == 1.0 and narrow['recall'] <= wide['recall']
+        assert narrow['build_s'] == wide['build_s']
+
+    def test_recall_at_k(self):
+        assert recall_at_k([[1, 2], [3, 9]], np.array([[1, 2], [3, 4]])) == 0.75
+
+    def test_partition_stand_in_matches_filtered_results(self):
+        """Isolating reference rows changes latency, not the answer"""
+        reference, queries = split_queries(synthetic_vectors(320, dim=16), 20)
+        students = synthetic_vectors(2000, dim=16, seed=2)
+
+        result = run_partition_stand_in(reference, students, queries, 5)
+
+        assert result['unpartitioned']['recall'] == 1.0
+        assert result['partitioned']['recall'] == 1.0
+        assert result['students'] == 2000
+
+    def test_quantize_keeps_neighbours_and_halves_memory(self):
+        base, queries = split_queries(synthetic_vectors(500, dim=16), 20)
+        truth = exact_top_k(base, queries, k=5)
+
+        for dtype in ('float16', 'bfloat16'):
+            result = run_stand_in({'index_type': 'FLAT', 'params': {}}, quantize(base, dtype),
+                                  quantize(queries, dtype), truth, 5)
+            assert result['recall'] >= 0.95
+        assert estimate_milvus_memory('FLAT', {}, 1000, 768, vector_bytes=2) * 2 == \
+            estimate_milvus_memory('FLAT', {}, 1000, 768)
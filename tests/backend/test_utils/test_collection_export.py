@@ -0,0 +1,75 @@
+"""
+Tests for the streaming collection export and audit
+"""
+import json
+import pyarrow.parquet as pq
+from unittest.mock import Mock
+from handlers.milvus_handler import encode_vector
+from utils.milvus_migrations import cpl_fields
+from utils.collection_export import NdjsonSink, ParquetSink, CollectionAudit, export_collection
+
+def _rows(document_id, count, document_type='resume', skip=(), text='x' * 100):
+    return [{'pk': f"{document_id}_{i}", 'document_id': document_id, 'document_name': f"{document_id}.pdf",
+             'document_type': document_type, 'sequence_number': i, 'text': text}
+            for i in range(count) if i not in skip]
+
+def _collection(pages):
+    iterator = Mock()
+    iterator.next.side_effect = list(pages) + [[]]
+    collection = Mock()
+    collection.query_iterator.return_value = iterator
+    return collection, iterator
+
+class TestCollectionExport:
+
+    def test_audit_tracks_documents_across_pages(self):
+        """A document split over two iterator pages is still counted once"""
+        rows = _rows('a', 3) + _rows('b', 4, 'nu_syllabus') + _rows('c', 2, text='')
+        documents = []
+        audit = CollectionAudit(on_document=documents.append)
+        audit.add(rows[:5])
+        audit.add(rows[5:])
+        summary = audit.finish()
+
+        assert summary['chunks'] == 9 and summary['documents'] == 3
+        assert [d['chunks'] for d in documents] == [3, 4, 2]
+        assert summary['by_type'] == {'nu_syllabus': 4, 'resume': 5}
+        assert summary['empty_text'] == 2
+        assert summary['largest_documents'][0]['document_id'] == 'b'
+        assert summary['chunk_bytes']['max'] == 100 and summary['chunk_bytes']['min'] == 0
+
+    def test_audit_flags_missing_and_duplicate_chunks(self):
+        rows = _rows('a', 5, skip=(2,)) + _rows('b', 2) + _rows('b', 1)
+        audit = CollectionAudit()
+        audit.add(rows)
+        summary = audit.finish()
+
+        assert summary['incomplete_documents'] == 2
+        flagged = {d['document_id']: d for d in summary['incomplete_sample']}
+        assert flagged['a']['missing_sequence_numbers'] == 1
+        assert flagged['b']['duplicates'] == 1
+
+    def test_audit_memory_is_bounded(self):
+        audit = CollectionAudit(top=3, reservoir_size=50)
+        for n in range(200):
+            audit.add(_rows(f"doc-{n:04d}", 5))
+        summary = audit.finish()
+
+        assert summary['documents'] == 200
+        assert len(audit.reservoir) == 50 and len(audit.largest) == 3
+
+    def test_export_streams_to_ndjson_and_parquet(self, tmp_path):
+        fields = [f for f in cpl_fields(profile='compact') if f.name in ('pk', 'text', 'vector')]
+        page = [{'pk': 'a_0', 'text': 'hello', 'vector': [encode_vector([0.5] * 768, 'float16')]}]
+        collection, iterator = _collection([page, page])
+        ndjson = NdjsonSink(str(tmp_path / 'out.ndjson'), 'float16')
+        parquet = ParquetSink(str(tmp_path / 'out.parquet'), fields)
+
+        rows = export_collection(collection, fields, [ndjson, parquet], batch_size=1)
+
+        assert rows == 2
+        iterator.close.assert_called_once()
+        lines = (tmp_path / 'out.ndjson').read_text().splitlines()
+        assert json.loads(lines[0])['vector'][:2] == [0.5, 0.5]
+        table = pq.read_table(str(tmp_path / 'out.parquet'))
+        assert table.num_rows == 2 and len(table.column('vector')[0].as_py()) == 768 * 2
@@ -0,0 +1,33 @@
+"""
+Tests for the student x reference syllabus coverage matrix
+"""
+import pytest
+from utils.coverage import compute_coverage, course_variants
+
+class TestCoverage:
+
+    def test_course_variants(self):
+        """Student-entered course matches however the syllabus was filed"""
+        assert course_variants('PJM 5900') == ['PJM 5900', 'PJM5900']
+        assert course_variants('PJM5900') == ['PJM5900', 'PJM 5900']
+        assert course_variants('Not Specified') == ['Not Specified']
+
+    def test_best_match_per_reference_chunk(self):
+        student = [[1.0, 0.0], [0.0, 1.0]]
+        reference_vectors = [[0.0, 2.0], [1.0, 1.0], [-1.0, 0.0]]
+        reference = [
+            {'document_id': 'nu', 'sequence_number': i, 'text': f'chunk {i}'}
+            for i in range(3)
+        ]
+
+        summary = compute_coverage(student, reference, reference_vectors, threshold=0.7)
+
+        assert summary['student_chunks'] == 2
+        assert summary['reference_chunks'] == 3
+        assert [r['best_student_chunk'] for r in summary['per_reference']][:1] == [1]
+        assert [r['covered'] for r in summary['per_reference']] == [True, True, False]
+        assert summary['covered_fraction'] == pytest.approx(2 / 3, abs=1e-4)
+        assert summary['reference_document_ids'] == ['nu']
+
+    def test_no_reference_syllabus(self):
+        assert compute_coverage([[1.0, 0.0]], [], []) is None
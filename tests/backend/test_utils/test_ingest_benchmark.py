@@ -0,0 +1,52 @@
+"""
+Tests for the ingest micro-benchmark helpers
+"""
+import io
+import os
+import PyPDF2
+from utils.ingest_benchmark import syllabus_lines, make_pdf, make_fixtures, measure, compare
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), '..', 'benchmarks', 'fixtures')
+
+class TestIngestBenchmark:
+
+    def test_generated_pdf_is_extractable(self):
+        """The hand-written PDF round-trips through PyPDF2 page by page"""
+        pages_lines = syllabus_lines(3, seed=1)
+
+        reader = PyPDF2.PdfReader(io.BytesIO(make_pdf(pages_lines)))
+
+        assert len(reader.pages) == 3
+        text = reader.pages[2].extract_text()
+        assert text.startswith('Week 3:')
+        assert pages_lines[2][-1] in text
+
+    def test_checked_in_fixtures_are_current(self, tmp_path):
+        """Regenerating gives the checked-in PDF and TXT fixtures byte for byte"""
+        names = make_fixtures(str(tmp_path))
+
+        assert sorted(names) == sorted(os.listdir(FIXTURES_DIR))
+        for name in names:
+            if name.endswith('.docx'):
+                continue  # python-docx stamps the creation time
+            with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+                assert (tmp_path / name).read_bytes() == f.read(), name
+
+    def test_compare_flags_regressions(self):
+        """Calibrated times beyond the tolerance are regressions, new cases are reported"""
+        baseline = {'cases': {'split[large]': {'calibrated': 1.0}, 'extract_pypdf2[large]': {'calibrated': 2.0},
+                              'build_documents[large]': {'calibrated': 1.0}}}
+        report = {'cases': {'split[large]': {'calibrated': 1.3}, 'extract_pypdf2[large]': {'calibrated': 2.1},
+                            'build_documents[large]': {'calibrated': 0.5}, 'split[huge]': {'calibrated': 9.0}}}
+
+        rows = {row['case']: row['status'] for row in compare(report, baseline, tolerance=0.25)}
+
+        assert rows == {'split[large]': 'regression', 'extract_pypdf2[large]': 'ok',
+                        'build_documents[large]': 'improvement', 'split[huge]': 'new'}
+
+    def test_measure(self):
+        """Per-call seconds over enough loops to be measurable; the best round is never above the median"""
+        result = measure(lambda: sum(range(1000)), repeat=3, min_seconds=0.01)
+
+        assert 0 < result['best'] <= result['median']
+        assert result['loops'] >= 1
@@ -0,0 +1,103 @@
+"""
+Tests for the local keyword index and query routing
+"""
+import pytest
+from utils.keyword_index import (
+    KeywordIndex, classify_query, normalize_course_code, reciprocal_rank_fusion
+)
+
+def _chunk(document_id, seq, text, course, document_type='nu_syllabus'):
+    return {
+        'content': text,
+        'metadata': {
+            'document_id': document_id,
+            'sequence_number': seq,
+            'target_course': course,
+            'document_type': document_type
+        }
+    }
+
+@pytest.fixture
+def index(tmp_path):
+    index = KeywordIndex(path=str(tmp_path / 'index.jsonl'))
+    index.add_chunks([
+        _chunk('stu-1', 0, 'Intro to risk registers and mitigation', 'PJM 5900', 'student_syllabus'),
+        _chunk('nu-5900', 0, 'PJM5900 Foundations of Project Management', 'PJM5900'),
+        _chunk('nu-5900', 1, 'Stakeholder analysis and scope', 'PJM5900'),
+        _chunk('nu-6005', 0, 'Agile methods; prerequisite PJM 5900', 'PJM6005'),
+    ])
+    return index
+
+class TestKeywordIndex:
+
+    def test_normalize_course_code(self):
+        """All spellings of a code map to one identifier"""
+        assert normalize_course_code('PJM 5900') == 'PJM5900'
+        assert normalize_course_code('pjm-6005') == 'PJM6005'
+        assert normalize_course_code('project management') is None
+        assert normalize_course_code('Fall 2024') is None
+        assert normalize_course_code('in 2024') is None
+
+    def test_classify_query(self):
+        """Identifiers are routed away from the embedding API"""
+        assert classify_query('PJM 5900') == ('course', ['PJM5900'])
+        assert classify_query('"risk register"') == ('phrase', ['risk register'])
+        assert classify_query('learning outcomes of PJM6005')[0] == 'hybrid'
+        assert classify_query('how is scope managed')[0] == 'vector'
+        assert classify_query('courses taken in 2024') == ('vector', [])
+        assert classify_query('Fall 2024') == ('vector', [])
+        assert classify_query('cs 5800 taken in 2024') == ('hybrid', ['CS5800'])
+
+    def test_lookup_course_reference_syllabus_first(self, index):
+        """Filed chunks rank NU syllabus first, then student docs, then mentions"""
+        hits = index.lookup_course('pjm 5900', k=5)
+        keys = [(h['metadata']['document_id'], h['metadata']['sequence_number']) for h in hits]
+
+        assert keys[:3] == [('nu-5900', 0), ('nu-5900', 1), ('stu-1', 0)]
+        assert ('nu-6005', 0) in keys
+
+    def test_phrase_search_requires_exact_phrase(self, index):
+        hits = index.search('risk registers', k=5, phrase=True)
+
+        assert [h['metadata']['document_id'] for h in hits] == ['stu-1']
+
+    def test_journal_shared_between_instances(self, index, tmp_path):
+        """A second process replays writes and removals from the journal"""
+        reader = KeywordIndex(path=index.path)
+        assert len(reader.lookup_course('PJM5900', k=10)) == 4
+
+        index.remove_document('nu-5900')
+        assert [h['metadata']['document_id'] for h in reader.lookup_course('PJM5900', k=1)] == ['stu-1']
+
+    def test_rebuild_swap_keeps_concurrent_appends(self, index, tmp_path):
+        """Lines appended to the live journal during a rebuild survive the swap"""
+        started_at = index.journal_size()
+        rebuilt = KeywordIndex(path=str(tmp_path / 'index.jsonl.rebuild'))
+        rebuilt.add_chunks([_chunk('nu-5900', 0, 'PJM5900 Foundations of Project Management', 'PJM5900')])
+        index.add_chunks([_chunk('stu-2', 0, 'Uploaded mid-rebuild', 'PJM 6005', 'resume')])
+
+        index.swap_in(rebuilt.path, started_at)
+
+        reader = KeywordIndex(path=index.path)
+        reader.refresh()
+        assert sorted(h['metadata']['document_id'] for h in reader.lookup_course('PJM6005', k=10)) == ['stu-2']
+        assert len(reader) == 2 and len(index) == 2
+
+    def test_compaction_reloads_readers(self, index):
+        reader = KeywordIndex(path=index.path)
+        reader.refresh()
+        index.remove_document('stu-1')
+        index.compact()
+
+        reader.refresh()
+        assert len(reader) == 3
+
+    def test_reciprocal_rank_fusion(self):
+        """Chunks ranked by both lists rise to the top"""
+        a = _chunk('d', 0, 'x', 'PJM5900')
+        b = _chunk('d', 1, 'y', 'PJM5900')
+        c = _chunk('d', 2, 'z', 'PJM5900')
+
+        fused = reciprocal_rank_fusion([a, b], [c, b])
+
+        assert fused[0]['metadata']['sequence_number'] == 1
@@ -0,0 +1,78 @@
+"""
+Tests for lazily initialized backends
+"""
+import threading
+import pytest
+from unittest.mock import Mock
+from utils.lazy import LazyBackend
+
+class TestLazyBackend:
+
+    def test_factory_runs_on_first_use_only(self):
+        """Nothing is built until an attribute is used, then exactly once"""
+        backend = Mock()
+        backend.ping.return_value = 'pong'
+        factory = Mock(return_value=backend)
+        lazy = LazyBackend('test', factory)
+
+        assert not lazy.initialized
+        factory.assert_not_called()
+        assert lazy.ping() == 'pong'
+        assert lazy.ping() == 'pong'
+        assert lazy.initialized
+        factory.assert_called_once()
+        assert lazy.get() is backend
+
+    def test_failed_factory_is_retried(self):
+        """A backend that is down fails the call, not the proxy"""
+        factory = Mock(side_effect=[ConnectionError("unreachable"), Mock(bucket_name='cpl-documents')])
+        lazy = LazyBackend('test', factory)
+
+        with pytest.raises(ConnectionError):
+            lazy.bucket_name
+        assert not lazy.initialized
+        assert lazy.bucket_name == 'cpl-documents'
+        assert factory.call_count == 2
+
+    def test_concurrent_first_use_builds_once(self):
+        """Threads racing on first use share one instance"""
+        started = threading.Event()
+
+        def factory():
+            started.wait(0.1)
+            return object()
+
+        factory_mock = Mock(side_effect=factory)
+        lazy = LazyBackend('test', factory_mock)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+
+        factory_mock.assert_called_once()
+        assert len({id(result) for result in results}) == 1
+
+    def test_private_lookups_do_not_initialize(self):
+        """Introspection probes (mock.patch, copy) do not trigger the factory"""
+        factory = Mock()
+        lazy = LazyBackend('test', factory)
+
+        assert not hasattr(lazy, '__deepcopy__')
+        assert not hasattr(lazy, '_is_coroutine')
+        factory.assert_not_called()
+
+    def test_set_replaces_factory(self):
+        """An installed instance is used as is; the factory never runs"""
+        factory = Mock()
+        lazy = LazyBackend('test', factory)
+        instance = Mock()
+
+        lazy.set(instance)
+
+        assert lazy.initialized and lazy.get() is instance
+        lazy.search('query')
+        instance.search.assert_called_once_with('query')
+        factory.assert_not_called()
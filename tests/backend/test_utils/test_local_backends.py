@@ -0,0 +1,54 @@
+"""
+Tests for the in-process backend stand-ins
+"""
+import time
+import pytest
+from handlers.local_storage import SQLiteRequestStore
+from utils.local_backends import (
+    BackendFault, Faults, HashEmbeddings, PrestoRestStandIn, with_faults, FAULT_OPERATIONS
+)
+
+class TestLocalBackends:
+
+    def test_hash_embeddings(self):
+        """Texts sharing words are closer than unrelated ones"""
+        embedder = HashEmbeddings()
+        query = embedder.embed_query('agile risk management')
+        near, far = embedder.embed_documents(['risk management for agile sprints', 'hypothesis testing'])
+
+        def distance(a, b):
+            return sum((x - y) ** 2 for x, y in zip(a, b))
+
+        assert len(query) == embedder.dim
+        assert distance(query, near) < distance(query, far)
+
+    def test_presto_rest_stand_in(self, tmp_path):
+        """simple_server's submit-then-poll protocol answered from the request store"""
+        store = SQLiteRequestStore(str(tmp_path / 'requests.sqlite3'))
+        store.insert_request({'document_id': 'doc-1', 'student_name': 'Jane Doe', 'nuid': '001234567'})
+        presto = PrestoRestStandIn(store)
+
+        submitted = presto.post('local://presto', data="SELECT student_name, nuid FROM "
+                                "iceberg_data.cpl_schema.cpl_requests WHERE nuid = '001234567'").json()
+        result = presto.get(submitted['nextUri']).json()
+
+        assert [c['name'] for c in result['columns']] == ['student_name', 'nuid']
+        assert result['data'] == [['Jane Doe', '001234567']]
+        assert result['stats']['state'] == 'FINISHED'
+
+    def test_fault_injection(self, tmp_path):
+        """Error rate 1 fails every call; a faulty request store fails like IcebergHandler does on Presto errors"""
+        failing = HashEmbeddings(faults=Faults(error_rate=1.0, seed=1))
+        with pytest.raises(BackendFault):
+            failing.embed_query('risk management')
+
+        store = with_faults(SQLiteRequestStore(str(tmp_path / 'requests.sqlite3')),
+                            Faults(error_rate=1.0), FAULT_OPERATIONS['request'])
+        assert store.get_all_requests() == []
+        assert store.update_status('REQ000001', 'approved') is False
+
+        faults = Faults(latency_ms=20, jitter=0, seed=1)
+        started = time.perf_counter()
+        for _ in range(3):
+            faults('search')
+        assert time.perf_counter() - started >= 0.055
@@ -0,0 +1,72 @@
+"""
+Tests for per-stage memory accounting and the upload memory budget
+"""
+import gc
+import threading
+import pytest
+from utils.memory import MB, MemoryBudget, MemoryBudgetExceeded, MemoryTracker
+from utils.metrics import MetricsRegistry
+
+class TestMemory:
+
+    def test_budget_plan(self):
+        """Uploads are processed in memory, streamed, or rejected by size"""
+        budget = MemoryBudget(budget_mb=100, factor=8)
+        assert budget.plan(5 * MB) == 'memory'
+        assert budget.plan(20 * MB) == 'stream'
+        assert budget.plan(150 * MB) == 'reject'
+        assert MemoryBudget().plan(10 ** 12) == 'memory'
+        assert not MemoryBudget().tracking and budget.tracking
+
+    def test_nested_stage_peaks(self):
+        """An inner stage's allocations count toward the enclosing stage and the request"""
+        gc.collect()  # garbage left by earlier tests, freed mid-stage, would lower the measured peak
+        timer = MetricsRegistry().timer('upload_to_watsonx')
+        tracker = timer.track_memory()
+
+        with timer.stage('ingest'):
+            with timer.stage('embed'):
+                buffer = bytearray(4 * MB)
+                del buffer
+            with timer.stage('insert'):
+                pass
+
+        assert tracker.stages['embed'] >= 4 * MB
+        assert tracker.stages['ingest'] >= tracker.stages['embed']
+        assert tracker.stages['insert'] < MB
+        assert tracker.finish() >= 4 * MB
+
+    def test_stage_over_budget_raises_and_is_exported(self):
+        """A stage over budget raises once it completes; its peak reaches /metrics"""
+        registry = MetricsRegistry()
+        timer = registry.timer('upload_to_watsonx')
+        timer.track_memory(budget_bytes=MB)
+
+        with pytest.raises(MemoryBudgetExceeded) as excinfo:
+            with timer.stage('extract'):
+                text = bytearray(3 * MB)
+        timer.finish(413)
+
+        assert excinfo.value.stage == 'extract' and excinfo.value.used_bytes > MB
+        rendered = registry.render()
+        assert 'cpl_stage_peak_memory_bytes_bucket{endpoint="upload_to_watsonx",stage="extract",le="4194304"} 1' in rendered
+        assert 'cpl_request_peak_memory_bytes_count{endpoint="upload_to_watsonx"} 1' in rendered
+
+    def test_concurrent_request_runs_untracked(self):
+        """A second tracker does not wait for the first; it measures nothing and cannot reset the first one's peak"""
+        first = MemoryTracker()
+        second = []
+        thread = threading.Thread(target=lambda: second.append(MetricsRegistry().timer('upload_to_watsonx').track_memory()))
+
+        first.enter('embed')
+        buffer = bytearray(4 * MB)
+        del buffer
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive() and second == [None]
+
+        first.exit()
+        assert first.finish() >= 4 * MB and first.finish() == first.peak
+        third = MemoryTracker()
+        assert third.tracking
+        third.close()
@@ -0,0 +1,57 @@
+"""
+Tests for request metrics and the Prometheus exposition
+"""
+import pytest
+from utils.metrics import MetricsRegistry, StageTimer
+
+class TestMetrics:
+
+    def test_histogram_exposition(self):
+        """Buckets are cumulative and end in +Inf, with _sum and _count"""
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.observe('cpl_stage_duration_seconds', 0.05, endpoint='upload_to_watsonx', stage='embed')
+        registry.observe('cpl_stage_duration_seconds', 0.5, endpoint='upload_to_watsonx', stage='embed')
+        registry.observe('cpl_stage_duration_seconds', 3.0, endpoint='upload_to_watsonx', stage='embed')
+
+        text = registry.render()
+        labels = 'endpoint="upload_to_watsonx",stage="embed"'
+        assert '# TYPE cpl_stage_duration_seconds histogram' in text
+        assert f'cpl_stage_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+        assert f'cpl_stage_duration_seconds_bucket{{{labels},le="1.0"}} 2' in text
+        assert f'cpl_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+        assert f'cpl_stage_duration_seconds_sum{{{labels}}} 3.55' in text
+        assert f'cpl_stage_duration_seconds_count{{{labels}}} 3' in text
+
+    def test_unknown_metric_rejected(self):
+        """Typos fail loudly instead of creating a new series"""
+        with pytest.raises(KeyError):
+            MetricsRegistry().inc('cpl_uplaod_bytes_total')
+
+    def test_stage_timer_records_and_counts_errors(self):
+        """Stages accumulate ms; a raising stage is counted and re-raised"""
+        registry = MetricsRegistry()
+        timer = StageTimer('search_documents', registry)
+        with timer.stage('embed'):
+            pass
+        with pytest.raises(RuntimeError):
+            with timer.stage('milvus_search'):
+                raise RuntimeError("timeout")
+        timer.finish(500)
+
+        assert set(timer.stages) == {'embed', 'milvus_search'}
+        text = registry.render()
+        assert 'cpl_stage_errors_total{endpoint="search_documents",stage="milvus_search"} 1' in text
+        assert 'cpl_requests_total{endpoint="search_documents",status="500"} 1' in text
+
+    def test_workers_are_summed_through_metrics_dir(self, tmp_path):
+        """Every worker's snapshot counts toward /metrics"""
+        other = MetricsRegistry(directory=str(tmp_path))
+        other.inc('cpl_upload_chunks_total', 5)
+        other.flush()
+        snapshot, = tmp_path.iterdir()
+        snapshot.rename(tmp_path / 'metrics-1.json')  # as if written by another worker
+
+        registry = MetricsRegistry(directory=str(tmp_path))
+        registry.inc('cpl_upload_chunks_total', 2)
+
+        assert 'cpl_upload_chunks_total 7' in registry.render()
@@ -0,0 +1,78 @@
+"""
+Tests for the Parquet bulk-import path
+"""
+import pyarrow.parquet as pq
+from unittest.mock import Mock, patch
+from pymilvus import BulkInsertState
+from handlers.milvus_handler import document_row
+from utils.milvus_migrations import cpl_fields, route_rows
+from utils.milvus_bulk_import import ParquetChunkWriter, BulkImportStage, submit_imports, wait_for_imports
+
+def _row(i, document_type='resume', dtype='float32'):
+    document = {'content': f"chunk {i}", 'metadata': {
+        'document_id': f"doc-{i}", 'sequence_number': 0, 'document_type': document_type,
+        'document_name': 'a.txt', 'page': 1, 'start_index': 0, 'student_name': '',
+        'nuid': '001', 'target_course': 'PJM5900', 'request_type': ''
+    }}
+    return document_row(document, [0.5] * 768, dtype)
+
+def _state(state, row_count=0, reason=''):
+    return Mock(state=state, state_name=str(state), row_count=row_count, failed_reason=reason)
+
+class TestMilvusBulkImport:
+
+    def test_writer_matches_collection_schema(self, tmp_path):
+        writer = ParquetChunkWriter(str(tmp_path), cpl_fields(), rows_per_file=2)
+        writer.add([_row(i) for i in range(5)])
+        files = writer.close()
+
+        assert [f['rows'] for f in files] == [2, 2, 1]
+        table = pq.read_table(files[0]['path'])
+        assert table.column_names == [field.name for field in cpl_fields()]
+        assert table.column('pk').to_pylist() == ['doc-0_0', 'doc-1_0']
+        assert len(table.column('vector')[0].as_py()) == 768
+
+    def test_writer_splits_doc_type_partitions(self, tmp_path):
+        partitions = {'_default', 'nu_syllabus', 'student_documents'}
+        writer = ParquetChunkWriter(str(tmp_path), cpl_fields(), route=lambda rows: route_rows(rows, partitions))
+        writer.add([_row(0, 'nu_syllabus'), _row(1, 'resume'), _row(2, 'transcript')])
+        files = {f['partition']: f for f in writer.close()}
+
+        assert files['nu_syllabus']['rows'] == 1 and files['student_documents']['rows'] == 2
+        assert '/student_documents/' in files['student_documents']['path']
+
+    def test_writer_stores_float16_vectors_as_bytes(self, tmp_path):
+        writer = ParquetChunkWriter(str(tmp_path), cpl_fields(profile='compact'))
+        writer.add([_row(0, dtype='float16')])
+        table = pq.read_table(writer.close()[0]['path'])
+
+        assert len(table.column('vector')[0].as_py()) == 768 * 2
+
+    def test_stage_keeps_layout_under_run_prefix(self, tmp_path):
+        client = Mock()
+        entry = {'path': str(tmp_path / 'nu_syllabus' / 'part-00000.parquet'), 'partition': 'nu_syllabus', 'rows': 1}
+
+        staged = BulkImportStage(client=client, bucket='a-bucket', prefix='bulk').upload([entry], 'run1', str(tmp_path))
+
+        assert staged[0]['remote'] == 'bulk/run1/nu_syllabus/part-00000.parquet'
+        client.upload_file.assert_called_once_with(entry['path'], 'a-bucket', staged[0]['remote'])
+
+    @patch('utils.milvus_bulk_import.utility')
+    def test_import_tasks_polled_until_done(self, mock_utility):
+        mock_utility.do_bulk_insert.side_effect = [11, 12]
+        states = {
+            11: [_state(BulkInsertState.ImportStarted), _state(BulkInsertState.ImportCompleted, 100)],
+            12: [_state(BulkInsertState.ImportFailed, reason='bad column')],
+        }
+        mock_utility.get_bulk_insert_state.side_effect = lambda task_id, using: states[task_id].pop(0)
+        staged = [{'remote': 'a.parquet', 'partition': None}, {'remote': 'b.parquet', 'partition': 'nu_syllabus'}]
+        progress = []
+
+        tasks = submit_imports('cpl_documents_v6', staged)
+        result = wait_for_imports(tasks, poll_seconds=0, on_progress=lambda *args: progress.append(args[:3]))
+
+        assert mock_utility.do_bulk_insert.call_args.kwargs['partition_name'] == 'nu_syllabus'
+        assert result['rows'] == 100
+        assert [t['task_id'] for t in result['completed']] == [11]
+        assert result['failed'][0]['failed_reason'] == 'bad column'
+        assert progress == [(1, 2, 0), (2, 2, 100)]
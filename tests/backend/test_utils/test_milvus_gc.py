@@ -0,0 +1,105 @@
+"""
+Tests for orphan chunk garbage collection
+"""
+import pytest
+from unittest.mock import Mock, patch
+from utils.milvus_gc import find_orphans, collect_garbage
+from utils.syllabus_ingest import SyllabusManifest
+
+def _collection(rows):
+    collection = Mock()
+    iterator = Mock()
+    iterator.next.side_effect = [rows, []]
+    collection.query_iterator.return_value = iterator
+    return collection
+
+def _handler(rows):
+    handler = Mock()
+    handler.collection = _collection(rows)
+    handler.delete_documents.return_value = 3
+    handler.compact.return_value = 'Completed'
+    return handler
+
+ROWS = [
+    {'document_id': 'live-req', 'document_type': 'resume'},
+    {'document_id': 'failed-upload', 'document_type': 'resume'},
+    {'document_id': 'failed-upload', 'document_type': 'resume'},
+    {'document_id': 'old-syllabus', 'document_type': 'nu_syllabus'},
+    {'document_id': 'current-syllabus', 'document_type': 'nu_syllabus'},
+]
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = SyllabusManifest(str(tmp_path / 'manifest.json'))
+    manifest.mark_done(str(tmp_path / 'PJM5900.txt'), 'abc', 'current-syllabus', 'PJM5900', ['current-syllabus_0'])
+    return manifest
+
+class TestMilvusGC:
+
+    def test_find_orphans_counts_chunks_per_document(self):
+        orphans = find_orphans(_collection(ROWS), {'live-req', 'current-syllabus'})
+
+        assert orphans == {
+            'failed-upload': {'chunks': 2, 'document_type': 'resume'},
+            'old-syllabus': {'chunks': 1, 'document_type': 'nu_syllabus'},
+        }
+
+    def test_dry_run_deletes_nothing(self, manifest):
+        handler = _handler(ROWS)
+        iceberg = Mock()
+        iceberg.get_document_ids.return_value = {'live-req'}
+
+        result = collect_garbage(handler, iceberg, manifest, log=lambda message: None)
+
+        assert set(result['orphans']) == {'failed-upload', 'old-syllabus'}
+        handler.delete_documents.assert_not_called()
+        handler.compact.assert_not_called()
+
+    def test_apply_rechecks_live_set_then_deletes_and_compacts(self, manifest):
+        """An upload whose Iceberg row lands during the grace period is spared"""
+        handler = _handler(ROWS)
+        keyword_index = Mock()
+        iceberg = Mock()
+        iceberg.get_document_ids.side_effect = [{'live-req'}, {'live-req', 'failed-upload'}]
+
+        result = collect_garbage(handler, iceberg, manifest, keyword_index=keyword_index,
+                                 apply=True, confirm_after=0, batch_size=100, log=lambda message: None)
+
+        handler.delete_documents.assert_called_once_with(['old-syllabus'], batch_size=100)
+        keyword_index.remove_documents.assert_called_once_with(['old-syllabus'])
+        handler.compact.assert_called_once()
+        assert result['documents_deleted'] == 1 and result['by_type'] == {'nu_syllabus': 1}
+
+    def test_confirm_pass_sees_syllabi_ingested_by_another_process(self, manifest, tmp_path):
+        handler = _handler(ROWS)
+        iceberg = Mock()
+        iceberg.get_document_ids.return_value = {'live-req'}
+
+        def other_process_ingests(seconds):
+            other = SyllabusManifest(manifest.path)
+            other.mark_done(str(tmp_path / 'PJM6000.txt'), 'def', 'old-syllabus', 'PJM6000', ['old-syllabus_0'])
+
+        with patch('utils.milvus_gc.time.sleep', side_effect=other_process_ingests):
+            result = collect_garbage(handler, iceberg, manifest, apply=True, confirm_after=60,
+                                     batch_size=100, log=lambda message: None)
+
+        handler.delete_documents.assert_called_once_with(['failed-upload'], batch_size=100)
+        assert set(result['orphans']) == {'failed-upload'}
+
+    def test_skip_types_are_never_collected(self, manifest):
+        iceberg = Mock()
+        iceberg.get_document_ids.return_value = {'live-req'}
+
+        result = collect_garbage(_handler(ROWS), iceberg, manifest, skip_types=('nu_syllabus',),
+                                 log=lambda message: None)
+
+        assert set(result['orphans']) == {'failed-upload'}
+
+    def test_unreadable_iceberg_aborts(self, manifest):
+        handler = _handler(ROWS)
+        iceberg = Mock()
+        iceberg.get_document_ids.return_value = None
+
+        with pytest.raises(RuntimeError):
+            collect_garbage(handler, iceberg, manifest, apply=True, confirm_after=0, log=lambda message: None)
+        handler.delete_documents.assert_not_called()
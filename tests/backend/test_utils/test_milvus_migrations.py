@@ -0,0 +1,133 @@
+"""
+Tests for versioned Milvus schema migrations
+"""
+import pytest
+from unittest.mock import Mock, patch
+from pymilvus import DataType
+from utils import milvus_migrations
+from utils.milvus_migrations import current_version, point_alias, copy_rows, catch_up, migrate
+
+def _iterator(batches):
+    iterator = Mock()
+    iterator.next.side_effect = list(batches) + [[]]
+    return iterator
+
+def _collection(rows=(), partitions=('_default',)):
+    """Mock collection whose query_iterator yields `rows` in one batch"""
+    collection = Mock()
+    collection.schema.fields = [Mock(is_partition_key=False) for _ in range(2)]
+    collection.schema.fields[0].name = 'pk'
+    collection.schema.fields[0].params = {'max_length': 65535}
+    collection.schema.fields[1].name = 'document_type'
+    collection.partitions = [Mock() for _ in partitions]
+    for partition, name in zip(collection.partitions, partitions):
+        partition.name = name
+    collection.query_iterator.side_effect = lambda **kwargs: _iterator([list(rows)] if rows else [])
+    return collection
+
+class TestMilvusMigrations:
+
+    @patch('utils.milvus_migrations.utility')
+    def test_current_version_follows_alias(self, mock_utility):
+        mock_utility.list_collections.return_value = ['cpl_documents_v5', 'cpl_documents_v6', 'other']
+        mock_utility.list_aliases.side_effect = lambda name, using: ['cpl_documents'] if name == 'cpl_documents_v6' else []
+
+        assert current_version() == (6, 'cpl_documents_v6')
+
+    @patch('utils.milvus_migrations.utility')
+    def test_point_alias_creates_then_alters(self, mock_utility):
+        mock_utility.list_collections.return_value = ['cpl_documents_v5']
+        mock_utility.list_aliases.return_value = []
+        point_alias('cpl_documents', 'cpl_documents_v5')
+        mock_utility.create_alias.assert_called_once_with('cpl_documents_v5', 'cpl_documents', using='default')
+
+        mock_utility.list_aliases.return_value = ['cpl_documents']
+        point_alias('cpl_documents', 'cpl_documents_v6')
+        mock_utility.alter_alias.assert_called_once_with('cpl_documents_v6', 'cpl_documents', using='default')
+
+    def test_copy_rows_routes_to_doc_type_partitions(self):
+        """Rows land in the matching partition of a doc-type target; vectors are copied, not re-embedded"""
+        rows = [{'pk': 'a_0', 'document_type': 'nu_syllabus'}, {'pk': 'b_0', 'document_type': 'resume'}]
+        source = _collection(rows)
+        target = _collection(partitions=('_default', 'nu_syllabus', 'student_documents'))
+
+        assert copy_rows(source, target) == 2
+        inserted = {c.kwargs['partition_name']: c.args[0] for c in target.insert.call_args_list}
+        assert inserted['nu_syllabus'] == [rows[0]]
+        assert inserted['student_documents'] == [rows[1]]
+        assert source.query_iterator.call_args.kwargs['output_fields'] == ['pk', 'document_type']
+
+    def test_catch_up_copies_new_and_deletes_removed_rows(self):
+        source = _collection([{'pk': 'a_0', 'document_type': 'resume'}, {'pk': 'c_0', 'document_type': 'resume'}])
+        target = _collection([{'pk': 'a_0', 'document_type': 'resume'}, {'pk': 'b_0', 'document_type': 'resume'}])
+
+        result = catch_up(source, target)
+
+        assert result == {'copied': 2, 'deleted': 1}  # mock iterator ignores the expr
+        assert 'pk in ["c_0"]' in [c.kwargs['expr'] for c in source.query_iterator.call_args_list]
+        target.delete.assert_called_once_with('pk in ["b_0"]')
+
+    @patch('utils.milvus_migrations.create_collection')
+    @patch('utils.milvus_migrations.Collection')
+    @patch('utils.milvus_migrations.utility')
+    def test_migrate_swaps_alias_after_copy(self, mock_utility, mock_collection_cls, mock_create):
+        mock_utility.list_collections.return_value = ['cpl_documents_v5']
+        mock_utility.list_aliases.return_value = ['cpl_documents']
+        mock_utility.has_collection.return_value = False
+        rows = [{'pk': 'a_0', 'document_type': 'resume'}]
+        mock_collection_cls.return_value = _collection(rows)
+        mock_create.return_value = _collection(rows)
+
+        applied = migrate(6, log=lambda message: None)
+
+        assert [(step['from'], step['to']) for step in applied] == [('cpl_documents_v5', 'cpl_documents_v6')]
+        assert mock_create.call_args.kwargs['layout'] == 'flat'
+        mock_utility.alter_alias.assert_called_once_with('cpl_documents_v6', 'cpl_documents', using='default')
+
+    @patch('utils.milvus_migrations.create_collection')
+    @patch('utils.milvus_migrations.Collection')
+    @patch('utils.milvus_migrations.utility')
+    def test_migrate_keeps_rows_written_after_swap(self, mock_utility, mock_collection_cls, mock_create):
+        """An upload that lands in the new version after the alias swap survives the final catch-up"""
+        mock_utility.list_collections.return_value = ['cpl_documents_v5']
+        mock_utility.list_aliases.return_value = ['cpl_documents']
+        mock_utility.has_collection.return_value = False
+        source_rows = [{'pk': 'a_0', 'document_type': 'resume'}]
+        target_rows = list(source_rows)
+        source, target = _collection(source_rows), _collection()
+        target.query_iterator.side_effect = lambda **kwargs: _iterator([list(target_rows)])
+        mock_utility.alter_alias.side_effect = lambda *args, **kwargs: \
+            target_rows.append({'pk': 'z_0', 'document_type': 'resume'})
+        mock_collection_cls.return_value = source
+        mock_create.return_value = target
+
+        applied = migrate(6, log=lambda message: None)
+
+        assert applied[0]['deleted'] == 0
+        target.delete.assert_not_called()
+        assert all(c.kwargs['consistency_level'] == 'Strong' for c in target.query_iterator.call_args_list)
+
+    @patch('utils.milvus_migrations.utility')
+    def test_migrate_requires_source_without_alias(self, mock_utility):
+        mock_utility.list_collections.return_value = ['cpl_documents_v5']
+        mock_utility.list_aliases.return_value = []
+
+        with pytest.raises(ValueError):
+            migrate(6, log=lambda message: None)
+
+    def test_every_version_has_a_migration(self):
+        versions = sorted(milvus_migrations.MIGRATIONS)
+        assert versions == list(range(milvus_migrations.BASELINE_VERSION + 1, milvus_migrations.LATEST_VERSION + 1))
+
+    def test_copy_rows_reencodes_vectors_for_compact_profile(self):
+        """FLOAT32 -> FLOAT16 profile change re-encodes stored vectors instead of re-embedding"""
+        source = _collection([{'pk': 'a_0', 'document_type': 'resume', 'vector': [0.5, -0.25]}])
+        target = _collection()
+        vector_field = Mock(is_partition_key=False, dtype=DataType.FLOAT16_VECTOR)
+        vector_field.name = 'vector'
+        target.schema.fields.append(vector_field)
+
+        copy_rows(source, target)
+
+        row = target.insert.call_args.args[0][0]
+        assert isinstance(row['vector'], bytes) and len(row['vector']) == 4
@@ -0,0 +1,94 @@
+"""
+Tests for on-demand and slowest-N request profiling
+"""
+import time
+import pytest
+from flask import Flask, jsonify
+from utils import profiling
+from utils.profiling import ProfileStore, StackSampler
+
+ADMIN = {'X-Admin-Token': 'secret'}
+
+def busy_view_work(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+@pytest.fixture
+def client_and_store(tmp_path, monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+
+    def make(keep_slowest=0):
+        app = Flask(__name__)
+
+        @app.route('/work')
+        def work():
+            busy_view_work(float(request_seconds[0]))
+            return jsonify({'success': True})
+
+        @app.route('/health')
+        def health():
+            return jsonify({'status': 'healthy'})
+
+        store = ProfileStore(str(tmp_path), keep_slowest=keep_slowest)
+        profiling.init_app(app, store=store, sampler=StackSampler(0.001))
+        return app.test_client(), store
+
+    request_seconds = [0.05]
+    make.request_seconds = request_seconds
+    return make
+
+class TestProfiling:
+
+    def test_on_demand_sample_requires_admin(self, client_and_store):
+        """Admins get a collapsed-stack profile; others are served without profiling"""
+        client, store = client_and_store()
+
+        response = client.get('/work', headers={'X-Profile': 'sample', 'X-Admin-Token': 'wrong'})
+        assert response.status_code == 200
+        assert 'X-Profile-Id' not in response.headers
+        assert store.list() == []
+
+        response = client.get('/work?profile=sample', headers=ADMIN)
+        name = response.headers['X-Profile-Id']
+        assert name.endswith('.collapsed')
+
+        assert client.get('/admin/profiles').status_code == 403
+        assert client.get('/admin/profiles', headers=ADMIN).get_json()['profiles'] == [name]
+        body = client.get(f'/admin/profiles/{name}', headers=ADMIN).get_data(as_text=True)
+        stack, count = body.splitlines()[0].rsplit(' ', 1)
+        assert int(count) > 0
+        assert any('busy_view_work' in line for line in body.splitlines())
+        assert client.get('/admin/profiles/..%2Fsecret', headers=ADMIN).status_code == 404
+
+    def test_on_demand_cprofile(self, client_and_store):
+        """cprofile mode stores a pstats dump"""
+        import pstats
+        client, store = client_and_store()
+
+        name = client.get('/work', headers={'X-Profile': 'cprofile', **ADMIN}).headers['X-Profile-Id']
+
+        assert name.endswith('.pstats')
+        stats = pstats.Stats(store.path(name))
+        assert any(func[2] == 'busy_view_work' for func in stats.stats)
+
+    def test_keeps_slowest_n(self, client_and_store):
+        """Automatic profiles keep only the slowest requests; excluded paths are never profiled"""
+        client, store = client_and_store(keep_slowest=2)
+
+        for seconds in (0.03, 0.12, 0.06, 0.02):
+            client_and_store.request_seconds[0] = seconds
+            client.get('/work')
+        client.get('/health')
+
+        kept = store.list()
+        assert len(kept) == 2
+        durations = [int(name.split('-')[1]) for name in kept]
+        assert durations[0] >= 120 and 60 <= durations[1] < 120
+
+    def test_admin_disabled_without_token(self, monkeypatch):
+        """No ADMIN_TOKEN means nobody is an admin"""
+        monkeypatch.delenv('ADMIN_TOKEN', raising=False)
+        assert not profiling.is_admin({'X-Admin-Token': ''})
+        monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+        assert profiling.is_admin(ADMIN)
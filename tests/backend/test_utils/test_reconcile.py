@@ -0,0 +1,115 @@
+"""
+Tests for the cross-store reconciler
+"""
+import pytest
+from unittest.mock import Mock, patch
+from utils.reconcile import (
+    MILVUS, COS, ICEBERG, OrphanRepair, cos_document_ids, milvus_document_ids, sorted_unique, reconcile
+)
+from utils.syllabus_ingest import SyllabusManifest
+
+def _streams(milvus, cos, iceberg):
+    return {MILVUS: sorted_unique(milvus), COS: sorted_unique(cos), ICEBERG: sorted_unique(iceberg)}
+
+class TestReconcile:
+
+    def test_sorted_unique_spills_runs(self, tmp_path):
+        """Runs larger than run_size go to disk and merge back sorted and deduplicated"""
+        ids = [f"doc-{n % 50:03d}" for n in range(200, 0, -1)]
+
+        result = list(sorted_unique(ids, run_size=7, tmp_dir=str(tmp_path)))
+
+        assert result == sorted(set(ids))
+        assert list(tmp_path.iterdir()) == []  # spilled runs are cleaned up
+
+    def test_sources_collapse_repeated_ids(self):
+        iterator = Mock()
+        iterator.next.side_effect = [
+            [{'document_id': 'a', 'document_type': 'resume'}, {'document_id': 'a', 'document_type': 'resume'}],
+            [{'document_id': 'b', 'document_type': 'nu_syllabus'}],
+            []
+        ]
+        collection = Mock()
+        collection.query_iterator.return_value = iterator
+        cos = Mock()
+        cos.iter_keys.return_value = iter(['a/file.pdf', 'a/_coverage.json', 'stray.txt', 'b/file.pdf'])
+        protected = set()
+
+        assert list(milvus_document_ids(collection, protected=protected)) == ['a', 'b']
+        assert protected == {'b'}
+        assert list(cos_document_ids(cos)) == ['a', 'b']
+        iterator.close.assert_called_once()
+
+    def test_reconcile_classifies_drift(self):
+        streams = _streams(
+            milvus=['ok', 'no-cos', 'untracked', 'orphan-vec', 'syllabus'],
+            cos=['ok', 'untracked', 'no-vec', 'orphan-obj'],
+            iceberg=['ok', 'no-cos', 'no-vec'],
+        )
+        drift = []
+
+        report = reconcile(streams, skip_ids={'syllabus'}, on_drift=lambda *args: drift.append(args[:2]))
+
+        assert report['totals'] == {MILVUS: 5, COS: 4, ICEBERG: 3}
+        assert report['skipped'] == 1 and report['counts']['consistent'] == 1
+        assert dict(drift) == {
+            'no-cos': 'missing_original',
+            'no-vec': 'missing_vectors',
+            'untracked': 'untracked_upload',
+            'orphan-vec': 'orphan_vectors',
+            'orphan-obj': 'orphan_objects',
+        }
+        assert report['drift'] == 5
+
+    def test_repair_rechecks_iceberg_and_skips_unrepairable(self):
+        milvus, cos, iceberg = Mock(), Mock(), Mock()
+        milvus.delete_documents.return_value = 4
+        cos.iter_keys.side_effect = lambda prefix: iter([f"{prefix}file.pdf"])
+        cos.delete_document.return_value = True
+        iceberg.find_document_ids.return_value = {'late-request'}
+        repair = OrphanRepair(milvus, cos, iceberg, confirm_after=0, batch_size=10, log=lambda message: None)
+
+        repair('untracked', 'untracked_upload', frozenset((MILVUS, COS)))
+        repair('late-request', 'orphan_vectors', frozenset((MILVUS,)))
+        repair('no-cos', 'missing_original', frozenset((MILVUS, ICEBERG)))
+        repair.flush()
+
+        milvus.delete_documents.assert_called_once_with(['untracked'], batch_size=10)
+        cos.delete_document.assert_called_once_with('untracked/file.pdf')
+        assert repair.repaired == {'vectors_deleted': 4, 'documents_deleted': 1, 'objects_deleted': 1,
+                                   'spared': 1, 'protected': 0}
+
+    def test_repair_waits_then_spares_protected_and_newly_ingested_syllabi(self, tmp_path):
+        """Old syllabi are never repaired; one ingested during the wait is re-checked via the manifest"""
+        milvus = Mock()
+        milvus.delete_documents.return_value = 2
+        iceberg = Mock()
+        iceberg.find_document_ids.return_value = set()
+        manifest = SyllabusManifest(str(tmp_path / 'manifest.json'))
+        repair = OrphanRepair(milvus, Mock(), iceberg, manifest=manifest, protected_ids={'old-syllabus'},
+                              confirm_after=60, batch_size=10, log=lambda message: None)
+
+        def ingest_during_wait(seconds):
+            other = SyllabusManifest(manifest.path)
+            other.mark_done(str(tmp_path / 'PJM6000.txt'), 'abc', 'new-syllabus', 'PJM6000', ['new-syllabus_0'])
+
+        with patch('utils.reconcile.time') as clock:
+            clock.monotonic.return_value = 100.0
+            clock.sleep.side_effect = ingest_during_wait
+            repair('old-syllabus', 'orphan_vectors', frozenset((MILVUS,)))
+            repair('new-syllabus', 'orphan_vectors', frozenset((MILVUS,)))
+            repair('orphan', 'orphan_vectors', frozenset((MILVUS,)))
+            repair.flush()
+
+        clock.sleep.assert_called_once_with(60.0)
+        milvus.delete_documents.assert_called_once_with(['orphan'], batch_size=10)
+        assert repair.repaired['protected'] == 1 and repair.repaired['spared'] == 1
+
+    def test_repair_stops_when_iceberg_unreadable(self):
+        iceberg = Mock()
+        iceberg.find_document_ids.return_value = None
+        repair = OrphanRepair(Mock(), Mock(), iceberg, confirm_after=0, log=lambda message: None)
+        repair('x', 'orphan_vectors', frozenset((MILVUS,)))
+
+        with pytest.raises(RuntimeError):
+            repair.flush()
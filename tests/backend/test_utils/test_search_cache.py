@@ -0,0 +1,66 @@
+"""
+Tests for the query embedding / search result cache
+"""
+import pytest
+from unittest.mock import Mock
+from utils.search_cache import SearchCache, CachedEmbeddings, normalize_query
+
+class TestSearchCache:
+
+    def test_normalize_query(self):
+        """Case and whitespace variants share a key"""
+        assert normalize_query("  PJM   5900 Outcomes ") == normalize_query("pjm 5900 outcomes")
+
+    def test_cached_embeddings_skip_remote_call(self):
+        """Repeated query embeddings are served from the cache"""
+        model = Mock()
+        model.embed_query.return_value = [0.1, 0.2]
+        embedder = CachedEmbeddings(model, SearchCache(generation_file=''))
+
+        assert embedder.embed_query("Risk management") == [0.1, 0.2]
+        assert embedder.embed_query("risk  MANAGEMENT") == [0.1, 0.2]
+        model.embed_query.assert_called_once()
+
+    def test_results_keyed_by_k_and_filters(self):
+        """Different k or filters never share a result entry"""
+        cache = SearchCache(generation_file='')
+        generation = cache.generation()
+        cache.put_results("scope", 5, {'target_course': 'PJM5900'}, ['a'], generation)
+
+        assert cache.get_results("scope", 5, {'target_course': 'PJM5900'}) == ['a']
+        assert cache.get_results("scope", 3, {'target_course': 'PJM5900'}) is None
+        assert cache.get_results("scope", 5, {}) is None
+
+    def test_results_invalidated_by_write_generation(self):
+        """An insert after the search started makes the entry stale"""
+        cache = SearchCache(generation_file='')
+        generation = cache.generation()
+        cache.bump_generation()
+        cache.put_results("scope", 5, None, ['stale'], generation)
+
+        assert cache.get_results("scope", 5, None) is None
+
+    def test_generation_file_shared_between_caches(self, tmp_path):
+        """A bump in one process invalidates another process's results"""
+        path = str(tmp_path / 'generation')
+        worker_a = SearchCache(generation_file=path)
+        worker_b = SearchCache(generation_file=path)
+        worker_a.put_results("scope", 5, None, ['a'], worker_a.generation())
+
+        worker_b.bump_generation()
+
+        assert worker_a.get_results("scope", 5, None) is None
+
+    def test_embed_queries_single_remote_call(self):
+        """A batch embeds all cache misses in one request, duplicates once"""
+        model = Mock()
+        model.embed_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        cache = SearchCache(generation_file='')
+        cache.put_embedding("cached", [9.0])
+        embedder = CachedEmbeddings(model, cache)
+
+        vectors, calls = embedder.embed_queries(["cached", "abc", "abcd", "abc"])
+
+        assert vectors == [[9.0], [3.0], [4.0], [3.0]]
+        assert calls == 1
+        model.embed_documents.assert_called_once_with(["abc", "abcd"])
@@ -0,0 +1,60 @@
+"""
+Tests for the slow-operation log
+"""
+import json
+import pytest
+from utils import slowlog
+from utils.slowlog import SlowLog, presto_details
+
+PRESTO_STATS = {
+    'queryId': '20240101_000000_00001_abcde', 'state': 'FINISHED', 'queuedTimeMillis': 40,
+    'elapsedTimeMillis': 2400, 'cpuTimeMillis': 900, 'processedRows': 1200000, 'nodes': 3
+}
+
+class TestSlowLog:
+
+    def test_threshold_and_file(self, tmp_path):
+        """Only operations over their kind's threshold are written; negative disables a kind"""
+        path = tmp_path / 'slow.ndjson'
+        log = SlowLog(str(path), thresholds_ms={'presto': 100, 'milvus': -1})
+
+        assert not log.record('presto', 'ping', 20, sql='SELECT 1')
+        assert log.record('presto', 'get_all_requests', 250, sql='SELECT *', **presto_details(PRESTO_STATS, rows=5))
+        assert not log.record('milvus', 'search', 10000)
+
+        entries = [json.loads(line) for line in path.read_text().splitlines()]
+        assert len(entries) == 1
+        assert entries[0]['operation'] == 'get_all_requests'
+        assert entries[0]['queryId'] == PRESTO_STATS['queryId']
+        assert entries[0]['executionTimeMillis'] == 2360
+        assert entries[0]['processedRows'] == 1200000 and entries[0]['rows'] == 5
+        assert 'nodes' not in entries[0]
+
+    def test_timed_records_errors(self, tmp_path):
+        """A failing operation is logged with its error and the exception propagates"""
+        path = tmp_path / 'slow.ndjson'
+        log = SlowLog(str(path), thresholds_ms={'milvus': 0})
+
+        with pytest.raises(ConnectionError):
+            with log.timed('milvus', 'query', expr="document_id == 'doc-1'"):
+                raise ConnectionError("Milvus is unavailable")
+
+        entry = json.loads(path.read_text())
+        assert entry['error'] == "Milvus is unavailable" and entry['expr'] == "document_id == 'doc-1'"
+
+    def test_iceberg_statements_are_logged(self, tmp_path, monkeypatch, mock_iceberg_connection):
+        """IcebergHandler logs SQL, rows and Presto stats of slow statements"""
+        from handlers.iceberg_handler import IcebergHandler
+        path = tmp_path / 'slow.ndjson'
+        monkeypatch.setattr(slowlog, '_slow_log', SlowLog(str(path), thresholds_ms={'presto': 0}))
+        mock_iceberg_connection.cursor.return_value.stats = PRESTO_STATS
+        handler = IcebergHandler()
+        handler.conn = mock_iceberg_connection
+
+        requests = handler.get_all_requests()
+
+        entry = json.loads(path.read_text())
+        assert entry['operation'] == 'get_all_requests'
+        assert entry['sql'].startswith('SELECT request_id, document_id')
+        assert entry['rows'] == len(requests) == 1
+        assert entry['queuedTimeMillis'] == 40
@@ -0,0 +1,163 @@
+"""
+Tests for the NU syllabus bulk ingest pipeline and its checkpoint manifest
+"""
+import pytest
+from utils.syllabus_ingest import build_documents, bulk_ingest, sync_ingest, SyllabusManifest, file_sha256
+
+class FakeVectorStore:
+    """Records each add_documents batch and returns chunk pks"""
+
+    def __init__(self, fail_on_batch=None):
+        self.batches = []
+        self.fail_on_batch = fail_on_batch
+
+    def add_documents(self, documents):
+        if self.fail_on_batch is not None and len(self.batches) == self.fail_on_batch:
+            raise RuntimeError("insert failed")
+        self.batches.append(documents)
+        return [doc['metadata']['pk'] for doc in documents]
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+@pytest.fixture
+def syllabi(tmp_path):
+    return [
+        (_write(tmp_path, 'PJM5900.txt', 'Foundations of project management. ' * 100), 'PJM5900'),
+        (_write(tmp_path, 'PJM6005.txt', 'Agile project management. ' * 20), 'PJM6005'),
+    ]
+
+class TestSyllabusIngest:
+
+    def test_build_documents_reference_metadata(self):
+        documents = build_documents('word ' * 700, 'PJM5900.txt', 'doc-1', 'PJM5900')
+
+        assert len(documents) == 3
+        assert [d['metadata']['pk'] for d in documents] == ['doc-1_0', 'doc-1_1', 'doc-1_2']
+        assert all(d['metadata']['document_type'] == 'nu_syllabus' and d['metadata']['nuid'] == '' for d in documents)
+        assert documents[1]['metadata']['start_index'] == len(documents[0]['content'])
+
+    def test_manifest_round_trip(self, tmp_path, syllabi):
+        path = str(tmp_path / 'manifest.json')
+        file_path = syllabi[0][0]
+        sha256 = file_sha256(file_path)
+
+        SyllabusManifest(path).mark_done(file_path, sha256, 'doc-1', 'PJM5900', ['doc-1_0'])
+        manifest = SyllabusManifest(path)
+
+        assert manifest.is_current(file_path, sha256)
+        assert not manifest.is_current(file_path, 'stale')
+        assert manifest.pending == {}
+
+    def test_manifest_concurrent_writers_keep_each_others_entries(self, tmp_path, syllabi):
+        """Two processes' instances both land in the journal; compaction keeps the merged view"""
+        path = str(tmp_path / 'manifest.json')
+        bulk_run, single_upload = SyllabusManifest(path), SyllabusManifest(path)
+        bulk_run.COMPACT_AFTER = 3
+
+        bulk_run.mark_pending(syllabi[0][0], 'doc-1')
+        single_upload.mark_done(syllabi[1][0], 'sha-2', 'doc-2', 'PJM6005', ['doc-2_0'])
+        bulk_run.mark_done(syllabi[0][0], 'sha-1', 'doc-1', 'PJM5900', ['doc-1_0', 'doc-1_1'])
+        single_upload.retire([SyllabusManifest.key(syllabi[1][0])])
+
+        merged = SyllabusManifest(path)
+        assert merged.referenced_ids() == {'doc-1', 'doc-2'} and merged.pending == {}
+        assert merged.retired == {'doc-2': SyllabusManifest.key(syllabi[1][0])}
+        assert 'pks' not in merged.files[SyllabusManifest.key(syllabi[0][0])]
+        assert bulk_run.reload().retired == merged.retired
+
+    def test_bulk_ingest_batches_across_files_and_skips_on_rerun(self, tmp_path, syllabi):
+        manifest = SyllabusManifest(str(tmp_path / 'manifest.json'))
+        store = FakeVectorStore()
+        indexed = []
+
+        summary = bulk_ingest(syllabi, store, manifest, on_batch=indexed.extend,
+                              workers=1, batch_size=1000, log=lambda message: None)
+
+        assert summary['files'] == 2 and summary['failed'] == 0
+        assert summary['batches'] == 1  # both files' chunks share one embedding + insert call
+        assert len(store.batches[0]) == summary['chunks'] == len(indexed)
+        assert {entry['course_code'] for entry in manifest.files.values()} == {'PJM5900', 'PJM6005'}
+
+        rerun = bulk_ingest(syllabi, FakeVectorStore(), SyllabusManifest(manifest.path),
+                            workers=1, log=lambda message: None)
+        assert rerun['skipped'] == 2 and rerun['chunks'] == 0
+
+    def test_failed_insert_leaves_pending_for_cleanup(self, tmp_path, syllabi):
+        """A file interrupted mid-write is deleted before the next run re-ingests it"""
+        manifest = SyllabusManifest(str(tmp_path / 'manifest.json'))
+
+        with pytest.raises(RuntimeError):
+            bulk_ingest(syllabi, FakeVectorStore(fail_on_batch=0), manifest,
+                        workers=1, batch_size=1000, log=lambda message: None)
+        pending = set(SyllabusManifest(manifest.path).pending.values())
+        assert len(pending) == 2
+
+        cleaned = []
+        store = FakeVectorStore()
+        summary = bulk_ingest(syllabi, store, SyllabusManifest(manifest.path), cleanup=cleaned.extend,
+                              workers=1, batch_size=1000, log=lambda message: None)
+
+        assert set(cleaned) == pending
+        assert summary['files'] == 2
+        assert SyllabusManifest(manifest.path).pending == {}
+
+    def test_unreadable_file_is_counted_not_fatal(self, tmp_path, syllabi):
+        jobs = syllabi + [(_write(tmp_path, 'notes.rtf', 'unsupported'), 'PJM5900')]
+
+        summary = bulk_ingest(jobs, FakeVectorStore(), SyllabusManifest(str(tmp_path / 'm.json')),
+                              workers=1, log=lambda message: None)
+
+        assert summary['failed'] == 1 and summary['files'] == 2
+
+    def test_sync_reembeds_only_changes_and_deletes_old_documents(self, tmp_path, syllabi):
+        manifest = SyllabusManifest(str(tmp_path / 'manifest.json'))
+        deleted = []
+        quiet = lambda message: None
+
+        first = sync_ingest(syllabi, str(tmp_path), FakeVectorStore(), manifest, deleted.extend, workers=1, log=quiet)
+        assert len(first['added']) == 2 and deleted == []
+        old_ids = {key: entry['document_id'] for key, entry in manifest.files.items()}
+
+        # Edit one file, delete the other, add a third
+        changed_path, removed_path = syllabi[0][0], syllabi[1][0]
+        _write(tmp_path, 'PJM5900.txt', 'Revised foundations syllabus.')
+        (tmp_path / 'PJM6005.txt').unlink()
+        new_path = _write(tmp_path, 'PJM6100.txt', 'Risk management.')
+        store = FakeVectorStore()
+
+        second = sync_ingest([syllabi[0], (new_path, 'PJM6100')], str(tmp_path), store, manifest,
+                             deleted.extend, workers=1, log=quiet)
+
+        assert second['changed'] == [changed_path] and second['added'] == [new_path]
+        assert second['removed'] == [manifest.key(removed_path)]
+        assert second['ingest']['files'] == 2  # only the diff is embedded
+        assert sorted(deleted) == sorted(old_ids.values())
+        assert second['retired_documents'] == 2 and manifest.retired == {}
+
+        third = sync_ingest([syllabi[0], (new_path, 'PJM6100')], str(tmp_path), FakeVectorStore(), manifest,
+                            deleted.extend, workers=1, log=quiet)
+        assert third['unchanged'] == 2 and third['ingest']['chunks'] == 0
+
+    def test_sync_keeps_old_chunks_when_reingest_fails(self, tmp_path, syllabi):
+        """An interrupted sync neither loses the old version nor leaves the new one half-written"""
+        manifest = SyllabusManifest(str(tmp_path / 'manifest.json'))
+        deleted = []
+        quiet = lambda message: None
+        sync_ingest(syllabi[:1], str(tmp_path), FakeVectorStore(), manifest, deleted.extend, workers=1, log=quiet)
+        old_id = next(iter(manifest.files.values()))['document_id']
+        _write(tmp_path, 'PJM5900.txt', 'Revised foundations syllabus.')
+
+        with pytest.raises(RuntimeError):
+            sync_ingest(syllabi[:1], str(tmp_path), FakeVectorStore(fail_on_batch=0), manifest,
+                        deleted.extend, workers=1, log=quiet)
+        assert deleted == []
+
+        resumed = SyllabusManifest(manifest.path)
+        summary = sync_ingest(syllabi[:1], str(tmp_path), FakeVectorStore(), resumed, deleted.extend, workers=1, log=quiet)
+
+        assert summary['changed'] == [syllabi[0][0]]
+        assert old_id in deleted and len(deleted) == 2  # half-written new id, then the old one
+        assert resumed.retired == {} and resumed.pending == {}
@@ -0,0 +1,83 @@
+"""
+Tests for trace context propagation and spans
+"""
+import pytest
+from flask import Flask, jsonify
+from utils import tracing
+from utils.tracing import Tracer, parse_traceparent, span, traced, otlp_payload
+
+GATEWAY_TRACEPARENT = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+
+class ListExporter:
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span_dicts):
+        self.spans.extend(span_dicts)
+
+@pytest.fixture
+def exported(monkeypatch):
+    exporter = ListExporter()
+    monkeypatch.setattr(tracing, '_tracer', Tracer('test-service', exporter))
+    return exporter.spans
+
+class TestTracing:
+
+    def test_parse_traceparent(self):
+        """Valid headers parse; malformed or all-zero ids are ignored"""
+        assert parse_traceparent(GATEWAY_TRACEPARENT) == (
+            '4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7', True)
+        assert parse_traceparent('00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00')[2] is False
+        assert parse_traceparent('00-' + '0' * 32 + '-00f067aa0ba902b7-01') is None
+        assert parse_traceparent('garbage') is None
+        assert parse_traceparent(None) is None
+
+    def test_nested_spans_share_trace(self, exported):
+        """Backend calls inside a stage are its children; errors are recorded and re-raised"""
+        @traced('cos.upload_document', peer='cos')
+        def upload():
+            raise IOError("bucket unreachable")
+
+        with span('cos_upload') as stage:
+            with pytest.raises(IOError):
+                upload()
+
+        child, parent = exported
+        assert child['traceId'] == parent['traceId'] == stage.trace_id
+        assert child['parentSpanId'] == parent['spanId']
+        assert child['kind'] == 'client' and child['attributes'] == {'peer': 'cos'}
+        assert child['status'] == 'ERROR' and 'bucket unreachable' in child['error']
+        assert parent['status'] == 'OK'
+
+    def test_flask_continues_gateway_trace(self, exported):
+        """The Flask server span is a child of the gateway span from traceparent"""
+        app = Flask(__name__)
+        tracing.init_app(app, 'test-service')
+
+        @app.route('/api/things/<thing_id>')
+        def get_thing(thing_id):
+            with span('iceberg_query'):
+                return jsonify({'id': thing_id})
+
+        response = app.test_client().get('/api/things/7', headers={'traceparent': GATEWAY_TRACEPARENT})
+
+        stage, server = exported
+        assert server['name'] == 'GET /api/things/<thing_id>'
+        assert server['traceId'] == '4bf92f3577b34da6a3ce929d0e0e4736'
+        assert server['parentSpanId'] == '00f067aa0ba902b7'
+        assert server['attributes']['http.status_code'] == 200
+        assert stage['parentSpanId'] == server['spanId']
+        assert response.headers['traceparent'] == f"00-{server['traceId']}-{server['spanId']}-01"
+
+    def test_otlp_payload_groups_by_service(self, exported):
+        """OTLP JSON carries service.name and numeric kinds / status codes"""
+        with span('embed', model='slate'):
+            pass
+
+        payload = otlp_payload(exported)
+        resource_spans, = payload['resourceSpans']
+        assert resource_spans['resource']['attributes'][0]['value'] == {'stringValue': 'test-service'}
+        otlp_span, = resource_spans['scopeSpans'][0]['spans']
+        assert otlp_span['kind'] == 1 and otlp_span['status'] == {'code': 1}
+        assert otlp_span['attributes'] == [{'key': 'model', 'value': {'stringValue': 'slate'}}]